@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+# Seeds a scratch catalogue with installed widgets whose code has been cached in the resource documents and measures
+# the work done by /api/resources (catalogue query, validation and processed descriptions), loading the whole
+# documents as before and using the catalogue projections. The database is dropped at the end. Without --url the
+# in-process mongomock client used by the tests is used, which measures the copy and validation costs but not the
+# transfer of the documents.
+#
+#   python benchmarks/bench_catalogue_projection.py --url mongodb://localhost:27017 --resources 2000
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from bson import ObjectId  # noqa: E402
+
+from wirecloud.catalogue import crud  # noqa: E402
+from wirecloud.catalogue.schemas import clear_processed_info_cache  # noqa: E402
+
+BATCH_SIZE = 500
+
+
+def build_resource(i, user_id, code_size):
+    description = {
+        "type": "widget",
+        "macversion": 1,
+        "vendor": "acme",
+        "name": f"widget{i}",
+        "version": "1.0.0",
+        "title": f"Widget {i}",
+        "description": "Benchmark widget",
+        "contents": {"src": "index.html", "cacheable": True},
+        "widget_width": "4",
+        "widget_height": "3",
+        "wiring": {"inputs": [], "outputs": []},
+    }
+
+    return {
+        "_id": ObjectId(),
+        "vendor": "acme",
+        "short_name": f"widget{i}",
+        "version": "1.0.0",
+        "type": 0,
+        "public": False,
+        "creation_date": datetime.now(timezone.utc),
+        "template_uri": f"acme_widget{i}_1.0.0.wgt",
+        "popularity": 0.0,
+        "description": description,
+        "creator_id": user_id,
+        "users": [user_id],
+        "groups": [],
+        "xhtml": {
+            "uri": f"acme/widget{i}/1.0.0/xhtml",
+            "code": "<html><body>" + "x" * code_size + "</body></html>",
+            "code_timestamp": 1,
+            "url": f"acme/widget{i}/1.0.0/index.html",
+            "content_type": "text/html",
+            "use_platform_style": False,
+            "cacheable": True,
+        },
+    }
+
+
+async def seed(db, resources, code_size):
+    user_id = ObjectId()
+    for start in range(0, resources, BATCH_SIZE):
+        await db.catalogue_resources.insert_many([build_resource(i, user_id, code_size)
+                                                  for i in range(start, min(start + BATCH_SIZE, resources))])
+
+    return user_id
+
+
+async def list_resources(session, user):
+    results = await crud.get_catalogue_resource_versions_for_user(session, user=user)
+    return {resource.local_uri_part: resource.get_processed_info(process_urls=False) for resource in results}
+
+
+async def measure(label, session, user, iterations):
+    clear_processed_info_cache()
+    await list_resources(session, user)
+
+    start = time.perf_counter()
+    for _i in range(iterations):
+        await list_resources(session, user)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed / iterations * 1e3:>10.2f} ms/request")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default=None)
+    parser.add_argument("--database", default="wirecloud_bench_catalogue_projection")
+    parser.add_argument("--resources", type=int, default=2000)
+    parser.add_argument("--code-size", type=int, default=50000)
+    parser.add_argument("--iterations", type=int, default=10)
+    options = parser.parse_args()
+
+    if options.url is None:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+    else:
+        from pymongo import AsyncMongoClient
+        client = AsyncMongoClient(options.url)
+
+    db = client[options.database]
+    await client.drop_database(options.database)
+    try:
+        user_id = await seed(db, options.resources, options.code_size)
+        session = SimpleNamespace(client=db)
+        user = SimpleNamespace(id=str(user_id), groups=[], has_perm=lambda _perm: False)
+        print(f"{options.resources} installed widgets, {options.code_size} bytes of cached code each\n")
+
+        projection = crud.RESOURCE_PROJECTION
+        crud.RESOURCE_PROJECTION = None
+        await measure("/api/resources (full documents)", session, user, options.iterations)
+        crud.RESOURCE_PROJECTION = projection
+        await measure("/api/resources (projection)", session, user, options.iterations)
+    finally:
+        await client.drop_database(options.database)
+        if options.url is not None:
+            await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
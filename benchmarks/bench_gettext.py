@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+# Measures the translated definitions built while loading a workspace (platform and workspace context definitions
+# and preferences), comparing the previous gettext implementation, which walked the call stack with inspect.stack()
+# to find the request language and the calling plugin, with the context variable based one. The calls are made
+# --depth frames below the frame holding the request, as happens behind the FastAPI middlewares.
+#
+#   python benchmarks/bench_gettext.py --iterations 200 --lang es
+
+import argparse
+import inspect
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from fastapi import Request, WebSocket  # noqa: E402
+
+from wirecloud import settings, translation  # noqa: E402
+from wirecloud.platform.context.utils import get_platform_context_definitions, get_workspace_context_definitions  # noqa: E402
+from wirecloud.platform.plugins import get_platform_preferences, get_workspace_preferences, get_plugins  # noqa: E402
+
+
+def legacy_find_request_language():
+    for frame_info in inspect.stack():
+        for value in frame_info.frame.f_locals.values():
+            if isinstance(value, Request) or isinstance(value, WebSocket):
+                return value.state.lang
+
+    return None
+
+
+def legacy_gettext(text, lang=None, translation_obj=None):
+    lang = lang or legacy_find_request_language()
+    if lang == "en" or lang == "en-GB":
+        return text
+
+    if translation_obj is None:
+        plugin = None
+        module_name = inspect.stack()[1].frame.f_globals.get('__name__')
+        for plugin_name in settings.INSTALLED_APPS:
+            if module_name.startswith(f"{plugin_name}"):
+                plugin = plugin_name
+                break
+
+        src_path = os.path.dirname(os.path.dirname(translation.__file__))
+        locale_path = os.path.join(src_path, plugin.replace(".", "/"), "locale")
+        if not os.path.exists(locale_path) or not os.path.isdir(locale_path):
+            raise ValueError(f"Could not find the locale directory for plugin {plugin}")
+
+        translation_obj = translation.translations.get((plugin, lang))
+        if translation_obj is None:
+            return text
+
+    return translation_obj.gettext(text)
+
+
+def use_gettext(func):
+    for module in list(sys.modules.values()):
+        if getattr(module, "_", None) in (translation.gettext, legacy_gettext):
+            module._ = func
+
+
+def load_workspace_definitions():
+    get_platform_context_definitions()
+    get_workspace_context_definitions()
+    get_platform_preferences()
+    get_workspace_preferences()
+
+
+def nested(depth, func):
+    if depth == 0:
+        return func()
+    return nested(depth - 1, func)
+
+
+def measure(label, func, iterations):
+    start = time.perf_counter()
+    for _i in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {iterations / elapsed:>10,.1f} loads/s  {elapsed / iterations * 1e3:>8.3f} ms/load")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=40)
+    parser.add_argument("--lang", default="es")
+    options = parser.parse_args()
+
+    get_plugins()
+
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
+    request.state.lang = options.lang
+
+    def legacy_load():
+        return nested(options.depth, load_workspace_definitions)
+
+    def load():
+        with translation.override_language(request.state.lang):
+            nested(options.depth, load_workspace_definitions)
+
+    use_gettext(legacy_gettext)
+    measure("inspect.stack() gettext", legacy_load, options.iterations)
+
+    use_gettext(translation.gettext)
+    measure("contextvar gettext", load, options.iterations)
+
+
+if __name__ == "__main__":
+    main()
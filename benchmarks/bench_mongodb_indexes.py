@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+# Seeds a scratch database of a local mongod with users and workspaces and measures the lookups done by the crud
+# modules, without indexes and after creating the indexes declared by the plugins. The database is dropped at the end.
+#
+#   python benchmarks/bench_mongodb_indexes.py --url mongodb://localhost:27017 --documents 100000
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from bson import ObjectId  # noqa: E402
+from pymongo import AsyncMongoClient  # noqa: E402
+
+from wirecloud.commons.auth.crud import INDEXES as AUTH_INDEXES  # noqa: E402
+from wirecloud.platform.workspace.crud import INDEXES as WORKSPACE_INDEXES  # noqa: E402
+
+BATCH_SIZE = 5000
+
+
+async def seed(db, documents):
+    user_ids = [ObjectId() for _i in range(documents)]
+    group_ids = [ObjectId() for _i in range(documents // 100 or 1)]
+
+    for start in range(0, documents, BATCH_SIZE):
+        batch = range(start, min(start + BATCH_SIZE, documents))
+        await db.users.insert_many([{"_id": user_ids[i], "username": f"user{i}", "groups": [group_ids[i % len(group_ids)]]}
+                                    for i in batch])
+        await db.workspaces.insert_many([{
+            "_id": ObjectId(),
+            "creator": user_ids[i],
+            "name": f"dashboard{i}",
+            "public": i % 50 == 0,
+            "searchable": True,
+            "users": [{"id": user_ids[i], "accesslevel": 2}],
+            "groups": [{"id": group_ids[i % len(group_ids)], "accesslevel": 1}],
+        } for i in batch])
+
+    return user_ids, group_ids
+
+
+async def measure(label, query, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        await query(i)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {iterations / elapsed:>10,.0f} ops/s  {elapsed / iterations * 1e3:>8.3f} ms/op")
+
+
+async def run_queries(db, documents, user_ids, group_ids, iterations):
+    rnd = random.Random(42)
+    picks = [rnd.randrange(documents) for _i in range(iterations)]
+
+    await measure("users: username", lambda i: db.users.find_one({"username": f"user{picks[i]}"}), iterations)
+    await measure("workspaces: creator + name",
+                  lambda i: db.workspaces.find_one({"creator": user_ids[picks[i]], "name": f"dashboard{picks[i]}"}),
+                  iterations)
+    await measure("workspaces: workspace list ($or)", lambda i: db.workspaces.find({"$or": [
+        {"public": True, "searchable": True, "creator": user_ids[picks[i]]},
+        {"users.id": user_ids[picks[i]]},
+        {"groups.id": {"$in": [group_ids[picks[i] % len(group_ids)]]}},
+    ]}).to_list(), iterations)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="wirecloud_bench_indexes")
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--iterations", type=int, default=200)
+    options = parser.parse_args()
+
+    client = AsyncMongoClient(options.url)
+    await client.drop_database(options.database)
+    db = client[options.database]
+
+    try:
+        print(f"Seeding {options.documents:,} users and workspaces...")
+        user_ids, group_ids = await seed(db, options.documents)
+
+        print("\nWithout indexes")
+        await run_queries(db, options.documents, user_ids, group_ids, options.iterations)
+
+        for collection, indexes in ({**AUTH_INDEXES, **WORKSPACE_INDEXES}).items():
+            await db[collection].create_indexes(list(indexes))
+
+        print("\nWith the declared indexes")
+        await run_queries(db, options.documents, user_ids, group_ids, options.iterations)
+    finally:
+        await client.drop_database(options.database)
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+# Seeds a scratch database of a local replica set with users and workspaces and measures the latency of a read-only
+# request (a user lookup and the list of its workspaces) served through a session starting its transaction up front,
+# as get_session did before, a session starting it lazily and the read session used by the GET routes, optionally
+# reading from the secondaries. The database is dropped at the end. Transactions require a replica set, e.g.:
+#
+#   mongod --replSet rs0 --dbpath /tmp/rs0 --port 27017 && mongosh --eval "rs.initiate()"
+#   python benchmarks/bench_mongodb_read_session.py --url "mongodb://localhost:27017/?replicaSet=rs0" --concurrency 50
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from bson import ObjectId  # noqa: E402
+from pymongo import AsyncMongoClient  # noqa: E402
+from pymongo.read_concern import ReadConcern  # noqa: E402
+
+from wirecloud.database import READ_PREFERENCES, PyMongoSession  # noqa: E402
+
+WORKSPACES_PER_USER = 5
+
+
+async def seed(db, users):
+    user_ids = [ObjectId() for _i in range(users)]
+    await db.users.insert_many([{"_id": user_id, "username": f"user{i}"} for i, user_id in enumerate(user_ids)])
+    await db.workspaces.insert_many([{"_id": ObjectId(), "creator": user_id, "name": f"workspace{i}", "tabs": {}}
+                                     for user_id in user_ids for i in range(WORKSPACES_PER_USER)])
+    await db.workspaces.create_index("creator")
+    return user_ids
+
+
+async def read_request(session, user_id):
+    await session.client.users.find_one({"_id": user_id})
+    await session.client.workspaces.find({"creator": user_id}).to_list()
+
+
+async def eager_request(client, database_name, user_id):
+    async with client.start_session() as mongo_session:
+        session = PyMongoSession(mongo_session, db=client[database_name])
+        await session.start_transaction()
+        await read_request(session, user_id)
+        if session.in_transaction:
+            await mongo_session.commit_transaction()
+
+
+async def lazy_request(client, database_name, user_id):
+    async with client.start_session() as mongo_session:
+        session = PyMongoSession(mongo_session, db=client[database_name])
+        await read_request(session, user_id)
+        if session.in_transaction:
+            await mongo_session.commit_transaction()
+
+
+async def measure(label, request, user_ids, requests, concurrency):
+    latencies = []
+    queue = asyncio.Queue()
+    for _i in range(requests):
+        queue.put_nowait(random.choice(user_ids))
+
+    async def worker():
+        while not queue.empty():
+            user_id = queue.get_nowait()
+            start = time.perf_counter()
+            await request(user_id)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"{label:<40} {requests / elapsed:>8.0f} req/s  mean {statistics.mean(latencies) * 1e3:>6.2f} ms"
+          f"  p99 {latencies[int(len(latencies) * 0.99) - 1] * 1e3:>6.2f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="mongodb://localhost:27017/?replicaSet=rs0")
+    parser.add_argument("--database", default="wirecloud_bench_read_session")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--read-preference", choices=tuple(READ_PREFERENCES), default="secondaryPreferred")
+    parser.add_argument("--read-concern", default="local")
+    options = parser.parse_args()
+
+    client = AsyncMongoClient(options.url)
+    await client.drop_database(options.database)
+    try:
+        user_ids = await seed(client[options.database], options.users)
+        read_db = client.get_database(options.database, read_preference=READ_PREFERENCES[options.read_preference],
+                                      read_concern=ReadConcern(options.read_concern))
+        primary_db = client.get_database(options.database, read_preference=READ_PREFERENCES["primary"])
+        print(f"{options.users} users, {options.requests} requests, {options.concurrency} concurrent\n")
+
+        await measure("transaction started up front",
+                      lambda user_id: eager_request(client, options.database, user_id),
+                      user_ids, options.requests, options.concurrency)
+        await measure("transaction started on first write",
+                      lambda user_id: lazy_request(client, options.database, user_id),
+                      user_ids, options.requests, options.concurrency)
+        await measure("read session (primary)",
+                      lambda user_id: read_request(PyMongoSession(None, use_transactions=False, db=primary_db), user_id),
+                      user_ids, options.requests, options.concurrency)
+        await measure(f"read session ({options.read_preference})",
+                      lambda user_id: read_request(PyMongoSession(None, use_transactions=False, db=read_db), user_id),
+                      user_ids, options.requests, options.concurrency)
+    finally:
+        await client.drop_database(options.database)
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+# Relays a large request body with a secure data pattern to a local aiohttp upstream, as done by the proxy after the
+# X-WireCloud-Secure-Data processor, comparing the legacy processor (the whole body read into a bytearray and replaced
+# at once) with the streaming replacement stage. Every mode runs in its own process so its peak RSS can be reported.
+#
+#   python benchmarks/bench_proxy_body_stream.py --size 500 --chunk-size 65536
+
+import argparse
+import asyncio
+import json
+import resource
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from wirecloud.proxy.utils import add_body_replacement  # noqa: E402
+
+PATTERN = b"{token}"
+REPLACEMENT = b"a-secret-value-longer-than-the-pattern"
+
+
+async def client_body(size, chunk_size):
+    # The same chunk object is yielded again and again, as the body does not need to be held by the client
+    chunk = (b"x" * (chunk_size - len(PATTERN) - 4) + PATTERN + b"\r\n")[:chunk_size]
+    sent = 0
+    while sent < size:
+        yield chunk
+        sent += len(chunk)
+
+
+async def legacy_replacement(request):
+    new_body_array = bytearray()
+    async for chunk in request.data:
+        new_body_array.extend(chunk)
+
+    new_body = new_body_array.replace(PATTERN, REPLACEMENT)
+    request.headers['content-length'] = str(len(new_body))
+    request.data = new_body
+
+
+async def relay(mode, url, size, chunk_size):
+    request = SimpleNamespace(headers={"Content-Length": str(size)}, data=client_body(size, chunk_size))
+    start = time.perf_counter()
+    if mode == "legacy":
+        await legacy_replacement(request)
+    else:
+        add_body_replacement(request, PATTERN, REPLACEMENT)
+
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, data=request.data, headers=request.headers) as response:
+            received = int(await response.text())
+    elapsed = time.perf_counter() - start
+
+    return {"elapsed": elapsed, "received": received,
+            "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+
+async def upstream_handler(request):
+    received = 0
+    async for chunk in request.content.iter_any():
+        received += len(chunk)
+
+    return web.Response(text=str(received))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=500, help="Body size in MB")
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    parser.add_argument("--mode", choices=("legacy", "streaming"), default=None)
+    parser.add_argument("--url", default=None)
+    options = parser.parse_args()
+    size = options.size * 1024 * 1024
+
+    if options.mode is not None:
+        print(json.dumps(await relay(options.mode, options.url, size, options.chunk_size)))
+        return
+
+    app = web.Application(client_max_size=0)
+    app.router.add_post("/", upstream_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    print(f"{options.size} MB body, {options.chunk_size} bytes per chunk\n")
+    try:
+        for mode in ("legacy", "streaming"):
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, __file__, "--mode", mode, "--url", f"http://127.0.0.1:{port}/",
+                "--size", str(options.size), "--chunk-size", str(options.chunk_size),
+                stdout=asyncio.subprocess.PIPE)
+            stdout, _stderr = await process.communicate()
+            result = json.loads(stdout)
+            print(f"{mode:<10} {result['received'] / result['elapsed'] / 1024 / 1024:>8.1f} MB/s"
+                  f"  {result['elapsed']:>7.2f} s  peak RSS {result['max_rss']:>8.1f} MB")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+# Measures the throughput of the HTTP proxy against a local aiohttp stand-in upstream, comparing the legacy
+# behaviour (a new ClientSession/connector per proxied request) with the shared connection pool.
+#
+#   python benchmarks/bench_proxy_connection_pool.py --requests 2000 --concurrency 50 [--tls]
+
+import argparse
+import asyncio
+import datetime
+import os
+import ssl
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from starlette.requests import Request  # noqa: E402
+
+from wirecloud import settings  # noqa: E402
+from wirecloud.proxy import routes  # noqa: E402
+from wirecloud.proxy.pool import ProxyConnectionPool  # noqa: E402
+from wirecloud.proxy.schemas import ProxyRequestData  # noqa: E402
+
+
+class LegacyConnectionPool:
+    # Reproduces the behaviour previous to the connection pool: every request opens its own connector
+
+    def session(self) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True))
+
+
+def build_self_signed_context(tmpdir: str) -> ssl.SSLContext:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number()).not_valid_before(now)
+            .not_valid_after(now + datetime.timedelta(days=1)).sign(key, hashes.SHA256()))
+
+    cert_path = os.path.join(tmpdir, "cert.pem")
+    key_path = os.path.join(tmpdir, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                  serialization.NoEncryption()))
+
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert_path, key_path)
+    return context
+
+
+async def start_upstream(payload_size: int, ssl_context) -> tuple[web.AppRunner, int]:
+    payload = b"x" * payload_size
+
+    async def handler(_request):
+        return web.Response(body=payload, content_type="application/octet-stream")
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=ssl_context)
+    await site.start()
+    return runner, runner.addresses[0][1]
+
+
+def build_request() -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "scheme": "http",
+        "http_version": "1.1",
+        "server": ("wirecloud.local", 80),
+        "client": ("127.0.0.1", 50000),
+        "path": "/cdp/http/upstream/data",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+    })
+
+
+async def proxy_once(url: str) -> None:
+    request_data = ProxyRequestData(headers={})
+    response = await routes.WIRECLOUD_PROXY.do_request(build_request(), url, "GET", request_data, None, None)
+    if response.status_code != 200:
+        raise RuntimeError("Unexpected status code %s" % response.status_code)
+
+    async for _chunk in response.body_iterator:
+        pass
+
+
+async def run(label: str, connection_pool, url: str, total: int, concurrency: int) -> float:
+    routes.get_connection_pool = lambda: connection_pool
+
+    # Warm up (plugin loading, DNS cache, first connections)
+    await asyncio.gather(*[proxy_once(url) for _i in range(min(concurrency, total))])
+
+    queue = iter(range(total))
+
+    async def worker():
+        for _i in queue:
+            await proxy_once(url)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    rps = total / elapsed
+    print("%-8s %8d requests in %7.3fs -> %9.1f req/s" % (label, total, elapsed, rps))
+    return rps
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Proxy connection pool benchmark")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--payload-size", type=int, default=1024)
+    parser.add_argument("--tls", action="store_true", help="Serve the stand-in upstream over HTTPS")
+    args = parser.parse_args()
+
+    settings.WIRECLOUD_HTTPS_VERIFY = False
+    routes.get_request_proxy_processors = lambda: ()
+    routes.get_response_proxy_processors = lambda: ()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ssl_context = build_self_signed_context(tmpdir) if args.tls else None
+        runner, port = await start_upstream(args.payload_size, ssl_context)
+        url = "%s://127.0.0.1:%s/data" % ("https" if args.tls else "http", port)
+
+        try:
+            before = await run("before", LegacyConnectionPool(), url, args.requests, args.concurrency)
+
+            connection_pool = ProxyConnectionPool.from_settings()
+            after = await run("after", connection_pool, url, args.requests, args.concurrency)
+            await connection_pool.close()
+        finally:
+            await runner.cleanup()
+
+    print("speedup  %.2fx" % (after / before))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
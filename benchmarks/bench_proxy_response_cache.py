@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+# Simulates widgets polling the same feed through Proxy.do_request against a local aiohttp upstream answering with
+# Cache-Control: max-age and an ETag, with and without the proxy response cache, and reports the number of requests
+# received by the upstream. Each round sends --widgets concurrent polls.
+#
+#   python benchmarks/bench_proxy_response_cache.py --widgets 200 --rounds 20
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from wirecloud.proxy import cache, routes  # noqa: E402
+from wirecloud.proxy.pool import ProxyConnectionPool  # noqa: E402
+from wirecloud.proxy.schemas import ProxyRequestData  # noqa: E402
+
+FEED = b'{"entities": [' + b",".join([b'{"id": "sensor%d", "temperature": 21.5}' % i for i in range(200)]) + b"]}"
+
+
+class FakeRequest:
+    method = "GET"
+    headers = {}
+    scope = {"http_version": "1.1"}
+    client = SimpleNamespace(host="127.0.0.1")
+
+
+async def poll(proxy, url):
+    response = await proxy.do_request(FakeRequest(), url, "GET", ProxyRequestData(), None, None)
+    if hasattr(response, "body_iterator"):
+        async for _chunk in response.body_iterator:
+            pass
+
+
+async def measure(label, url, widgets, rounds, upstream_requests):
+    proxy = routes.Proxy()
+    upstream_requests.clear()
+    start = time.perf_counter()
+    for _i in range(rounds):
+        await asyncio.gather(*[poll(proxy, url) for _j in range(widgets)])
+    elapsed = time.perf_counter() - start
+    polls = widgets * rounds
+    print(f"{label:<16} {polls / elapsed:>10,.0f} polls/s  {len(upstream_requests):>6} upstream requests")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--widgets", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="Upstream latency in seconds")
+    options = parser.parse_args()
+
+    upstream_requests = []
+
+    async def handler(request):
+        upstream_requests.append(request.path)
+        await asyncio.sleep(options.latency)
+        return web.Response(body=FEED, content_type="application/json",
+                            headers={"Cache-Control": "max-age=60", "ETag": '"feed"'})
+
+    app = web.Application()
+    app.router.add_get("/feed", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{runner.addresses[0][1]}/feed"
+
+    connection_pool = ProxyConnectionPool(limit=100, limit_per_host=100, keepalive_timeout=30, dns_cache_ttl=300)
+    routes.get_connection_pool = lambda: connection_pool
+    routes.get_current_domain = lambda _request: "wirecloud.example.org"
+    routes.get_request_proxy_processors = lambda: []
+    routes.get_response_proxy_processors = lambda: []
+
+    print(f"{options.widgets} widgets, {options.rounds} rounds, {len(FEED)} bytes feed\n")
+    try:
+        routes.get_response_cache = lambda: None
+        await measure("without cache", url, options.widgets, options.rounds, upstream_requests)
+        response_cache = cache.ProxyResponseCache()
+        routes.get_response_cache = lambda: response_cache
+        await measure("with cache", url, options.widgets, options.rounds, upstream_requests)
+    finally:
+        await connection_pool.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+# Relays WebSocket messages between an aiohttp client and a local aiohttp echo server through a uvicorn served
+# WebSocket endpoint, comparing the previous relay loop (a read task per side created and passed to asyncio.wait on
+# every message; the previous code passed bare coroutines, which Python 3.11 rejects) with the WebSocketRelay pumps. Reports messages/sec and round trip latency percentiles with --window
+# messages in flight.
+#
+#   python benchmarks/bench_proxy_ws_relay.py --messages 20000 --window 32 --size 256
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+import uvicorn
+from aiohttp import web
+from fastapi import FastAPI, WebSocket
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from wirecloud.proxy.relay import WebSocketRelay, read_client_message, read_server_message  # noqa: E402
+
+UPSTREAM_URL = None
+
+
+async def legacy_relay(client, server):
+    async def read_client():
+        return ('client',) + await read_client_message(client)
+
+    async def read_server():
+        return ('server',) + await read_server_message(server)
+
+    pending_tasks = set()
+    read_from_client = read_from_server = True
+    while True:
+        tasks = []
+        if read_from_server:
+            tasks.append(asyncio.create_task(read_server()))
+        if read_from_client:
+            tasks.append(asyncio.create_task(read_client()))
+        tasks.extend(pending_tasks)
+        read_from_server = read_from_client = False
+
+        done, pending_tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            source, data, is_binary, close = await task
+            if close is not None:
+                if source == 'client':
+                    await server.close(code=close[0], message=close[1].encode())
+                else:
+                    await client.close(code=close[0], reason=close[1])
+                for pending in pending_tasks:
+                    pending.cancel()
+                return
+            if source == 'client':
+                read_from_client = True
+                await (server.send_bytes(data) if is_binary else server.send_str(data))
+            else:
+                read_from_server = True
+                await (client.send_bytes(data) if is_binary else client.send_text(data))
+
+
+app = FastAPI()
+
+
+@app.websocket("/{mode}")
+async def proxy_endpoint(websocket: WebSocket, mode: str):
+    async with aiohttp.ClientSession() as session:
+        async with session.ws_connect(UPSTREAM_URL) as server:
+            await websocket.accept()
+            if mode == "legacy":
+                await legacy_relay(websocket, server)
+            else:
+                await WebSocketRelay(websocket, server).run()
+
+
+async def echo_handler(request):
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+    async for msg in ws:
+        await ws.send_str(msg.data)
+    return ws
+
+
+async def measure(label, url, messages, window, size):
+    payload = "x" * size
+    latencies = []
+    async with aiohttp.ClientSession() as session:
+        async with session.ws_connect(url) as ws:
+            sent_at = {}
+            in_flight = asyncio.Semaphore(window)
+
+            async def sender():
+                for i in range(messages):
+                    await in_flight.acquire()
+                    sent_at[i] = time.perf_counter()
+                    await ws.send_str("%d %s" % (i, payload))
+
+            start = time.perf_counter()
+            send_task = asyncio.create_task(sender())
+            for _i in range(messages):
+                msg = await ws.receive()
+                sequence = int(msg.data.split(" ", 1)[0])
+                latencies.append(time.perf_counter() - sent_at.pop(sequence))
+                in_flight.release()
+            elapsed = time.perf_counter() - start
+            await send_task
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"{label:<18} {messages / elapsed:>10,.0f} msg/s  p50 {percentiles[49] * 1e3:>6.2f} ms"
+          f"  p95 {percentiles[94] * 1e3:>6.2f} ms  p99 {percentiles[98] * 1e3:>6.2f} ms")
+
+
+async def main():
+    global UPSTREAM_URL
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--window", type=int, default=32)
+    parser.add_argument("--size", type=int, default=256, help="Message size in bytes")
+    options = parser.parse_args()
+
+    upstream = web.Application()
+    upstream.router.add_get("/", echo_handler)
+    runner = web.AppRunner(upstream)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    UPSTREAM_URL = f"http://127.0.0.1:{runner.addresses[0][1]}/"
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    print(f"{options.messages} messages of {options.size} bytes, {options.window} in flight\n")
+    try:
+        for mode in ("legacy", "relay"):
+            await measure(f"{mode} relay" if mode == "legacy" else "WebSocketRelay", f"http://127.0.0.1:{port}/{mode}",
+                          options.messages, options.window, options.size)
+    finally:
+        server.should_exit = True
+        await serve_task
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+# Parses the config.xml of the components bundled in platform/core/initial and fiware/initial, comparing the previous
+# XPath evaluation (string expressions compiled by lxml on every call) with the precompiled expressions, and measures
+# the import time of the template package, which no longer loads rdflib nor the XSD schema.
+#
+#   python benchmarks/bench_template_parser.py --iterations 200
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from wirecloud.commons.utils.template import TemplateParser  # noqa: E402
+from wirecloud.commons.utils.template.parsers import xml as xml_parser  # noqa: E402
+from wirecloud.commons.utils.wgt import WgtFile  # noqa: E402
+
+INITIAL_DIRS = (SRC_DIR / "wirecloud" / "platform" / "core" / "initial", SRC_DIR / "wirecloud" / "fiware" / "initial")
+
+IMPORT_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import wirecloud.commons.utils.template
+print(time.perf_counter() - start, 'rdflib' in sys.modules)
+"""
+
+
+def legacy_xpath(self, query, element):
+    return element.xpath(query, namespaces={'t': xml_parser.WIRECLOUD_TEMPLATE_NS})
+
+
+def load_templates():
+    templates = {}
+    for directory in INITIAL_DIRS:
+        for path in sorted(directory.glob("*.wgt")):
+            wgt_file = WgtFile(str(path))
+            templates[path.name] = wgt_file.get_template()
+            wgt_file.close()
+
+    return templates
+
+
+def parse(template):
+    TemplateParser(template).get_resource_info()
+
+
+def measure(label, templates, iterations):
+    for template in templates.values():
+        parse(template)
+
+    start = time.perf_counter()
+    for _i in range(iterations):
+        for template in templates.values():
+            parse(template)
+    elapsed = time.perf_counter() - start
+    per_template = elapsed / (iterations * len(templates))
+    print(f"{label:<32} {1 / per_template:>10,.0f} templates/s  {per_template * 1e3:>8.3f} ms/template")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    options = parser.parse_args()
+
+    templates = load_templates()
+    print(f"{len(templates)} bundled components: {', '.join(templates)}\n")
+
+    compiled_xpath = xml_parser.ApplicationMashupTemplateParser._xpath
+    xml_parser.ApplicationMashupTemplateParser._xpath = legacy_xpath
+    measure("parse (string XPath)", templates, options.iterations)
+    xml_parser.ApplicationMashupTemplateParser._xpath = compiled_xpath
+    measure("parse (compiled XPath)", templates, options.iterations)
+    print(f"{len(xml_parser._compiled_xpaths)} compiled expressions\n")
+
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True,
+                            cwd=SRC_DIR).stdout.split()
+    print(f"import wirecloud.commons.utils.template: {float(output[0]) * 1e3:.1f} ms (rdflib loaded: {output[1]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+# Measures the cost of the referer resolution done by the proxy for every request (urlparse + resolve_url_name) and of
+# reverse URL building, comparing the previous regex-per-call implementation with the precompiled URL router.
+#
+#   python benchmarks/bench_url_router.py --iterations 20000
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from wirecloud.commons.utils.http import get_relative_reverse_url, resolve_url_name  # noqa: E402
+from wirecloud.platform.plugins import get_plugin_urls, get_url_router  # noqa: E402
+
+REFERERS = (
+    "http://wirecloud.example.com/workspace/alice/My%20Dashboard",
+    "http://wirecloud.example.com/showcase/media/CoNWeT/map-viewer/1.2.3/index.html",
+    "http://wirecloud.example.com/cdp/https/api.example.com/v1/entities",
+    "http://wirecloud.example.com/some/unknown/page",
+)
+
+
+def legacy_resolve_url_name(path):
+    for name, url in get_plugin_urls().items():
+        pattern = re.escape(url.urlpattern).replace('\\{', '{').replace('\\}', '}')
+        param_names = re.findall(r'\{([^/]+)}', pattern)
+        pattern = re.sub(r'\{[^/]+:path}', r'(.+)', pattern)
+        pattern = re.sub(r'\{[^/]+}', r'([^/]+)', pattern)
+        pattern = '^' + pattern + '$'
+
+        match = re.match(pattern, path)
+        if match:
+            return name, dict(zip(param_names, match.groups()))
+
+    return None
+
+
+def legacy_get_relative_reverse_url(viewname, **kwargs):
+    patterns = get_plugin_urls()
+    if viewname not in patterns:
+        raise ValueError('No URL pattern found for view "%s"' % viewname)
+
+    url = patterns[viewname].urlpattern
+    for key in kwargs:
+        if '{' + f"{key}:path" + '}' in url:
+            url = url.replace('{' + f"{key}:path" + '}', kwargs[key])
+        else:
+            url = url.replace('{' + key + '}', str(kwargs[key]))
+
+    return url
+
+
+def measure(label, func, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {iterations / elapsed:>12,.0f} ops/s  {elapsed / iterations * 1e6:>8.2f} µs/op")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    options = parser.parse_args()
+
+    get_url_router()
+    print(f"{len(get_plugin_urls())} URL patterns\n")
+
+    def resolve_with(resolver):
+        def run(i):
+            resolver(urlparse(REFERERS[i % len(REFERERS)]).path)
+        return run
+
+    for referer in REFERERS:
+        path = urlparse(referer).path
+        # The legacy implementation used "<name>:path" as the key of path parameters, compare only the view names
+        assert (legacy_resolve_url_name(path) or (None,))[0] == (resolve_url_name(path) or (None,))[0], path
+
+    measure("referer resolution (legacy)", resolve_with(legacy_resolve_url_name), options.iterations)
+    measure("referer resolution (router)", resolve_with(resolve_url_name), options.iterations)
+
+    kwargs = {"vendor": "CoNWeT", "name": "map-viewer", "version": "1.2.3", "path": "index.html"}
+    measure("reverse URL (legacy)",
+            lambda i: legacy_get_relative_reverse_url("wirecloud.showcase_media", **kwargs), options.iterations)
+    measure("reverse URL (router)",
+            lambda i: get_relative_reverse_url("wirecloud.showcase_media", **kwargs), options.iterations)
+
+
+if __name__ == "__main__":
+    main()
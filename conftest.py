@@ -100,6 +100,47 @@ class _FakeClientSession:
 # 4. Fixtures
 # ---------------------------------------------------------------------------
 
+@pytest.fixture(autouse=True)
+def _clear_process_caches():
+    # Process-level caches must not leak entries between tests
+    from wirecloud.catalogue.schemas import clear_processed_info_cache
+    from wirecloud.catalogue.utils import clear_rendered_docs_cache
+    from wirecloud.commons.auth.cache import clear_principal_cache
+    from wirecloud.commons.auth.idm_tokens import clear_idm_token_cache
+    from wirecloud.commons.auth.passwords import clear_password_hasher
+    from wirecloud.commons.templates.tags import clear_bootstrap_caches
+    from wirecloud.commons.utils.theme import clear_available_themes_cache, clear_static_files_index
+    from wirecloud.platform.context.utils import clear_context_cache
+    from wirecloud.platform.search import clear_pending_workspace_updates
+    from wirecloud.proxy.cache import clear_response_cache
+    from wirecloud.translation import clear_translation_caches
+
+    clear_processed_info_cache()
+    clear_principal_cache()
+    clear_translation_caches()
+    clear_password_hasher()
+    clear_context_cache()
+    clear_rendered_docs_cache()
+    clear_static_files_index()
+    clear_available_themes_cache()
+    clear_bootstrap_caches()
+    clear_response_cache()
+    clear_idm_token_cache()
+    clear_pending_workspace_updates()
+    yield
+    clear_processed_info_cache()
+    clear_principal_cache()
+    clear_translation_caches()
+    clear_password_hasher()
+    clear_context_cache()
+    clear_rendered_docs_cache()
+    clear_static_files_index()
+    clear_available_themes_cache()
+    clear_bootstrap_caches()
+    clear_response_cache()
+    clear_idm_token_cache()
+
+
 @pytest.fixture(scope="session")
 def mock_mongo_client():
     return _mock_mongo_client_instance
@@ -117,12 +158,13 @@ async def app_client(mock_mongo_client, db_session):
     from asgi_lifespan import LifespanManager
     from httpx import AsyncClient, ASGITransport
     from wirecloud.main import app
-    from wirecloud.database import get_session
+    from wirecloud.database import get_session, get_read_session
 
     async def _override_get_session():
         yield db_session
 
     app.dependency_overrides[get_session] = _override_get_session
+    app.dependency_overrides[get_read_session] = _override_get_session
 
     try:
         async with LifespanManager(app) as manager:
@@ -72,6 +72,9 @@ DATABASE = {
     "USER": _env_str("WIRECLOUD_DB_USER", ""),
     "PASSWORD": _env_str("WIRECLOUD_DB_PASSWORD", ""),
     "USE_TRANSACTIONS": _env_bool("WIRECLOUD_DB_USE_TRANSACTIONS", True),
+    "SYNC_INDEXES": _env_bool("WIRECLOUD_DB_SYNC_INDEXES", True),
+    "READ_PREFERENCE": _env_str("WIRECLOUD_DB_READ_PREFERENCE", "primary"),
+    "READ_CONCERN": _env_str("WIRECLOUD_DB_READ_CONCERN", "") or None,
 }
 
 ELASTICSEARCH = {
@@ -102,6 +105,14 @@ OID_CONNECT_FULLY_SYNC_GROUPS = _env_bool("WIRECLOUD_OIDC_FULLY_SYNC_GROUPS", Fa
 OID_CONNECT_BACKCHANNEL_LOGOUT = _env_bool("WIRECLOUD_OIDC_BACKCHANNEL_LOGOUT", False)
 OID_CONNECT_PLUGIN = _env_str("WIRECLOUD_OIDC_PLUGIN", "keycloak")
 
+AUTH_PRINCIPAL_CACHE_SIZE = _env_int("WIRECLOUD_AUTH_PRINCIPAL_CACHE_SIZE", 1024)
+AUTH_PRINCIPAL_CACHE_TTL = _env_int("WIRECLOUD_AUTH_PRINCIPAL_CACHE_TTL", 30)
+PASSWORD_HASH_ITERATIONS = _env_int("WIRECLOUD_PASSWORD_HASH_ITERATIONS", 150000)
+PASSWORD_HASHING_WORKERS = _env_int("WIRECLOUD_PASSWORD_HASHING_WORKERS", 2)
+PASSWORD_HASHING_QUEUE_SIZE = _env_int("WIRECLOUD_PASSWORD_HASHING_QUEUE_SIZE", 64)
+
+WGT_PACKAGING_CONCURRENCY = _env_int("WIRECLOUD_WGT_PACKAGING_CONCURRENCY", 2)
+
 CATALOGUE_MEDIA_ROOT = _env_str("WIRECLOUD_CATALOGUE_MEDIA_ROOT", os.path.join(BASEDIR, "catalogue", "media"))
 CACHE_DIR = _env_str("WIRECLOUD_CACHE_DIR", os.path.join(BASEDIR, "cache"))
 WIDGET_DEPLOYMENT_DIR = _env_str("WIRECLOUD_WIDGET_DEPLOYMENT_DIR", os.path.join(BASEDIR, "deployment", "widgets"))
@@ -112,16 +123,42 @@ AVAILABLE_THEMES = _env_csv("WIRECLOUD_AVAILABLE_THEMES", ["defaulttheme"])
 THEME_ACTIVE = _env_str("WIRECLOUD_THEME_ACTIVE", AVAILABLE_THEMES[0])
 
 PROXY_WS_MAX_MSG_SIZE = _env_int("WIRECLOUD_PROXY_WS_MAX_MSG_SIZE", 4 * 1024 * 1024)
+PROXY_WS_QUEUE_SIZE = _env_int("WIRECLOUD_PROXY_WS_QUEUE_SIZE", 16)
+PROXY_WS_HEARTBEAT = _env_int("WIRECLOUD_PROXY_WS_HEARTBEAT", 30)
+PROXY_WS_IDLE_TIMEOUT = _env_int("WIRECLOUD_PROXY_WS_IDLE_TIMEOUT", 0)
 
 PROXY_WHITELIST_ENABLED = _env_bool("WIRECLOUD_PROXY_WHITELIST_ENABLED", False)
 PROXY_WHITELIST = _env_csv("WIRECLOUD_PROXY_WHITELIST", [])
 PROXY_BLACKLIST_ENABLED = _env_bool("WIRECLOUD_PROXY_BLACKLIST_ENABLED", False)
 PROXY_BLACKLIST = _env_csv("WIRECLOUD_PROXY_BLACKLIST", [])
 
-caches.set_config({
-    "default": {
-        "cache": "aiocache.SimpleMemoryCache",
-        "ttl": _env_int("WIRECLOUD_CACHE_TTL", 3600),
-    }
-})
-cache = caches.get("default")
+PROXY_POOL_LIMIT = _env_int("WIRECLOUD_PROXY_POOL_LIMIT", 100)
+PROXY_POOL_LIMIT_PER_HOST = _env_int("WIRECLOUD_PROXY_POOL_LIMIT_PER_HOST", 30)
+PROXY_POOL_KEEPALIVE_TIMEOUT = _env_int("WIRECLOUD_PROXY_POOL_KEEPALIVE_TIMEOUT", 30)
+PROXY_POOL_DNS_CACHE_TTL = _env_int("WIRECLOUD_PROXY_POOL_DNS_CACHE_TTL", 300)
+
+PROXY_CACHE_ENABLED = _env_bool("WIRECLOUD_PROXY_CACHE_ENABLED", False)
+PROXY_CACHE_MAX_SIZE = _env_int("WIRECLOUD_PROXY_CACHE_MAX_SIZE", 64 * 1024 * 1024)
+PROXY_CACHE_MAX_ENTRY_SIZE = _env_int("WIRECLOUD_PROXY_CACHE_MAX_ENTRY_SIZE", 1024 * 1024)
+
+# Set WIRECLOUD_CACHE_URL (redis://host:port/db or unix:///path/to/socket) when running several workers, so all
+# of them share the same cache. Otherwise each worker keeps its own in-memory cache.
+CACHE_URL = _env_str("WIRECLOUD_CACHE_URL", "")
+
+if CACHE_URL:
+    from wirecloud.commons.utils.sharedcache import SharedCache
+
+    cache = SharedCache(
+        CACHE_URL,
+        ttl=_env_int("WIRECLOUD_CACHE_TTL", 3600),
+        l1_size=_env_int("WIRECLOUD_CACHE_L1_SIZE", 1024),
+        l1_ttl=_env_int("WIRECLOUD_CACHE_L1_TTL", 30),
+    )
+else:
+    caches.set_config({
+        "default": {
+            "cache": "aiocache.SimpleMemoryCache",
+            "ttl": _env_int("WIRECLOUD_CACHE_TTL", 3600),
+        }
+    })
+    cache = caches.get("default")
@@ -40,7 +40,11 @@ DATABASE = {
     'PORT': '',
     'USER': '',
     'PASSWORD': '',
-    'USE_TRANSACTIONS': True
+    'USE_TRANSACTIONS': True,
+    'SYNC_INDEXES': True,
+    # Read-only requests (GET) can be served by the secondary members of a replica set
+    'READ_PREFERENCE': 'primary',
+    'READ_CONCERN': None
 }
 
 ELASTICSEARCH = {
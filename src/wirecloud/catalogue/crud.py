@@ -16,12 +16,13 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import Optional
+from typing import Optional, AsyncIterator
 
 from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
 
 from wirecloud.catalogue.schemas import (CatalogueResourceCreate, CatalogueResource, CatalogueResourceBase,
-                                             CatalogueResourceType, CatalogueResourceXHTML)
+                                             CatalogueResourceType, CatalogueResourceXHTML, clear_processed_info_cache)
 from wirecloud.catalogue.models import DBCatalogueResource as CatalogueResourceModel
 from wirecloud.catalogue.models import XHTML
 from wirecloud.commons.auth.crud import get_all_user_groups
@@ -30,6 +31,25 @@ from wirecloud.commons.auth.schemas import UserAll, User
 from wirecloud.commons.utils.template.schemas.macdschemas import (MACD, Vendor, Name, Version)
 from wirecloud.database import DBSession, Id, commit
 
+INDEXES = {
+    "catalogue_resources": (
+        # Also used by get_catalogue_resources_with_regex, as the short_name regex is anchored
+        IndexModel([("vendor", ASCENDING), ("short_name", ASCENDING), ("version", ASCENDING)],
+                   name="wirecloud_vendor_short_name_version"),
+        IndexModel([("users", ASCENDING)], name="wirecloud_users"),
+        IndexModel([("groups", ASCENDING)], name="wirecloud_groups"),
+    ),
+}
+
+# The widget code stored by save_catalogue_resource_xhtml can be large, it is only read when the widget code is served
+RESOURCE_PROJECTION = {"xhtml": 0}
+# Used by the list views whose queries already apply the access rules: the users and groups each resource is installed
+# for can be long lists and are not needed there (the returned resources have them empty). Ownership checks use their
+# own queries (see has_resource_user)
+RESOURCE_LIST_PROJECTION = {"xhtml": 0, "users": 0, "groups": 0}
+XHTML_PROJECTION = {"xhtml.code": 0}
+EXISTS_PROJECTION = {"_id": 1}
+
 
 def build_schema_from_resource(resource: CatalogueResourceModel) -> CatalogueResource:
     return CatalogueResource(
@@ -79,7 +99,7 @@ async def get_catalogue_resource(db: DBSession, vendor: Vendor, short_name: Name
         query = {"vendor": vendor, "short_name": short_name, "version": version}
     else:
         query = {"vendor": vendor, "short_name": short_name, "version": version, "type": type.value}
-    result = await db.client.catalogue_resources.find_one(query)
+    result = await db.client.catalogue_resources.find_one(query, RESOURCE_PROJECTION)
 
     if result is None:
         return None
@@ -89,7 +109,7 @@ async def get_catalogue_resource(db: DBSession, vendor: Vendor, short_name: Name
 
 async def get_user_catalogue_resource(db: DBSession, user: User, vendor: Vendor, short_name: Name, version: Version) -> Optional[CatalogueResource]:
     query = {"vendor": vendor, "short_name": short_name, "version": version, "users": {"$in": [ObjectId(user.id)]}}
-    result = await db.client.catalogue_resources.find_one(query)
+    result = await db.client.catalogue_resources.find_one(query, RESOURCE_PROJECTION)
 
     if result is None:
         return None
@@ -99,7 +119,7 @@ async def get_user_catalogue_resource(db: DBSession, user: User, vendor: Vendor,
 
 async def get_user_catalogue_resources(db: DBSession, user: User, vendor: Vendor, short_name: Name) -> list[CatalogueResource]:
     query = {"vendor": vendor, "short_name": short_name, "users": {"$in": [ObjectId(user.id)]}}
-    results = await db.client.catalogue_resources.find(query).to_list()
+    results = await db.client.catalogue_resources.find(query, RESOURCE_LIST_PROJECTION).to_list()
 
     resources = [CatalogueResourceModel.model_validate(resource) for resource in results]
     return [build_schema_from_resource(resource) for resource in resources]
@@ -107,7 +127,7 @@ async def get_user_catalogue_resources(db: DBSession, user: User, vendor: Vendor
 
 async def get_catalogue_resource_with_xhtml(db: DBSession, vendor: Vendor, short_name: Name, version: Version) -> Optional[CatalogueResourceXHTML]:
     query = {"vendor": vendor, "short_name": short_name, "version": version}
-    result = await db.client.catalogue_resources.find_one(query)
+    result = await db.client.catalogue_resources.find_one(query, XHTML_PROJECTION)
 
     if result is None:
         return None
@@ -115,9 +135,19 @@ async def get_catalogue_resource_with_xhtml(db: DBSession, vendor: Vendor, short
     return CatalogueResourceXHTML.model_validate(result)
 
 
+async def get_catalogue_resource_xhtml_code(db: DBSession, resource_id: Id) -> str:
+    query = {"_id": ObjectId(resource_id)}
+    result = await db.client.catalogue_resources.find_one(query, {"xhtml.code": 1})
+
+    if result is None:
+        return ''
+
+    return (result.get("xhtml") or {}).get("code") or ''
+
+
 async def get_catalogue_resource_by_id(db: DBSession, resource_id: Id) -> Optional[CatalogueResource]:
     query = {"_id": ObjectId(resource_id)}
-    result = await db.client.catalogue_resources.find_one(query)
+    result = await db.client.catalogue_resources.find_one(query, RESOURCE_PROJECTION)
 
     if result is None:
         return None
@@ -125,10 +155,30 @@ async def get_catalogue_resource_by_id(db: DBSession, resource_id: Id) -> Option
     return build_schema_from_resource(CatalogueResourceModel.model_validate(result))
 
 
+async def get_catalogue_resources_by_ids(db: DBSession, resource_ids: list[Id]) -> list[CatalogueResource]:
+    if len(resource_ids) == 0:
+        return []
+
+    query = {"_id": {"$in": [ObjectId(resource_id) for resource_id in resource_ids]}}
+    results = await db.client.catalogue_resources.find(query, RESOURCE_PROJECTION).to_list()
+
+    return [build_schema_from_resource(CatalogueResourceModel.model_validate(result)) for result in results]
+
+
+async def get_catalogue_resources_by_uris(db: DBSession, uris: list[tuple[Vendor, Name, Version]]) -> list[CatalogueResource]:
+    if len(uris) == 0:
+        return []
+
+    query = {"$or": [{"vendor": vendor, "short_name": short_name, "version": version} for (vendor, short_name, version) in uris]}
+    results = await db.client.catalogue_resources.find(query, RESOURCE_PROJECTION).to_list()
+
+    return [build_schema_from_resource(CatalogueResourceModel.model_validate(result)) for result in results]
+
+
 async def has_resource_user(db: DBSession, resource_id: Id, user_id: Id) -> bool:
     # Checks if the resource is owned by the user (present in CatalogueResource.users)
     query = {"_id": ObjectId(resource_id), "creator_id": ObjectId(user_id)}
-    result = await db.client.catalogue_resources.find_one(query)
+    result = await db.client.catalogue_resources.find_one(query, EXISTS_PROJECTION)
 
     return result is not None
 
@@ -137,7 +187,7 @@ async def get_all_catalogue_resource_versions(db: DBSession, vendor: Vendor, sho
     query = {"vendor": vendor, "short_name": short_name}
 
     resources = [CatalogueResourceModel.model_validate(resource) for resource in
-                 await db.client.catalogue_resources.find(query).to_list()]
+                 await db.client.catalogue_resources.find(query, RESOURCE_LIST_PROJECTION).to_list()]
 
     return [build_schema_from_resource(resource) for resource in resources]
 
@@ -164,28 +214,35 @@ async def get_catalogue_resource_versions_for_user(db: DBSession, vendor: Option
 
         query = {"$or": [public_resources_query, user_resources_query, group_resources_query]}
 
-    result = await db.client.catalogue_resources.find(query).to_list()
+    result = await db.client.catalogue_resources.find(query, RESOURCE_LIST_PROJECTION).to_list()
     resources = [CatalogueResourceModel.model_validate(resource) for resource in result]
 
     return [build_schema_from_resource(resource) for resource in resources]
 
 
 async def get_all_catalogue_resources(db: DBSession) -> list[CatalogueResource]:
-    result = await db.client.catalogue_resources.find().to_list()
+    result = await db.client.catalogue_resources.find({}, RESOURCE_PROJECTION).to_list()
     resources = [CatalogueResourceModel.model_validate(resource) for resource in result]
 
     return [build_schema_from_resource(resource) for resource in resources]
 
 
+async def iter_all_catalogue_resources(db: DBSession, batch_size: int = 500) -> AsyncIterator[CatalogueResource]:
+    async for resource in db.client.catalogue_resources.find({}, RESOURCE_PROJECTION, batch_size=batch_size):
+        yield build_schema_from_resource(CatalogueResourceModel.model_validate(resource))
+
+
 async def update_catalogue_resource_description(db: DBSession, resource_id: Id, description: MACD) -> None:
     query = {"_id": ObjectId(resource_id)}
     update = {"$set": {"description": description.model_dump_json()}}
     await db.client.catalogue_resources.update_one(query, update)
+    clear_processed_info_cache([resource_id])
 
 
 async def delete_catalogue_resources(db: DBSession, resource_ids: list[Id]) -> None:
     query = {"_id": {"$in": [ObjectId(rid) for rid in resource_ids]}}
     await db.client.catalogue_resources.delete_many(query)
+    clear_processed_info_cache(resource_ids)
 
 
 async def mark_resources_as_not_available(db: DBSession, resources: list[CatalogueResource]) -> None:
@@ -200,7 +257,7 @@ async def change_resource_publicity(db: DBSession, resource: CatalogueResource,
 async def install_resource_to_user(db: DBSession, resource: CatalogueResource, user: User) -> bool:
     # Check integrity
     query = {"_id": ObjectId(resource.id), "user_id": ObjectId(user.id)}
-    result = await db.client.catalogue_resource_users.find_one(query)
+    result = await db.client.catalogue_resource_users.find_one(query, EXISTS_PROJECTION)
     if result is not None:
         return False
     else:
@@ -213,7 +270,7 @@ async def install_resource_to_user(db: DBSession, resource: CatalogueResource, u
 async def install_resource_to_group(db: DBSession, resource: CatalogueResource, group: Group) -> bool:
     # Check integrity
     query = {"_id": ObjectId(resource.id), "groups": ObjectId(group.id)}
-    result = await db.client.catalogue_resources.find_one(query)
+    result = await db.client.catalogue_resources.find_one(query, EXISTS_PROJECTION)
     if result is not None:
         return False
     else:
@@ -226,7 +283,7 @@ async def install_resource_to_group(db: DBSession, resource: CatalogueResource,
 async def uninstall_resource_to_user(db: DBSession, resource: CatalogueResource, user: User) -> bool:
     # Check integrity
     query = {"_id": ObjectId(resource.id), "users": ObjectId(user.id)}
-    result = await db.client.catalogue_resources.find_one(query)
+    result = await db.client.catalogue_resources.find_one(query, EXISTS_PROJECTION)
     if result is None:
         return False
     else:
@@ -239,11 +296,12 @@ async def uninstall_resource_to_user(db: DBSession, resource: CatalogueResource,
 async def delete_resource_if_not_used(db: DBSession, resource: CatalogueResource) -> bool:
     # Check if the resource is not used by any user or group
     query = {"_id": ObjectId(resource.id), "users": {"$size": 0}, "groups": {"$size": 0}, "public": False}
-    result = await db.client.catalogue_resources.find_one(query)
+    result = await db.client.catalogue_resources.find_one(query, EXISTS_PROJECTION)
 
     if result is not None:
         await db.client.catalogue_resources.delete_one({"_id": ObjectId(resource.id)})
         await commit(db)
+        clear_processed_info_cache([resource.id])
         return True
     else:
         return False
@@ -263,7 +321,7 @@ async def get_catalogue_resources_with_regex(db: DBSession, vendor: Vendor, name
         ]
     }
 
-    results = await db.client.catalogue_resources.find(query).to_list()
+    results = await db.client.catalogue_resources.find(query, RESOURCE_PROJECTION).to_list()
     resources = [build_schema_from_resource(CatalogueResourceModel.model_validate(resource)) for resource in results]
 
     return resources
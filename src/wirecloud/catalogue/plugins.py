@@ -20,8 +20,10 @@ import os
 import logging
 from typing import Optional, Callable
 from fastapi import FastAPI
+from pymongo import IndexModel
 
 from wirecloud.platform.plugins import WirecloudPlugin
+from wirecloud.catalogue.crud import INDEXES as CATALOGUE_INDEXES
 from wirecloud.catalogue.urls import patterns as catalogue_patterns
 from wirecloud.catalogue.routes import router as catalogue_router
 
@@ -40,6 +42,9 @@ class WirecloudCataloguePlugin(WirecloudPlugin):
 
         app.include_router(catalogue_router, prefix="/catalogue", tags=["Catalogue"])
 
+    def get_database_indexes(self) -> dict[str, tuple[IndexModel, ...]]:
+        return CATALOGUE_INDEXES
+
     def get_config_validators(self) -> tuple[Callable, ...]:
         def validate_catalogue_settings(settings, _offline: bool) -> None:
             from os import path
@@ -59,4 +64,19 @@ class WirecloudCataloguePlugin(WirecloudPlugin):
                 except Exception as e:
                     raise ValueError(f"Failed to create CATALOGUE_MEDIA_ROOT directory: {e}")
 
+            # CATALOGUE_PROCESSED_INFO_CACHE_SIZE (default: 1024 processed descriptions)
+            if not hasattr(settings, 'CATALOGUE_PROCESSED_INFO_CACHE_SIZE'):
+                setattr(settings, 'CATALOGUE_PROCESSED_INFO_CACHE_SIZE', 1024)
+
+            if not isinstance(settings.CATALOGUE_PROCESSED_INFO_CACHE_SIZE, int) or settings.CATALOGUE_PROCESSED_INFO_CACHE_SIZE <= 0:
+                raise ValueError("CATALOGUE_PROCESSED_INFO_CACHE_SIZE must be a positive integer")
+
+            # WGT_PACKAGING_CONCURRENCY (default: 2 components packaged/extracted at the same time per worker)
+            if not hasattr(settings, 'WGT_PACKAGING_CONCURRENCY'):
+                setattr(settings, 'WGT_PACKAGING_CONCURRENCY', 2)
+
+            if isinstance(settings.WGT_PACKAGING_CONCURRENCY, bool) or not isinstance(settings.WGT_PACKAGING_CONCURRENCY, int) \
+                    or settings.WGT_PACKAGING_CONCURRENCY <= 0:
+                raise ValueError("WGT_PACKAGING_CONCURRENCY must be a positive integer")
+
         return (validate_catalogue_settings,)
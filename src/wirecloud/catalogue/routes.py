@@ -34,7 +34,7 @@ from wirecloud.commons.utils.http import (PermissionDenied, NotFound,
                                               produces, consumes, authentication_required, XHTMLResponse,
                                               force_trailing_slash, build_downloadfile_response,
                                               get_absolute_reverse_url, build_error_response)
-from wirecloud.commons.utils.downloader import download_local_file
+from wirecloud.commons.utils.cache import check_if_none_match
 from wirecloud.commons.utils.html import clean_html, filter_changelog
 from wirecloud.commons.utils.version import Version as VersionType
 from wirecloud.commons.utils.wgt import WgtFile, InvalidContents
@@ -47,7 +47,7 @@ from wirecloud.catalogue.crud import (get_catalogue_resource_versions_for_user,
                                           get_all_catalogue_resource_versions, mark_resources_as_not_available)
 from wirecloud.catalogue.utils import get_resource_group_data, get_resource_data
 from wirecloud.platform.localcatalogue.utils import install_component
-from wirecloud.database import DBDep
+from wirecloud.database import DBDep, DBReadDep
 from wirecloud.translation import gettext as _
 
 router = APIRouter()
@@ -189,7 +189,7 @@ async def get_resources(user: UserDepNoCSRF, request: Request,
     }
 )
 @produces(["application/json"])
-async def get_resource_versions(db: DBDep,
+async def get_resource_versions(db: DBReadDep,
                                 user: UserDepNoCSRF,
                                 request: Request,
                                 vendor: Vendor = Path(description=docs.get_resource_entry_group_vendor_description,
@@ -274,7 +274,7 @@ async def delete_resource_versions(db: DBDep,
     }
 )
 @produces(["application/json"])
-async def get_resource_version(db: DBDep,
+async def get_resource_version(db: DBReadDep,
                                user: UserDepNoCSRF,
                                request: Request,
                                vendor: Vendor = Path(description=docs.get_resource_entry_vendor_description,
@@ -344,6 +344,17 @@ async def delete_resource_version(db: DBDep,
     return CatalogueResourceDeleteResults(affectedVersions=[resource.version])
 
 
+def build_rendered_doc_response(request: Request, doc: str, etag: str) -> Response:
+    if not check_if_none_match(request, etag):
+        return Response(status_code=304, headers={'ETag': etag})
+
+    return Response(
+        content=doc,
+        media_type="application/xhtml+xml; charset=UTF-8",
+        headers={'ETag': etag}
+    )
+
+
 @router.get(
     "/resource/{vendor}/{name}/{version}/changelog",
     summary=docs.get_resource_changelog_summary,
@@ -365,7 +376,7 @@ async def delete_resource_version(db: DBDep,
     }
 )
 @produces(["application/xhtml+xml"])
-async def get_resource_changelog(db: DBDep,
+async def get_resource_changelog(db: DBReadDep,
                                  request: Request,
                                  user: UserDepNoCSRF,
                                  vendor: Vendor = Path(description=docs.get_resource_changelog_vendor_description,
@@ -393,35 +404,28 @@ async def get_resource_changelog(db: DBDep,
     doc_relative_path = url2pathname(resource_info.changelog)
     doc_base_url = force_trailing_slash(urljoin(resource.get_template_url(request=request, for_base=True),
                                                 pathname2url(os.path.dirname(doc_relative_path))))
-    doc_path = os.path.join(catalogue_utils.wgt_deployer.get_base_dir(vendor, name, version), doc_relative_path)
 
-    (doc_filename_root, doc_filename_ext) = os.path.splitext(doc_path)
     # TODO Use user language instead of 'en'
-    localized_doc_path = doc_filename_root + '.' + 'en' + doc_filename_ext
-
-    try:
-        doc_code = download_local_file(localized_doc_path).decode('utf-8')
-    except Exception:
-        try:
-            doc_code = download_local_file(doc_path).decode('utf-8')
-        except Exception:
-            msg = _('Error opening the changelog file')
-            doc_code = '<div class="margin-top: 10px"><p>%s</p></div>' % msg
-
-    doc_pre_html = markdown.markdown(doc_code, output_format='xhtml',
-                                     extensions=['markdown.extensions.codehilite', 'markdown.extensions.fenced_code'])
-
-    if from_version is not None:
-        doc_pre_html = filter_changelog(doc_pre_html, VersionType(from_version))
-        if doc_pre_html.strip() == '':
-            raise NotFound()
-
-    doc = clean_html(doc_pre_html, base_url=doc_base_url)
+    rendered = await catalogue_utils.get_rendered_resource_doc(resource, 'changelog', doc_relative_path, doc_base_url,
+                                                               from_version=from_version)
+    if rendered is None:
+        msg = _('Error opening the changelog file')
+        doc_code = '<div class="margin-top: 10px"><p>%s</p></div>' % msg
+        doc_pre_html = markdown.markdown(doc_code, output_format='xhtml')
+        if from_version is not None:
+            doc_pre_html = filter_changelog(doc_pre_html, VersionType(from_version))
+            if doc_pre_html.strip() == '':
+                raise NotFound()
+
+        return Response(
+            content=clean_html(doc_pre_html, base_url=doc_base_url),
+            media_type="application/xhtml+xml; charset=UTF-8"
+        )
+
+    if rendered[0] == '':
+        raise NotFound()
 
-    return Response(
-        content=doc,
-        media_type="application/xhtml+xml; charset=UTF-8"
-    )
+    return build_rendered_doc_response(request, *rendered)
 
 
 @router.get(
@@ -445,7 +449,7 @@ async def get_resource_changelog(db: DBDep,
     }
 )
 @produces(["application/xhtml+xml"])
-async def get_resource_user_guide(db: DBDep,
+async def get_resource_user_guide(db: DBReadDep,
                                   request: Request,
                                   user: UserDepNoCSRF,
                                   vendor: Vendor = Path(description=docs.get_resource_userguide_vendor_description,
@@ -475,20 +479,15 @@ async def get_resource_user_guide(db: DBDep,
         doc_relative_path = url2pathname(resource_info.doc)
         doc_base_url = force_trailing_slash(urljoin(resource.get_template_url(request=request, for_base=True),
                                                     pathname2url(os.path.dirname(doc_relative_path))))
-        doc_path = os.path.join(catalogue_utils.wgt_deployer.get_base_dir(vendor, name, version), doc_relative_path)
 
-        (doc_filename_root, doc_filename_ext) = os.path.splitext(doc_path)
         # TODO Use user language instead of 'en'
-        localized_doc_path = doc_filename_root + '.' + 'en' + doc_filename_ext
+        rendered = await catalogue_utils.get_rendered_resource_doc(resource, 'userguide', doc_relative_path,
+                                                                   doc_base_url)
+        if rendered is not None:
+            return build_rendered_doc_response(request, *rendered)
 
-        try:
-            doc_code = download_local_file(localized_doc_path).decode('utf-8')
-        except Exception:
-            try:
-                doc_code = download_local_file(doc_path).decode('utf-8')
-            except Exception:
-                msg = _('Error opening the userguide file')
-                doc_code = '<div class="margin-top: 10px"><p>%s</p></div>' % msg
+        msg = _('Error opening the userguide file')
+        doc_code = '<div class="margin-top: 10px"><p>%s</p></div>' % msg
 
     doc_pre_html = markdown.markdown(doc_code, output_format='xhtml',
                                      extensions=['markdown.extensions.codehilite', 'markdown.extensions.fenced_code'])
@@ -521,7 +520,7 @@ async def get_resource_user_guide(db: DBDep,
     }
 )
 @produces(["application/octet-stream"])
-async def get_resource_file(db: DBDep,
+async def get_resource_file(db: DBReadDep,
                             request: Request,
                             user: UserDepNoCSRF,
                             vendor: Vendor = Path(description=docs.get_resource_file_vendor_description,
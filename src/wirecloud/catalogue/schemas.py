@@ -22,14 +22,17 @@ from datetime import datetime
 from urllib.parse import urlparse
 from fastapi import Request
 from typing import Optional
+from copy import deepcopy
 import random
 
+from wirecloud import settings
 from wirecloud.settings import cache
 from wirecloud.catalogue.models import XHTML
 from wirecloud.commons.utils.template.schemas.macdschemas import MACD, MACType, Vendor, Name, Version
 from wirecloud.commons.utils.template.base import Contact
 from wirecloud.commons.auth.schemas import User, UserAll
 from wirecloud.commons.utils.http import get_absolute_reverse_url
+from wirecloud.commons.utils.structures import LRUCache
 from wirecloud.commons.utils.template import TemplateParser
 from wirecloud.database import DBSession, Id
 
@@ -39,6 +42,89 @@ RESOURCE_MIMETYPES = ('application/x-widget+mashable-application-component',
                       'application/x-mashup+mashable-application-component',
                       'application/x-operator+mashable-application-component')
 
+_processed_info_cache: Optional[LRUCache] = None
+
+
+def _get_processed_info_cache() -> LRUCache:
+    global _processed_info_cache
+
+    if _processed_info_cache is None:
+        _processed_info_cache = LRUCache(getattr(settings, 'CATALOGUE_PROCESSED_INFO_CACHE_SIZE', 1024))
+
+    return _processed_info_cache
+
+
+def clear_processed_info_cache(resource_ids: Optional[list[Id]] = None) -> None:
+    if _processed_info_cache is None:
+        return
+
+    if resource_ids is None:
+        _processed_info_cache.clear()
+    else:
+        resource_ids = {str(resource_id) for resource_id in resource_ids}
+        _processed_info_cache.delete_matching(lambda key, _value: key[0] in resource_ids)
+
+
+class VariableDefinition:
+    __slots__ = ('name', 'kind', 'type', 'secure', 'multiuser', 'default')
+
+    def __init__(self, name: str, kind: str, type: str, secure: bool = False, multiuser: bool = False,
+                 default: str = ''):
+        self.name = name
+        self.kind = kind
+        self.type = type
+        self.secure = secure
+        self.multiuser = multiuser
+        self.default = default
+
+
+class VariableIndex:
+    """
+    Definitions of the preferences and properties of a widget or operator, in the order used by its description.
+    """
+
+    __slots__ = ('preferences', 'properties')
+
+    def __init__(self, preferences: dict[str, VariableDefinition], properties: dict[str, VariableDefinition]):
+        self.preferences = preferences
+        self.properties = properties
+
+    def __iter__(self):
+        yield from self.preferences.values()
+        yield from self.properties.values()
+
+    def __len__(self) -> int:
+        return len(self.preferences) + len(self.properties)
+
+
+def build_variable_index(info: MACD) -> VariableIndex:
+    def index(kind, vardefs):
+        return {vardef.name: VariableDefinition(vardef.name, kind, vardef.type, vardef.secure, vardef.multiuser,
+                                                vardef.default) for vardef in vardefs}
+
+    return VariableIndex(index('preference', getattr(info, 'preferences', ())),
+                         index('property', getattr(info, 'properties', ())))
+
+
+def get_variable_index(resource) -> VariableIndex:
+    """
+    Returns the variable index of a catalogue resource. Indexes are shared by all the callers, so they must not be
+    modified, and live in the processed info cache, so they are dropped with the processed descriptions of the resource.
+    """
+
+    resource_id = getattr(resource, 'id', None)
+    if resource_id is None:
+        return build_variable_index(resource.get_processed_info(process_urls=False))
+
+    key = (str(resource_id), 'variable_index')
+    processed_info_cache = _get_processed_info_cache()
+    variable_index = processed_info_cache.get(key)
+    if variable_index is None:
+        variable_index = build_variable_index(resource.get_processed_info(process_urls=False))
+        processed_info_cache.set(key, variable_index)
+
+    return variable_index
+
 
 class CatalogueResourceType(Enum):
     widget = 0
@@ -88,11 +174,24 @@ class CatalogueResourceBase(BaseModel):
         # TODO Handle translations
         lang = None
 
-        parser = self.get_template(request, url_pattern_name=url_pattern_name)
-        processed_info = parser.get_resource_processed_info(lang=lang, process_urls=process_urls, translate=True,
-                                                            process_variables=process_variables)
-
-        return processed_info
+        resource_id = getattr(self, 'id', None)
+        if resource_id is None:
+            parser = self.get_template(request, url_pattern_name=url_pattern_name)
+            return parser.get_resource_processed_info(lang=lang, process_urls=process_urls, translate=True,
+                                                      process_variables=process_variables)
+
+        # Processed descriptions are cached by resource, callers get their own copy as they are free to modify it
+        template_uri = self.get_template_url(request=request, url_pattern_name=url_pattern_name) if process_urls else None
+        key = (str(resource_id), lang, process_urls, process_variables, template_uri)
+        processed_info_cache = _get_processed_info_cache()
+        processed_info = processed_info_cache.get(key)
+        if processed_info is None:
+            parser = TemplateParser(self.description.model_dump_json(), base=template_uri)
+            processed_info = parser.get_resource_processed_info(lang=lang, process_urls=process_urls, translate=True,
+                                                                process_variables=process_variables)
+            processed_info_cache.set(key, processed_info)
+
+        return deepcopy(processed_info)
 
     def resource_type(self) -> str:
         return self.type.name
@@ -157,7 +256,7 @@ class CatalogueResource(CatalogueResourceBase, populate_by_name=True):
 
 
 class CatalogueResourceXHTML(CatalogueResource):
-    xhtml: Optional[XHTML]
+    xhtml: Optional[XHTML] = None
 
 
 class CatalogueResourceDataSummaryPermissions(BaseModel):
@@ -19,12 +19,11 @@
 from typing import Optional, Any
 from urllib.parse import urljoin
 
-from elasticsearch._async.helpers import async_bulk
 from pydantic import BaseModel
 from datetime import datetime
 from fastapi import Request
 
-from wirecloud.catalogue.crud import get_all_catalogue_resources, get_catalogue_resource_by_id
+from wirecloud.catalogue.crud import iter_all_catalogue_resources, get_catalogue_resource_by_id
 from wirecloud.catalogue.schemas import CatalogueResource, get_template_url
 from wirecloud.commons.auth.schemas import UserAll
 from wirecloud.commons.utils.version import Version
@@ -284,32 +283,28 @@ def prepare_resource_for_indexing(resource: CatalogueResource) -> ResourceOut:
     )
 
 
-async def rebuild_resource_index(db: DBSession):
-    from wirecloud.commons.search import es_client
+async def rebuild_resource_index(db: DBSession, chunk_size: Optional[int] = None, progress=None) -> int:
+    from wirecloud.commons.search import rebuild_index, REBUILD_CHUNK_SIZE
 
-    if await es_client.indices.exists(index=RESOURCES_INDEX):
-        await es_client.indices.delete(index=RESOURCES_INDEX)
+    chunk_size = chunk_size or REBUILD_CHUNK_SIZE
 
-    await es_client.indices.create(index=RESOURCES_INDEX, body={
-        "settings": {"index": {"max_ngram_diff": 18}, "analysis": RESOURCE_MAPPINGS["settings"]["analysis"]},
-        "mappings": RESOURCE_MAPPINGS["mappings"]})
+    async def documents():
+        async for resource in iter_all_catalogue_resources(db, batch_size=chunk_size):
+            yield str(resource.id), prepare_resource_for_indexing(resource).model_dump()
 
-    data = await get_all_catalogue_resources(db)
-    actions = [{'_index': RESOURCES_INDEX, '_id': str(resource.id),
-                '_source': prepare_resource_for_indexing(resource).model_dump()} for resource in data]
-
-    await async_bulk(es_client, actions)
+    return await rebuild_index(RESOURCES_INDEX, RESOURCE_MAPPINGS, documents(), chunk_size=chunk_size,
+                               progress=progress)
 
 
 async def add_resource_to_index(db: DBSession, resource: CatalogueResource):
-    from wirecloud.commons.search import es_client
+    from wirecloud.commons.search import index_document
     res = await get_catalogue_resource_by_id(db, resource.id)
 
-    await es_client.index(index=RESOURCES_INDEX, id=str(res.id), document=prepare_resource_for_indexing(res).model_dump())
+    await index_document(RESOURCES_INDEX, str(res.id), prepare_resource_for_indexing(res).model_dump())
 
 
 async def delete_resource_from_index(resource: CatalogueResource):
-    from wirecloud.commons.search import es_client
+    from wirecloud.commons.search import delete_document
 
-    await es_client.delete(index=RESOURCES_INDEX, id=str(resource.id))
+    await delete_document(RESOURCES_INDEX, str(resource.id))
 
@@ -17,14 +17,17 @@
 # along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
 
 import errno
+import hashlib
 from io import BytesIO
 import os
 import re
 import logging
+import shutil
+import tempfile
 from urllib.parse import urljoin
 from urllib.request import pathname2url, url2pathname
 import time
-from typing import Union, IO, Optional
+from typing import Union, IO, Optional, Any
 from datetime import datetime, timezone
 from fastapi import Request
 
@@ -40,11 +43,12 @@ from wirecloud.catalogue.crud import (create_catalogue_resource, has_resource_us
                                           update_catalogue_resource_description, delete_catalogue_resources)
 from wirecloud.commons.auth.schemas import User, UserAll
 from wirecloud.commons.utils.downloader import download_http_content, download_local_file
-from wirecloud.commons.utils.html import clean_html
+from wirecloud.commons.utils.html import clean_html, filter_changelog
 from wirecloud.commons.utils.http import get_absolute_reverse_url, force_trailing_slash
 from wirecloud.commons.utils.template import ObsoleteFormatError, TemplateParser, TemplateFormatError, TemplateParseException
+from wirecloud.commons.utils.structures import LRUCache
 from wirecloud.commons.utils.version import Version
-from wirecloud.commons.utils.wgt import InvalidContents, WgtDeployer, WgtFile
+from wirecloud.commons.utils.wgt import InvalidContents, WgtDeployer, WgtFile, run_packaging_task
 from wirecloud.database import DBSession, commit
 from wirecloud.platform.widget.utils import create_widget_from_wgt
 from wirecloud.translation import gettext as _
@@ -55,6 +59,16 @@ logger = logging.getLogger(__name__)
 
 wgt_deployer: WgtDeployer = WgtDeployer(settings.CATALOGUE_MEDIA_ROOT)
 
+# Rendered documents are stored in this folder inside the folder of the deployed resource
+RENDERED_DOCS_DIR = '.rendered_docs'
+DOC_MARKDOWN_EXTENSIONS = {
+    'changelog': ['markdown.extensions.codehilite', 'markdown.extensions.fenced_code'],
+    'userguide': ['markdown.extensions.codehilite', 'markdown.extensions.fenced_code'],
+    'longdescription': [],
+}
+
+_rendered_docs = LRUCache(512)
+
 
 def extract_resource_media_from_package(template: TemplateParser, package: WgtFile, base_path: str) -> dict[str, str]:
     overrides = {}
@@ -193,9 +207,8 @@ def check_packaged_resource(wgt_file: WgtFile, resource_info: Optional[MACD] = N
     check_invalid_embedded_resources(wgt_file, resource_info)
 
 
-async def add_packaged_resource(db: DBSession, file: Union[str, IO[bytes]], user: Optional[User],
-                                wgt_file: Optional[WgtFile] = None, template: Optional[TemplateParser] = None,
-                                deploy_only: bool = False) -> Optional[CatalogueResource]:
+def _deploy_packaged_resource(file: IO[bytes], wgt_file: Optional[WgtFile],
+                              template: Optional[TemplateParser]) -> tuple[MACD, str, dict[str, Any]]:
     close_wgt = False
     if wgt_file is None:
         wgt_file = WgtFile(file)
@@ -226,10 +239,19 @@ async def add_packaged_resource(db: DBSession, file: Union[str, IO[bytes]], user
     if close_wgt:
         wgt_file.close()
 
-    f = open(local_wgt, "wb")
-    file.seek(0)
-    f.write(file.read())
-    f.close()
+    with open(local_wgt, "wb") as f:
+        file.seek(0)
+        shutil.copyfileobj(file, f)
+
+    return resource_info, file_name, overrides
+
+
+async def add_packaged_resource(db: DBSession, file: Union[str, IO[bytes]], user: Optional[User],
+                                wgt_file: Optional[WgtFile] = None, template: Optional[TemplateParser] = None,
+                                deploy_only: bool = False) -> Optional[CatalogueResource]:
+    # Validating, extracting and copying the package are blocking operations
+    resource_info, file_name, overrides = await run_packaging_task(_deploy_packaged_resource, file, wgt_file,
+                                                                   template)
 
     if not deploy_only:
         for key, value in overrides.items():
@@ -251,6 +273,93 @@ async def add_packaged_resource(db: DBSession, file: Union[str, IO[bytes]], user
         return resource
 
 
+def clear_rendered_docs_cache() -> None:
+    _rendered_docs.clear()
+
+
+def _read_localized_doc(doc_path: str, lang: str) -> Optional[str]:
+    (filename_root, filename_ext) = os.path.splitext(doc_path)
+    for path in (filename_root + '.' + lang + filename_ext, doc_path):
+        try:
+            return download_local_file(path).decode('utf-8')
+        except Exception:
+            pass
+
+    return None
+
+
+def _render_canonical_doc(kind: str, doc_path: str, lang: str, cache_path: str) -> Optional[str]:
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        pass
+
+    doc_code = _read_localized_doc(doc_path, lang)
+    if doc_code is None:
+        return None
+
+    doc = markdown.markdown(doc_code, output_format='xhtml', extensions=DOC_MARKDOWN_EXTENSIONS[kind])
+    doc = clean_html(doc) if doc.strip() != '' else ''
+
+    # Write to a temporary file first, so concurrent readers never see a partial document
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=os.path.dirname(cache_path), delete=False) as f:
+            f.write(doc)
+        os.replace(f.name, cache_path)
+    except OSError as e:
+        logger.warning("Unable to store the rendered document %s: %s", cache_path, e)
+
+    return doc
+
+
+def _render_doc(kind: str, doc_path: str, base_url: Optional[str], lang: str, from_version: Optional[str],
+                cache_path: str) -> Optional[str]:
+    doc = _render_canonical_doc(kind, doc_path, lang, cache_path)
+    if doc is None or doc == '':
+        return doc
+
+    # Only the canonical rendering is stored on disk, the request dependent parts (the changelog version filter and
+    # the base url used for relative media) are applied on top of it
+    if from_version is not None:
+        doc = filter_changelog(doc, Version(from_version))
+        if doc.strip() == '':
+            return ''
+
+    if base_url is not None:
+        doc = clean_html(doc, base_url=base_url)
+
+    return doc
+
+
+async def get_rendered_resource_doc(resource: CatalogueResource, kind: str, doc_relative_path: str,
+                                    base_url: Optional[str], lang: str = 'en',
+                                    from_version: Optional[str] = None) -> Optional[tuple[str, str]]:
+    """
+    Returns the markdown document of the resource rendered as sanitized XHTML, together with its (strong) ETag, or
+    None if the document cannot be read. Installed resources never change, so documents are rendered once and stored
+    on disk next to the deployed resource and in memory.
+    """
+
+    key = (str(resource.id), kind, doc_relative_path, lang, from_version, base_url)
+    entry = _rendered_docs.get(key)
+    if entry is not None:
+        return entry
+
+    base_dir = wgt_deployer.get_base_dir(resource.vendor, resource.short_name, resource.version)
+    canonical_key = (str(resource.id), kind, doc_relative_path, lang)
+    cache_path = os.path.join(base_dir, RENDERED_DOCS_DIR, hashlib.sha1(repr(canonical_key).encode('utf-8')).hexdigest() + '.xhtml')
+    doc = await run_packaging_task(_render_doc, kind, os.path.join(base_dir, doc_relative_path), base_url, lang,
+                                   from_version, cache_path)
+    if doc is None:
+        return None
+
+    entry = (doc, '"%s"' % hashlib.sha1(doc.encode('utf-8')).hexdigest())
+    _rendered_docs.set(key, entry)
+    return entry
+
+
 async def get_resource_data(db: DBSession, resource: CatalogueResource, user: Optional[User],
                             request: Optional[Request] = None) -> CatalogueResourceDataSummary:
     """Gets all the information related to the given resource."""
@@ -270,21 +379,14 @@ async def get_resource_data(db: DBSession, resource: CatalogueResource, user: Op
     if longdescription != '':
         longdescription_relative_path = url2pathname(longdescription)
         longdescription_base_url = force_trailing_slash(urljoin(resource.get_template_url(request=request, for_base=True), pathname2url(os.path.dirname(longdescription_relative_path))))
-        longdescription_path = os.path.join(wgt_deployer.get_base_dir(resource.vendor, resource.short_name, resource.version), longdescription_relative_path)
 
-        (filename_root, filename_ext) = os.path.splitext(longdescription_path)
         # TODO Being able to get the user language instead of using 'en'
-        localized_longdescription_path = filename_root + '.' + "en" + filename_ext
-
         try:
-            description_code = download_local_file(localized_longdescription_path).decode('utf-8')
-            longdescription = clean_html(markdown.markdown(description_code, output_format='xhtml'), base_url=longdescription_base_url)
+            rendered = await get_rendered_resource_doc(resource, 'longdescription', longdescription_relative_path,
+                                                       longdescription_base_url)
         except Exception:
-            try:
-                description_code = download_local_file(longdescription_path).decode('utf-8')
-                longdescription = clean_html(markdown.markdown(description_code, output_format='xhtml'), base_url=longdescription_base_url)
-            except Exception:
-                longdescription = resource_info.description
+            rendered = None
+        longdescription = rendered[0] if rendered is not None else resource_info.description
     else:
         longdescription = resource_info.description
 
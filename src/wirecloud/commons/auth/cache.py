@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import time
+
+from wirecloud import settings
+from wirecloud.commons.auth.schemas import UserAll
+from wirecloud.commons.utils.structures import LRUCache
+from wirecloud.database import Id
+
+
+class _Loads:
+    """
+    Keys being loaded from the database and the invalidations received meanwhile, so values read before an
+    invalidation are not stored after it (the same approach used by ``SharedCache``).
+    """
+
+    def __init__(self):
+        # key -> [number of loads, invalidations received meanwhile, owner]
+        self._loads: dict[str, list] = {}
+        self._clear_generation = 0
+
+    def start(self, key: str, owner: Optional[str] = None) -> tuple[list, int, int]:
+        load = self._loads.get(key)
+        if load is None:
+            load = self._loads[key] = [0, 0, owner]
+        load[0] += 1
+        return load, load[1], self._clear_generation
+
+    def finish(self, key: str, started: tuple[list, int, int]) -> bool:
+        # Returns whether the key was left untouched while it was being loaded
+        load, generation, clear_generation = started
+        load[0] -= 1
+        if load[0] == 0:
+            del self._loads[key]
+        return load[1] == generation and clear_generation == self._clear_generation
+
+    def invalidate(self, key: str) -> None:
+        load = self._loads.get(key)
+        if load is not None:
+            load[1] += 1
+
+    def invalidate_owner(self, owner: str) -> None:
+        for load in self._loads.values():
+            if load[2] == owner:
+                load[1] += 1
+
+    def clear(self) -> None:
+        self._clear_generation += 1
+
+
+class PrincipalCache:
+    """
+    Process-local cache of the data resolved by the authentication dependencies: the validity of each token (by jti)
+    and the ``UserAll`` (including permissions) of each user. Both maps are bounded in size and entries expire after
+    ``ttl`` seconds (or when the token expires, if earlier), but the functions in ``wirecloud.commons.auth.crud``
+    that change tokens, users or group memberships invalidate the affected entries explicitly once their changes
+    are committed. Values loaded while one of these invalidations arrives are not stored.
+
+    When the deployment uses a ``SharedCache``, the invalidations are sent to the other workers through its pub/sub
+    channel, and the cache is bypassed while that channel is not being listened to. Otherwise (a single worker is
+    expected) a revoked token or a changed user may still be accepted by other workers for up to ``ttl`` seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.tokens = LRUCache(maxsize, ttl)
+        self.users = LRUCache(maxsize, ttl)
+        self._token_loads = _Loads()
+        self._user_loads = _Loads()
+
+    def get_token_validity(self, token_id: str) -> Optional[bool]:
+        if not is_coherent():
+            return None
+
+        entry = self.tokens.get(str(token_id))
+        return entry[1] if entry is not None else None
+
+    def set_token_validity(self, token_id: str, user_id: Id, valid: bool, expires_at: Optional[float] = None) -> None:
+        if not is_coherent():
+            return
+
+        ttl = None
+        if expires_at is not None:
+            ttl = expires_at - time.time()
+            if ttl <= 0:
+                return
+
+        self.tokens.set(str(token_id), (str(user_id), valid), ttl)
+
+    async def load_token_validity(self, token_id: str, user_id: Id, load: Callable[[], Awaitable[bool]],
+                                  expires_at: Optional[float] = None) -> bool:
+        """
+        Returns the validity obtained by calling ``load``, caching it until ``expires_at`` (a timestamp) at most unless
+        the token was invalidated meanwhile.
+        """
+
+        token_id = str(token_id)
+        started = self._token_loads.start(token_id, str(user_id))
+        try:
+            valid = await load()
+        finally:
+            unchanged = self._token_loads.finish(token_id, started)
+
+        if unchanged:
+            self.set_token_validity(token_id, user_id, valid, expires_at)
+        return valid
+
+    def get_user(self, user_id: Id) -> Optional[UserAll]:
+        if not is_coherent():
+            return None
+
+        user = self.users.get(str(user_id))
+        # Copy on read, handlers are free to modify the user they receive
+        return user.model_copy(deep=True) if user is not None else None
+
+    def set_user(self, user: UserAll) -> None:
+        if is_coherent():
+            self.users.set(str(user.id), user.model_copy(deep=True))
+
+    async def load_user(self, user_id: Id, load: Callable[[], Awaitable[Optional[UserAll]]]) -> Optional[UserAll]:
+        """Returns the user obtained by calling ``load``, caching it unless the user was invalidated meanwhile."""
+
+        user_id = str(user_id)
+        started = self._user_loads.start(user_id)
+        try:
+            user = await load()
+        finally:
+            unchanged = self._user_loads.finish(user_id, started)
+
+        if user is not None and unchanged:
+            self.set_user(user)
+        return user
+
+    def invalidate_tokens(self, token_ids: list[str], broadcast: bool = True) -> None:
+        token_ids = [str(token_id) for token_id in token_ids]
+        for token_id in token_ids:
+            self.tokens.delete(token_id)
+            self._token_loads.invalidate(token_id)
+
+        if broadcast:
+            _publish({"tokens": token_ids})
+
+    def invalidate_user_tokens(self, user_id: Id, broadcast: bool = True) -> None:
+        user_id = str(user_id)
+        self.tokens.delete_matching(lambda _token_id, entry: entry[0] == user_id)
+        self._token_loads.invalidate_owner(user_id)
+
+        if broadcast:
+            _publish({"user_tokens": user_id})
+
+    def invalidate_users(self, user_ids: Optional[list[Id]] = None, broadcast: bool = True) -> None:
+        for listener in _user_invalidation_listeners:
+            listener(user_ids)
+
+        if broadcast:
+            _publish({"users": [str(user_id) for user_id in user_ids] if user_ids is not None else None})
+
+        if user_ids is None:
+            self.users.clear()
+            self._user_loads.clear()
+            return
+
+        for user_id in user_ids:
+            self.users.delete(str(user_id))
+            self._user_loads.invalidate(str(user_id))
+
+    def process_message(self, message: Optional[dict[str, Any]]) -> None:
+        # Invalidations sent by other workers, None meaning that some of them may have been missed
+        if message is None:
+            self.clear()
+            for listener in _user_invalidation_listeners:
+                listener(None)
+        elif "tokens" in message:
+            self.invalidate_tokens(message["tokens"], broadcast=False)
+        elif "user_tokens" in message:
+            self.invalidate_user_tokens(message["user_tokens"], broadcast=False)
+        elif "users" in message:
+            self.invalidate_users(message["users"], broadcast=False)
+
+    def clear(self) -> None:
+        self.tokens.clear()
+        self.users.clear()
+        self._token_loads.clear()
+        self._user_loads.clear()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            "tokens": self.tokens.stats(),
+            "users": self.users.stats()
+        }
+
+
+PRINCIPAL_CACHE_TOPIC = 'auth:principals'
+
+_principal_cache: Optional[PrincipalCache] = None
+_user_invalidation_listeners: list[Callable[[Optional[list[Id]]], None]] = []
+_pending_messages: set[asyncio.Task] = set()
+
+
+def _get_shared_cache():
+    cache = getattr(settings, 'cache', None)
+    return cache if callable(getattr(cache, 'publish', None)) else None
+
+
+def is_coherent() -> bool:
+    """
+    Returns whether the user invalidations sent by the other workers (if any) are being received, so the process-local
+    caches of data derived from the users can be used.
+    """
+
+    shared_cache = _get_shared_cache()
+    if shared_cache is None:
+        return True
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+
+    return shared_cache.is_listening()
+
+
+def _process_shared_message(message: Optional[dict[str, Any]]) -> None:
+    if _principal_cache is not None:
+        _principal_cache.process_message(message)
+
+
+def _publish(message: dict[str, Any]) -> None:
+    shared_cache = _get_shared_cache()
+    if shared_cache is None:
+        return
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+
+    # Invalidations are called from synchronous code, the message is sent in the background
+    task = loop.create_task(shared_cache.publish(PRINCIPAL_CACHE_TOPIC, message))
+    _pending_messages.add(task)
+    task.add_done_callback(_pending_messages.discard)
+
+
+def add_user_invalidation_listener(listener: Callable[[Optional[list[Id]]], None]) -> None:
+    """
+    Registers a function called with the ids passed to ``PrincipalCache.invalidate_users`` (``None`` meaning all the
+    users), so other caches holding data derived from the users are invalidated at the same time.
+    """
+
+    if listener not in _user_invalidation_listeners:
+        _user_invalidation_listeners.append(listener)
+
+
+def get_principal_cache() -> PrincipalCache:
+    global _principal_cache
+
+    if _principal_cache is None:
+        _principal_cache = PrincipalCache(getattr(settings, 'AUTH_PRINCIPAL_CACHE_SIZE', 1024),
+                                          getattr(settings, 'AUTH_PRINCIPAL_CACHE_TTL', 30))
+
+        shared_cache = _get_shared_cache()
+        if shared_cache is not None:
+            shared_cache.add_listener(PRINCIPAL_CACHE_TOPIC, _process_shared_message)
+
+    return _principal_cache
+
+
+def clear_principal_cache() -> None:
+    global _principal_cache
+    _principal_cache = None
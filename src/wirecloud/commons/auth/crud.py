@@ -16,17 +16,37 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import Optional
+from typing import Optional, AsyncIterator
 from datetime import datetime, timezone
 
 from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
 
+from wirecloud.commons.auth.cache import get_principal_cache
 from wirecloud.commons.auth.schemas import User, UserWithPassword, Permission, UserAll, UserCreate, GroupCreate, \
     OrganizationCreate
 from wirecloud.commons.auth.models import DBUser as UserModel
 from wirecloud.commons.auth.models import Group as GroupModel, Group
 from wirecloud.commons.auth.models import DBPlatformPreference as PlatformPreferenceModel
-from wirecloud.database import DBSession, Id
+from wirecloud.database import DBSession, Id, on_commit
+
+INDEXES = {
+    "users": (
+        IndexModel([("username", ASCENDING)], name="wirecloud_username"),
+    ),
+    "groups": (
+        IndexModel([("name", ASCENDING)], name="wirecloud_name"),
+        IndexModel([("codename", ASCENDING)], name="wirecloud_codename"),
+        IndexModel([("path", ASCENDING)], name="wirecloud_path"),
+        IndexModel([("users", ASCENDING)], name="wirecloud_users"),
+    ),
+    "tokens": (
+        # Expired tokens are never valid again, let MongoDB remove them
+        IndexModel([("expiration", ASCENDING)], name="wirecloud_expiration_ttl", expireAfterSeconds=0),
+        IndexModel([("idm_session", ASCENDING)], name="wirecloud_idm_session", sparse=True),
+        IndexModel([("user_id", ASCENDING)], name="wirecloud_user_id"),
+    ),
+}
 
 
 async def create_token(db: DBSession, expiration: datetime, user_id: Id, idm_session: Optional[str] = None) -> ObjectId:
@@ -61,26 +81,32 @@ async def is_token_valid(db: DBSession, token_id: ObjectId) -> bool:
 async def set_token_expiration(db: DBSession, token_id: ObjectId, expiration: datetime) -> None:
     query = {"_id": token_id}, {"$set": {"expiration": expiration}}
     await db.client.tokens.update_one(*query)
+    on_commit(db, lambda: get_principal_cache().invalidate_tokens([token_id]))
 
 
 async def invalidate_token(db: DBSession, token_id: ObjectId) -> None:
     query = {"_id": token_id}, {"$set": {"valid": False}}
     await db.client.tokens.update_one(*query)
+    on_commit(db, lambda: get_principal_cache().invalidate_tokens([token_id]))
 
 
 async def invalidate_tokens_by_idm_session(db: DBSession, idm_session: str) -> None:
+    tokens = await db.client.tokens.find({"idm_session": idm_session}, {"_id": 1}).to_list()
+
     query = {"idm_session": idm_session}, {"$set": {"valid": False}}
     await db.client.tokens.update_many(*query)
+    on_commit(db, lambda: get_principal_cache().invalidate_tokens([token["_id"] for token in tokens]))
 
 
 async def invalidate_all_user_tokens(db: DBSession, user_id: Id) -> None:
     query = {"user_id": user_id}, {"$set": {"valid": False}}
     await db.client.tokens.update_many(*query)
+    on_commit(db, lambda: get_principal_cache().invalidate_user_tokens(user_id))
 
 
 async def get_token_idm_session(db: DBSession, token_id: ObjectId) -> Optional[str]:
     token = await db.client.tokens.find_one({"_id": token_id})
-    return token.get("idm_session")
+    return token.get("idm_session") if token is not None else None
 
 
 async def create_user_db(db: DBSession, user_info: UserCreate) -> UserModel:
@@ -112,6 +138,7 @@ async def update_user(db: DBSession, user_info: User) -> None:
 
     query = {"_id": ObjectId(user_info.id)}, {"$set": user_info.model_dump(by_alias=True, exclude={"id"})}
     await db.client.users.update_one(*query)
+    on_commit(db, lambda: get_principal_cache().invalidate_users([user_info.id]))
     await add_user_to_index(user_info)
 
 
@@ -121,6 +148,7 @@ async def update_user_with_all_info(db: DBSession, user: UserAll) -> None:
 
     data = user.model_dump(exclude={"id"}, by_alias=True)
     await db.client.users.update_one(query, {"$set": data})
+    on_commit(db, lambda: get_principal_cache().invalidate_users([user.id]))
     await add_user_to_index(user)
 
 
@@ -132,6 +160,7 @@ async def delete_user(db: DBSession, user: User) -> None:
     query = {"_id": ObjectId(user.id)}
 
     await db.client.users.delete_one(query)
+    on_commit(db, lambda: get_principal_cache().invalidate_users([user.id]))
     await delete_user_from_index(user)
 
 
@@ -307,6 +336,7 @@ async def add_user_to_groups_by_codename(db: DBSession, user_id: Id, group_names
 
         updated_group_ids = list(current_group_ids.union(new_group_ids))
         await db.client.users.update_one(user_query, {"$set": {"groups": updated_group_ids}})
+        on_commit(db, lambda: get_principal_cache().invalidate_users([user_id]))
 
 
 async def create_group_if_not_exists(db: DBSession, group_info: Group) -> None:
@@ -334,16 +364,24 @@ async def remove_user_from_all_groups(db: DBSession, user_id: Id) -> None:
     )
 
     await db.client.users.update_one(query, {"$set": {"groups": []}})
+    on_commit(db, lambda: get_principal_cache().invalidate_users([user_id]))
 
 
 async def set_login_date_for_user(db: DBSession, user_id: Id) -> None:
     query = {"_id": ObjectId(user_id)}, {"$set": {"last_login": datetime.now(timezone.utc)}}
     await db.client.users.update_one(*query)
+    on_commit(db, lambda: get_principal_cache().invalidate_users([user_id]))
+
+
+async def set_user_password(db: DBSession, user_id: Id, password_hash: str) -> None:
+    query = {"_id": ObjectId(user_id)}, {"$set": {"password": password_hash}}
+    await db.client.users.update_one(*query)
 
 
 async def remove_user_idm_data(db: DBSession, user_id: Id, provider: str) -> None:
     query = {"_id": ObjectId(user_id)}, {"$unset": {f"idm_data.{provider}": ""}}
     await db.client.users.update_one(*query)
+    on_commit(db, lambda: get_principal_cache().invalidate_users([user_id]))
 
 
 async def get_username_by_id(db: DBSession, user_id: Id) -> Optional[str]:
@@ -356,6 +394,21 @@ async def get_username_by_id(db: DBSession, user_id: Id) -> Optional[str]:
     return user.get("username")
 
 
+async def get_user_names_by_ids(db: DBSession, user_ids: list[Id]) -> dict[str, tuple[str, str]]:
+    """Returns the username and the full name of the given users, by user id. Missing users are left out."""
+
+    if len(user_ids) == 0:
+        return {}
+
+    query = {"_id": {"$in": [ObjectId(user_id) for user_id in user_ids]}}
+    users = await db.client.users.find(query, {"username": 1, "first_name": 1, "last_name": 1}).to_list()
+
+    return {
+        str(user["_id"]): (user["username"], f"{user.get('first_name', '')} {user.get('last_name', '')}".strip())
+        for user in users
+    }
+
+
 async def get_user_preferences(db: DBSession, user_id: Id, name: str = None) -> Optional[list[PlatformPreferenceModel]]:
     query = {"_id": ObjectId(user_id)}
     user = await db.client.users.find_one(query)
@@ -395,6 +448,16 @@ async def get_group_by_id(db: DBSession, group_id: Id) -> Optional[Group]:
     return GroupModel.model_validate(group)
 
 
+async def get_groups_by_ids(db: DBSession, group_ids: list[Id]) -> list[Group]:
+    if len(group_ids) == 0:
+        return []
+
+    query = {"_id": {"$in": [ObjectId(group_id) for group_id in group_ids]}}
+    groups = await db.client.groups.find(query).to_list()
+
+    return [GroupModel.model_validate(group) for group in groups]
+
+
 async def get_all_groups(db: DBSession) -> list[Group]:
     groups = await db.client.groups.find().to_list()
     return [GroupModel.model_validate(group) for group in groups]
@@ -405,6 +468,16 @@ async def get_all_users(db: DBSession):
     return [UserModel.model_validate(user) for user in users]
 
 
+async def iter_all_users(db: DBSession, batch_size: int = 500) -> AsyncIterator[UserModel]:
+    async for user in db.client.users.find(batch_size=batch_size):
+        yield UserModel.model_validate(user)
+
+
+async def iter_all_groups(db: DBSession, batch_size: int = 500) -> AsyncIterator[Group]:
+    async for group in db.client.groups.find(batch_size=batch_size):
+        yield GroupModel.model_validate(group)
+
+
 async def get_all_parent_groups_from_child(db: DBSession, child_group_id: Id) -> list[Group]:
     child = await db.client.groups.find_one({"_id": child_group_id}, {"path": 1})
     if not child or "path" not in child:
@@ -459,6 +532,7 @@ async def add_group_to_users(db: DBSession, group_id: Id, users: list[Id]) -> No
         {"_id": {"$in": users}},
         {"$addToSet": {"groups": group_id}}
     )
+    on_commit(db, lambda: get_principal_cache().invalidate_users(users))
 
 
 async def remove_group_to_users(db: DBSession, group_id: Id, users: list[Id]) -> None:
@@ -466,6 +540,7 @@ async def remove_group_to_users(db: DBSession, group_id: Id, users: list[Id]) ->
         {"_id": {"$in": users}},
         {"$pull": {"groups": group_id}}
     )
+    on_commit(db, lambda: get_principal_cache().invalidate_users(users))
 
 
 async def update_group(db: DBSession, group: Group) -> None:
@@ -474,6 +549,8 @@ async def update_group(db: DBSession, group: Group) -> None:
 
     data = group.model_dump(by_alias=True)
     await db.client.groups.update_one(query, {"$set": data})
+    # Group permissions are part of the cached principal of every (current or former) member
+    on_commit(db, lambda: get_principal_cache().invalidate_users())
     await add_group_to_index(group)
 
 
@@ -509,6 +586,8 @@ async def delete_group(db: DBSession, group: Group, skip_descendants: bool = Fal
 
     query_delete = {"_id": ObjectId(group.id)}
     await db.client.groups.delete_one(query_delete)
+    # The permissions of the group were inherited by the members of its descendants
+    on_commit(db, lambda: get_principal_cache().invalidate_users())
     await delete_group_from_index(group)
 
 
@@ -541,6 +620,8 @@ async def delete_organization(db: DBSession, organization: Group) -> None:
         await remove_group_to_users(db, group["_id"], group["users"])
         await delete_group_from_index(GroupModel.model_validate(group))
 
+    on_commit(db, lambda: get_principal_cache().invalidate_users())
+
 
 async def get_all_organization_groups(db: DBSession, organization_group: Group) -> list[Group]:
     groups = await db.client.groups.find({"path": organization_group.id}).to_list(None)
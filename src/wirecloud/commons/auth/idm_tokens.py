@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+from typing import Any, Awaitable, Callable, Hashable, Optional, TypeVar
+import asyncio
+import time
+
+from wirecloud import settings
+from wirecloud.commons.auth.crud import get_user_by_id, update_user
+from wirecloud.commons.auth.schemas import UserAll
+from wirecloud.commons.utils.structures import LRUCache
+from wirecloud.database import Id, commit, get_session
+from wirecloud.platform.plugins import get_idm_get_token_functions
+
+T = TypeVar('T')
+
+# Tokens are discarded this number of seconds before they expire, so they are not rejected by the services they are
+# sent to
+EXPIRATION_MARGIN = 30
+TOKEN_CACHE_SIZE = 1024
+
+_RETRY = object()
+
+
+def parse_expires_in(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenCache:
+    """
+    Process-local cache of the tokens obtained from external services. Entries are kept until they expire (minus
+    ``EXPIRATION_MARGIN``) and concurrent requests for a missing entry wait for a single call to the function
+    obtaining it (single-flight), sharing its result or its error.
+    """
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE):
+        self.entries = LRUCache(maxsize)
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable[tuple[T, Optional[float]]]],
+                  is_valid: Callable[[T], bool] = lambda _value: True) -> T:
+        while True:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > time.monotonic() and is_valid(entry[0]):
+                return entry[0]
+
+            future = self._inflight.get(key)
+            if future is None:
+                break
+
+            result = await asyncio.shield(future)
+            # The request obtaining the token was cancelled, try again
+            if result is not _RETRY:
+                return result
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value, expires_in = await fetch()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the error as retrieved, there may be no request waiting for it
+            future.exception()
+            raise
+        except BaseException:
+            future.set_result(_RETRY)
+            raise
+        finally:
+            del self._inflight[key]
+
+        if expires_in is not None and expires_in > EXPIRATION_MARGIN:
+            self.entries.set(key, (value, time.monotonic() + expires_in - EXPIRATION_MARGIN))
+        future.set_result(value)
+        return value
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> None:
+        self.entries.delete_matching(lambda key, _entry: predicate(key))
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+_access_tokens = TokenCache()
+
+
+def get_idm_token_cache() -> TokenCache:
+    return _access_tokens
+
+
+async def get_idm_access_token(user: UserAll) -> str:
+    """
+    Returns an access token of the user for the IdM configured in ``OID_CONNECT_PLUGIN``. Tokens are obtained by
+    exchanging the refresh token stored in the IdM data of the user and are reused while that refresh token (or the
+    one it was rotated to) is the stored one. The rotated refresh tokens are saved. Raises ``ValueError`` if the IdM
+    does not issue the token.
+    """
+
+    plugin = getattr(settings, "OID_CONNECT_PLUGIN")
+    refresh_token = user.idm_data[plugin]["idm_token"]
+
+    async def fetch() -> tuple[tuple[str, frozenset[str]], Optional[float]]:
+        # The stored refresh token is read and updated through a regular session, as the session of the request may
+        # read from a secondary member of the replica set
+        async for db in get_session():  # pragma: no branch
+            # ``user`` may come from the principal cache and hold a refresh token already rotated by another worker,
+            # exchanging it again would be rejected by the IdM
+            stored_user = await get_user_by_id(db, user.id)
+            stored_refresh_token = None
+            if stored_user is not None:
+                stored_refresh_token = stored_user.idm_data.get(plugin, {}).get("idm_token")
+            if not stored_refresh_token:
+                raise ValueError("The user has no refresh token for the IdM")
+
+            token_data_get_func = get_idm_get_token_functions()[plugin]
+            if asyncio.iscoroutinefunction(token_data_get_func):
+                token_data = await token_data_get_func(refresh_token=stored_refresh_token, code=None, redirect_uri=None)
+            else:
+                token_data = token_data_get_func(refresh_token=stored_refresh_token, code=None, redirect_uri=None)
+
+            if token_data["refresh_token"] != stored_refresh_token:
+                stored_user.idm_data[plugin]["idm_token"] = token_data["refresh_token"]
+                await update_user(db, stored_user)
+                await commit(db)
+            user.idm_data[plugin]["idm_token"] = token_data["refresh_token"]
+
+            refresh_tokens = frozenset((refresh_token, stored_refresh_token, token_data["refresh_token"]))
+            return (token_data["access_token"], refresh_tokens), parse_expires_in(token_data.get("expires_in"))
+
+    access_token, _refresh_tokens = await _access_tokens.get((str(user.id), plugin), fetch,
+                                                             lambda value: refresh_token in value[1])
+    return access_token
+
+
+def invalidate_idm_tokens(user_id: Id) -> None:
+    user_id = str(user_id)
+    _access_tokens.invalidate(lambda key: key[0] == user_id)
+
+
+def clear_idm_token_cache() -> None:
+    _access_tokens.clear()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+from typing import Any, Callable, Optional, TypeVar
+
+from wirecloud import settings
+from wirecloud.commons.auth.utils import check_password, hash_password, get_password_iterations
+from wirecloud.commons.utils.executor import BoundedExecutor, ExecutorBusy
+
+T = TypeVar('T')
+
+
+def _timed(func: Callable[..., T], *args: Any) -> tuple[T, float]:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class PasswordHasher:
+    """
+    Runs the password hashing functions (PBKDF2 with hundreds of thousands of iterations) on a dedicated pool of
+    ``workers`` threads, so logins don't block the event loop. At most ``queue_size`` calls wait for a free worker,
+    further calls are rejected with ``ExecutorBusy`` instead of piling up.
+    """
+
+    def __init__(self, workers: int, queue_size: int, iterations: int):
+        self.iterations = iterations
+        self._executor = BoundedExecutor(workers, thread_name_prefix='password-hashing', max_queued=queue_size)
+        self.completed = 0
+        self.rejected = 0
+        self._total_time = 0.0
+        self._max_time = 0.0
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        try:
+            result, elapsed = await self._executor.run(_timed, func, *args)
+        except ExecutorBusy:
+            self.rejected += 1
+            raise
+
+        self.completed += 1
+        self._total_time += elapsed
+        self._max_time = max(self._max_time, elapsed)
+        return result
+
+    async def check_password(self, password: str, password_hash: str) -> bool:
+        return await self._run(check_password, password, password_hash)
+
+    async def hash_password(self, password: str) -> str:
+        return await self._run(hash_password, password, self.iterations)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        iterations = get_password_iterations(password_hash)
+        return iterations is not None and iterations < self.iterations
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": self._executor.max_workers,
+            "running": self._executor.running,
+            "queued": self._executor.queued,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "latency_ms_avg": self._total_time / self.completed * 1000 if self.completed else 0.0,
+            "latency_ms_max": self._max_time * 1000,
+        }
+
+
+_password_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    global _password_hasher
+
+    if _password_hasher is None:
+        _password_hasher = PasswordHasher(getattr(settings, 'PASSWORD_HASHING_WORKERS', 2),
+                                          getattr(settings, 'PASSWORD_HASHING_QUEUE_SIZE', 64),
+                                          getattr(settings, 'PASSWORD_HASH_ITERATIONS', 150000))
+
+    return _password_hasher
+
+
+def clear_password_hasher() -> None:
+    global _password_hasher
+
+    if _password_hasher is not None:
+        _password_hasher.shutdown()
+        _password_hasher = None
@@ -35,9 +35,12 @@ from wirecloud.commons.auth.crud import get_user_with_password, set_login_date_f
     create_group_if_not_exists, remove_user_from_all_groups, set_token_expiration, remove_user_idm_data, \
     get_user_with_all_info_by_username, get_token_idm_session, update_user_with_all_info, delete_user, \
     get_group_by_name, get_user_by_id, create_group_db, add_group_to_users, remove_group_to_users, update_group, \
-    delete_group, create_organization_db, get_all_organization_groups, update_path_for_descendants, delete_organization
-from wirecloud.commons.auth.utils import check_password, SessionDepNoCSRF, SessionDep, \
-    UserDep, UserDepNoCSRF, RealUserDep, hash_password
+    delete_group, create_organization_db, get_all_organization_groups, update_path_for_descendants, delete_organization, \
+    set_user_password
+from wirecloud.commons.auth.idm_tokens import invalidate_idm_tokens
+from wirecloud.commons.auth.passwords import get_password_hasher
+from wirecloud.commons.auth.utils import SessionDepNoCSRF, SessionDep, UserDep, UserDepNoCSRF, RealUserDep
+from wirecloud.commons.utils.executor import ExecutorBusy
 from wirecloud.database import DBDep, commit
 from wirecloud.commons.utils.http import build_error_response, build_validation_error_response, produces, consumes, \
     get_redirect_response, get_absolute_reverse_url, resolve_url_name, authentication_required
@@ -55,6 +58,27 @@ base_router = APIRouter()
 admin_router = APIRouter()
 
 
+async def _check_login_password(db: DBDep, user: UserWithPassword, password: str) -> bool:
+    password_hasher = get_password_hasher()
+    if not await password_hasher.check_password(password, user.password):
+        return False
+
+    # The plain password is only known here, upgrade the hash if it was created with fewer iterations
+    if password_hasher.needs_rehash(user.password):
+        try:
+            await set_user_password(db, user.id, await password_hasher.hash_password(password))
+        except ExecutorBusy:
+            # Try again on the next login
+            pass
+
+    return True
+
+
+def _build_busy_response(request: Request) -> Response:
+    return build_error_response(request, 503, _("Too many requests are being processed, please try again later"),
+                                headers={"Retry-After": "1"})
+
+
 @base_router.get(
     "/oidc/callback",
     summary=docs.oidc_login_summary,
@@ -232,7 +256,12 @@ async def api_login(request: Request, db: DBDep):
         return build_validation_error_response(request)
 
     user: UserWithPassword = await get_user_with_password(db, login_data.username)
-    if user is None or not user.is_active or not check_password(login_data.password, user.password):
+    try:
+        valid_login = user is not None and user.is_active and await _check_login_password(db, user, login_data.password)
+    except ExecutorBusy:
+        return _build_busy_response(request)
+
+    if not valid_login:
         return build_error_response(request, 401, _("Invalid username or password"))
 
     await set_login_date_for_user(db, user.id)
@@ -308,7 +337,12 @@ async def login(request: Request, db: DBDep):
         return build_validation_error_response(request)
 
     user: UserWithPassword = await get_user_with_password(db, login_data.username)
-    if user is None or not user.is_active or not check_password(login_data.password, user.password):
+    try:
+        valid_login = user is not None and user.is_active and await _check_login_password(db, user, login_data.password)
+    except ExecutorBusy:
+        return _build_busy_response(request)
+
+    if not valid_login:
         return render_wirecloud(request, page="registration/login", title="Login", extra_context={"form": {"errors": True}})
 
     await set_login_date_for_user(db, user.id)
@@ -379,6 +413,9 @@ async def logout(request: Request, db: DBDep, session: SessionDepNoCSRF, user: U
         except Exception as e:
             pass
 
+        # The access tokens obtained for the proxied requests of the user must not outlive the IdM session
+        invalidate_idm_tokens(user.id)
+
     response = get_redirect_response(request)
 
     # Remove cookies
@@ -609,7 +646,10 @@ async def create_user(db: DBDep, request: Request, user: UserDep,
     if await get_user_by_username(db, user_data.username) is not None:
         return build_error_response(request, 409, _("A user with that username already exists"))
 
-    user_data.password = hash_password(user_data.password)
+    try:
+        user_data.password = await get_password_hasher().hash_password(user_data.password)
+    except ExecutorBusy:
+        return _build_busy_response(request)
     user = await create_user_db(db, user_data)
     await add_user_to_index(User(**user.model_dump(by_alias=False)))
 
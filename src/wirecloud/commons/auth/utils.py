@@ -31,6 +31,7 @@ from typing import Annotated
 from wirecloud import settings
 from wirecloud.database import DBDep, Id
 from wirecloud.commons.auth.schemas import Session, UserAll
+from wirecloud.commons.auth.cache import get_principal_cache
 from wirecloud.commons.auth.crud import is_token_valid, get_user_with_all_info
 from wirecloud.translation import gettext as _
 
@@ -67,7 +68,15 @@ async def get_token_contents(token: Annotated[str, Depends(login_scheme)], reque
     if 'jti' not in token_contents:
         return None
 
-    token_valid = await is_token_valid(db, ObjectId(token_contents['jti']))
+    principal_cache = get_principal_cache()
+    token_valid = principal_cache.get_token_validity(token_contents['jti'])
+    if token_valid is None:
+        # Tokens created when switching users belong to the real user
+        token_owner = token_contents['real_user'].get('id') if 'real_user' in token_contents else token_contents['sub']
+        token_valid = await principal_cache.load_token_validity(
+            token_contents['jti'], token_owner, lambda: is_token_valid(db, ObjectId(token_contents['jti'])),
+            expires_at=token_contents['exp'])
+
     if not token_valid:
         return None
 
@@ -117,7 +126,11 @@ async def get_user(db: DBDep, token: Token, real_user: bool) -> Union[UserAll, N
     if real_user and 'real_user' in token:
         sub = token['real_user'].get('id')
 
-    user = await get_user_with_all_info(db, Id(sub))
+    principal_cache = get_principal_cache()
+    user = principal_cache.get_user(sub)
+    if user is None:
+        user = await principal_cache.load_user(sub, lambda: get_user_with_all_info(db, Id(sub)))
+
     if user is None or not user.is_active:
         return None
 
@@ -194,10 +207,21 @@ def check_password(password: str, password_hash: str) -> bool:
     return False
 
 
-def hash_password(password: str) -> str:
+def get_password_iterations(password_hash: str) -> Optional[int]:
+    if not password_hash.startswith('pbkdf2_sha256$'):
+        return None
+
+    try:
+        return int(password_hash.split('$')[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def hash_password(password: str, iterations: Optional[int] = None) -> str:
     algorithm = 'pbkdf2_sha256'
     salt = secrets.token_hex(16)
-    iterations = 150000
+    if iterations is None:
+        iterations = getattr(settings, 'PASSWORD_HASH_ITERATIONS', 150000)
     hashed_password = pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('ascii'), iterations)
     return f'{algorithm}${iterations}${salt}${b64encode(hashed_password).decode("ascii")}'
 
@@ -25,6 +25,7 @@ from starlette.requests import cookie_parser
 
 from typing import Optional
 from wirecloud import settings
+from wirecloud.translation import override_language
 
 DEFAULT_LANGUAGE = getattr(settings, "DEFAULT_LANGUAGE", "en")
 AVAILABLE_LANGUAGES = [lang[0] for lang in settings.LANGUAGES]
@@ -79,8 +80,9 @@ class LocaleMiddleware(BaseHTTPMiddleware):
         accept_lang_header = request.headers.get("Accept-Language")
         request.state.lang = get_language_from_req_data(accept_lang_header, request.query_params.get("lang"), request.cookies.get("lang"))
 
-        # Call the next middleware
-        response = await call_next(request)
+        # Call the next middleware, gettext reads the language from the context
+        with override_language(request.state.lang):
+            response = await call_next(request)
 
         # Add a Content-Language header to the response
         response.headers["Content-Language"] = request.state.lang
@@ -107,7 +109,8 @@ class LocaleWSMiddleware:
         language = get_language_from_req_data(headers.get("accept-language"), query_params.get("lang"), cookies.get("lang"))
         scope["state"]["lang"] = language
 
-        await self.app(scope, receive, send)
+        with override_language(language):
+            await self.app(scope, receive, send)
         return None
 
 
@@ -128,8 +131,25 @@ class ContentTypeUTF8Middleware(BaseHTTPMiddleware):
         return response
 
 
+class CompressionMiddleware:
+    """
+    GZipMiddleware leaving range requests untouched, the ranges refer to the uncompressed contents. Responses that are
+    already compressed (e.g. precompressed static files) are never compressed again by GZipMiddleware.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, compresslevel: int = 9) -> None:
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "range" in Headers(scope=scope):
+            return await self.app(scope, receive, send)
+
+        await self.gzip(scope, receive, send)
+
+
 def install_all_middlewares(app: FastAPI) -> None:
     app.add_middleware(LocaleMiddleware)
     app.add_middleware(LocaleWSMiddleware)
-    app.add_middleware(GZipMiddleware)
+    app.add_middleware(CompressionMiddleware)
     app.add_middleware(ContentTypeUTF8Middleware)
\ No newline at end of file
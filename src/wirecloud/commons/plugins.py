@@ -21,7 +21,9 @@ from typing import Any, Callable, Optional
 
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
+from pymongo import IndexModel
 
+from wirecloud.commons.auth.crud import INDEXES as AUTH_INDEXES
 from wirecloud.commons.auth.routes import router as auth_router
 from wirecloud.commons.auth.routes import base_router as auth_base_router
 from wirecloud.commons.auth.schemas import UserLogin
@@ -32,12 +34,13 @@ from wirecloud.commons.routes import (
     error_response_handler,
     permission_denied_handler,
     not_found_handler,
+    conflict_handler,
     validation_exception_handler,
     value_error_handler,
     general_exception_handler
 )
 from wirecloud.commons.urls import get_urlpatterns
-from wirecloud.commons.utils.http import PermissionDenied, NotFound
+from wirecloud.commons.utils.http import PermissionDenied, NotFound, Conflict
 from wirecloud.platform.plugins import WirecloudPlugin, URLTemplate
 
 
@@ -56,6 +59,7 @@ class WirecloudCommonsPlugin(WirecloudPlugin):
         app.add_exception_handler(ErrorResponse, error_response_handler)
         app.add_exception_handler(PermissionDenied, permission_denied_handler)
         app.add_exception_handler(NotFound, not_found_handler)
+        app.add_exception_handler(Conflict, conflict_handler)
         app.add_exception_handler(RequestValidationError, validation_exception_handler)
         app.add_exception_handler(ValueError, value_error_handler)
         app.add_exception_handler(Exception, general_exception_handler)
@@ -71,3 +75,51 @@ class WirecloudCommonsPlugin(WirecloudPlugin):
     def get_management_commands(self, subparsers: _SubParsersAction) -> dict[str, Callable]:
         return setup_commands(subparsers)
 
+    def get_database_indexes(self) -> dict[str, tuple[IndexModel, ...]]:
+        return AUTH_INDEXES
+
+    def get_config_validators(self) -> tuple[Callable, ...]:
+        def validate_auth_settings(settings, _offline: bool) -> None:
+            # AUTH_PRINCIPAL_CACHE_SIZE (default: 1024 tokens and 1024 users)
+            if not hasattr(settings, 'AUTH_PRINCIPAL_CACHE_SIZE'):
+                setattr(settings, 'AUTH_PRINCIPAL_CACHE_SIZE', 1024)
+
+            if not isinstance(settings.AUTH_PRINCIPAL_CACHE_SIZE, int) or settings.AUTH_PRINCIPAL_CACHE_SIZE <= 0:
+                raise ValueError("AUTH_PRINCIPAL_CACHE_SIZE must be a positive integer")
+
+            # AUTH_PRINCIPAL_CACHE_TTL (default: 30 seconds)
+            if not hasattr(settings, 'AUTH_PRINCIPAL_CACHE_TTL'):
+                setattr(settings, 'AUTH_PRINCIPAL_CACHE_TTL', 30)
+
+            if isinstance(settings.AUTH_PRINCIPAL_CACHE_TTL, bool) or not isinstance(settings.AUTH_PRINCIPAL_CACHE_TTL, (int, float)) \
+                    or settings.AUTH_PRINCIPAL_CACHE_TTL <= 0:
+                raise ValueError("AUTH_PRINCIPAL_CACHE_TTL must be a positive number")
+
+            # PASSWORD_HASH_ITERATIONS (default: 150000 PBKDF2 iterations, hashes using fewer iterations are upgraded on
+            # login). Higher values (e.g. the 600000 iterations recommended by OWASP) increase the CPU time of every
+            # login by the same factor, PASSWORD_HASHING_WORKERS should be raised accordingly
+            if not hasattr(settings, 'PASSWORD_HASH_ITERATIONS'):
+                setattr(settings, 'PASSWORD_HASH_ITERATIONS', 150000)
+
+            if isinstance(settings.PASSWORD_HASH_ITERATIONS, bool) or not isinstance(settings.PASSWORD_HASH_ITERATIONS, int) \
+                    or settings.PASSWORD_HASH_ITERATIONS <= 0:
+                raise ValueError("PASSWORD_HASH_ITERATIONS must be a positive integer")
+
+            # PASSWORD_HASHING_WORKERS (default: 2 passwords hashed at the same time per worker)
+            if not hasattr(settings, 'PASSWORD_HASHING_WORKERS'):
+                setattr(settings, 'PASSWORD_HASHING_WORKERS', 2)
+
+            if isinstance(settings.PASSWORD_HASHING_WORKERS, bool) or not isinstance(settings.PASSWORD_HASHING_WORKERS, int) \
+                    or settings.PASSWORD_HASHING_WORKERS <= 0:
+                raise ValueError("PASSWORD_HASHING_WORKERS must be a positive integer")
+
+            # PASSWORD_HASHING_QUEUE_SIZE (default: 64 passwords waiting, further logins are rejected with a 503)
+            if not hasattr(settings, 'PASSWORD_HASHING_QUEUE_SIZE'):
+                setattr(settings, 'PASSWORD_HASHING_QUEUE_SIZE', 64)
+
+            if isinstance(settings.PASSWORD_HASHING_QUEUE_SIZE, bool) or not isinstance(settings.PASSWORD_HASHING_QUEUE_SIZE, int) \
+                    or settings.PASSWORD_HASHING_QUEUE_SIZE < 0:
+                raise ValueError("PASSWORD_HASHING_QUEUE_SIZE must be a non-negative integer")
+
+        return (validate_auth_settings,)
+
@@ -27,7 +27,7 @@ from wirecloud.commons.search import get_search_engine, is_available_search_engi
 from wirecloud.commons.templates.tags import get_javascript_catalogue
 from wirecloud.commons import docs
 from wirecloud import docs as root_docs
-from wirecloud.commons.utils.http import produces, build_error_response, PermissionDenied, NotFound
+from wirecloud.commons.utils.http import produces, build_error_response, PermissionDenied, NotFound, Conflict
 from wirecloud.commons.exceptions import ErrorResponse
 from wirecloud.database import DBDep
 from wirecloud.translation import gettext as _
@@ -53,6 +53,11 @@ async def not_found_handler(request: Request, exc: NotFound):
     return build_error_response(request, 404, error_msg)
 
 
+async def conflict_handler(request: Request, exc: Conflict):
+    error_msg = str(exc) if str(exc) else _('The resource has been modified by another request')
+    return build_error_response(request, 409, error_msg)
+
+
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     errors = {}
     for error in exc.errors():
@@ -16,16 +16,19 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import Optional, Callable, Union
+import re
+import time
+from datetime import datetime, timezone
+from typing import Optional, Callable, Union, AsyncIterator, Awaitable
 from fastapi import Request
 
-from elasticsearch import AsyncElasticsearch
+from elasticsearch import AsyncElasticsearch, NotFoundError
 from elasticsearch.helpers import async_bulk
 from pydantic import BaseModel
 
 from wirecloud import settings
 from wirecloud.catalogue.search import ResourceOutResponse, RESOURCES_INDEX
-from wirecloud.commons.auth.crud import get_all_users, get_all_groups
+from wirecloud.commons.auth.crud import iter_all_users, iter_all_groups
 from wirecloud.commons.auth.models import Group
 from wirecloud.commons.auth.schemas import User
 from wirecloud.database import DBSession
@@ -37,6 +40,20 @@ es_client = AsyncElasticsearch(hosts=f"{'https' if settings.ELASTICSEARCH['SECUR
 USERS_INDEX = 'users'
 GROUPS_INDEX = 'groups'
 
+# Number of documents sent to Elasticsearch on each bulk request when rebuilding an index
+REBUILD_CHUNK_SIZE = 500
+
+# Alias given to the index being built by rebuild_index (after its name). The changes made to the live index while
+# the documents are copied are also applied to the new one, so they are not lost when it replaces the live index
+REBUILD_ALIAS_SUFFIX = '-rebuilding'
+# Documents deleted while an index is being rebuilt are replaced by a document only holding this field in the new
+# index, so the copy does not add them back. They are removed before the new index replaces the live one
+REBUILD_DELETED_FIELD = 'rebuild_deleted'
+
+# Called during index rebuilds with the index alias, the number of documents indexed so far, the elapsed time in
+# seconds and whether the rebuild has finished
+RebuildProgressCallback = Callable[[str, int, float, bool], None]
+
 USER_CONTENT_FIELDS = ['fullname', 'username']
 GROUP_CONTENT_FIELDS = ['name']
 
@@ -165,7 +182,7 @@ def get_available_search_engines() -> dict[str, Callable[[str, int, int, Optiona
     return _available_search_engines
 
 
-def get_available_rebuild_engines() -> dict[str, Callable[[DBSession], None]]:
+def get_available_rebuild_engines() -> dict[str, Callable[..., Awaitable[int]]]:
     global _available_rebuild_engines
 
     if _available_rebuild_engines is None:
@@ -192,42 +209,48 @@ def get_search_engine(indexname: str) -> Optional[Callable[[str, int, int, Optio
     return get_available_search_engines().get(indexname)
 
 
-def get_rebuild_engine(indexname: str) -> Optional[Callable[[DBSession], None]]:
+def get_rebuild_engine(indexname: str) -> Optional[Callable[..., Awaitable[int]]]:
     return get_available_rebuild_engines().get(indexname)
 
 
-async def calculate_pagination(index: str, body: dict, pagenum: int, max_results: int) -> tuple[int, int, int, int]:
-    resp = await es_client.count(index=index, body={"query": body.get("query", {"match_all": {}})})
-    total = resp['count']
-
+def calculate_pagination(total: int, pagenum: int, max_results: int) -> tuple[int, int, int]:
     pagecount = total // max_results
     if total % max_results != 0:
         pagecount += 1
 
     if pagenum > pagecount:
         pagenum = max(1, pagecount)
-    else:
-        pagenum = pagenum
 
     offset = (pagenum - 1) * max_results
-    return offset, pagecount, pagenum, total
+    return offset, pagecount, pagenum
+
+
+async def _search_page(index: Union[str, list[str]], body: dict, offset: int, max_results: int) -> dict:
+    return await es_client.search(index=index, body=body, from_=offset, size=max_results, track_total_hits=True)
 
 
 async def build_search_response(index: Union[str, list[str]], body: dict, pagenum: int,
                                 max_results: int,
                                 clean: Union[Callable[[dict], Union[SearchUserOutput, SearchGroupOutput, SearchWorkspaceOutputResponse, ResourceOutResponse]], Callable[[dict, Request], Union[SearchUserOutput, SearchGroupOutput, SearchWorkspaceOutputResponse, ResourceOutResponse]]],
                                 request: Optional[Request] = None) -> SearchResponse:
-    offset, pagecount, pagenum, total = await calculate_pagination(index=index, body=body, pagenum=pagenum, max_results=max_results)
+    # Hits and the exact total are retrieved at once. Out of range pages are only known after that first request, in
+    # that case the last page is requested again
+    pagenum = max(1, pagenum)
+    offset = (pagenum - 1) * max_results
+    resp = await _search_page(index, body, offset, max_results)
+    total = resp.get("hits", {}).get("total", {}).get("value", len(resp.get("hits", {}).get("hits", [])))
+
+    offset, pagecount, clamped_pagenum = calculate_pagination(total, pagenum, max_results)
+    if clamped_pagenum != pagenum and total > 0:
+        resp = await _search_page(index, body, offset, max_results)
+    pagenum = clamped_pagenum
 
-    resp = await es_client.search(index=index, body=body, from_=offset, size=max_results)
     hits = resp.get("hits", {}).get("hits", [])
     if index == RESOURCES_INDEX:
         results = [clean(hit, request) for hit in hits]
     else:
         results = [clean(hit) for hit in hits]
 
-    total = resp.get("hits", {}).get("total", {}).get("value", len(results))
-
     return SearchResponse(
         offset=offset,
         pagecount=pagecount,
@@ -269,7 +292,7 @@ async def search_users(querytext: str, pagenum: int, max_results: int, order_by:
 
 
 async def add_user_to_index(user: User):
-    await es_client.index(index=USERS_INDEX, id=str(user.id), document=SearchUserOutput(
+    await index_document(USERS_INDEX, str(user.id), SearchUserOutput(
         fullname=f"{user.first_name} {user.last_name}".strip(),
         username=user.username,
         type="user"
@@ -277,11 +300,11 @@ async def add_user_to_index(user: User):
 
 
 async def delete_user_from_index(user: User):
-    await es_client.delete(index=USERS_INDEX, id=str(user.id))
+    await delete_document(USERS_INDEX, str(user.id))
 
 
 async def add_group_to_index(group: Group):
-    await es_client.index(index=GROUPS_INDEX, id=str(group.id), document=SearchGroupOutput(
+    await index_document(GROUPS_INDEX, str(group.id), SearchGroupOutput(
         name=group.name,
         is_organization=group.is_organization,
         is_root=len(group.path) == 1,
@@ -290,7 +313,7 @@ async def add_group_to_index(group: Group):
 
 
 async def delete_group_from_index(group: Group):
-    await es_client.delete(index=GROUPS_INDEX, id=str(group.id))
+    await delete_document(GROUPS_INDEX, str(group.id))
 
 
 def clean_group_out(hit: dict) -> SearchGroupOutput:
@@ -344,47 +367,190 @@ async def search_user_groups(querytext: str, pagenum: int, max_results: int, ord
 
     return await build_search_response(index=[USERS_INDEX, GROUPS_INDEX], body=body,
                                        pagenum=pagenum, max_results=max_results,
-                                       clean=lambda hit: clean_group_out(hit) if hit["_index"] == GROUPS_INDEX else clean_user_out(hit))
-
+                                       clean=lambda hit: clean_group_out(hit) if _is_index_version(hit["_index"], GROUPS_INDEX) else clean_user_out(hit))
 
-async def rebuild_user_index(db: DBSession) -> None:
-    if await es_client.indices.exists(index=USERS_INDEX):
-        await es_client.indices.delete(index=USERS_INDEX)
 
-    await es_client.indices.create(index=USERS_INDEX, body={
-        "settings": {"index": {"max_ngram_diff": 18}, "analysis": USER_MAPPINGS["settings"]["analysis"]},
-        "mappings": USER_MAPPINGS["mappings"]})
-    data = await get_all_users(db)
-    actions = [{'_index': USERS_INDEX, '_id': str(user.id), '_source': SearchUserOutput(
-        fullname=f"{user.first_name} {user.last_name}".strip(),
-        username=user.username,
-        type="user"
-    ).model_dump()} for user in data]
-    await async_bulk(es_client, actions)
-
-
-async def rebuild_group_index(db: DBSession):
-    if await es_client.indices.exists(index=GROUPS_INDEX):
-        await es_client.indices.delete(index=GROUPS_INDEX)
-
-    await es_client.indices.create(index=GROUPS_INDEX, body={
-        "settings": {"index": {"max_ngram_diff": 18}, "analysis": GROUP_MAPPINGS["settings"]["analysis"]},
-        "mappings": GROUP_MAPPINGS["mappings"]})
-    data = await get_all_groups(db)
-    actions = [{'_index': GROUPS_INDEX, '_id': str(group.id), '_source': SearchGroupOutput(
-        name=group.name,
-        is_organization=group.is_organization,
-        is_root=len(group.path) == 1,
-        type="organization" if group.is_organization else "group"
-    ).model_dump()} for group in data]
-    await async_bulk(es_client, actions)
+def _is_index_version(index: str, alias: str) -> bool:
+    return index == alias or re.fullmatch(re.escape(alias) + r'-\d{20}', index) is not None
 
 
-async def rebuild_all_indexes(db: DBSession):
+async def _get_rebuild_targets(alias: str) -> list[str]:
+    # Aliases of the indexes being rebuilt for the given alias. They are looked up on every write, so the writes made
+    # once a rebuild has started are always applied to its index
+    try:
+        found = await es_client.indices.get_alias(name=f"{alias}-*{REBUILD_ALIAS_SUFFIX}")
+    except NotFoundError:
+        return []
+
+    return [name for index, info in found.items() if _is_index_version(index, alias) for name in info["aliases"]]
+
+
+async def _apply_to_rebuilds(alias: str, operation: Callable[[str], Awaitable]) -> None:
+    for target in await _get_rebuild_targets(alias):
+        try:
+            await operation(target)
+        except NotFoundError:
+            # The rebuild has finished (or failed) or the document has not been copied yet, in that case it is read
+            # from the database
+            pass
+
+
+async def index_document(alias: str, doc_id: str, document: dict) -> None:
+    """
+    Indexes a document through the alias of an index, also adding it to the indexes being rebuilt for that alias.
+    """
+
+    await es_client.index(index=alias, id=doc_id, document=document)
+    await _apply_to_rebuilds(alias, lambda target: es_client.index(index=target, id=doc_id, document=document,
+                                                                   require_alias=True))
+
+
+async def update_document(alias: str, doc_id: str, doc: dict) -> None:
+    """
+    Updates some fields of an indexed document, on the index behind the alias and on the indexes being rebuilt for
+    it. Raises ``NotFoundError`` if the document is not in the live index.
+    """
+
+    try:
+        await es_client.update(index=alias, id=doc_id, doc=doc)
+    finally:
+        await _apply_to_rebuilds(alias, lambda target: es_client.update(index=target, id=doc_id, doc=doc,
+                                                                        require_alias=True))
+
+
+async def delete_document(alias: str, doc_id: str) -> None:
+    """
+    Deletes a document from the index behind the alias and from the indexes being rebuilt for it.
+    """
+
+    try:
+        await es_client.delete(index=alias, id=doc_id)
+    finally:
+        # The document may not have been copied yet, the tombstone prevents the copy from adding it back
+        await _apply_to_rebuilds(alias, lambda target: es_client.index(index=target, id=doc_id,
+                                                                       document={REBUILD_DELETED_FIELD: True},
+                                                                       require_alias=True))
+
+
+async def _swap_index_alias(alias: str, index: str) -> None:
+    # The new index stops receiving the changes as a rebuild at the same time it starts receiving them as the live one
+    actions = [{"add": {"index": index, "alias": alias}},
+               {"remove": {"index": index, "alias": index + REBUILD_ALIAS_SUFFIX}}]
+    if await es_client.indices.exists_alias(name=alias):
+        current = await es_client.indices.get_alias(name=alias)
+        actions = [{"remove": {"index": old_index, "alias": alias}} for old_index in current] + actions
+    elif await es_client.indices.exists(index=alias):
+        # Index created before aliases were used, it is replaced by the alias in the same atomic operation
+        actions.insert(0, {"remove_index": {"index": alias}})
+
+    await es_client.indices.update_aliases(actions=actions)
+
+    # Versions are named after their creation date, remove the ones previous to the new one (including leftovers of
+    # interrupted rebuilds) but not the ones created by rebuilds started afterwards
+    versions = await es_client.indices.get(index=f"{alias}-*", allow_no_indices=True, ignore_unavailable=True)
+    stale = [name for name in versions if _is_index_version(name, alias) and name < index]
+    if stale:
+        await es_client.indices.delete(index=",".join(stale), ignore_unavailable=True)
+
+
+async def _purge_deleted_documents(index: str) -> None:
+    await es_client.indices.refresh(index=index)
+    # Tombstones replaced meanwhile by the document being indexed again are kept
+    await es_client.delete_by_query(index=index, query={"term": {REBUILD_DELETED_FIELD: True}}, conflicts="proceed",
+                                    refresh=True)
+
+
+async def rebuild_index(alias: str, mappings: dict, documents: AsyncIterator[tuple[str, dict]],
+                        chunk_size: Optional[int] = None,
+                        progress: Optional[RebuildProgressCallback] = None) -> int:
+    """
+    Rebuilds the index behind an alias without disrupting searches: documents are written into a new versioned index,
+    sent in bulk requests of ``chunk_size`` documents as they are read from ``documents``. Once all of them are indexed,
+    the alias is moved to the new index atomically and the previous versions are deleted.
+
+    The changes made meanwhile through ``index_document``, ``update_document`` and ``delete_document`` are applied to
+    both indexes. Documents are only copied into the new index if they are not there yet, so the copies read before
+    a change do not overwrite it, and deletions are recorded as tombstones in the new index until the swap.
+
+    Returns the number of indexed documents.
+    """
+
+    chunk_size = chunk_size or REBUILD_CHUNK_SIZE
+    index = f"{alias}-{datetime.now(timezone.utc):%Y%m%d%H%M%S%f}"
+    index_mappings = dict(mappings["mappings"])
+    index_mappings["properties"] = {**index_mappings["properties"], REBUILD_DELETED_FIELD: {"type": "boolean"}}
+    await es_client.indices.create(index=index, body={
+        "settings": {"index": {"max_ngram_diff": 18}, "analysis": mappings["settings"]["analysis"]},
+        "mappings": index_mappings,
+        "aliases": {index + REBUILD_ALIAS_SUFFIX: {}}})
+
+    start = time.monotonic()
+    indexed = 0
+
+    async def actions():
+        nonlocal indexed
+        async for doc_id, source in documents:
+            yield {'_op_type': 'create', '_index': index, '_id': doc_id, '_source': source}
+            indexed += 1
+            if progress is not None and indexed % chunk_size == 0:
+                progress(alias, indexed, time.monotonic() - start, False)
+
+    try:
+        # Conflicts are documents changed since the rebuild started, their indexed version is newer
+        await async_bulk(es_client, actions(), chunk_size=chunk_size, ignore_status=(409,))
+        await _purge_deleted_documents(index)
+        await _swap_index_alias(alias, index)
+    except BaseException:
+        await es_client.indices.delete(index=index, ignore_unavailable=True)
+        raise
+
+    # Deletions that were still applied as tombstones just before the swap
+    await _purge_deleted_documents(index)
+
+    if progress is not None:
+        progress(alias, indexed, time.monotonic() - start, True)
+
+    return indexed
+
+
+async def rebuild_user_index(db: DBSession, chunk_size: Optional[int] = None,
+                             progress: Optional[RebuildProgressCallback] = None) -> int:
+    chunk_size = chunk_size or REBUILD_CHUNK_SIZE
+
+    async def documents():
+        async for user in iter_all_users(db, batch_size=chunk_size):
+            yield str(user.id), SearchUserOutput(
+                fullname=f"{user.first_name} {user.last_name}".strip(),
+                username=user.username,
+                type="user"
+            ).model_dump()
+
+    return await rebuild_index(USERS_INDEX, USER_MAPPINGS, documents(), chunk_size=chunk_size, progress=progress)
+
+
+async def rebuild_group_index(db: DBSession, chunk_size: Optional[int] = None,
+                              progress: Optional[RebuildProgressCallback] = None) -> int:
+    chunk_size = chunk_size or REBUILD_CHUNK_SIZE
+
+    async def documents():
+        async for group in iter_all_groups(db, batch_size=chunk_size):
+            yield str(group.id), SearchGroupOutput(
+                name=group.name,
+                is_organization=group.is_organization,
+                is_root=len(group.path) == 1,
+                type="organization" if group.is_organization else "group"
+            ).model_dump()
+
+    return await rebuild_index(GROUPS_INDEX, GROUP_MAPPINGS, documents(), chunk_size=chunk_size, progress=progress)
+
+
+async def rebuild_all_indexes(db: DBSession, chunk_size: Optional[int] = None,
+                              progress: Optional[RebuildProgressCallback] = None) -> int:
     from wirecloud.platform.search import rebuild_workspace_index
     from wirecloud.catalogue.search import rebuild_resource_index
 
-    await rebuild_user_index(db)
-    await rebuild_group_index(db)
-    await rebuild_workspace_index(db)
-    await rebuild_resource_index(db)
+    indexed = await rebuild_user_index(db, chunk_size=chunk_size, progress=progress)
+    indexed += await rebuild_group_index(db, chunk_size=chunk_size, progress=progress)
+    indexed += await rebuild_workspace_index(db, chunk_size=chunk_size, progress=progress)
+    indexed += await rebuild_resource_index(db, chunk_size=chunk_size, progress=progress)
+    return indexed
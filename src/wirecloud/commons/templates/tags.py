@@ -27,13 +27,36 @@ from fastapi.templating import Jinja2Templates
 from urllib.parse import urljoin, urlparse, parse_qs
 
 from wirecloud.commons.utils.http import get_absolute_reverse_url
-from wirecloud.commons.utils.theme import get_theme_translation
-from wirecloud.platform.plugins import get_constants, get_wirecloud_ajax_endpoints
+from wirecloud.commons.utils.structures import LRUCache
+from wirecloud.commons.utils.theme import get_theme_translation, find_static_file_version, resolve_static_alias
+from wirecloud.platform.plugins import get_constants, get_plugins, get_wirecloud_ajax_endpoints, WirecloudPlugin
 from wirecloud.translation import gettext as _trans
 from wirecloud import settings
 
 templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), './templatefiles'))
 
+BOOTSTRAP_FRAGMENTS_CACHE_SIZE = 256
+_bootstrap_fragments = LRUCache(BOOTSTRAP_FRAGMENTS_CACHE_SIZE)
+_javascript_catalogues: Optional[tuple[tuple[WirecloudPlugin, ...], dict[tuple[str, str], str]]] = None
+
+
+def clear_bootstrap_caches() -> None:
+    global _javascript_catalogues
+
+    _bootstrap_fragments.clear()
+    _javascript_catalogues = None
+
+
+def _get_rendered_fragment(source, render) -> str:
+    # Fragments are rendered from the cached endpoint and theme lists. A reference to the source is kept with the
+    # fragment, so its id cannot be reused by another object while the fragment is cached
+    entry = _bootstrap_fragments.get(id(source))
+    if entry is None or entry[0] is not source:
+        entry = (source, render(source))
+        _bootstrap_fragments.set(id(source), entry)
+
+    return entry[1]
+
 def get_translation(theme: str, lang: str, text: str, **kwargs) -> str:
     theme_translation = get_theme_translation(theme, lang)
 
@@ -51,6 +74,14 @@ def get_static_path(theme: str, view: str, request: Request, path: str) -> str:
     if "view" not in query_dict:
         query_dict["view"] = [view]
 
+    if "v" not in query_dict:
+        # Versioned URLs are cached by browsers without revalidation
+        context = query_dict["context"][0] if "context" in query_dict else "platform"
+        version = find_static_file_version(theme, resolve_static_alias(theme, parsed_url.path, query_dict["view"][0],
+                                                                       context))
+        if version is not None:
+            query_dict["v"] = [version]
+
     return urljoin(request.url.path, "/static/" + parsed_url.path) + "?" + "&".join(
         [f"{k}={v[0]}" for k, v in query_dict.items()])
 
@@ -62,19 +93,18 @@ def get_wirecloud_bootstrap(context: dict, available_themes: list[dict[str, str]
         view = context["VIEW_MODE"]
 
     def get_wirecloud_constants() -> list[dict[str, str]]:
-        constants_def = get_constants()
-        constants = []
-        for constant in constants_def:
-            constants.append({'key': constant['key'], 'value': constant['value']})
+        # The constants provided by the plugins are shared, they are copied before adding the request ones
+        constants = list(get_constants())
         constants.append({'key': 'CURRENT_LANGUAGE', 'value': '"' + str(context["request"].state.lang) + '"'})
         constants.append({'key': 'CURRENT_MODE', 'value': '"' + view + '"'})
         constants.append({'key': 'CURRENT_THEME', 'value': '"' + context["THEME"] + '"'})
-        constants.append({'key': 'AVAILABLE_THEMES', 'value': orjson.dumps(available_themes).decode('utf-8')})
+        constants.append({'key': 'AVAILABLE_THEMES',
+                          'value': _get_rendered_fragment(available_themes,
+                                                          lambda themes: orjson.dumps(themes).decode('utf-8'))})
 
         return constants
 
-    def get_wirecloud_bootstrap_script() -> str:
-        endpoints = get_wirecloud_ajax_endpoints(view, context["request"])
+    def render_wirecloud_bootstrap_script(endpoints) -> str:
         script = 'Wirecloud.URLs = {\n'
         for endpoint in endpoints:
             script += '    "' + endpoint.id + '": '
@@ -92,7 +122,8 @@ def get_wirecloud_bootstrap(context: dict, available_themes: list[dict[str, str]
         'static': context['static'],
         'url': context['url'],
         'wirecloud_constants': get_wirecloud_constants(),
-        'wirecloud_bootstrap_script': get_wirecloud_bootstrap_script(),
+        'wirecloud_bootstrap_script': _get_rendered_fragment(get_wirecloud_ajax_endpoints(view, context["request"]),
+                                                             render_wirecloud_bootstrap_script),
         'plain': plain,
 
         'LANGUAGE_CODE': context['LANGUAGE_CODE'],
@@ -104,6 +135,21 @@ def get_wirecloud_bootstrap(context: dict, available_themes: list[dict[str, str]
     return templates.get_template('bootstrap.html').render(template_context)
 
 def get_javascript_catalogue(lang: str, theme: str) -> str:
+    global _javascript_catalogues
+
+    # The catalogues include the translations provided by the plugins
+    plugins = get_plugins()
+    if _javascript_catalogues is None or _javascript_catalogues[0] is not plugins:
+        _javascript_catalogues = (plugins, {})
+
+    catalogue = _javascript_catalogues[1].get((lang, theme))
+    if catalogue is None:
+        catalogue = _javascript_catalogues[1][(lang, theme)] = _render_javascript_catalogue(lang, theme)
+
+    return catalogue
+
+
+def _render_javascript_catalogue(lang: str, theme: str) -> str:
     template_context = {
         'request': None
     }
@@ -71,6 +71,17 @@ def check_if_modified_since(request: Request, time_last_modified: Optional[datet
 
     return time_last_modified > if_modified_since
 
+def check_if_none_match(request: Request, etag: str) -> bool:
+    # Returns False if the copy of the client, identified by the If-None-Match header, is still valid
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is None:
+        return True
+
+    if if_none_match.strip() == '*':
+        return False
+
+    return etag not in (value.strip() for value in if_none_match.split(','))
+
 class CacheableData(BaseModel):
     data: Union[WorkspaceGlobalData, str]
     timestamp: Union[datetime, float] = None
@@ -16,13 +16,58 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
 
-from typing import Any
+from typing import Any, Optional
 
 from wirecloud.database import DBSession, Id
 from wirecloud.platform.workspace.models import Tab
 from wirecloud.platform.workspace.utils import is_there_a_tab_with_that_name
 
 
+def _is_safe_path_key(key: Any) -> bool:
+    return isinstance(key, str) and key != '' and '.' not in key and not key.startswith('$')
+
+
+def _diff_documents(previous: dict, current: dict, prefix: str, to_set: dict, to_unset: list) -> None:
+    for key, value in current.items():
+        path = f'{prefix}{key}'
+        if key not in previous:
+            to_set[path] = value
+            continue
+
+        old_value = previous[key]
+        if isinstance(value, dict) and isinstance(old_value, dict) and all(_is_safe_path_key(k) for k in value) \
+                and all(_is_safe_path_key(k) for k in old_value):
+            _diff_documents(old_value, value, f'{path}.', to_set, to_unset)
+        elif old_value != value or type(old_value) is not type(value):
+            to_set[path] = value
+
+    for key in previous:
+        if key not in current:
+            to_unset.append(f'{prefix}{key}')
+
+
+def build_update_document(previous: dict, current: dict) -> Optional[dict]:
+    """
+    Compares two serialized versions of a document and returns the MongoDB update document (using ``$set`` and
+    ``$unset`` operators) required to turn ``previous`` into ``current``, or ``None`` if both are equal.
+
+    Embedded documents are compared key by key so only the modified paths are written. Lists and embedded documents
+    whose keys cannot be used as part of a dotted path are replaced as a whole.
+    """
+
+    to_set = {}
+    to_unset = []
+    _diff_documents(previous, current, '', to_set, to_unset)
+
+    update = {}
+    if to_set:
+        update['$set'] = to_set
+    if to_unset:
+        update['$unset'] = {path: '' for path in to_unset}
+
+    return update if update else None
+
+
 async def save_alternative(db: DBSession, collection: str, variant_field: str, instance: Any) -> None:
     db_collection = db.client[collection]
 
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class ExecutorBusy(Exception):
+    pass
+
+
+class BoundedExecutor:
+    """
+    Runs blocking functions outside the event loop using a fixed number of worker threads. Calls exceeding that number
+    wait for a free worker without blocking the event loop. If ``max_queued`` is provided, calls arriving when that many
+    calls are already waiting are rejected with ``ExecutorBusy``. Context variables are propagated to the workers.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = '', max_queued: Optional[int] = None):
+        if isinstance(max_workers, bool) or not isinstance(max_workers, int) or max_workers <= 0:
+            raise ValueError("max_workers must be a positive integer")
+
+        if max_queued is not None and (isinstance(max_queued, bool) or not isinstance(max_queued, int) or max_queued < 0):
+            raise ValueError("max_queued must be a non-negative integer")
+
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._thread_name_prefix = thread_name_prefix
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Calls submitted and not finished yet. A call is finished when its worker returns, which may happen after the
+        # coroutine waiting for it has been cancelled, so it is decremented from the workers
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> int:
+        return min(self._pending, self.max_workers)
+
+    @property
+    def queued(self) -> int:
+        return max(self._pending - self.max_workers, 0)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix=self._thread_name_prefix)
+
+        return self._executor
+
+    def _call_done(self, _future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+
+        with self._lock:
+            if self.max_queued is not None and self._pending >= self.max_workers + self.max_queued:
+                raise ExecutorBusy("Too many tasks waiting for a worker")
+            self._pending += 1
+
+        try:
+            future = self._get_executor().submit(call)
+        except BaseException:
+            self._call_done(None)
+            raise
+
+        future.add_done_callback(self._call_done)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -21,7 +21,6 @@
 import socket
 from email.utils import formatdate
 from inspect import Signature
-import re
 import mimetypes
 
 import orjson as json
@@ -61,6 +60,10 @@ class NotFound(Exception):
     pass
 
 
+class Conflict(Exception):
+    pass
+
+
 def get_html_basic_error_response(request: Optional[Request], mimetype: str, status_code: int, context: dict) -> str:
     from wirecloud.platform.routes import render_wirecloud
 
@@ -388,20 +391,10 @@ def get_absolute_reverse_url(viewname: str, request: Optional[Request] = None, *
     return urljoin(get_current_scheme(request) + '://' + get_current_domain(request), url)
 
 
-# FIXME Request.url_for could be used instead of this
 def get_relative_reverse_url(viewname: str, request: Optional[Request] = None, **kwargs) -> str:
-    from wirecloud.platform.plugins import get_plugin_urls
+    from wirecloud.platform.plugins import get_url_router
 
-    patterns = get_plugin_urls()
-    if viewname not in patterns:
-        raise ValueError('No URL pattern found for view "%s"' % viewname)
-
-    url = patterns[viewname].urlpattern
-    for key in kwargs:
-        if '{' + f"{key}:path" + '}' in url:
-            url = url.replace('{' + f"{key}:path" + '}', kwargs[key])
-        else:
-            url = url.replace('{' + key + '}', str(kwargs[key]))
+    url = get_url_router().reverse(viewname, kwargs)
 
     mount_path = request.scope.get("root_path") if request else ""
     if mount_path and mount_path[-1] == '/':
@@ -411,23 +404,9 @@ def get_relative_reverse_url(viewname: str, request: Optional[Request] = None, *
 
 
 def resolve_url_name(path: str) -> Optional[tuple[str, dict[str, str]]]:
-    from wirecloud.platform.plugins import get_plugin_urls
-
-    for name, url in get_plugin_urls().items():
-        # Check if the pattern matches the path, to do so, convert the pattern to a regex
-        pattern = re.escape(url.urlpattern).replace('\\{', '{').replace('\\}', '}')
-        param_names = re.findall(r'\{([^/]+)}', pattern)
-        pattern = re.sub(r'\{[^/]+:path}', r'(.+)', pattern)
-        pattern = re.sub(r'\{[^/]+}', r'([^/]+)', pattern)
-        pattern = '^' + pattern + '$'
-
-        match = re.match(pattern, path)
-        if match:
-            param_values = match.groups()
-            params = dict(zip(param_names, param_values))
-            return name, params
-
-    return None
+    from wirecloud.platform.plugins import get_url_router
+
+    return get_url_router().resolve(path)
 
 
 def iri_to_uri(iri: str) -> str:
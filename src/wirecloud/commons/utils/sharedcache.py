@@ -0,0 +1,553 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Cache backend shared by every worker of a Wirecloud deployment.
+
+``SharedCache`` exposes the subset of the aiocache API used by Wirecloud (``get``, ``set``, ``delete``, ``exists``,
+``clear`` and ``close``) on top of two tiers: a per-process LRU (L1) and a shared Redis-protocol server (L2). Every
+write is broadcast on a pub/sub channel so the other workers drop the affected keys from their L1. Other per-process
+caches can use the same channel to send their own invalidations (see ``publish`` and ``add_listener``).
+
+The shared server can be a Redis (or compatible) server or the ``CacheServer`` stand-in provided by this module,
+listening on a Unix socket (see the ``runcacheserver`` management command). Values are stored pickled, so the
+shared server must only be reachable by trusted clients.
+"""
+
+import asyncio
+import fnmatch
+import json
+import logging
+import pickle
+import time
+from typing import Any, Callable, Optional
+from urllib.parse import urlparse, parse_qs, unquote
+from uuid import uuid4
+
+from wirecloud.commons.utils.structures import LRUCache
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT = object()
+
+
+class SharedCacheError(Exception):
+    pass
+
+
+def _encode_command(*args) -> bytes:
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode('utf-8')
+        elif isinstance(arg, int):
+            arg = str(arg).encode('ascii')
+        parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(parts)
+
+
+async def _read_reply(reader: asyncio.StreamReader) -> Any:
+    line = await reader.readline()
+    if not line.endswith(b'\r\n'):
+        raise ConnectionError("Connection closed by the cache server")
+
+    prefix, payload = line[:1], line[1:-2]
+    if prefix == b'+':
+        return payload.decode('utf-8')
+    elif prefix == b'-':
+        raise SharedCacheError(payload.decode('utf-8'))
+    elif prefix == b':':
+        return int(payload)
+    elif prefix == b'$':
+        length = int(payload)
+        if length == -1:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    elif prefix == b'*':
+        length = int(payload)
+        if length == -1:
+            return None
+        return [await _read_reply(reader) for _i in range(length)]
+
+    raise SharedCacheError(f"Unexpected reply from the cache server: {line!r}")
+
+
+class RESPConnection:
+    """
+    Minimal client for the Redis serialization protocol. Supported URLs are ``redis://[:password@]host[:port][/db]``
+    and ``unix:///path/to/socket[?db=N&password=...]``.
+    """
+
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        query = parse_qs(parsed.query)
+
+        if parsed.scheme == 'unix':
+            self.path = unquote(parsed.path)
+            self.host = self.port = None
+            db = query.get('db', ['0'])[0]
+        elif parsed.scheme == 'redis':
+            self.path = None
+            self.host = parsed.hostname or 'localhost'
+            self.port = parsed.port or 6379
+            db = parsed.path.lstrip('/') or query.get('db', ['0'])[0]
+        else:
+            raise ValueError(f"Unsupported cache URL scheme: {parsed.scheme}")
+
+        self.db = int(db)
+        self.password = unquote(parsed.password) if parsed.password else query.get('password', [None])[0]
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._loop = None
+        self._lock = None
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def _open(self) -> None:
+        if self.path is not None:
+            self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+        if self.password is not None:
+            await self._send('AUTH', self.password)
+        if self.db != 0:
+            await self._send('SELECT', self.db)
+
+    async def _send(self, *args) -> Any:
+        self._writer.write(_encode_command(*args))
+        await self._writer.drain()
+        return await _read_reply(self._reader)
+
+    async def execute(self, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Streams are bound to the event loop that created them
+            self._reader = self._writer = None
+            self._loop = loop
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            try:
+                if not self.connected:
+                    await self._open()
+                return await self._send(*args)
+            except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                await self.close()
+                raise
+
+    async def subscribe(self, channel: str) -> None:
+        await self._open()
+        self._loop = asyncio.get_running_loop()
+        await self._send('SUBSCRIBE', channel)
+
+    async def read_message(self) -> Any:
+        return await _read_reply(self._reader)
+
+    async def close(self) -> None:
+        writer = self._writer
+        self._reader = self._writer = None
+        if writer is not None and self._loop is asyncio.get_running_loop():
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+
+class SharedCache:
+    """
+    Two-tier cache: a per-process LRU in front of a shared Redis-protocol server.
+
+    The L1 tier is only used while the invalidation listener is subscribed; if the subscription is lost the L1 is
+    flushed and every lookup goes to the shared server until it is restored. ``l1_ttl`` bounds how long a worker may
+    keep a value in its L1, also limiting how long it can outlive the expiration of the shared entry.
+
+    Values read from or written to the shared server are only stored in the L1 if the key was not invalidated while
+    the command was running, otherwise a late reply could bring back a value already replaced by another worker.
+    """
+
+    def __init__(self, url: str, ttl: Optional[float] = None, namespace: str = 'wirecloud:', l1_size: int = 1024,
+                 l1_ttl: float = 30, channel: str = 'wirecloud:cache:invalidate'):
+        self.url = url
+        self.ttl = ttl
+        self.namespace = namespace
+        self.channel = channel
+        self.l1 = LRUCache(l1_size, l1_ttl)
+
+        self._id = uuid4().hex
+        self._connection = RESPConnection(url)
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribed = False
+        # Keys with commands in progress: [number of commands, invalidations received meanwhile]
+        self._operations: dict[str, list[int]] = {}
+        self._clear_generation = 0
+        self._topic_listeners: dict[str, list[Callable[[Any], None]]] = {}
+
+    def _key(self, key: str) -> str:
+        return self.namespace + key
+
+    def _ensure_listener(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._listener is None or self._listener.done() or self._listener.get_loop() is not loop:
+            self._subscribed = False
+            self._reset()
+            self._listener = loop.create_task(self._listen())
+
+    def _start_operation(self, key: str) -> tuple[list[int], int, int]:
+        operation = self._operations.get(key)
+        if operation is None:
+            operation = self._operations[key] = [0, 0]
+        operation[0] += 1
+        return operation, operation[1], self._clear_generation
+
+    def _finish_operation(self, key: str, started: tuple[list[int], int, int]) -> bool:
+        # Returns whether the key was left untouched while the command was running
+        operation, generation, clear_generation = started
+        operation[0] -= 1
+        if operation[0] == 0:
+            del self._operations[key]
+        return operation[1] == generation and clear_generation == self._clear_generation
+
+    def _invalidate_l1(self, key: str) -> None:
+        self.l1.delete(key)
+        operation = self._operations.get(key)
+        if operation is not None:
+            operation[1] += 1
+
+    def _clear_l1(self) -> None:
+        self.l1.clear()
+        self._clear_generation += 1
+
+    def _reset(self) -> None:
+        # Messages may have been missed, the listeners of the topics are notified with None
+        self._clear_l1()
+        for listeners in self._topic_listeners.values():
+            for listener in listeners:
+                listener(None)
+
+    def add_listener(self, topic: str, listener: Callable[[Any], None]) -> None:
+        """
+        Registers a function called with the payload of the messages published on ``topic`` by other workers, or with
+        ``None`` when messages may have been missed (the invalidation channel was lost or is being restored).
+        """
+
+        listeners = self._topic_listeners.setdefault(topic, [])
+        if listener not in listeners:
+            listeners.append(listener)
+
+    def is_listening(self) -> bool:
+        """
+        Returns whether the messages sent by other workers are being received, starting the listener if needed.
+        """
+
+        self._ensure_listener()
+        return self._subscribed
+
+    async def publish(self, topic: str, payload: Any) -> None:
+        self._ensure_listener()
+        await self._execute('PUBLISH', self.channel, json.dumps({'sender': self._id, 'topic': topic,
+                                                                 'payload': payload}))
+
+    async def _listen(self) -> None:
+        delay = 0.1
+        while True:
+            subscriber = RESPConnection(self.url)
+            try:
+                await subscriber.subscribe(self.channel)
+                self._subscribed = True
+                delay = 0.1
+                while True:
+                    message = await subscriber.read_message()
+                    if isinstance(message, list) and len(message) == 3 and message[0] == b'message':
+                        self._process_invalidation(message[2])
+            except asyncio.CancelledError:
+                self._subscribed = False
+                await subscriber.close()
+                raise
+            except (ConnectionError, OSError, asyncio.IncompleteReadError, SharedCacheError) as e:
+                logger.warning(f"Lost the cache invalidation channel, retrying in {delay}s: {e}")
+
+            # Invalidations may have been missed while disconnected
+            self._subscribed = False
+            self._reset()
+            await subscriber.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 5)
+
+    def _process_invalidation(self, data: bytes) -> None:
+        try:
+            message = json.loads(data)
+        except ValueError:
+            return
+
+        if message.get('sender') == self._id:
+            return
+
+        if 'topic' in message:
+            for listener in self._topic_listeners.get(message['topic'], ()):
+                listener(message.get('payload'))
+            return
+
+        keys = message.get('keys')
+        if keys is None:
+            self._clear_l1()
+        else:
+            for key in keys:
+                self._invalidate_l1(key)
+
+    async def _execute(self, *args, default=None) -> Any:
+        # A cache outage must not break the requests using it, they just run uncached
+        try:
+            return await self._connection.execute(*args)
+        except (ConnectionError, OSError, asyncio.IncompleteReadError, SharedCacheError) as e:
+            logger.warning(f"Error executing {args[0]} on the shared cache: {e}")
+            return default
+
+    async def _broadcast(self, keys: Optional[list[str]]) -> None:
+        await self._execute('PUBLISH', self.channel, json.dumps({'sender': self._id, 'keys': keys}))
+
+    async def get(self, key: str, default=None) -> Any:
+        self._ensure_listener()
+        value = self.l1.get(key, _DEFAULT)
+        if value is not _DEFAULT:
+            return value
+
+        started = self._start_operation(key)
+        try:
+            data = await self._execute('GET', self._key(key))
+        finally:
+            current = self._finish_operation(key, started)
+
+        if data is None:
+            return default
+
+        value = pickle.loads(data)
+        if self._subscribed and current:
+            self.l1.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any, ttl=_DEFAULT) -> bool:
+        self._ensure_listener()
+        ttl = self.ttl if ttl is _DEFAULT else ttl
+
+        command = ['SET', self._key(key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)]
+        if ttl:
+            command += ['PX', int(ttl * 1000)]
+        started = self._start_operation(key)
+        try:
+            result = await self._execute(*command)
+        finally:
+            current = self._finish_operation(key, started)
+
+        # The reads of this key in progress must not store the previous value
+        self._invalidate_l1(key)
+        if result is None:
+            return False
+
+        if self._subscribed and current:
+            self.l1.set(key, value)
+        await self._broadcast([key])
+        return True
+
+    async def delete(self, key: str) -> int:
+        self._ensure_listener()
+        self._invalidate_l1(key)
+        deleted = await self._execute('DEL', self._key(key), default=0)
+        self._invalidate_l1(key)
+        await self._broadcast([key])
+        return deleted
+
+    async def exists(self, key: str) -> bool:
+        self._ensure_listener()
+        if key in self.l1:
+            return True
+
+        return await self._execute('EXISTS', self._key(key), default=0) > 0
+
+    async def clear(self) -> bool:
+        self._ensure_listener()
+        self._clear_l1()
+
+        cursor = b'0'
+        while True:
+            cursor, keys = await self._execute('SCAN', cursor, 'MATCH', self.namespace + '*', 'COUNT', 1000,
+                                               default=(b'0', []))
+            if keys:
+                await self._execute('DEL', *keys)
+            if cursor in (b'0', '0'):
+                break
+
+        self._clear_l1()
+        await self._broadcast(None)
+        return True
+
+    async def close(self) -> None:
+        listener = self._listener
+        self._listener = None
+        self._subscribed = False
+        self.l1.clear()
+
+        if listener is not None and not listener.done() and listener.get_loop() is asyncio.get_running_loop():
+            listener.cancel()
+            try:
+                await listener
+            except asyncio.CancelledError:
+                pass
+
+        await self._connection.close()
+
+
+class CacheServer:
+    """
+    Stand-in for a Redis server, listening on a Unix socket. It implements the commands used by ``SharedCache``
+    (GET, SET [EX|PX], DEL, EXISTS, SCAN, FLUSHDB, PUBLISH, SUBSCRIBE, PING, AUTH and SELECT) with a single
+    keyspace kept in memory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data: dict[bytes, tuple[bytes, Optional[float]]] = {}
+        self._subscribers: dict[bytes, set[asyncio.StreamWriter]] = {}
+        self._clients: set[asyncio.StreamWriter] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is None:
+            return
+
+        self._server.close()
+        for writer in self._clients:
+            writer.close()
+        self._subscribers.clear()
+        await self._server.wait_closed()
+        self._server = None
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        if value is None:
+            return b'$-1\r\n'
+        elif isinstance(value, SharedCacheError):
+            return b'-ERR %s\r\n' % str(value).encode('utf-8')
+        elif isinstance(value, bool):
+            return b'+OK\r\n'
+        elif isinstance(value, int):
+            return b':%d\r\n' % value
+        elif isinstance(value, str):
+            return b'+%s\r\n' % value.encode('utf-8')
+        elif isinstance(value, list):
+            return b'*%d\r\n' % len(value) + b''.join(CacheServer._encode(item) for item in value)
+
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+
+    def _get_entry(self, key: bytes) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+
+        return entry[0]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._clients.add(writer)
+        try:
+            while True:
+                try:
+                    command = await _read_reply(reader)
+                except (ConnectionError, OSError, asyncio.IncompleteReadError, SharedCacheError):
+                    break
+
+                if not isinstance(command, list) or len(command) == 0:
+                    writer.write(self._encode(SharedCacheError("invalid command")))
+                    continue
+
+                name = command[0].decode('utf-8').upper()
+                if name == 'SUBSCRIBE':
+                    for channel in command[1:]:
+                        self._subscribers.setdefault(channel, set()).add(writer)
+                        writer.write(self._encode([b'subscribe', channel, 1]))
+                    await writer.drain()
+                    continue
+
+                try:
+                    result = self._execute(name, command[1:])
+                except (ValueError, IndexError):
+                    result = SharedCacheError(f"wrong arguments for '{name.lower()}' command")
+                writer.write(self._encode(result))
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            for writers in self._subscribers.values():
+                writers.discard(writer)
+            writer.close()
+
+    def _execute(self, name: str, args: list[bytes]) -> Any:
+        if name == 'PING':
+            return 'PONG'
+        elif name in ('AUTH', 'SELECT'):
+            return True
+        elif name == 'GET':
+            return self._get_entry(args[0])
+        elif name == 'SET':
+            expires = None
+            if len(args) == 4 and args[2].upper() in (b'EX', b'PX'):
+                seconds = int(args[3]) / (1000 if args[2].upper() == b'PX' else 1)
+                expires = time.monotonic() + seconds
+            elif len(args) != 2:
+                raise ValueError()
+            self._data[args[0]] = (args[1], expires)
+            return True
+        elif name == 'DEL':
+            deleted = 0
+            for key in args:
+                if self._get_entry(key) is not None:
+                    deleted += 1
+                self._data.pop(key, None)
+            return deleted
+        elif name == 'EXISTS':
+            return sum(1 for key in args if self._get_entry(key) is not None)
+        elif name == 'SCAN':
+            options = dict(zip((arg.upper() for arg in args[1::2]), args[2::2]))
+            pattern = options.get(b'MATCH', b'*').decode('utf-8')
+            keys = [key for key in list(self._data) if self._get_entry(key) is not None
+                    and fnmatch.fnmatchcase(key.decode('utf-8'), pattern)]
+            return [b'0', keys]
+        elif name == 'FLUSHDB':
+            self._data.clear()
+            return True
+        elif name == 'PUBLISH':
+            subscribers = self._subscribers.get(args[0], set())
+            for subscriber in subscribers:
+                subscriber.write(self._encode([b'message', args[0], args[1]]))
+            return len(subscribers)
+
+        return SharedCacheError(f"unknown command '{name.lower()}'")
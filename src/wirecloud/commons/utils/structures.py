@@ -16,8 +16,10 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
 
+import time
 from collections.abc import MutableMapping, Mapping
 from collections import OrderedDict
+from typing import Optional
 
 
 class CaseInsensitiveDict(MutableMapping):
@@ -87,3 +89,74 @@ class CaseInsensitiveDict(MutableMapping):
 
     def __repr__(self):
         return str(dict(self.items()))
+
+
+class LRUCache:
+    """A size-bounded mapping evicting the least recently used entries.
+
+    Entries optionally expire ``ttl`` seconds after being stored. ``hits`` and
+    ``misses`` count the lookups made through ``get``.
+
+    ``get`` returns the stored object itself, so callers sharing cached values
+    are responsible for not mutating them (or for copying them on read).
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = None):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be a positive integer")
+
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be a positive number")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._store = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            expires, value = self._store[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        if expires is not None and expires <= time.monotonic():
+            del self._store[key]
+            self.misses += 1
+            return default
+
+        self._store.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: Optional[float] = None) -> None:
+        """Stores ``value``, expiring after ``ttl`` seconds if given (capped to the ``ttl`` of the cache)."""
+        if self.ttl is not None:
+            ttl = min(ttl, self.ttl) if ttl is not None else self.ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        self._store[key] = (expires, value)
+        self._store.move_to_end(key)
+
+        while len(self._store) > self.maxsize:
+            self._store.popitem(last=False)
+
+    def delete(self, key) -> None:
+        self._store.pop(key, None)
+
+    def delete_matching(self, predicate) -> None:
+        """Removes every entry for which ``predicate(key, value)`` is true."""
+        for key in [key for key, (_expires, value) in self._store.items() if predicate(key, value)]:
+            del self._store[key]
+
+    def clear(self) -> None:
+        self._store.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._store)}
+
+    def __contains__(self, key) -> bool:
+        return key in self._store
+
+    def __len__(self) -> int:
+        return len(self._store)
@@ -19,11 +19,10 @@
 # TODO Add translations
 
 import re
-from typing import Any
+from typing import Any, TYPE_CHECKING
 from copy import deepcopy
 from urllib.parse import urljoin
 from lxml import etree
-import rdflib
 
 from wirecloud.commons.utils.template.base import ObsoleteFormatError, TemplateFormatError, TemplateParseException
 from wirecloud.commons.utils.template.schemas.macdschemas import *
@@ -31,13 +30,21 @@ from wirecloud.database import Id
 from wirecloud.platform.wiring.schemas import WiringInput, WiringOutput
 from wirecloud.commons.utils.template.parsers.json import JSONTemplateParser
 from wirecloud.commons.utils.template.parsers.xml import ApplicationMashupTemplateParser
-from wirecloud.commons.utils.template.parsers.rdf import RDFTemplateParser
+
+if TYPE_CHECKING:
+    import rdflib
 
 __all__ = ('ObsoleteFormatError', 'TemplateFormatError', 'TemplateParseException', 'TemplateParser')
 
 BASIC_URL_FIELDS = ['doc', 'image', 'smartphoneimage']
 
 
+def _rdf_template_parser(template: Union[bytes, str, 'rdflib.Graph']):
+    # rdflib is slow to import and RDF descriptions are deprecated, only load it when the other parsers fail
+    from wirecloud.commons.utils.template.parsers.rdf import RDFTemplateParser
+    return RDFTemplateParser(template)
+
+
 def absolutize_url_field(value: str, base_url: str) -> str:
     value = value.strip()
     if value != '':
@@ -49,9 +56,9 @@ def absolutize_url_field(value: str, base_url: str) -> str:
 class TemplateParser(object):
     _doc = None
     _parser = None
-    parsers = (ApplicationMashupTemplateParser, JSONTemplateParser, RDFTemplateParser)
+    parsers = (ApplicationMashupTemplateParser, JSONTemplateParser, _rdf_template_parser)
 
-    def __init__(self, template: Union[str, bytes, dict, etree.Element, rdflib.Graph], base: str = None):
+    def __init__(self, template: Union[str, bytes, dict, etree.Element, 'rdflib.Graph'], base: str = None):
         self.base = base
 
         for parser in self.parsers:
@@ -16,7 +16,6 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
 
-import codecs
 import os
 
 from lxml import etree
@@ -30,12 +29,12 @@ from wirecloud.platform.wiring.utils import get_behaviour_skeleton, get_wiring_s
 
 from wirecloud.translation import gettext as _
 
-XMLSCHEMA_FILE = codecs.open(os.path.join(os.path.dirname(__file__), '../schemas/xml_schema.xsd'), 'rb')
-XMLSCHEMA_DOC = etree.parse(XMLSCHEMA_FILE)
-XMLSCHEMA_FILE.close()
-XMLSCHEMA = etree.XMLSchema(XMLSCHEMA_DOC)
+XMLSCHEMA_PATH = os.path.join(os.path.dirname(__file__), '../schemas/xml_schema.xsd')
+# Loaded by get_xml_schema the first time a description is validated
+XMLSCHEMA: Optional[etree.XMLSchema] = None
 
 WIRECLOUD_TEMPLATE_NS = 'http://wirecloud.conwet.fi.upm.es/ns/macdescription/1'
+XPATH_NAMESPACES = {'t': WIRECLOUD_TEMPLATE_NS}
 OLD_TEMPLATE_NAMESPACES = ('http://wirecloud.conwet.fi.upm.es/ns/template#', 'http://morfeo-project.org/2007/Template')
 
 MAC_VERSION_XPATH = 't:macversion'
@@ -100,6 +99,28 @@ TRANSLATION_XPATH = 't:translation'
 MSG_XPATH = 't:msg'
 
 
+_compiled_xpaths: dict[str, etree.XPath] = {}
+
+
+def get_xml_schema() -> etree.XMLSchema:
+    global XMLSCHEMA
+
+    if XMLSCHEMA is None:
+        with open(XMLSCHEMA_PATH, 'rb') as schema_file:
+            XMLSCHEMA = etree.XMLSchema(etree.parse(schema_file))
+
+    return XMLSCHEMA
+
+
+def compile_xpath(query: str) -> etree.XPath:
+    # The queries used by the parser are the *_XPATH constants, so each one is compiled only once per process
+    xpath = _compiled_xpaths.get(query)
+    if xpath is None:
+        xpath = _compiled_xpaths[query] = etree.XPath(query, namespaces=XPATH_NAMESPACES)
+
+    return xpath
+
+
 class ApplicationMashupTemplateParser(object):
     _info: MACD
 
@@ -139,7 +160,7 @@ class ApplicationMashupTemplateParser(object):
 
     def _init(self) -> None:
         try:
-            XMLSCHEMA.assertValid(self._doc)
+            get_xml_schema().assertValid(self._doc)
         except Exception as e:
             raise TemplateParseException('%s' % e)
 
@@ -147,7 +168,7 @@ class ApplicationMashupTemplateParser(object):
         self._parse_basic_info()
 
     def _xpath(self, query: str, element: etree.Element) -> list[etree.Element]:
-        return element.xpath(query, namespaces={'t': WIRECLOUD_TEMPLATE_NS})
+        return compile_xpath(query)(element)
 
     def get_xpath(self, query: str, element: etree.Element, required: bool = True) -> Optional[etree.Element]:
         elements = self._xpath(query, element)
@@ -16,10 +16,12 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
 import os
 import inspect
 from importlib import import_module
 import gettext as gt
+from typing import Optional
 from fastapi.templating import Jinja2Templates
 from jinja2.loaders import FileSystemLoader
 from jinja2 import Environment
@@ -32,6 +34,7 @@ from wirecloud.platform.plugins import get_plugins
 DIST_PATH = os.path.join(os.path.dirname(__file__), "../../dist")
 JINJA2_TEMPLATES = {}
 THEME_TRANSLATIONS = {}
+AVAILABLE_THEMES_INFO: dict[str, list[dict[str, str]]] = {}
 
 def _generate_jinja2_templates() -> None:
     for theme in AVAILABLE_THEMES:
@@ -115,6 +118,19 @@ def get_theme_translation(theme: str, lang: str) -> gt.NullTranslations:
     return THEME_TRANSLATIONS[theme][lang]
 
 def get_available_themes(lang: str) -> list[dict[str, str]]:
+    # The returned list is shared between requests and must not be modified
+    themes = AVAILABLE_THEMES_INFO.get(lang)
+    if themes is None:
+        themes = AVAILABLE_THEMES_INFO[lang] = _build_available_themes(lang)
+
+    return themes
+
+
+def clear_available_themes_cache() -> None:
+    AVAILABLE_THEMES_INFO.clear()
+
+
+def _build_available_themes(lang: str) -> list[dict[str, str]]:
     result = []
     for theme in AVAILABLE_THEMES:
         # Find the translations for the theme
@@ -209,5 +225,116 @@ def get_theme_static_path(theme: str, path: str) -> str:
 
     return found_path
 
+def get_static_dirs(theme: str) -> list[str]:
+    """
+    Returns the directories searched by get_theme_static_path for the given theme, by order of precedence.
+    """
+
+    from wirecloud.platform.core.plugins import WirecloudCorePlugin
+
+    static_dirs = [DIST_PATH]
+
+    try:
+        theme_module = import_module(f"wirecloud.themes.{theme}")
+    except ModuleNotFoundError:
+        theme_module = None
+
+    while theme_module is not None:
+        static_dirs.append(os.path.join(os.path.dirname(theme_module.__file__), 'static'))
+
+        parent = getattr(theme_module, "parent", None)
+        try:
+            theme_module = import_module(f"wirecloud.themes.{parent}") if parent is not None else None
+        except ModuleNotFoundError:
+            theme_module = None
+
+    for plugin in get_plugins():
+        plugin_dir = os.path.dirname(inspect.getfile(plugin.__class__))
+        if isinstance(plugin, WirecloudCorePlugin):
+            plugin_dir = os.path.dirname(plugin_dir)
+
+        static_dirs.append(os.path.join(plugin_dir, "static"))
+
+    return static_dirs
+
+
+def _build_static_files_index(theme: str) -> dict[str, str]:
+    index = {}
+    for static_dir in reversed(get_static_dirs(theme)):
+        # Directories with more precedence are walked last and override the files of the previous ones
+        for dirpath, _dirnames, filenames in os.walk(static_dir):
+            relative_dir = os.path.relpath(dirpath, static_dir)
+            for filename in filenames:
+                relative_path = filename if relative_dir == '.' else os.path.join(relative_dir, filename)
+                index[relative_path.replace(os.sep, '/')] = os.path.join(dirpath, filename)
+
+    return index
+
+
+STATIC_FILES_INDEX: dict[str, dict[str, str]] = {}
+
+
+def build_static_files_index() -> None:
+    for theme in AVAILABLE_THEMES:
+        STATIC_FILES_INDEX[theme] = _build_static_files_index(theme)
+
+
+def clear_static_files_index() -> None:
+    STATIC_FILES_INDEX.clear()
+
+
+def find_static_file(theme: str, path: str, refresh: bool = False) -> str:
+    """
+    Same as get_theme_static_path, but resolved using an index of the static directories of the theme built on first
+    use. Files missing from the index (e.g. compiled after it was built) are searched on disk and added to it.
+    """
+
+    if theme not in AVAILABLE_THEMES:
+        raise NotFound("Theme not found")
+
+    if path.startswith("/"):
+        path = path[1:]
+
+    if '..' in path:
+        raise ValueError("Path traversal attack attempted!")
+
+    index = STATIC_FILES_INDEX.get(theme)
+    if index is None:
+        index = STATIC_FILES_INDEX[theme] = _build_static_files_index(theme)
+
+    found_path = None if refresh else index.get(path)
+    if found_path is None:
+        found_path = index[path] = get_theme_static_path(theme, path)
+
+    return found_path
+
+
+def get_static_file_variant(theme: str, path: str, found_path: str, suffix: str) -> Optional[str]:
+    # Precompressed variants (.br, .gz) are only looked up in the index and must be siblings of the resolved file
+    variant_path = STATIC_FILES_INDEX.get(theme, {}).get((path[1:] if path.startswith("/") else path) + suffix)
+    return variant_path if variant_path == found_path + suffix else None
+
+
+def resolve_static_alias(theme: str, path: str, view: str = "classic", context: str = "platform") -> str:
+    # The compiled CSS and JS files are requested using the same name in every theme and view
+    if path == "css/cache.css":
+        return f"css/{theme}_{view}_{context}.css"
+    elif path == "js/cache.js":
+        return f"js/main-{theme}-{view}.js"
+
+    return path
+
+
+def get_static_file_version(stat_result: os.stat_result) -> str:
+    return hashlib.md5(f"{stat_result.st_mtime}-{stat_result.st_size}".encode(), usedforsecurity=False).hexdigest()[:12]
+
+
+def find_static_file_version(theme: str, path: str) -> Optional[str]:
+    try:
+        return get_static_file_version(os.stat(find_static_file(theme, path)))
+    except (NotFound, ValueError, OSError):
+        return None
+
+
 _generate_jinja2_templates()
 _generate_theme_translations()
\ No newline at end of file
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+import re
+from typing import Any, Mapping, Optional, Union
+
+_PARAM_RE = re.compile(r'\{([^{}/]+)}')
+
+
+class _Param:
+    __slots__ = ('name', 'placeholder')
+
+    def __init__(self, name: str, placeholder: str):
+        self.name = name
+        self.placeholder = placeholder
+
+
+class _Route:
+    __slots__ = ('index', 'name', 'urlpattern', 'regex', 'param_names', 'tokens')
+
+    def __init__(self, index: int, name: str, urlpattern: str):
+        self.index = index
+        self.name = name
+        self.urlpattern = urlpattern
+
+        tokens: list[Union[str, _Param]] = []
+        param_names = []
+        regex = ''
+        position = 0
+        for match in _PARAM_RE.finditer(urlpattern):
+            literal = urlpattern[position:match.start()]
+            if literal:
+                tokens.append(literal)
+            regex += re.escape(literal)
+
+            param = match.group(1)
+            param_name, _sep, converter = param.partition(':')
+            tokens.append(_Param(param_name, match.group(0)))
+            param_names.append(param_name)
+            regex += '(.+)' if converter == 'path' else '([^/]+)'
+            position = match.end()
+
+        literal = urlpattern[position:]
+        if literal:
+            tokens.append(literal)
+        regex += re.escape(literal)
+
+        self.tokens = tuple(tokens)
+        self.param_names = tuple(param_names)
+        # Static patterns are matched by string comparison
+        self.regex = re.compile(regex) if param_names else None
+
+    def match(self, path: str) -> Optional[dict[str, str]]:
+        if self.regex is None:
+            return {} if path == self.urlpattern else None
+
+        match = self.regex.fullmatch(path)
+        if match is None:
+            return None
+
+        return dict(zip(self.param_names, match.groups()))
+
+    def reverse(self, kwargs: Mapping[str, Any]) -> str:
+        parts = []
+        for token in self.tokens:
+            if type(token) is str:
+                parts.append(token)
+            elif token.name in kwargs:
+                parts.append(str(kwargs[token.name]))
+            else:
+                parts.append(token.placeholder)
+
+        return ''.join(parts)
+
+
+class _Node:
+    __slots__ = ('children', 'routes')
+
+    def __init__(self):
+        self.children: dict[str, _Node] = {}
+        self.routes: list[_Route] = []
+
+
+class URLRouter:
+    """
+    Index of the URL patterns provided by the WireCloud plugins, built once and used both to find the view associated
+    with a path and to build the path of a view.
+
+    Patterns are stored in a trie using the leading path segments that contain no parameters, so resolving a path only
+    has to check the patterns sharing its static prefix. When several patterns match a path, the first one declared
+    wins, as when iterating over ``get_plugin_urls()``.
+    """
+
+    def __init__(self, urls: Mapping[str, Any]):
+        self._routes: dict[str, _Route] = {}
+        self._root = _Node()
+
+        for index, (name, url) in enumerate(urls.items()):
+            route = _Route(index, name, url.urlpattern)
+            self._routes[name] = route
+
+            node = self._root
+            for segment in url.urlpattern.split('/'):
+                if '{' in segment:
+                    break
+                node = node.children.setdefault(segment, _Node())
+            node.routes.append(route)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._routes
+
+    def resolve(self, path: str) -> Optional[tuple[str, dict[str, str]]]:
+        candidates = list(self._root.routes)
+        node = self._root
+        for segment in path.split('/'):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            candidates += node.routes
+
+        candidates.sort(key=lambda route: route.index)
+        for route in candidates:
+            params = route.match(path)
+            if params is not None:
+                return route.name, params
+
+        return None
+
+    def reverse(self, name: str, kwargs: Mapping[str, Any]) -> str:
+        try:
+            route = self._routes[name]
+        except KeyError:
+            raise ValueError('No URL pattern found for view "%s"' % name)
+
+        return route.reverse(kwargs)
@@ -19,13 +19,16 @@
 from io import BytesIO
 import os
 import re
-from shutil import rmtree
-from typing import Optional, IO, Union
+from shutil import copyfileobj, rmtree
+from typing import Any, Callable, Optional, IO, TypeVar, Union
 from urllib.request import pathname2url
 import zipfile
 
+from wirecloud.commons.utils.executor import BoundedExecutor
 from wirecloud.commons.utils.template import TemplateParser
 
+T = TypeVar('T')
+
 
 class InvalidContents(Exception):
     def __init__(self, message, details=None):
@@ -68,15 +71,21 @@ class WgtFile:
         except KeyError:
             raise InvalidContents('Missing config.xml at the root of the zipfile (wgt)')
 
+    def _copy_member(self, name: str, output_path: str) -> None:
+        # Decompress in chunks instead of loading the whole member into memory
+        with self._zip.open(name) as src, open(output_path, 'wb') as dst:
+            copyfileobj(src, dst)
+
     def extract_file(self, file_name: str, output_path: str) -> None:
-        contents = self.read(file_name)
+        file_name = file_name.replace('\\', '/')
+        # Raise KeyError before creating any folder if the file is not in the archive
+        self._zip.getinfo(file_name)
 
         dir_path = os.path.dirname(output_path)
         if not os.path.exists(dir_path):
             os.makedirs(dir_path)
 
-        with open(output_path, 'wb') as f:
-            f.write(contents)
+        self._copy_member(file_name, output_path)
 
     def extract_localized_files(self, file_name: str, output_dir: str) -> None:
         (file_root, ext) = os.path.splitext(file_name)
@@ -111,9 +120,7 @@ class WgtFile:
                     folder += os.sep + namedir.replace("/", os.sep)
                     if not os.path.exists(folder) or not os.path.isdir(folder):
                         os.mkdir(folder)
-                outfile = open(os.path.join(output_path, local_name.replace("/", os.sep)), 'wb')
-                outfile.write(self._zip.read(name))
-                outfile.close()
+                self._copy_member(name, os.path.join(output_path, local_name.replace("/", os.sep)))
 
     def extract(self, path: str) -> None:
         if not os.path.exists(path) or not os.path.isdir(path):
@@ -132,9 +139,7 @@ class WgtFile:
                     folder += os.sep + namedir.replace("/", os.sep)
                     if not os.path.exists(folder) or not os.path.isdir(folder):
                         os.mkdir(folder)
-                outfile = open(os.path.join(path, name.replace("/", os.sep)), 'wb')
-                outfile.write(self._zip.read(name))
-                outfile.close()
+                self._copy_member(name, os.path.join(path, name.replace("/", os.sep)))
 
     def update_config(self, contents: Union[str, bytes]) -> None:
         # Encode contents if needed
@@ -216,4 +221,44 @@ class WgtDeployer:
         _create_folder(widget_dir)
 
 
+_packaging_executor: Optional[BoundedExecutor] = None
+
+
+def get_packaging_executor() -> BoundedExecutor:
+    global _packaging_executor
+
+    if _packaging_executor is None:
+        from wirecloud import settings
+        _packaging_executor = BoundedExecutor(getattr(settings, 'WGT_PACKAGING_CONCURRENCY', 2),
+                                              thread_name_prefix='wgt-packaging')
+
+    return _packaging_executor
+
+
+async def run_packaging_task(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Runs a blocking packaging task (zip decompression, component validation, file writes...) on the packaging
+    workers. At most WGT_PACKAGING_CONCURRENCY tasks run at the same time, the rest wait without blocking the loop.
+    """
+
+    from wirecloud.translation import find_request_language, override_language
+
+    # The request is not reachable from the call stack of the worker threads
+    lang = find_request_language()
+
+    def task():
+        with override_language(lang):
+            return func(*args, **kwargs)
+
+    return await get_packaging_executor().run(task)
+
+
+def shutdown_packaging_executor() -> None:
+    global _packaging_executor
+
+    if _packaging_executor is not None:
+        _packaging_executor.shutdown(wait=False)
+        _packaging_executor = None
+
+
 __all__ = (InvalidContents, WgtFile, WgtDeployer)
@@ -17,10 +17,11 @@
 # along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
 
 from fastapi import Depends
-from pymongo import AsyncMongoClient
+from pymongo import AsyncMongoClient, IndexModel, ReadPreference
 from pymongo.asynchronous.client_session import AsyncClientSession
 from pymongo.errors import OperationFailure
-from typing import AsyncIterator, Annotated, Any, Optional
+from pymongo.read_concern import ReadConcern
+from typing import AsyncIterator, Annotated, Any, Callable, Mapping, Optional, Sequence
 
 import logging
 
@@ -30,48 +31,87 @@ from wirecloud.settings import DATABASE
 from bson import ObjectId
 
 
+# Collection methods modifying the database. When called through a session using transactions, the transaction is
+# started before running the first of them, so requests only reading data never open one
+WRITE_METHODS = frozenset((
+    'insert_one', 'insert_many', 'replace_one', 'update_one', 'update_many', 'delete_one', 'delete_many',
+    'find_one_and_delete', 'find_one_and_replace', 'find_one_and_update', 'bulk_write',
+))
+
+
 class CollectionWrapper:
-    def __init__(self, collection, session):
+    def __init__(self, collection, session, pymongo_session: Optional["PyMongoSession"] = None):
         self._collection = collection
         self._session = session
+        self._pymongo_session = pymongo_session
 
     def __getattr__(self, item):
         attr = getattr(self._collection, item)
-        if callable(attr):
+        if not callable(attr):
+            return attr
+
+        if item in WRITE_METHODS and self._pymongo_session is not None:
+            pymongo_session = self._pymongo_session
+
+            async def wrapper(*args, **kwargs):
+                await pymongo_session.start_transaction()
+                if 'session' not in kwargs:
+                    kwargs['session'] = self._session
+                return await attr(*args, **kwargs)
+        else:
             def wrapper(*args, **kwargs):
                 if 'session' not in kwargs:
                     kwargs['session'] = self._session
                 return attr(*args, **kwargs)
-            return wrapper
-        return attr
+
+        # Cache the wrapped method, __getattr__ is not called again for it
+        setattr(self, item, wrapper)
+        return wrapper
 
 
 class DatabaseWrapper:
-    def __init__(self, db, session):
+    def __init__(self, db, session, pymongo_session: Optional["PyMongoSession"] = None):
         self._db = db
         self._session = session
+        self._pymongo_session = pymongo_session
+        self._collections = {}
 
     def __getitem__(self, name):
-        collection = self._db[name]
-        return CollectionWrapper(collection, self._session)
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = CollectionWrapper(self._db[name], self._session,
+                                                                     self._pymongo_session)
+        return collection
 
     def __getattr__(self, item):
-        collection = getattr(self._db, item)
-        return CollectionWrapper(collection, self._session)
+        collection = CollectionWrapper(getattr(self._db, item), self._session, self._pymongo_session)
+        setattr(self, item, collection)
+        return collection
 
 
 class PyMongoSession:
-    def __init__(self, session: AsyncClientSession, use_transactions: bool = True):
+    def __init__(self, session: Optional[AsyncClientSession], use_transactions: bool = True, db=None):
         self._session = session
         self._transactions_supported = use_transactions
+        self._db = db
+        # Called once the current transaction has been committed
+        self._commit_callbacks: list[Callable[[], None]] = []
 
     def __getattr__(self, item: str):
         if item == "client":
-            db = self._session.client[DATABASE['NAME']]
-            if self._transactions_supported:
-                return DatabaseWrapper(db, self._session)
+            if self._db is not None:
+                db = self._db
             else:
-                return db
+                db = self._session.client[DATABASE['NAME']]
+
+            if self._transactions_supported:
+                db = DatabaseWrapper(db, self._session, self)
+
+            # Cache the database, __getattr__ is not called again for it
+            self.client = db
+            return db
+        elif self._session is None:
+            raise AttributeError(item)
         else:
             return getattr(self._session, item)
 
@@ -94,6 +134,11 @@ class PyMongoSession:
             else:
                 raise
 
+    def _run_commit_callbacks(self) -> None:
+        callbacks, self._commit_callbacks = self._commit_callbacks, []
+        for callback in callbacks:
+            callback()
+
 
 class PyObjectId(ObjectId):
     @classmethod
@@ -137,9 +182,35 @@ def get_db_url() -> str:
     return database_url
 
 
+READ_PREFERENCES = {
+    'primary': ReadPreference.PRIMARY,
+    'primaryPreferred': ReadPreference.PRIMARY_PREFERRED,
+    'secondary': ReadPreference.SECONDARY,
+    'secondaryPreferred': ReadPreference.SECONDARY_PREFERRED,
+    'nearest': ReadPreference.NEAREST,
+}
+
+
 USE_TRANSACTIONS = DATABASE.get('USE_TRANSACTIONS', True)
 client = AsyncMongoClient(get_db_url())
 database = client[DATABASE['NAME']]
+# Used by the read-only requests, that may be served by a secondary member of the replica set. Built on first use,
+# once the settings have been validated
+_read_database = None
+
+
+def get_read_database():
+    global _read_database
+
+    if _read_database is None:
+        read_preference = DATABASE.get('READ_PREFERENCE', 'primary')
+        if read_preference not in READ_PREFERENCES:
+            raise ValueError(f"DATABASE.READ_PREFERENCE must be one of: {', '.join(READ_PREFERENCES)}")
+
+        _read_database = client.get_database(DATABASE['NAME'], read_preference=READ_PREFERENCES[read_preference],
+                                             read_concern=ReadConcern(DATABASE.get('READ_CONCERN', None)))
+
+    return _read_database
 
 
 async def close() -> None:
@@ -177,11 +248,12 @@ async def get_session() -> AsyncIterator[PyMongoSession]:
         transactions_enabled = USE_TRANSACTIONS and await check_transactions_supported()
         pymongo_session = PyMongoSession(session, use_transactions=transactions_enabled)
 
+        # The transaction is started by the first write operation
         try:
-            await pymongo_session.start_transaction()
             yield pymongo_session
             if pymongo_session.in_transaction:
                 await pymongo_session._session.commit_transaction()
+            pymongo_session._run_commit_callbacks()
 
         except Exception:
             if pymongo_session.in_transaction:
@@ -189,11 +261,100 @@ async def get_session() -> AsyncIterator[PyMongoSession]:
             raise
 
 
+async def get_read_session() -> AsyncIterator[PyMongoSession]:
+    """
+    Session for the requests that only read data: no client session nor transaction is used and the reads honour the
+    ``READ_PREFERENCE`` and ``READ_CONCERN`` database settings. Writes are still allowed (e.g. caches stored in the
+    database), but they are sent to the primary outside any transaction.
+    """
+
+    yield PyMongoSession(None, use_transactions=False, db=get_read_database())
+
+
 async def commit(session: PyMongoSession) -> None:
+    # The next write operation starts a new transaction
     if session.in_transaction:
         await session._session.commit_transaction()
-        await session.start_transaction()
+        session._run_commit_callbacks()
+
+
+def on_commit(session: PyMongoSession, callback: Callable[[], None]) -> None:
+    """
+    Calls ``callback`` once the changes made through ``session`` are visible to other sessions: when the current
+    transaction is committed or, if there is no transaction in progress, right away. Callbacks are dropped if the
+    transaction is aborted.
+    """
+
+    if isinstance(session, PyMongoSession) and session.in_transaction:
+        session._commit_callbacks.append(callback)
+    else:
+        callback()
+
+
+# Only the indexes whose name starts with this prefix are managed (and dropped when no longer declared) by
+# sync_indexes, any other index created manually by the administrators is left untouched
+INDEX_NAME_PREFIX = 'wirecloud_'
+_INDEX_OPTIONS = ('unique', 'sparse', 'expireAfterSeconds', 'partialFilterExpression')
+
+
+def _index_matches(declared: dict, existing: dict) -> bool:
+    if list(dict(declared['key']).items()) != list(dict(existing['key']).items()):
+        return False
+
+    return all(declared.get(option) == existing.get(option) for option in _INDEX_OPTIONS)
+
+
+async def _drop_index(collection, name: str) -> None:
+    try:
+        await collection.drop_index(name)
+    except OperationFailure as e:
+        # Another worker may have dropped it first (IndexNotFound)
+        if e.code != 27:
+            raise
+
+
+async def sync_indexes(indexes: Mapping[str, Sequence[IndexModel]], drop: bool = True) -> dict[str, list[str]]:
+    """
+    Makes the indexes of the database match the declared ones: missing indexes are created, indexes whose keys or
+    options changed are recreated and, if ``drop`` is ``True``, managed indexes no longer declared are dropped.
+    Returns the ``collection.index`` names created and dropped.
+    """
+
+    result = {"created": [], "dropped": []}
+
+    for collection_name, collection_indexes in indexes.items():
+        collection = database[collection_name]
+        existing = {index['name']: index for index in await collection.list_indexes().to_list()}
+
+        declared = {}
+        for index in collection_indexes:
+            document = index.document
+            if not document['name'].startswith(INDEX_NAME_PREFIX):
+                raise ValueError(f"Index names must start with '{INDEX_NAME_PREFIX}': {document['name']}")
+            declared[document['name']] = index
+
+        to_create = []
+        for name, index in declared.items():
+            if name in existing:
+                if _index_matches(index.document, existing[name]):
+                    continue
+                await _drop_index(collection, name)
+                result["dropped"].append(f"{collection_name}.{name}")
+            to_create.append(index)
+
+        if drop:
+            for name in existing:
+                if name.startswith(INDEX_NAME_PREFIX) and name not in declared:
+                    await _drop_index(collection, name)
+                    result["dropped"].append(f"{collection_name}.{name}")
+
+        if to_create:
+            await collection.create_indexes(to_create)
+            result["created"] += [f"{collection_name}.{index.document['name']}" for index in to_create]
+
+    return result
 
 
 DBSession = PyMongoSession
-DBDep = Annotated[PyMongoSession, Depends(get_session)]
\ No newline at end of file
+DBDep = Annotated[PyMongoSession, Depends(get_session)]
+DBReadDep = Annotated[PyMongoSession, Depends(get_read_session)]
@@ -17,13 +17,12 @@
 # along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
 
 import aiohttp
-import asyncio
+from datetime import datetime, timezone
 from typing import Optional
 
 from wirecloud import settings
-from wirecloud.commons.auth.crud import update_user
+from wirecloud.commons.auth.idm_tokens import get_idm_access_token, get_idm_token_cache
 from wirecloud.commons.auth.schemas import UserAll
-from wirecloud.database import DBSession
 from wirecloud.platform.plugins import get_idm_get_token_functions
 
 
@@ -84,7 +83,19 @@ async def get_project_permissions(url: str, token: str) -> dict:
             return permissions
 
 
-async def get_openstack_project_token(url: str, project_id: str, idm_token: str) -> str:
+def get_token_expires_in(token_info: dict) -> Optional[float]:
+    try:
+        expires_at = datetime.fromisoformat(token_info["token"]["expires_at"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+
+    return (expires_at - datetime.now(timezone.utc)).total_seconds()
+
+
+async def get_openstack_project_token(url: str, project_id: str, idm_token: str) -> tuple[str, Optional[float]]:
     payload = {
         "auth": {
             "identity": {
@@ -112,17 +123,15 @@ async def get_openstack_project_token(url: str, project_id: str, idm_token: str)
             token = response.headers.get("X-Subject-Token")
             if not token:
                 raise Exception("No project token received from OpenStack")
-            return token
+            return token, get_token_expires_in(await response.json())
 
 
 class OpenStackTokenManager:
     def __init__(self, url: str):
         self.url = url
 
-    async def get_token(self, db: DBSession, user: UserAll, tenant_id: Optional[str]) -> str:
+    async def get_token(self, user: UserAll, tenant_id: Optional[str]) -> str:
         tenant_id = "__default__" if tenant_id is None else tenant_id
-        if "openstack_token" in user.idm_data and tenant_id in user.idm_data["openstack_token"]:
-            return user.idm_data["openstack_token"][tenant_id]
 
         if not getattr(settings, "OID_CONNECT_ENABLED", False):
             raise Exception("OIDC is not enabled")
@@ -130,26 +139,19 @@ class OpenStackTokenManager:
         if not getattr(settings, "OID_CONNECT_PLUGIN", "") in get_idm_get_token_functions():
             raise Exception("OIDC provider is not configured correctly! Contact your administrator.")
 
-        token_data_get_func = get_idm_get_token_functions()[getattr(settings, "OID_CONNECT_PLUGIN")]
-
-        try:
-            if asyncio.iscoroutinefunction(token_data_get_func):
-                token_data = await token_data_get_func(refresh_token=user.idm_data[getattr(settings, "OID_CONNECT_PLUGIN")]["idm_token"], code=None, redirect_uri=None)
-            else:
-                token_data = token_data_get_func(refresh_token=user.idm_data[getattr(settings, "OID_CONNECT_PLUGIN")]["idm_token"], code=None, redirect_uri=None)
-        except ValueError as e:
-            raise Exception(f"Error retrieving token from IDM: {str(e)}")
-
-        os_token = await self.get_openstack_token(user.username, token_data["access_token"], tenant_id)
-
-        user.idm_data[getattr(settings, "OID_CONNECT_PLUGIN")]["openstack_token"] = os_token
-        user.idm_data[getattr(settings, "OID_CONNECT_PLUGIN")]["idm_token"] = token_data["refresh_token"]
+        async def fetch() -> tuple[str, Optional[float]]:
+            try:
+                access_token = await get_idm_access_token(user)
+            except ValueError as e:
+                raise Exception(f"Error retrieving token from IDM: {str(e)}")
 
-        await update_user(db, user)
+            return await self.get_openstack_token(user.username, access_token, tenant_id)
 
-        return os_token
+        # Project tokens are cached with the IdM access tokens, so they are also discarded when the user logs out
+        key = (str(user.id), getattr(settings, "OID_CONNECT_PLUGIN"), 'openstack', self.url, tenant_id)
+        return await get_idm_token_cache().get(key, fetch)
 
-    async def get_openstack_token(self, username: str, idm_token: str, tenant_id: Optional[str]) -> str:
+    async def get_openstack_token(self, username: str, idm_token: str, tenant_id: Optional[str]) -> tuple[str, Optional[float]]:
         # We love FIWARE process to get the token <3
 
         # Fist we get an initial token
@@ -16,18 +16,17 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
 
-import asyncio
 from typing import Union
 from urllib.parse import quote_plus, urlparse
 
 from wirecloud import settings
-from wirecloud.commons.auth.crud import get_user_with_all_info, update_user, get_user_preferences
+from wirecloud.commons.auth.crud import get_user_with_all_info, get_user_preferences
+from wirecloud.commons.auth.idm_tokens import get_idm_access_token
 from wirecloud.database import DBSession
 from wirecloud.fiware import FIWARE_LAB_CLOUD_SERVER
 from wirecloud.fiware.openstack_token_manager import OpenStackTokenManager
-from wirecloud.platform.plugins import get_idm_get_token_functions
 from wirecloud.proxy.schemas import ProxyRequestData
-from wirecloud.proxy.utils import ValidationError
+from wirecloud.proxy.utils import ValidationError, add_body_replacement
 from wirecloud.translation import gettext as _
 
 
@@ -98,16 +97,7 @@ async def replace_body_pattern(request: ProxyRequestData, bodies: list[str], tok
         if request.data is None:
             raise ValidationError(_('No body data to replace pattern'))
 
-        new_body_array = bytearray()
-        if isinstance(request.data, bytes):
-            new_body_array.extend(request.data)
-        else:
-            async for chunk in request.data: # pragma: no branch
-                new_body_array.extend(chunk)
-
-        new_body = new_body_array.replace(pattern.encode('utf8'), token.encode('utf8'))
-        request.headers['content-length'] = str(len(new_body))
-        request.data = new_body
+        add_body_replacement(request, pattern.encode('utf8'), token.encode('utf8'))
 
 
 class IDMTokenProcessor:
@@ -151,50 +141,35 @@ class IDMTokenProcessor:
                 or not user.idm_data[getattr(settings, "OID_CONNECT_PLUGIN")]['idm_token']:
             raise ValidationError(_('User has not an active FIWARE profile'))
 
-        user_prefs = await get_user_preferences(db, user.id)
-        allows_use_of_token = False
-        domain_whitelist = ['*']
-        for pref in user_prefs:
-            if pref.name == 'allow_external_token_use':
-                allows_use_of_token = pref.value == 'true'
-            elif pref.name == 'external_token_domain_whitelist':
-                domain_whitelist = [domain.strip() for domain in pref.value.split(',')]
-
-        domain = urlparse(request.url).netloc
+        # The preferences of the workspace owner decide whether their token can be used by other users
+        if source == 'workspace':
+            user_prefs = await get_user_preferences(db, user.id)
+            allows_use_of_token = False
+            domain_whitelist = ['*']
+            for pref in user_prefs:
+                if pref.name == 'allow_external_token_use':
+                    allows_use_of_token = pref.value == 'true'
+                elif pref.name == 'external_token_domain_whitelist':
+                    domain_whitelist = [domain.strip() for domain in pref.value.split(',')]
+
+            domain = urlparse(request.url).netloc
+            if not allows_use_of_token or not (domain in domain_whitelist or '*' in domain_whitelist):
+                raise ValidationError(_('Workspace owner does not have permission to give their token to other users'))
 
-        if user is not None and source == 'workspace' and (not allows_use_of_token or not (domain in domain_whitelist or '*' in domain_whitelist)):
-            raise ValidationError(_('Workspace owner does not have permission to give their token to other users'))
-
-        token_data_get_func = get_idm_get_token_functions()[getattr(settings, "OID_CONNECT_PLUGIN")]
-
-        try:
-            if asyncio.iscoroutinefunction(token_data_get_func):
-                token_data = await token_data_get_func(
-                    refresh_token=user.idm_data[getattr(settings, "OID_CONNECT_PLUGIN")]["idm_token"], code=None,
-                    redirect_uri=None)
-            else:
-                token_data = token_data_get_func(
-                    refresh_token=user.idm_data[getattr(settings, "OID_CONNECT_PLUGIN")]["idm_token"], code=None,
-                    redirect_uri=None)
-        except ValueError:
-            raise Exception(_("Failed to get token from IdM"))
+        if 'fiware-oauth-token' in filtered:
+            try:
+                access_token = await get_idm_access_token(user)
+            except ValueError:
+                raise Exception(_("Failed to get token from IdM"))
 
-        user.idm_data[getattr(settings, "OID_CONNECT_PLUGIN")]["idm_token"] = token_data["refresh_token"]
+            replace_get_parameter(request, ["fiware-oauth-get-parameter"], access_token)
+            replace_header_name(request, ["fiware-oauth-header-name"], access_token)
+            await replace_body_pattern(request, ["fiware-oauth-body-pattern"], access_token)
 
         if 'fiware-openstack-token' in filtered:
             tenant_id = request.headers.get('fiware-openstack-tenant-id', None)
+            openstack_token = await self.openstack_manager.get_token(user, tenant_id)
 
-            openstack_token = await self.openstack_manager.get_token(db, user, tenant_id)
-
-        await update_user(db, user)
-        await db.commit()
-
-        if 'fiware-oauth-token' in filtered:
-            replace_get_parameter(request, ["fiware-oauth-get-parameter"], token_data["access_token"])
-            replace_header_name(request, ["fiware-oauth-header-name"], token_data["access_token"])
-            await replace_body_pattern(request, ["fiware-oauth-body-pattern"], token_data["access_token"])
-
-        if 'fiware-openstack-token' in filtered:
             replace_get_parameter(request, ["fiware-openstack-get-parameter"], openstack_token)
             replace_header_name(request, ["fiware-openstack-header-name"], openstack_token)
             await replace_body_pattern(request, ["fiware-openstack-body-pattern"], openstack_token)
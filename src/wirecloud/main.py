@@ -30,21 +30,41 @@ except ImportError:
 
     sys.path.insert(0, str(Path(__file__).parent.parent.resolve()))
 
+import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.openapi.utils import get_openapi
 
 from wirecloud.settings_validator import validate_settings
-from wirecloud.database import close
-from wirecloud.platform.plugins import get_plugins, get_extra_openapi_schemas
+from wirecloud.database import close, sync_indexes
+from wirecloud.settings import cache, DATABASE
+from wirecloud.proxy.pool import open_connection_pool, close_connection_pool
+from wirecloud.commons.utils.theme import build_static_files_index
+from wirecloud.commons.utils.wgt import shutdown_packaging_executor
+from wirecloud.commons.auth.passwords import clear_password_hasher
+from wirecloud.platform.plugins import get_plugins, get_extra_openapi_schemas, get_database_indexes
 from wirecloud.commons.middleware import install_all_middlewares
 from wirecloud import docs
 
+logger = logging.getLogger(__name__)
+
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     await validate_settings()
+    if DATABASE.get('SYNC_INDEXES', True):
+        try:
+            await sync_indexes(get_database_indexes())
+        except Exception:
+            # Queries still work without the indexes, they can be created later using the syncindexes command
+            logger.exception("Could not synchronize the database indexes")
+    await open_connection_pool()
+    build_static_files_index()
     yield
+    await close_connection_pool()
+    shutdown_packaging_executor()
+    clear_password_hasher()
+    await cache.close()
     await close()
 
 
@@ -19,7 +19,7 @@
 from fastapi import APIRouter, Request
 from typing import Optional
 
-from wirecloud.database import DBDep
+from wirecloud.database import DBReadDep
 from wirecloud.platform.context.schemas import Context
 from wirecloud.platform.context.utils import get_platform_context, get_workspace_context_definitions
 from wirecloud.commons.auth.utils import SessionDepNoCSRF, UserDepNoCSRF
@@ -28,7 +28,7 @@ router = APIRouter()
 
 
 @router.get("/", response_model=Context)
-async def get_context(db: DBDep, request: Request, user: UserDepNoCSRF, session: SessionDepNoCSRF, theme: Optional[str] = None):
+async def get_context(db: DBReadDep, request: Request, user: UserDepNoCSRF, session: SessionDepNoCSRF, theme: Optional[str] = None):
     context = Context(
         platform=await get_platform_context(db, request, user=user, session=session),
         workspace=get_workspace_context_definitions()
@@ -16,18 +16,107 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
 
+from hashlib import md5
 from typing import Optional, Any
 from urllib.request import Request
 
-from wirecloud.settings import cache
+from bson.errors import InvalidId
+
+from wirecloud import settings
 from wirecloud.platform.context.crud import get_all_constants
 from wirecloud.platform.plugins import get_plugins
 from wirecloud.platform.context.schemas import BaseContextKey, PlatformContextKey
+from wirecloud.commons.auth.cache import add_user_invalidation_listener, is_coherent
+from wirecloud.commons.auth.crud import get_user_groups, get_all_user_permissions
 from wirecloud.commons.auth.schemas import UserAll, Session
-from wirecloud.database import DBSession
+from wirecloud.commons.utils.structures import LRUCache
+from wirecloud.database import DBSession, Id
 from wirecloud.platform.workspace.models import Workspace
 
 
+class ContextCache:
+    """
+    Process-local cache of the values used to build the platform context: the constants stored in the database and
+    the values derived from each user (groups, permissions and avatar). Both follow the size and ttl limits of the
+    principal cache. Constants are dropped by ``invalidate_constants`` and user entries are dropped together with the
+    principal cache entries of the same users. As with the principal cache, user entries are bypassed while the
+    invalidations sent by other workers are not being received.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.constants = LRUCache(1, ttl)
+        self.users = LRUCache(maxsize, ttl)
+
+    def get_constants(self) -> Optional[dict[str, str]]:
+        constants = self.constants.get("constants")
+        return dict(constants) if constants is not None else None
+
+    def set_constants(self, constants: dict[str, str]) -> None:
+        self.constants.set("constants", dict(constants))
+
+    def invalidate_constants(self) -> None:
+        self.constants.clear()
+
+    def get_user_values(self, user_id: Id) -> Optional[dict[str, Any]]:
+        if not is_coherent():
+            return None
+
+        values = self.users.get(str(user_id))
+        if values is None:
+            return None
+
+        # Copy on read, the platform context is returned to the callers
+        return {**values, 'permissions': list(values['permissions'])}
+
+    def set_user_values(self, user_id: Id, values: dict[str, Any]) -> None:
+        if is_coherent():
+            self.users.set(str(user_id), {**values, 'permissions': list(values['permissions'])})
+
+    def invalidate_users(self, user_ids: Optional[list[Id]] = None) -> None:
+        if user_ids is None:
+            self.users.clear()
+            return
+
+        for user_id in user_ids:
+            self.users.delete(str(user_id))
+
+    def clear(self) -> None:
+        self.constants.clear()
+        self.users.clear()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            "constants": self.constants.stats(),
+            "users": self.users.stats()
+        }
+
+
+_context_cache: Optional[ContextCache] = None
+
+
+def get_context_cache() -> ContextCache:
+    global _context_cache
+
+    if _context_cache is None:
+        _context_cache = ContextCache(getattr(settings, 'AUTH_PRINCIPAL_CACHE_SIZE', 1024),
+                                      getattr(settings, 'AUTH_PRINCIPAL_CACHE_TTL', 30))
+
+    return _context_cache
+
+
+def clear_context_cache() -> None:
+    global _context_cache
+    _context_cache = None
+
+
+def _invalidate_user_context(user_ids: Optional[list[Id]]) -> None:
+    if _context_cache is not None:
+        _context_cache.invalidate_users(user_ids)
+
+
+add_user_invalidation_listener(_invalidate_user_context)
+
+
 # TODO Add type hints to these functions
 
 
@@ -41,14 +130,48 @@ def get_platform_context_definitions() -> dict[str, BaseContextKey]:
     return context
 
 
+async def get_user_context_values(db: DBSession, user: UserAll) -> dict[str, Any]:
+    context_cache = get_context_cache()
+    values = context_cache.get_user_values(user.id)
+    if values is not None:
+        return values
+
+    try:
+        permissions = [p.codename for p in await get_all_user_permissions(db, user.id)]
+    except InvalidId:
+        permissions = []
+
+    values = {
+        'avatar': 'https://www.gravatar.com/avatar/' + md5(user.email.strip().lower().encode('utf8')).hexdigest() + '?s=25',
+        'groups': tuple([group.name for group in await get_user_groups(db, user.id)]),
+        'permissions': permissions,
+    }
+    context_cache.set_user_values(user.id, values)
+
+    return values
+
+
 async def get_platform_context_current_values(db: DBSession, request: Optional[Request],
                                               user: Optional[UserAll], session: Optional[Session] = None) -> dict[str, Any]:
+    # The values are computed once per request, a workspace load needs them several times
+    state = getattr(request, 'state', None)
+    memo_key = (str(user.id) if user else None, id(session) if session else None)
+    memo = getattr(state, 'platform_context_values', None) if state is not None else None
+    if memo is not None and memo_key in memo:
+        return dict(memo[memo_key])
+
     plugins = get_plugins()
     values = {}
 
     for plugin in plugins:
         values.update(await plugin.get_platform_context_current_values(db, request, user, session=session))
 
+    if state is not None:
+        if memo is None:
+            memo = state.platform_context_values = {}
+        memo[memo_key] = values
+        return dict(values)
+
     return values
 
 
@@ -87,24 +210,24 @@ def get_workspace_context_current_values(workspace: Workspace, user: Optional[Us
 
 
 async def get_constant_context_values(db: DBSession) -> dict[str, str]:
+    context_cache = get_context_cache()
+    res = context_cache.get_constants()
+    if res is not None:
+        return res
+
     res = {}
 
     constants = await get_all_constants(db)
     for constant in constants:
         res[constant.concept] = constant.value
 
+    context_cache.set_constants(res)
     return res
 
 
 async def get_context_values(db: DBSession, workspace: Workspace, request: Optional[Request], user: Optional[UserAll],
                              session: Session = None) -> dict[str, dict[str, Any]]:
-    cache_key = f'constant_context/{str(user.id) if user else "anonymous"}'
-    constant_context = await cache.get(cache_key)
-    if constant_context is None:
-        constant_context = await get_constant_context_values(db)
-        await cache.set(cache_key, constant_context)
-
-    platform_context = constant_context
+    platform_context = await get_constant_context_values(db)
     platform_context.update(await get_platform_context_current_values(db, request, user, session=session))
 
     return {
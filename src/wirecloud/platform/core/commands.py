@@ -51,6 +51,23 @@ async def runserver_cmd(args: argparse.Namespace) -> None:
         pass
 
 
+async def runcacheserver_cmd(args: argparse.Namespace) -> None:
+    from wirecloud.commons.utils.sharedcache import CacheServer
+
+    if os.path.exists(args.socket):
+        os.unlink(args.socket)
+
+    server = CacheServer(args.socket)
+    await server.start()
+    print(f"Cache server listening on unix://{args.socket}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
 def _get_modules_to_process(wirecloud_path: Path, settings) -> list:
     modules_to_process = []
 
@@ -419,17 +436,98 @@ def compiletranslations_cmd(args: argparse.Namespace) -> None:
     print("=" * 70)
 
 
-async def rebuildsearchindexes_cmd(_args: argparse.Namespace) -> None:
-    from wirecloud.commons.search import rebuild_all_indexes
+def _print_rebuild_progress(index: str, indexed: int, elapsed: float, done: bool) -> None:
+    rate = indexed / elapsed if elapsed > 0 else 0
+    if done:
+        print(f"✓ {index}: {indexed} document(s) indexed in {elapsed:.1f}s ({rate:.0f} docs/s)")
+    else:
+        print(f"  {index}: {indexed} document(s) indexed ({rate:.0f} docs/s)")
+
+
+async def rebuildsearchindexes_cmd(args: argparse.Namespace) -> None:
+    from wirecloud.commons.search import get_rebuild_engine
     from wirecloud.database import get_session
 
+    rebuild = get_rebuild_engine(getattr(args, "index", None) or "all")
+
     # get_session provides an async iterator
     async for session in get_session():  # pragma: no branch
-        await rebuild_all_indexes(session)
+        await rebuild(session, chunk_size=getattr(args, "chunk_size", None), progress=_print_rebuild_progress)
 
     print("Search indexes rebuilt successfully.")
 
 
+async def syncindexes_cmd(args: argparse.Namespace) -> None:
+    from wirecloud.database import sync_indexes
+    from wirecloud.platform.plugins import get_database_indexes
+
+    result = await sync_indexes(get_database_indexes(), drop=not getattr(args, "no_drop", False))
+
+    for name in result["dropped"]:
+        print(f"- {name}")
+    for name in result["created"]:
+        print(f"+ {name}")
+
+    if not result["created"] and not result["dropped"]:
+        print("Database indexes are up to date.")
+    else:
+        print(f"Database indexes synchronized ({len(result['created'])} created, {len(result['dropped'])} dropped).")
+
+
+COMPRESSIBLE_STATIC_EXTENSIONS = ('.css', '.js', '.json', '.map', '.svg', '.html', '.txt', '.xml')
+
+
+def _compress_static_file(path: str, suffix: str, compress: Callable[[bytes], bytes]) -> bool:
+    compressed_path = path + suffix
+    if os.path.exists(compressed_path) and os.path.getmtime(compressed_path) >= os.path.getmtime(path):
+        return False
+
+    with open(path, 'rb') as f:
+        contents = compress(f.read())
+
+    with open(compressed_path, 'wb') as f:
+        f.write(contents)
+
+    return True
+
+
+def compressstatic_cmd(args: argparse.Namespace) -> None:
+    import gzip
+    from wirecloud import settings
+    from wirecloud.commons.utils.theme import get_static_dirs
+
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    compressors = [('.gz', lambda contents: gzip.compress(contents, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        compressors.append(('.br', lambda contents: brotli.compress(contents)))
+    else:
+        print("brotli is not installed, only the gzip variants will be built.")
+
+    static_dirs = []
+    for theme in settings.AVAILABLE_THEMES:
+        static_dirs.extend(static_dir for static_dir in get_static_dirs(theme) if static_dir not in static_dirs)
+
+    compressed = 0
+    for static_dir in static_dirs:
+        for dirpath, _dirnames, filenames in os.walk(static_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if not filename.endswith(COMPRESSIBLE_STATIC_EXTENSIONS) or os.path.getsize(path) < args.min_size:
+                    continue
+
+                for suffix, compress in compressors:
+                    if _compress_static_file(path, suffix, compress):
+                        compressed += 1
+                        if args.verbose:
+                            print(f"  {path}{suffix}")
+
+    print(f"{compressed} precompressed static file(s) built.")
+
+
 async def populate_cmd(_args: argparse.Namespace) -> None:
     from wirecloud.database import get_session
 
@@ -477,6 +575,9 @@ def setup_commands(subparsers: argparse._SubParsersAction) -> dict[str, Callable
     runserver.add_argument("-w", "--workers", type=int, default=1, help="Number of uvicorn workers (default: 1)")
     runserver.add_argument("--debug", action="store_true", help="Enable debug mode")
 
+    runcacheserver = subparsers.add_parser("runcacheserver", help="Start a local shared cache server on a Unix socket")
+    runcacheserver.add_argument("-s", "--socket", default="/tmp/wirecloud-cache.sock", help="Path of the Unix socket (default: /tmp/wirecloud-cache.sock)")
+
     gentranslations = subparsers.add_parser("gentranslations", help="Generate or update translation files (.po) for all modules")
     gentranslations.add_argument("-l", "--language", help="Generate translations for a specific language (e.g., 'es', 'fr', 'de'). If not specified, all languages from settings.LANGUAGES will be processed.")
 
@@ -484,13 +585,23 @@ def setup_commands(subparsers: argparse._SubParsersAction) -> dict[str, Callable
     compiletranslations.add_argument("-l", "--language", help="Compile translations for a specific language. If not specified, all languages from settings.LANGUAGES will be compiled.")
     compiletranslations.add_argument("-v", "--verbose", action="store_true", help="Show detailed output for each file compiled")
 
-    _rebuildsearchindexes = subparsers.add_parser("rebuildsearchindexes", help="Rebuild all search indexes")
+    rebuildsearchindexes = subparsers.add_parser("rebuildsearchindexes", help="Rebuild the search indexes without interrupting searches")
+    rebuildsearchindexes.add_argument("-i", "--index", default="all", choices=("all", "user", "group", "workspace", "resource"), help="Index to rebuild (default: all)")
+    rebuildsearchindexes.add_argument("-c", "--chunk-size", type=int, default=None, help="Number of documents sent on each bulk request (default: 500)")
+    syncindexes = subparsers.add_parser("syncindexes", help="Create, update and drop the database indexes declared by the installed plugins")
+    syncindexes.add_argument("--no-drop", action="store_true", help="Keep the indexes that are no longer declared")
+    compressstatic = subparsers.add_parser("compressstatic", help="Build the precompressed variants (.gz and, if brotli is installed, .br) of the static files")
+    compressstatic.add_argument("-m", "--min-size", type=int, default=1024, help="Skip the files smaller than this number of bytes (default: 1024)")
+    compressstatic.add_argument("-v", "--verbose", action="store_true", help="Show each file built")
     _populate = subparsers.add_parser("populate", help="Populate the database with initial data")
 
     return {
         "runserver": runserver_cmd,
+        "runcacheserver": runcacheserver_cmd,
         "gentranslations": gentranslations_cmd,
         "compiletranslations": compiletranslations_cmd,
         "rebuildsearchindexes": rebuildsearchindexes_cmd,
+        "syncindexes": syncindexes_cmd,
+        "compressstatic": compressstatic_cmd,
         "populate": populate_cmd
     }
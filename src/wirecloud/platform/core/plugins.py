@@ -21,15 +21,14 @@ import logging
 from argparse import _SubParsersAction
 from urllib.parse import quote_plus
 import orjson as json
-from bson.errors import InvalidId
-from hashlib import sha1, md5
+from hashlib import sha1
 from typing import Any, Optional, Callable
 from fastapi import FastAPI, Request
+from pymongo import IndexModel
 
 import wirecloud.platform as platform
 from wirecloud import settings
 from wirecloud.catalogue.crud import get_catalogue_resource
-from wirecloud.commons.auth.crud import get_user_groups, get_all_user_permissions
 from wirecloud.commons.auth.routes import admin_router
 from wirecloud.commons.utils.http import get_absolute_reverse_url
 from wirecloud.commons.utils.template.schemas.macdschemas import Vendor, Name, Version
@@ -42,10 +41,13 @@ from wirecloud.platform.localcatalogue.utils import install_component
 from wirecloud.platform.widget.routes import widget_router, showcase_router
 from wirecloud.platform.wiring.routes import wiring_router, operator_router
 from wirecloud.platform.workspace.crud import get_workspace_by_username_and_name, create_workspace
+from wirecloud.platform.workspace.crud import INDEXES as WORKSPACE_INDEXES
+from wirecloud.platform.markets.crud import INDEXES as MARKET_INDEXES
 from wirecloud.platform.workspace.routes import workspace_router, workspaces_router
 from wirecloud.platform.plugins import (get_active_features_info, get_plugin_urls, AjaxEndpoint, build_url_template,
                                             WirecloudPlugin, URLTemplate)
 from wirecloud.platform.context.schemas import BaseContextKey, WorkspaceContextKey
+from wirecloud.platform.context.utils import get_user_context_values
 from wirecloud.platform.preferences.routes import preferences_router
 from wirecloud.platform.preferences.schemas import PreferenceKey, SelectEntry, TabPreferenceKey
 from wirecloud.platform.urls import patterns
@@ -73,8 +75,18 @@ LANDING_DASHBOARD_FILE = os.path.join(BASE_PATH, 'initial', 'WireCloud_landing-d
 logger = logging.getLogger(__name__)
 
 
+_version_hash: Optional[tuple[dict[str, str], str]] = None
+
+
 def get_version_hash():
-    return sha1(json.dumps(get_active_features_info())).hexdigest()
+    global _version_hash
+
+    # The features info is rebuilt when the plugins are reloaded
+    features_info = get_active_features_info()
+    if _version_hash is None or _version_hash[0] is not features_info:
+        _version_hash = (features_info, sha1(json.dumps(features_info)).hexdigest())
+
+    return _version_hash[1]
 
 
 async def populate_component(db: DBSession, wirecloud_user: UserAll, vendor: Vendor, name: Name,
@@ -251,13 +263,10 @@ class WirecloudCorePlugin(WirecloudPlugin):
         if user:
             username = user.username
             fullname = user.get_full_name()
-            avatar = 'https://www.gravatar.com/avatar/' + md5(
-                user.email.strip().lower().encode('utf8')).hexdigest() + '?s=25'
-            groups = tuple([group.name for group in await get_user_groups(db, user.id)])
-            try:
-                permissions = [p.codename for p in await get_all_user_permissions(db, user.id)]
-            except InvalidId:
-                permissions = []
+            user_values = await get_user_context_values(db, user)
+            avatar = user_values['avatar']
+            groups = user_values['groups']
+            permissions = user_values['permissions']
         else:
             username = 'anonymous'
             fullname = 'Anonymous'
@@ -612,6 +621,9 @@ class WirecloudCorePlugin(WirecloudPlugin):
     def get_management_commands(self, subparsers: _SubParsersAction) -> dict[str, Callable]:
         return setup_commands(subparsers)
 
+    def get_database_indexes(self) -> dict[str, tuple[IndexModel, ...]]:
+        return {**WORKSPACE_INDEXES, **MARKET_INDEXES}
+
     async def populate(self, db: DBSession, wirecloud_user: UserAll) -> bool:
         updated = False
 
@@ -23,7 +23,7 @@ from fastapi import APIRouter, Request, Body, Path, Response
 from wirecloud.catalogue.crud import get_catalogue_resource_by_id
 from wirecloud.commons.auth.utils import UserDep, UserDepNoCSRF
 from wirecloud.commons.utils.http import authentication_required, build_error_response, consumes, NotFound
-from wirecloud.database import DBDep, Id
+from wirecloud.database import DBDep, DBReadDep, Id
 from wirecloud import docs as root_docs
 from wirecloud.platform.iwidget import docs
 from wirecloud.platform.iwidget.schemas import WidgetInstanceData, WidgetInstanceDataCreate, \
@@ -58,7 +58,7 @@ iwidget_router = APIRouter()
     }
 )
 @authentication_required(csrf=False)
-async def get_widget_instance_collection(db: DBDep, user: UserDepNoCSRF, request: Request, workspace_id: Id = Path(
+async def get_widget_instance_collection(db: DBReadDep, user: UserDepNoCSRF, request: Request, workspace_id: Id = Path(
     description=docs.get_widget_instance_collection_workspace_id_description),
                                  tab_id: str = Path(description=docs.get_widget_instance_collection_tab_id_description)):
     workspace = await get_workspace_by_id(db, workspace_id)
@@ -232,7 +232,7 @@ async def update_widget_instance_collection(db: DBDep, user: UserDep, request: R
     }
 )
 @authentication_required(csrf=False)
-async def get_widget_instance_entry(db: DBDep, user: UserDepNoCSRF, request: Request,
+async def get_widget_instance_entry(db: DBReadDep, user: UserDepNoCSRF, request: Request,
                             workspace_id: Id = Path(description=docs.get_widget_instance_entry_workspace_id_description),
                             tab_id: str = Path(description=docs.get_widget_instance_entry_tab_id_description),
                             iwidget_id: str = Path(
@@ -476,7 +476,7 @@ async def update_widget_instance_preferences(db: DBDep, user: UserDep, request:
     }
 )
 @authentication_required(csrf=False)
-async def get_widget_instance_preferences(db: DBDep, user: UserDepNoCSRF, request: Request, workspace_id: Id = Path(
+async def get_widget_instance_preferences(db: DBReadDep, user: UserDepNoCSRF, request: Request, workspace_id: Id = Path(
     description=docs.get_widget_instance_preferences_workspace_id_description), tab_id: str = Path(
     description=docs.get_widget_instance_preferences_tab_id_description), iwidget_id: str = Path(
     description=docs.get_widget_instance_preferences_widget_instance_id_description)):
@@ -607,7 +607,7 @@ async def update_widget_instance_properties(db: DBDep, user: UserDep, request: R
     }
 )
 @authentication_required(csrf=False)
-async def get_widget_instance_properties(db: DBDep, user: UserDepNoCSRF, request: Request, workspace_id: Id = Path(description=docs.get_widget_instance_properties_workspace_id_description),
+async def get_widget_instance_properties(db: DBReadDep, user: UserDepNoCSRF, request: Request, workspace_id: Id = Path(description=docs.get_widget_instance_properties_workspace_id_description),
                                  tab_id: str = Path(description=docs.get_widget_instance_properties_tab_id_description), iwidget_id: str = Path(description=docs.get_widget_instance_properties_widget_instance_id_description)):
     workspace = await get_workspace_by_id(db, workspace_id)
     if workspace is None:
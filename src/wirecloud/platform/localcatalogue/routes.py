@@ -18,7 +18,8 @@
 
 import zipfile
 import logging
-from typing import Union, Optional
+from tempfile import SpooledTemporaryFile
+from typing import Union, Optional, AsyncIterator
 
 import orjson
 from fastapi import APIRouter, Request, Response, Query, UploadFile, Path
@@ -41,9 +42,9 @@ from wirecloud.commons.utils.http import produces, NotFound, build_error_respons
 from wirecloud.catalogue.crud import get_catalogue_resource_versions_for_user, get_catalogue_resource_by_id, \
     get_catalogue_resource, get_user_catalogue_resource, get_user_catalogue_resources, \
     delete_catalogue_resources, uninstall_resource_to_user, delete_resource_if_not_used
-from wirecloud.commons.utils.wgt import WgtFile, InvalidContents
+from wirecloud.commons.utils.wgt import WgtFile, InvalidContents, run_packaging_task
 from wirecloud.platform.localcatalogue import docs
-from wirecloud.database import DBDep, Id, DBSession
+from wirecloud.database import DBDep, DBReadDep, Id, DBSession
 from wirecloud.platform.localcatalogue.schemas import MultipleResourcesInstalledResponse, ResourceCreateData
 from wirecloud.platform.localcatalogue.utils import fix_dev_version, install_component
 from wirecloud.platform.workspace.crud import get_workspace_by_id
@@ -55,6 +56,19 @@ from wirecloud import docs as root_docs
 
 logger = logging.getLogger(__name__)
 
+# Uploaded components larger than this are written to a temporary file instead of being kept in memory
+SPOOL_MAX_MEMORY_SIZE = 1024 * 1024
+
+
+async def _spool(chunks: AsyncIterator[bytes]) -> SpooledTemporaryFile:
+    spooled = SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY_SIZE)
+    async for chunk in chunks:
+        spooled.write(chunk)
+
+    spooled.seek(0)
+    return spooled
+
+
 router = APIRouter()
 resources_router = APIRouter()
 workspace_router = APIRouter()
@@ -75,7 +89,7 @@ workspace_router = APIRouter()
     }
 )
 @produces(["application/json"])
-async def get_resource_collection(db: DBDep, user: UserDepNoCSRF, request: Request,
+async def get_resource_collection(db: DBReadDep, user: UserDepNoCSRF, request: Request,
                                   process_urls: bool = Query(True, description=docs.get_resource_collection_process_urls_description)):
     resources = {}
     results = await get_catalogue_resource_versions_for_user(db, user=user)
@@ -159,16 +173,16 @@ async def create_resource(db: DBDep, user: UserDep, request: Request,
         if not "file" in form_data or not isinstance(form_data["file"], UploadFile):
             return build_error_response(request, 400, _("Missing component file in the request"))
 
-        downloaded_file = await form_data["file"].read()
+        # Starlette already spooled the uploaded file to disk, use it directly instead of reading it into memory
         try:
-            file_contents = WgtFile(downloaded_file)
+            file_contents = await run_packaging_task(WgtFile, form_data["file"].file)
         except zipfile.BadZipfile:
             return build_error_response(request, 400, _("The provided file is not a valid zip file"))
     elif request.state.mimetype == "application/octet-stream":
         # The request body is the file contents
-        downloaded_file = await request.body()
+        downloaded_file = await _spool(request.stream())
         try:
-            file_contents = WgtFile(downloaded_file)
+            file_contents = await run_packaging_task(WgtFile, downloaded_file)
         except zipfile.BadZipfile:
             return build_error_response(request, 400, _("The provided file is not a valid zip file"))
     else: # application/json
@@ -192,9 +206,7 @@ async def create_resource(db: DBDep, user: UserDep, request: Request,
                 raise Exception()
 
             if isinstance(response, StreamingResponse):
-                downloaded_file = b""
-                async for chunk in response.body_iterator:  # pragma: no branch
-                    downloaded_file += chunk
+                downloaded_file = await _spool(response.body_iterator)
             else:
                 downloaded_file = response.render(None)
         except Exception as e:
@@ -202,7 +214,7 @@ async def create_resource(db: DBDep, user: UserDep, request: Request,
             return build_error_response(request, 409, _('Content cannot be downloaded from the specified url'))
 
         try:
-            file_contents = WgtFile(downloaded_file)
+            file_contents = await run_packaging_task(WgtFile, downloaded_file)
         except zipfile.BadZipfile:
             return build_error_response(request, 400, _('The file downloaded from the marketplace is not a zip file'))
 
@@ -233,7 +245,7 @@ async def create_resource(db: DBDep, user: UserDep, request: Request,
             pass
 
     try:
-        fix_dev_version(file_contents, user)
+        await run_packaging_task(fix_dev_version, file_contents, user)
         added, resource = await install_component(db, file_contents, executor_user=user, public=public,
                                                   users=user_objs, groups=group_objs)
         if not added and force_create:
@@ -301,7 +313,7 @@ async def create_resource(db: DBDep, user: UserDep, request: Request,
     }
 )
 @authentication_required()
-async def get_resource_entry(db: DBDep, user: UserDepNoCSRF, request: Request,
+async def get_resource_entry(db: DBReadDep, user: UserDepNoCSRF, request: Request,
                              vendor: str = Path(..., description=docs.get_resource_entry_parameter_vendor_description),
                              name: str = Path(..., description=docs.get_resource_entry_parameter_name_description),
                              version: str = Path(..., description=docs.get_resource_entry_parameter_version_description)):
@@ -438,7 +450,7 @@ async def delete_resource_entry(db: DBDep, user: UserDep, request: Request,
             docs.get_resource_description_not_found_response_description)
     }
 )
-async def get_resource_description(db: DBDep, request: Request, user: UserDepNoCSRF,
+async def get_resource_description(db: DBReadDep, request: Request, user: UserDepNoCSRF,
                                    vendor: str = Path(..., description=docs.get_resource_description_parameter_vendor_description),
                                    name: str = Path(..., description=docs.get_resource_description_parameter_name_description),
                                    version: str = Path(..., description=docs.get_resource_description_parameter_version_description),
@@ -476,7 +488,7 @@ async def get_resource_description(db: DBDep, request: Request, user: UserDepNoC
     }
 )
 @produces(["application/json"])
-async def get_workspace_resource_collection(db: DBDep, user: UserDepNoCSRF, request: Request,
+async def get_workspace_resource_collection(db: DBReadDep, user: UserDepNoCSRF, request: Request,
                                             workspace_id: str = Path(..., description=docs.get_workspace_resource_collection_parameter_workspace_id_description),
                                             process_urls: bool = Query(True, description=docs.get_workspace_resource_collection_parameter_process_urls_description)):
     workspace: Workspace = await get_workspace_by_id(db, Id(workspace_id))
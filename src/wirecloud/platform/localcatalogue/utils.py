@@ -22,7 +22,7 @@ from typing import Optional
 import wirecloud.catalogue.utils as catalogue_utils
 from wirecloud.commons.auth.models import Group
 from wirecloud.database import DBSession, commit
-from wirecloud.commons.utils.wgt import WgtFile
+from wirecloud.commons.utils.wgt import WgtFile, run_packaging_task
 from wirecloud.catalogue.utils import add_packaged_resource, check_vendor_permissions
 from wirecloud.catalogue.crud import (get_catalogue_resource, delete_catalogue_resources, install_resource_to_user,
                                           install_resource_to_group, change_resource_publicity)
@@ -94,7 +94,7 @@ async def install_component(db: DBSession, file_contents: WgtFile, executor_user
             pass
 
     await catalogue_utils.create_widget_on_resource_creation(db, resource)
-    catalogue_utils.deploy_operators_on_resource_creation(resource)
+    await run_packaging_task(catalogue_utils.deploy_operators_on_resource_creation, resource)
 
     resource = await get_catalogue_resource(db, resource.vendor, resource.short_name, resource.version)
     if executor_user is not None:
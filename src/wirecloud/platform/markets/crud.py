@@ -19,6 +19,7 @@
 from typing import Optional
 
 from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
 
 from wirecloud.database import DBSession, commit
 from wirecloud.commons.auth.schemas import User
@@ -26,6 +27,13 @@ from wirecloud.commons.auth.models import DBUser as UserModel
 from wirecloud.platform.markets.models import DBMarket as MarketModel
 from wirecloud.platform.markets.schemas import Market
 
+INDEXES = {
+    "markets": (
+        IndexModel([("user_id", ASCENDING), ("name", ASCENDING)], name="wirecloud_user_id_name"),
+        IndexModel([("public", ASCENDING)], name="wirecloud_public"),
+    ),
+}
+
 
 async def get_markets_for_user(db: DBSession, user: Optional[User]) -> list[Market]:
     if user is not None and user.has_perm("MARKETPLACE.VIEW"):
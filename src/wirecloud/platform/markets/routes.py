@@ -33,7 +33,7 @@ from wirecloud.commons.utils.wgt import WgtFile
 from wirecloud.catalogue.crud import get_catalogue_resource
 from wirecloud.catalogue import utils as catalogue
 from wirecloud import docs as root_docs
-from wirecloud.database import DBDep
+from wirecloud.database import DBDep, DBReadDep
 from wirecloud.translation import gettext as _
 
 router = APIRouter()
@@ -56,7 +56,7 @@ markets_router = APIRouter()
 )
 @produces(["application/json"])
 @authentication_required(csrf=False)
-async def get_market_collection(db: DBDep, user: UserDepNoCSRF, _request: Request):
+async def get_market_collection(db: DBReadDep, user: UserDepNoCSRF, _request: Request):
     result = []
 
     for market in await get_markets_for_user(db, user):
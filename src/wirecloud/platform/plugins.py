@@ -24,11 +24,15 @@ from collections.abc import Callable
 from pydantic import BaseModel
 from fastapi import FastAPI, Request
 from argparse import _SubParsersAction
+from pymongo import IndexModel
 import inspect
 import logging
 import json
 
+from wirecloud import settings
 from wirecloud.commons.utils.encoding import LazyEncoderXHTML
+from wirecloud.commons.utils.structures import LRUCache
+from wirecloud.commons.utils.urlrouter import URLRouter
 from wirecloud.database import DBSession
 from wirecloud.platform.context.schemas import BaseContextKey, WorkspaceContextKey
 from wirecloud.platform.preferences.schemas import PreferenceKey, TabPreferenceKey
@@ -129,6 +133,9 @@ class WirecloudPlugin:
     def get_management_commands(self, subparsers: _SubParsersAction) -> dict[str, Callable]:
         return {}
 
+    def get_database_indexes(self) -> dict[str, tuple[IndexModel, ...]]:
+        return {}
+
     async def populate(self, db: DBSession, wirecloud_user: UserAll) -> bool:
         return False
 
@@ -150,6 +157,11 @@ _wirecloud_idm_get_authorization_url_functions: Optional[dict[str, Callable]] =
 _wirecloud_idm_get_token_functions: Optional[dict[str, Callable]] = None
 _wirecloud_idm_get_user_functions: Optional[dict[str, Callable]] = None
 _wirecloud_idm_backchannel_logout_functions: Optional[dict[str, Callable]] = None
+_wirecloud_url_router: Optional[tuple[tuple[WirecloudPlugin, ...], URLRouter]] = None
+_wirecloud_constants: Optional[tuple[tuple[WirecloudPlugin, ...], dict[Optional[str], list[dict[str, str]]]]] = None
+_wirecloud_ajax_endpoints: Optional[tuple[tuple[WirecloudPlugin, ...], LRUCache]] = None
+
+AJAX_ENDPOINTS_CACHE_SIZE = 256
 
 
 def find_wirecloud_plugins() -> list[WirecloudPlugin]:
@@ -278,6 +290,8 @@ def clear_cache() -> None:
     global _wirecloud_api_auth_backends
     global _wirecloud_tab_preferences
     global _wirecloud_workspace_preferences
+    global _wirecloud_url_router
+    global _wirecloud_ajax_endpoints
 
     _wirecloud_plugins = None
     _wirecloud_features = None
@@ -289,6 +303,8 @@ def clear_cache() -> None:
     _wirecloud_api_auth_backends = None
     _wirecloud_tab_preferences = None
     _wirecloud_workspace_preferences = None
+    _wirecloud_url_router = None
+    _wirecloud_ajax_endpoints = None
 
 
 def get_plugin_urls() -> dict[str, URLTemplate]:
@@ -302,12 +318,42 @@ def get_plugin_urls() -> dict[str, URLTemplate]:
     return urls
 
 
+def get_url_router() -> URLRouter:
+    global _wirecloud_url_router
+
+    # Plugins are loaded again once the app is available, the router must follow them
+    plugins = get_plugins()
+    if _wirecloud_url_router is None or _wirecloud_url_router[0] is not plugins:
+        _wirecloud_url_router = (plugins, URLRouter(get_plugin_urls()))
+
+    return _wirecloud_url_router[1]
+
+
+def _get_ajax_endpoints_cache_key(view: str, request: Optional[Request]) -> tuple:
+    if request is None:
+        return view, None, None
+
+    # The login view includes the current URL when OpenID Connect is enabled
+    current_url = str(request.url) if getattr(settings, 'OID_CONNECT_ENABLED', False) else None
+    return view, request.scope.get('root_path'), current_url
+
+
 def get_wirecloud_ajax_endpoints(view: str, request: Request) -> list[AjaxEndpoint]:
+    global _wirecloud_ajax_endpoints
+
     plugins = get_plugins()
-    endpoints = []
+    if _wirecloud_ajax_endpoints is None or _wirecloud_ajax_endpoints[0] is not plugins:
+        _wirecloud_ajax_endpoints = (plugins, LRUCache(AJAX_ENDPOINTS_CACHE_SIZE))
+
+    # The returned list is shared between requests and must not be modified
+    key = _get_ajax_endpoints_cache_key(view, request)
+    endpoints = _wirecloud_ajax_endpoints[1].get(key)
+    if endpoints is None:
+        endpoints = []
+        for plugin in plugins:
+            endpoints += plugin.get_ajax_endpoints(view, request)
 
-    for plugin in plugins:
-        endpoints += plugin.get_ajax_endpoints(view, request)
+        _wirecloud_ajax_endpoints[1].set(key, endpoints)
 
     return endpoints
 
@@ -343,7 +389,26 @@ def get_workspace_preferences() -> list[PreferenceKey]:
 
 
 def get_constants() -> list[dict[str, str]]:
+    global _wirecloud_constants
+
+    from wirecloud.translation import find_request_language
+
     plugins = get_plugins()
+    if _wirecloud_constants is None or _wirecloud_constants[0] is not plugins:
+        _wirecloud_constants = (plugins, {})
+
+    # Labels and descriptions of the preferences are translated, the returned list is shared between requests and must
+    # not be modified
+    lang = find_request_language()
+    constants = _wirecloud_constants[1].get(lang)
+    if constants is None:
+        constants = _build_constants(plugins)
+        _wirecloud_constants[1][lang] = constants
+
+    return constants
+
+
+def _build_constants(plugins: tuple[WirecloudPlugin, ...]) -> list[dict[str, str]]:
     constants_dict = {}
     for plugin in plugins:
         constants_dict.update(plugin.get_constants())
@@ -544,6 +609,17 @@ def get_management_commands(subparsers: _SubParsersAction) -> dict[str, Callable
     return commands
 
 
+def get_database_indexes() -> dict[str, tuple[IndexModel, ...]]:
+    plugins = get_plugins()
+    indexes = {}
+
+    for plugin in plugins:
+        for collection, collection_indexes in plugin.get_database_indexes().items():
+            indexes[collection] = indexes.get(collection, ()) + tuple(collection_indexes)
+
+    return indexes
+
+
 def build_url_template(urltemplate: URLTemplate, kwargs: Optional[list[str]] = None, prefix: Optional[str] = None) -> str:
     if kwargs is None:
         kwargs = []
@@ -25,7 +25,7 @@ from wirecloud.commons.auth.crud import get_user_preferences, get_group_by_name,
 from wirecloud.commons.auth.models import DBPlatformPreference as PlatformPreferenceModel
 from wirecloud.commons.auth.utils import UserDep, UserDepNoCSRF
 from wirecloud.commons.utils.http import build_error_response, consumes, authentication_required
-from wirecloud.database import DBDep, Id, commit
+from wirecloud.database import DBDep, DBReadDep, Id, commit
 from wirecloud.platform.preferences.crud import update_preferences, \
     update_workspace_preferences, update_tab_preferences
 from wirecloud.platform.preferences.schemas import PlatformPreferenceCreate, WorkspacePreference, \
@@ -58,7 +58,7 @@ def parse_values(preferences: list[PlatformPreferenceModel]) -> dict[str, dict[s
         )
     }
 )
-async def get_platform_preferences(db: DBDep, request: Request, user: UserDepNoCSRF):
+async def get_platform_preferences(db: DBReadDep, request: Request, user: UserDepNoCSRF):
     if user is not None:
         preferences = await get_user_preferences(db, user.id)
         if preferences is None:
@@ -121,7 +121,7 @@ async def create_platform_preferences(db: DBDep, user: UserDep,
     }
 )
 @authentication_required(csrf=False)
-async def get_workspace_preferences(db: DBDep, request: Request, user: UserDepNoCSRF, workspace_id: Id = Path(
+async def get_workspace_preferences(db: DBReadDep, request: Request, user: UserDepNoCSRF, workspace_id: Id = Path(
     description=docs.get_workspace_preference_collection_workspace_id_description)):
     workspace = await get_workspace_by_id(db, workspace_id)
     if workspace is None:
@@ -251,7 +251,7 @@ async def create_workspace_preferences(db: DBDep, request: Request, user: UserDe
     }
 )
 @authentication_required(csrf=False)
-async def get_tab_preferences(db: DBDep, request: Request, user: UserDepNoCSRF, workspace_id: Id = Path(
+async def get_tab_preferences(db: DBReadDep, request: Request, user: UserDepNoCSRF, workspace_id: Id = Path(
     description=docs.get_tab_preference_collection_workspace_id_description), tab_id: str = Path(
     description=docs.get_tab_preference_collection_tab_id_description)):
     workspace = await get_workspace_by_id(db, workspace_id)
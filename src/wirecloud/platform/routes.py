@@ -18,6 +18,8 @@
 
 from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse, FileResponse, Response, RedirectResponse
+from datetime import datetime, timezone
+from mimetypes import guess_type
 from typing import Optional
 from urllib.parse import quote_plus
 import os
@@ -29,8 +31,10 @@ from wirecloud.commons.auth.utils import UserDepNoCSRF
 from wirecloud.commons.templates.tags import get_wirecloud_bootstrap, get_translation, get_static_path, \
     get_url_from_view
 from wirecloud.commons.utils.http import NotFound, get_absolute_reverse_url, build_error_response
-from wirecloud.commons.utils.theme import get_theme_static_path, get_available_themes, get_jinja2_templates
-from wirecloud.database import DBSession, DBDep
+from wirecloud.commons.utils.cache import check_if_modified_since, check_if_none_match
+from wirecloud.commons.utils.theme import find_static_file, get_available_themes, get_jinja2_templates, \
+    get_static_file_variant, get_static_file_version, resolve_static_alias
+from wirecloud.database import DBSession, DBReadDep
 from wirecloud.platform import docs
 from wirecloud import docs as root_docs
 from wirecloud.platform.plugins import get_template_context
@@ -39,6 +43,10 @@ from wirecloud.platform.workspace.crud import get_workspace_by_username_and_name
 
 router = APIRouter()
 
+# Browsers only request versioned URLs again when the version of the file changes
+STATIC_FILES_CACHE_CONTROL = "public, max-age=31536000, immutable"
+PRECOMPRESSED_STATIC_FILES = (("br", ".br"), ("gzip", ".gz"))
+
 
 async def render_workspace_view(db: DBSession, request: Request, user: Optional[UserAll], owner: str, workspace: str) -> Response:
     login_url = get_absolute_reverse_url("login", request)
@@ -99,7 +107,7 @@ async def auto_select_workspace(db: DBSession, request: Request, user: Optional[
             docs.get_root_page_permission_denied_response_description, "You do not have permission to access this workspace.")
     }
 )
-async def render_root_page(db: DBDep, request: Request, user: UserDepNoCSRF):
+async def render_root_page(db: DBReadDep, request: Request, user: UserDepNoCSRF):
     mode = request.query_params.get("mode", None)
     return await auto_select_workspace(db, request, user, mode)
 
@@ -117,7 +125,7 @@ async def render_root_page(db: DBDep, request: Request, user: UserDepNoCSRF):
             docs.get_workspace_view_permission_denied_response_description, "You do not have permission to access this workspace.")
     }
 )
-async def render_workspace_page(db: DBDep, request: Request, user: UserDepNoCSRF, owner: str, name: str):
+async def render_workspace_page(db: DBReadDep, request: Request, user: UserDepNoCSRF, owner: str, name: str):
     return await render_workspace_view(db, request, user, owner, name)
 
 
@@ -135,19 +143,87 @@ async def render_workspace_page(db: DBDep, request: Request, user: UserDepNoCSRF
             docs.get_static_file_validation_error_response_description)
     }
 )
-def serve_static(path: str, themeactive: str = settings.THEME_ACTIVE, view: str = "classic", context: str = "platform"):
+def serve_static(request: Request, path: str, themeactive: str = settings.THEME_ACTIVE, view: str = "classic",
+                 context: str = "platform"):
     if path == "css/cache.css":
         try:
-            return FileResponse(get_theme_static_path(themeactive, f"css/{themeactive}_{view}_{context}.css"))
+            return build_static_file_response(request, themeactive, resolve_static_alias(themeactive, path, view, context))
         except NotFound:
             raise NotFound(f"File not found. If you're an admin, compile CSS by running npm run build:css.")
     elif path == "js/cache.js":
         try:
-            return FileResponse(get_theme_static_path(themeactive, f"js/main-{themeactive}-{view}.js"))
+            return build_static_file_response(request, themeactive, resolve_static_alias(themeactive, path, view, context))
         except NotFound:
             raise NotFound(f"File not found. If you're an admin, compile JS by running npm run build:js.")
 
-    return FileResponse(get_theme_static_path(themeactive, path))
+    return build_static_file_response(request, themeactive, path)
+
+
+def _get_accepted_encodings(request: Request) -> set[str]:
+    encodings = set()
+    for value in request.headers.get("Accept-Encoding", "").split(","):
+        coding, _sep, params = value.partition(";")
+        try:
+            if params.strip().startswith("q=") and float(params.strip()[2:]) == 0:
+                continue
+        except ValueError:
+            continue
+
+        encodings.add(coding.strip().lower())
+
+    return encodings
+
+
+def build_static_file_response(request: Request, theme: str, path: str) -> Response:
+    file_path = find_static_file(theme, path)
+    try:
+        stat_result = os.stat(file_path)
+    except FileNotFoundError:
+        # The file was removed or moved after being indexed
+        file_path = find_static_file(theme, path, refresh=True)
+        stat_result = os.stat(file_path)
+
+    media_type = guess_type(file_path)[0] or "text/plain"
+    version = get_static_file_version(stat_result)
+    headers = {}
+
+    if request.query_params.get("v") == version:
+        headers["Cache-Control"] = STATIC_FILES_CACHE_CONTROL
+
+    # Serve the precompressed variants built for the file, if any. Ranges always refer to the uncompressed file
+    accepted_encodings = _get_accepted_encodings(request)
+    for encoding, suffix in PRECOMPRESSED_STATIC_FILES:
+        variant_path = get_static_file_variant(theme, path, file_path, suffix)
+        if variant_path is None:
+            continue
+
+        headers["Vary"] = "Accept-Encoding"
+        if "Content-Encoding" in headers or encoding not in accepted_encodings or "range" in request.headers:
+            continue
+
+        try:
+            variant_stat = os.stat(variant_path)
+        except FileNotFoundError:
+            continue
+
+        # Ignore variants older than the file, they were not rebuilt after modifying it
+        if variant_stat.st_mtime >= stat_result.st_mtime:
+            file_path, stat_result = variant_path, variant_stat
+            headers["Content-Encoding"] = encoding
+
+    response = FileResponse(file_path, headers=headers, media_type=media_type, stat_result=stat_result)
+
+    if "If-None-Match" in request.headers:
+        modified = check_if_none_match(request, response.headers["ETag"])
+    else:
+        modified = check_if_modified_since(request, datetime.fromtimestamp(int(stat_result.st_mtime), timezone.utc))
+
+    if not modified:
+        headers = {name: value for name, value in response.headers.items()
+                   if name in ("etag", "last-modified", "cache-control", "vary")}
+        return Response(status_code=304, headers=headers)
+
+    return response
 
 
 def render_wirecloud(request: Request, view: Optional[str] = None, page: Optional[str] = None, title: str = "", description: str = "", extra_context: dict = None):
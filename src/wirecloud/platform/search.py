@@ -18,8 +18,10 @@
 
 from typing import Optional
 from datetime import datetime
+import asyncio
+import logging
 
-from elasticsearch.helpers import async_bulk
+from elasticsearch import NotFoundError
 from pydantic import BaseModel
 
 from wirecloud.commons.auth.crud import get_username_by_id, get_all_user_groups
@@ -27,6 +29,8 @@ from wirecloud.commons.auth.schemas import UserAll, User
 from wirecloud.database import DBSession
 from wirecloud.platform.workspace.models import Workspace
 
+logger = logging.getLogger(__name__)
+
 WORKSPACES_INDEX = 'workspaces'
 # TODO check this
 WORKSPACE_CONTENT_FIELDS = ["owner", "name^1.3"]  # "title^1.3"
@@ -167,6 +171,12 @@ async def search_workspaces(db: DBSession, user: UserAll, querytext: str, pagenu
     return await build_search_response(index=WORKSPACES_INDEX, body=body, pagenum=pagenum, max_results=max_results, clean=clean_workspace_out)
 
 
+# Workspace fields used by prepare_workspace_for_indexing. last_modified is left out on purpose: it changes on every
+# save, so it is updated alone by schedule_workspace_last_modified_update instead of re-indexing the whole document
+WORKSPACE_INDEXED_FIELDS = frozenset(('name', 'title', 'description', 'longdescription', 'public', 'requireauth',
+                                      'searchable', 'creator', 'users', 'groups'))
+
+
 def prepare_workspace_for_indexing(workspace: Workspace, owner_username: str) -> SearchWorkspaceOutput:
     return SearchWorkspaceOutput(
         name=workspace.name,
@@ -184,40 +194,87 @@ def prepare_workspace_for_indexing(workspace: Workspace, owner_username: str) ->
     )
 
 
-async def rebuild_workspace_index(db: DBSession):
-    from wirecloud.commons.search import es_client
+async def rebuild_workspace_index(db: DBSession, chunk_size: Optional[int] = None, progress=None) -> int:
+    from wirecloud.commons.search import rebuild_index, REBUILD_CHUNK_SIZE
+    from wirecloud.platform.workspace.crud import iter_all_workspaces
 
-    if await es_client.indices.exists(index=WORKSPACES_INDEX):
-        await es_client.indices.delete(index=WORKSPACES_INDEX)
+    chunk_size = chunk_size or REBUILD_CHUNK_SIZE
+    usernames = {}
 
-    await es_client.indices.create(index=WORKSPACES_INDEX, body={
-        "settings": {"index": {"max_ngram_diff": 18}, "analysis": WORKSPACE_MAPPINGS["settings"]["analysis"]},
-        "mappings": WORKSPACE_MAPPINGS["mappings"]})
+    async def documents():
+        async for workspace in iter_all_workspaces(db, batch_size=chunk_size):
+            if workspace.creator not in usernames:
+                usernames[workspace.creator] = await get_username_by_id(db, workspace.creator)
+            yield str(workspace.id), prepare_workspace_for_indexing(workspace, usernames[workspace.creator]).model_dump()
 
-    from wirecloud.platform.workspace.crud import get_all_workspaces
-    data = await get_all_workspaces(db)
-    actions = [{'_index': WORKSPACES_INDEX, '_id': str(workspace.id),
-                '_source': prepare_workspace_for_indexing(workspace, await get_username_by_id(db, workspace.creator)).model_dump()} for workspace in data]
-    await async_bulk(es_client, actions)
+    return await rebuild_index(WORKSPACES_INDEX, WORKSPACE_MAPPINGS, documents(), chunk_size=chunk_size,
+                               progress=progress)
 
 
 async def add_workspace_to_index(user: User, workspace: Workspace):
-    from wirecloud.commons.search import es_client
+    from wirecloud.commons.search import index_document
 
-    await es_client.index(index=WORKSPACES_INDEX, id=str(workspace.id),
-                          document=prepare_workspace_for_indexing(workspace, user.username).model_dump())
+    await index_document(WORKSPACES_INDEX, str(workspace.id),
+                         prepare_workspace_for_indexing(workspace, user.username).model_dump())
 
 
 async def delete_workspace_from_index(workspace: Workspace):
-    from wirecloud.commons.search import es_client
+    from wirecloud.commons.search import delete_document
+
+    _pending_last_modified.pop(str(workspace.id), None)
+    await delete_document(WORKSPACES_INDEX, str(workspace.id))
+
+
+# Saves only changing not indexed fields are not made to wait for Elasticsearch: the new last_modified dates are sent
+# in the background every WORKSPACE_LAST_MODIFIED_DELAY seconds, keeping only the latest one of each workspace
+WORKSPACE_LAST_MODIFIED_DELAY = 5
+_pending_last_modified: dict[str, datetime] = {}
+_last_modified_flush: Optional[asyncio.Task] = None
+
+
+def schedule_workspace_last_modified_update(workspace: Workspace) -> None:
+    global _last_modified_flush
+
+    _pending_last_modified[str(workspace.id)] = workspace.last_modified
+    loop = asyncio.get_running_loop()
+    if _last_modified_flush is None or _last_modified_flush.done() or _last_modified_flush.get_loop() is not loop:
+        _last_modified_flush = loop.create_task(flush_workspace_last_modified_updates(WORKSPACE_LAST_MODIFIED_DELAY))
+
+
+async def flush_workspace_last_modified_updates(delay: float = 0) -> None:
+    """Sends the pending last_modified dates of the workspaces to the index, after waiting ``delay`` seconds."""
+
+    from wirecloud.commons.search import update_document
+
+    await asyncio.sleep(delay)
+    while _pending_last_modified:
+        workspace_id = next(iter(_pending_last_modified))
+        last_modified = _pending_last_modified.pop(workspace_id)
+        try:
+            await update_document(WORKSPACES_INDEX, workspace_id, {"last_modified": last_modified})
+        except NotFoundError:
+            # The workspace is not indexed yet
+            pass
+        except Exception as e:
+            logger.warning("Unable to update the last modification date of the workspace %s in the index: %s",
+                           workspace_id, e)
+
+
+def clear_pending_workspace_updates() -> None:
+    global _last_modified_flush
 
-    await es_client.delete(index=WORKSPACES_INDEX, id=str(workspace.id))
+    _pending_last_modified.clear()
+    if _last_modified_flush is not None:
+        _last_modified_flush.cancel()
+        _last_modified_flush = None
 
 
 async def update_workspace_in_index(db: DBSession, workspace: Workspace):
-    from wirecloud.commons.search import es_client
+    from wirecloud.commons.search import es_client, update_document
 
+    # The whole document is sent, including the last modification date
+    _pending_last_modified.pop(str(workspace.id), None)
     if await es_client.exists(index=WORKSPACES_INDEX, id=str(workspace.id)):
         username = await get_username_by_id(db, workspace.creator)
-        await es_client.update(index=WORKSPACES_INDEX, id=str(workspace.id),
-                               doc=prepare_workspace_for_indexing(workspace, username).model_dump())
\ No newline at end of file
+        await update_document(WORKSPACES_INDEX, str(workspace.id),
+                              prepare_workspace_for_indexing(workspace, username).model_dump())
\ No newline at end of file
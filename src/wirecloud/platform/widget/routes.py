@@ -31,7 +31,7 @@ from wirecloud.commons.utils.http import NotFound, build_downloadfile_response,
     build_error_response
 from wirecloud.commons.utils.template.schemas.macdschemas import Vendor, Name, Version
 from wirecloud.commons.utils.theme import get_jinja2_templates
-from wirecloud.database import DBDep
+from wirecloud.database import DBReadDep
 from wirecloud.platform.routes import get_current_theme, get_current_view
 from wirecloud.platform.widget.utils import get_widget_platform_style, process_widget_code
 from wirecloud.platform.widget import docs
@@ -59,7 +59,7 @@ showcase_router = APIRouter()
         )
     },
 )
-async def get_widget_html(db: DBDep, request: Request, vendor: Vendor = Path(pattern=r"^[^/]+$",
+async def get_widget_html(db: DBReadDep, request: Request, vendor: Vendor = Path(pattern=r"^[^/]+$",
                                                                              description=docs.get_widget_html_vendor_description),
                           name: Name = Path(pattern=r"^[^/]+$", description=docs.get_widget_html_name_description),
                           version: Version = Path(
@@ -96,7 +96,7 @@ async def get_widget_html(db: DBDep, request: Request, vendor: Vendor = Path(pat
         )
     }
 )
-async def get_widget_file(db: DBDep, request: Request, vendor: Vendor = Path(pattern=r"^[^/]+$",
+async def get_widget_file(db: DBReadDep, request: Request, vendor: Vendor = Path(pattern=r"^[^/]+$",
                                                                              description=docs.get_widget_file_vendor_description),
                           name: Name = Path(pattern=r"^[^/]+$", description=docs.get_widget_file_name_description),
                           version: Version = Path(
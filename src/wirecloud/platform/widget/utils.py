@@ -35,7 +35,7 @@ from lxml.etree import _ElementTree, _Element
 from wirecloud import settings
 from wirecloud.settings import cache
 from wirecloud.catalogue.crud import get_catalogue_resources_with_regex, get_catalogue_resource_with_xhtml, \
-    save_catalogue_resource_xhtml
+    get_catalogue_resource_xhtml_code, save_catalogue_resource_xhtml
 from wirecloud.catalogue.models import XHTML
 from wirecloud.catalogue.schemas import CatalogueResource, CatalogueResourceXHTML
 from wirecloud.commons.auth.schemas import UserAll
@@ -47,7 +47,7 @@ from wirecloud.commons.utils.http import get_current_domain, build_response, ERR
 from wirecloud.commons.utils.template import UnsupportedFeature
 from wirecloud.commons.utils.template.schemas.macdschemas import Vendor, Name, Version, MACDRequirement, MACDWidget, \
     MACType
-from wirecloud.commons.utils.wgt import WgtDeployer, WgtFile
+from wirecloud.commons.utils.wgt import WgtDeployer, WgtFile, run_packaging_task
 from wirecloud.database import DBSession
 from wirecloud.platform.plugins import get_widget_api_extensions, get_active_features
 from wirecloud.platform.utils import get_current_theme
@@ -216,7 +216,7 @@ async def process_widget_code(db: DBSession, request: Request, resource: Catalog
 
     # Check if the xhtml code has been cached
     if widget_info.contents.cacheable:
-        cache_key = xhtml.get_cache_key(str(resource.id), get_current_domain(request), mode, theme)
+        cache_key = await xhtml.get_cache_key(str(resource.id), get_current_domain(request), mode, theme)
         cache_entry = await cache.get(cache_key)
         if cache_entry is not None:
             response = Response(content=cache_entry['code'], media_type=cache_entry['content_type'])
@@ -228,6 +228,10 @@ async def process_widget_code(db: DBSession, request: Request, resource: Catalog
     charset = widget_info.contents.charset
 
     code = xhtml.code
+    if xhtml.cacheable and code == '' and xhtml.code_timestamp is not None:
+        # get_catalogue_resource_with_xhtml does not load the stored code, only read it on cache misses
+        code = xhtml.code = await get_catalogue_resource_xhtml_code(db, resource.id)
+
     if not xhtml.cacheable or code == '':
         try:
             code = download_local_file(os.path.join(wgt_deployer.root_dir, url2pathname(xhtml.url)))
@@ -293,7 +297,7 @@ def check_requirements(resource: MACDWidget) -> None:
 
 
 async def create_widget_from_wgt(db: DBSession, wgt_file: WgtFile, deploy_only: bool = False) -> None:
-    template = wgt_deployer.deploy(wgt_file)
+    template = await run_packaging_task(wgt_deployer.deploy, wgt_file)
     if template.get_resource_type() != MACType.widget:
         raise Exception()
 
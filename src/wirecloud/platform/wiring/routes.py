@@ -31,7 +31,7 @@ from wirecloud.commons.auth.utils import UserDep, UserDepNoCSRF
 from wirecloud.commons.utils.cache import CacheableData
 from wirecloud.commons.utils.http import authentication_required, consumes, build_error_response, \
     get_current_domain, get_absolute_reverse_url
-from wirecloud.database import DBDep, Id
+from wirecloud.database import DBDep, DBReadDep, Id
 from wirecloud.platform.wiring.schemas import WiringEntryPatch, WiringOperatorVariables
 from wirecloud.platform.wiring import docs
 from wirecloud.platform.wiring.utils import check_wiring, check_multiuser_wiring, get_operator_cache_key, \
@@ -207,7 +207,7 @@ async def patch_wiring_entry(db: DBDep, request: Request, user: UserDep,
         )
     }
 )
-async def get_operator_html(db: DBDep, request: Request,
+async def get_operator_html(db: DBReadDep, request: Request,
                             vendor: str = Path(description=docs.get_operator_vendor_description),
                             name: str = Path(description=docs.get_operator_name_description),
                             version: str = Path(description=docs.get_operator_version_description),
@@ -261,7 +261,7 @@ WiringOperatorVariables.model_rebuild()
     }
 )
 @authentication_required(csrf=False)
-async def get_operator_variables_entry(db: DBDep, request: Request, user: UserDepNoCSRF, workspace_id: Id = Path(
+async def get_operator_variables_entry(db: DBReadDep, request: Request, user: UserDepNoCSRF, workspace_id: Id = Path(
     description=docs.get_operator_variables_entry_workspace_id_description),
                                        operator_id: str = Path(
                                            description=docs.get_operator_variables_entry_operator_id_description)):
@@ -20,7 +20,8 @@ from datetime import timezone, datetime
 from urllib.request import Request
 
 from bson import ObjectId
-from typing import Optional, Union
+from pymongo import ASCENDING, IndexModel
+from typing import Optional, Union, AsyncIterator
 import os
 from io import BytesIO
 
@@ -28,8 +29,9 @@ from wirecloud.settings import cache
 from wirecloud.catalogue import utils as catalogue
 from wirecloud.catalogue.crud import get_catalogue_resource
 from wirecloud.commons.auth.crud import get_user_by_username, get_all_user_groups
-from wirecloud.commons.utils.db import save_alternative
+from wirecloud.commons.utils.db import save_alternative, build_update_document
 from wirecloud.commons.utils.downloader import download_http_content
+from wirecloud.commons.utils.http import Conflict
 from wirecloud.commons.utils.template import TemplateParser
 from wirecloud.commons.utils.template.schemas.macdschemas import MACDMashupWithParametrization, MACType
 from wirecloud.commons.utils.urlify import URLify
@@ -39,11 +41,21 @@ from wirecloud.commons.auth.schemas import User, UserAll
 from wirecloud.platform.localcatalogue.utils import install_component
 from wirecloud.platform.preferences.schemas import WorkspacePreference
 from wirecloud.commons.auth.models import Group
-from wirecloud.platform.search import delete_workspace_from_index, update_workspace_in_index
+from wirecloud.platform.search import delete_workspace_from_index, update_workspace_in_index, \
+    schedule_workspace_last_modified_update, WORKSPACE_INDEXED_FIELDS
 from wirecloud.platform.workspace.models import Workspace, WorkspaceAccessPermissions, Tab
 from wirecloud.platform.workspace.utils import create_tab, _workspace_cache_key, _variable_values_cache_key
 from wirecloud.translation import gettext as _
 
+INDEXES = {
+    "workspaces": (
+        IndexModel([("creator", ASCENDING), ("name", ASCENDING)], name="wirecloud_creator_name"),
+        IndexModel([("users.id", ASCENDING)], name="wirecloud_users_id"),
+        IndexModel([("groups.id", ASCENDING)], name="wirecloud_groups_id"),
+        IndexModel([("public", ASCENDING), ("searchable", ASCENDING)], name="wirecloud_public_searchable"),
+    ),
+}
+
 
 def _sanitize_widget_layout_config(workspace_data: dict) -> None:
     tabs = workspace_data.get('tabs') or {}
@@ -58,6 +70,25 @@ def _sanitize_widget_layout_config(workspace_data: dict) -> None:
                     widget.pop('lessOrEqual', None)
 
 
+def _serialize_workspace(workspace: Workspace) -> dict:
+    # Create a dict representation and remove unwanted keys from layout configurations
+    data = workspace.model_dump(by_alias=True)
+    _sanitize_widget_layout_config(data)
+    return data
+
+
+def _load_workspace(data: dict) -> Workspace:
+    workspace = Workspace.model_validate(data)
+    workspace._persisted_state = _serialize_workspace(workspace)
+    return workspace
+
+
+def _now() -> datetime:
+    # MongoDB stores dates with millisecond precision, keep the in-memory value comparable with the stored one
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
 async def get_workspace_list(db: DBSession, user: Optional[UserAll]) -> list[Workspace]:
     if user is not None:
         if user.has_perm("WORKSPACE.VIEW"):
@@ -75,7 +106,7 @@ async def get_workspace_list(db: DBSession, user: Optional[UserAll]) -> list[Wor
     workspaces = await db.client.workspaces.find(query).to_list()
     results = []
     for workspace in workspaces:
-        results.append(Workspace.model_validate(workspace))
+        results.append(_load_workspace(workspace))
 
     return results
 
@@ -110,7 +141,7 @@ async def get_workspace_by_id(db: DBSession, workspace_id: Id) -> Optional[Works
     if workspace is None:
         return None
 
-    return Workspace.model_validate(workspace)
+    return _load_workspace(workspace)
 
 
 async def create_workspace(db: DBSession, request: Optional[Request], owner: UserAll, mashup: Union[str, WgtFile, Workspace],
@@ -225,26 +256,51 @@ async def add_user_to_workspace(db: DBSession, workspace: Workspace, user: User)
 
 
 async def insert_workspace(db: DBSession, workspace: Workspace) -> None:
-    # Create a dict representation and remove unwanted keys from layout configurations
-    data = workspace.model_dump(by_alias=True)
-    _sanitize_widget_layout_config(data)
+    if workspace.last_modified is not None:
+        workspace.last_modified = workspace.last_modified.replace(
+            microsecond=workspace.last_modified.microsecond // 1000 * 1000)
 
+    data = _serialize_workspace(workspace)
     await db.client.workspaces.insert_one(data)
+    workspace._persisted_state = _serialize_workspace(workspace)
 
 
 async def change_workspace(db: DBSession, workspace: Workspace, user: Optional[User]) -> None:
     await cache.delete(_workspace_cache_key(workspace, user))
     await cache.delete(_variable_values_cache_key(workspace, user))
 
-    workspace.last_modified = datetime.now(timezone.utc)
+    previous_state = workspace._persisted_state
+    previous_last_modified = workspace.last_modified
+    workspace.last_modified = _now()
     query = {"_id": ObjectId(workspace.id)}
-
-    # Create a dict representation and remove unwanted keys from layout configurations
-    data = workspace.model_dump(by_alias=True)
-    _sanitize_widget_layout_config(data)
-
-    await db.client.workspaces.replace_one(query, data)
-    await update_workspace_in_index(db, workspace)
+    data = _serialize_workspace(workspace)
+
+    if previous_state is None:
+        # The workspace was not loaded through this module, there is no way to know what has changed
+        await db.client.workspaces.replace_one(query, data)
+        workspace._persisted_state = data
+        await update_workspace_in_index(db, workspace)
+        return
+
+    # Only write the modified paths, and only if nobody has saved the workspace since it was loaded
+    update = build_update_document(previous_state, data)
+    if update is None:
+        # Nothing changed, not even last_modified (saved again within the same millisecond)
+        return
+
+    query["last_modified"] = previous_state.get("last_modified")
+    result = await db.client.workspaces.update_one(query, update)
+    if result.matched_count == 0:
+        workspace.last_modified = previous_last_modified
+        raise Conflict(_("The workspace has been modified by another request. Reload it and try again"))
+
+    workspace._persisted_state = _serialize_workspace(workspace)
+
+    changed_fields = set(update.get("$set", {})) | set(update.get("$unset", {}))
+    if any(path.split('.', 1)[0] in WORKSPACE_INDEXED_FIELDS for path in changed_fields):
+        await update_workspace_in_index(db, workspace)
+    else:
+        schedule_workspace_last_modified_update(workspace)
 
 
 async def get_workspace_by_username_and_name(db: DBSession, creator_username: str, name: str) -> Optional[Workspace]:
@@ -256,7 +312,7 @@ async def get_workspace_by_username_and_name(db: DBSession, creator_username: st
     if workspace is None:
         return None
 
-    return Workspace.model_validate(workspace)
+    return _load_workspace(workspace)
 
 
 async def is_a_workspace_with_that_name(db: DBSession, name: str, creator_id: Id) -> bool:
@@ -293,4 +349,9 @@ async def get_all_workspaces(db: DBSession) -> list[Workspace]:
     for workspace in workspaces:
         results.append(Workspace.model_validate(workspace))
 
-    return results
\ No newline at end of file
+    return results
+
+
+async def iter_all_workspaces(db: DBSession, batch_size: int = 500) -> AsyncIterator[Workspace]:
+    async for workspace in db.client.workspaces.find(batch_size=batch_size):
+        yield Workspace.model_validate(workspace)
\ No newline at end of file
@@ -16,7 +16,7 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
 
-from pydantic import BaseModel, Field, StringConstraints
+from pydantic import BaseModel, Field, StringConstraints, PrivateAttr
 from typing import Optional, Annotated, Any
 from datetime import datetime, timezone
 
@@ -111,6 +111,10 @@ class Workspace(BaseModel, populate_by_name=True):
     tabs: dict[str, Tab] = {}
     preferences: list[DBWorkspacePreference] = []
 
+    # Serialized state of the workspace as last read from or written to the database. Used to compute targeted
+    # updates (including the changes made to its tabs and widget instances) when the workspace is saved
+    _persisted_state: Optional[dict[str, Any]] = PrivateAttr(default=None)
+
     async def is_editable_by(self, db: DBSession, user: UserAll) -> bool:
         if user.is_superuser or self.creator == user.id:
             return True
@@ -43,9 +43,9 @@ from wirecloud.platform.workspace.mashupTemplateParser import check_mashup_depen
     fill_workspace_using_template
 from wirecloud.platform.workspace.schemas import WorkspaceData, WorkspaceCreate, WorkspaceGlobalData, \
     WorkspaceEntry, TabCreate, TabData, TabCreateEntry, MashupMergeService
-from wirecloud.database import DBDep, Id
+from wirecloud.database import DBDep, DBReadDep, Id
 from wirecloud.platform.workspace.utils import get_workspace_data, get_global_workspace_data, create_tab, \
-    get_tab_data, get_workspace_entry, is_owner_or_has_permission
+    get_tab_data, get_workspace_entry, is_owner_or_has_permission, WorkspaceDataLoader
 from wirecloud.platform.workspace import docs
 from wirecloud.translation import gettext as _
 
@@ -67,9 +67,11 @@ workspaces_router = APIRouter()
     }
 )
 @produces(["application/json"])
-async def get_workspace_list_route(db: DBDep, user: UserDepNoCSRF) -> list[WorkspaceData]:
+async def get_workspace_list_route(db: DBReadDep, user: UserDepNoCSRF) -> list[WorkspaceData]:
     workspaces = await get_workspace_list(db, user)
-    data_list = [await get_workspace_data(db, workspace, user) for workspace in workspaces]
+    loader = WorkspaceDataLoader(db)
+    loader.prime_users(workspace.creator for workspace in workspaces)
+    data_list = [await get_workspace_data(db, workspace, user, loader=loader) for workspace in workspaces]
     return data_list
 
 
@@ -400,7 +402,7 @@ async def create_tab_collection(db: DBDep, user: UserDep, request: Request, work
     }
 )
 @produces(["application/json"])
-async def get_tab_entry(db: DBDep, user: UserDepNoCSRF, request: Request,
+async def get_tab_entry(db: DBReadDep, user: UserDepNoCSRF, request: Request,
                         workspace_id: Id = Path(description=docs.get_tab_entry_workspace_id_description),
                         tab_id: str = Path(description=docs.get_tab_entry_tab_id_description)):
     workspace = await get_workspace_by_id(db, workspace_id)
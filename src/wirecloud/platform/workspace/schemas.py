@@ -123,13 +123,19 @@ class IdMapping(BaseModel):
     widget: dict[str, IdMappingWidget] = {}
 
 
-class CacheEntry(BaseModel):
-    type: str
-    secure: bool
-    value: Optional[str] = None
-    default: Optional[str] = None
-    readonly: Optional[bool] = None
-    hidden: bool = False
+class CacheEntry:
+    # Workspaces cache one entry per variable of each of their components, avoid the overhead of a pydantic model
+    __slots__ = ('type', 'secure', 'value', 'default', 'readonly', 'hidden', 'kind')
+
+    def __init__(self, type: str, secure: bool, value: Any = None, default: Optional[str] = None,
+                 readonly: Optional[bool] = None, hidden: bool = False, kind: str = 'preference'):
+        self.type = type
+        self.secure = secure
+        self.value = value
+        self.default = default
+        self.readonly = readonly
+        self.hidden = hidden
+        self.kind = kind
 
 
 class CacheVariableData(BaseModel):
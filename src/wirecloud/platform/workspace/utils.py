@@ -27,14 +27,14 @@ import markdown
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad
 
-from wirecloud.catalogue.crud import get_catalogue_resource_by_id, get_catalogue_resource
-from wirecloud.catalogue.schemas import CatalogueResource
-from wirecloud.commons.auth.crud import get_username_by_id, get_user_by_id, get_group_by_id, get_user_with_all_info
+from wirecloud.catalogue.crud import get_catalogue_resources_by_ids, get_catalogue_resources_by_uris
+from wirecloud.catalogue.schemas import CatalogueResource, VariableDefinition, VariableIndex, get_variable_index
+from wirecloud.commons.auth.crud import get_username_by_id, get_user_names_by_ids, get_groups_by_ids
+from wirecloud.commons.auth.models import Group
 from wirecloud.commons.utils.cache import CacheableData, check_if_modified_since, patch_cache_headers
 from wirecloud.commons.utils.html import clean_html
 from wirecloud.commons.utils.http import build_error_response
 from wirecloud.commons.utils.template.parsers import TemplateValueProcessor
-from wirecloud.commons.utils.template.schemas.macdschemas import MACDPreference, MACDProperty
 from wirecloud.commons.utils.urlify import URLify
 from wirecloud.database import DBSession, Id
 from wirecloud.platform.context.utils import get_context_values
@@ -45,7 +45,7 @@ from wirecloud.platform.preferences.schemas import WorkspacePreference
 from wirecloud.platform.preferences.utils import get_workspace_preference_values, get_tab_preference_values
 from wirecloud.commons.auth.schemas import User, UserAll
 from wirecloud.settings import cache, SECRET_KEY
-from wirecloud.platform.workspace.models import Workspace, Tab, WiringOperatorPreferenceValue
+from wirecloud.platform.workspace.models import Workspace, Tab, WorkspaceForcedValue
 from wirecloud.platform.workspace.schemas import WorkspaceForcedValues, CacheEntry, CacheVariableData, \
     WorkspaceData, TabData, WorkspaceGlobalData, UserWorkspaceData, GroupWorkspaceData
 from wirecloud.translation import gettext as _
@@ -78,6 +78,136 @@ def decrypt_value(value: str) -> str:
         return ''
 
 
+class WorkspaceDataLoader:
+    """
+    Loads the catalogue resources, users and groups referenced by workspaces in batches.
+
+    Ids are registered through the ``prime_*`` methods and every pending id of a collection is fetched using a single
+    query the first time one of them is requested. Results, including missing entries, are memoized for the life of
+    the loader, which is usually bound to the current request (see ``get_workspace_data_loader``).
+    """
+
+    def __init__(self, db: DBSession):
+        self.db = db
+        self._resources_by_id: dict[str, Optional[CatalogueResource]] = {}
+        self._resources_by_uri: dict[tuple[str, str, str], Optional[CatalogueResource]] = {}
+        # Only the username and the full name of the users are displayed
+        self._users: dict[str, Optional[tuple[str, str]]] = {}
+        self._groups: dict[str, Optional[Group]] = {}
+        self._pending_resource_ids: set[str] = set()
+        self._pending_resource_uris: set[tuple[str, str, str]] = set()
+        self._pending_users: set[str] = set()
+        self._pending_groups: set[str] = set()
+
+    def prime_resource_ids(self, resource_ids) -> None:
+        for resource_id in resource_ids:
+            if resource_id is not None and str(resource_id) not in self._resources_by_id:
+                self._pending_resource_ids.add(str(resource_id))
+
+    def prime_resource_uris(self, uris) -> None:
+        for uri in uris:
+            try:
+                (vendor, name, version) = uri.split('/')
+            except ValueError:
+                continue
+
+            if (vendor, name, version) not in self._resources_by_uri:
+                self._pending_resource_uris.add((vendor, name, version))
+
+    def prime_users(self, user_ids) -> None:
+        for user_id in user_ids:
+            if user_id is not None and str(user_id) not in self._users:
+                self._pending_users.add(str(user_id))
+
+    def prime_groups(self, group_ids) -> None:
+        for group_id in group_ids:
+            if group_id is not None and str(group_id) not in self._groups:
+                self._pending_groups.add(str(group_id))
+
+    def prime_workspace(self, workspace: Workspace) -> None:
+        self.prime_resource_ids(iwidget.resource for iwidget in get_widget_instances_from_workspace(workspace))
+        self.prime_resource_uris(operator.name for operator in workspace.wiring_status.operators.values())
+        self.prime_users([workspace.creator] + [u.id for u in workspace.users])
+        self.prime_groups(g.id for g in workspace.groups)
+
+    def _store_resource(self, resource: CatalogueResource) -> None:
+        self._resources_by_id[str(resource.id)] = resource
+        self._resources_by_uri[(resource.vendor, resource.short_name, resource.version)] = resource
+
+    async def _load_resources(self) -> None:
+        resource_ids = list(self._pending_resource_ids)
+        uris = list(self._pending_resource_uris)
+        self._pending_resource_ids.clear()
+        self._pending_resource_uris.clear()
+
+        for resource in await get_catalogue_resources_by_ids(self.db, resource_ids):
+            self._store_resource(resource)
+        for resource in await get_catalogue_resources_by_uris(self.db, [uri for uri in uris if uri not in self._resources_by_uri]):
+            self._store_resource(resource)
+
+        for resource_id in resource_ids:
+            self._resources_by_id.setdefault(resource_id, None)
+        for uri in uris:
+            self._resources_by_uri.setdefault(uri, None)
+
+    async def get_resource_by_id(self, resource_id: Id) -> Optional[CatalogueResource]:
+        key = str(resource_id)
+        if key not in self._resources_by_id:
+            self._pending_resource_ids.add(key)
+            await self._load_resources()
+
+        return self._resources_by_id[key]
+
+    async def get_resource(self, vendor: str, name: str, version: str) -> Optional[CatalogueResource]:
+        key = (vendor, name, version)
+        if key not in self._resources_by_uri:
+            self._pending_resource_uris.add(key)
+            await self._load_resources()
+
+        return self._resources_by_uri[key]
+
+    async def get_user_names(self, user_id: Id) -> Optional[tuple[str, str]]:
+        """Returns the username and the full name of the user, or None if the user does not exist."""
+        key = str(user_id)
+        if key not in self._users:
+            self._pending_users.add(key)
+            user_ids = list(self._pending_users)
+            self._pending_users.clear()
+
+            self._users.update(await get_user_names_by_ids(self.db, user_ids))
+            for pending_id in user_ids:
+                self._users.setdefault(pending_id, None)
+
+        return self._users[key]
+
+    async def get_group(self, group_id: Id) -> Optional[Group]:
+        key = str(group_id)
+        if key not in self._groups:
+            self._pending_groups.add(key)
+            group_ids = list(self._pending_groups)
+            self._pending_groups.clear()
+
+            for group in await get_groups_by_ids(self.db, group_ids):
+                self._groups[str(group.id)] = group
+            for pending_id in group_ids:
+                self._groups.setdefault(pending_id, None)
+
+        return self._groups[key]
+
+
+def get_workspace_data_loader(db: DBSession, request: Optional[Request]) -> WorkspaceDataLoader:
+    state = getattr(request, 'state', None)
+    if state is None:
+        return WorkspaceDataLoader(db)
+
+    loader = getattr(state, 'workspace_data_loader', None)
+    if loader is None:
+        loader = WorkspaceDataLoader(db)
+        state.workspace_data_loader = loader
+
+    return loader
+
+
 def process_forced_values(workspace: Workspace, user: Optional[User], concept_values: dict[str, dict[str, Any]],
                           preferences: dict[str, WorkspacePreference]) -> WorkspaceForcedValues:
     forced_values = deepcopy(workspace.forced_values)
@@ -123,44 +253,55 @@ def process_forced_values(workspace: Workspace, user: Optional[User], concept_va
     )
 
 
-def _process_variable(component_type: str, component_id: str, vardef: Union[MACDPreference, MACDProperty],
-                      value: Union[WidgetVariables, dict], forced_values: WorkspaceForcedValues,
-                      values_by_varname: dict[str, dict], current_user: Optional[User], workspace_creator: User) -> None:
-    if isinstance(value, dict):
-        value = WiringOperatorPreferenceValue(**value)
+def _parse_variable_value(vardef: VariableDefinition, value: Any) -> Any:
+    return parse_value_from_text({'type': vardef.type, 'default': vardef.default}, value)
 
-    varname = vardef.name
-    entry = CacheEntry(
-        type=vardef.type,
-        secure=vardef.secure
-    )
 
-    if component_id in getattr(forced_values, component_type) and varname in getattr(forced_values, component_type)[component_id]:
-        fv_entry = getattr(forced_values, component_type)[component_id][varname]
+def _get_user_value(value: Union[WidgetVariables, dict, None], user_key: str) -> Any:
+    if value is None:
+        return None
 
-        entry.value = fv_entry.value
-        if vardef.secure:
-            entry.value = encrypt_value(entry.value)
-        else:
-            entry.value = parse_value_from_text(entry.model_dump(), entry.value)
+    # Operator preferences are stored as plain dicts
+    users = value['users'] if isinstance(value, dict) else value.users
+    return users.get(user_key, None)
 
-        entry.readonly = True
-        entry.hidden = fv_entry.hidden
 
-    else:
-        # Handle multiuser variables
-        variable_user = current_user if vardef.multiuser else workspace_creator
+def _resolve_variable(vardef: VariableDefinition, value: Union[WidgetVariables, dict, None],
+                      forced_value: Optional[WorkspaceForcedValue], user_key: str, creator_key: str) -> CacheEntry:
+    entry = CacheEntry(type=vardef.type, secure=vardef.secure, kind=vardef.kind)
 
-        if value is None or value.users.get(str(variable_user.id if variable_user else "anonymous"), None) is None:
-            value = parse_value_from_text(entry.model_dump(), vardef.default)
+    if forced_value is not None:
+        if vardef.secure:
+            entry.value = encrypt_value(forced_value.value)
         else:
-            value = value.users.get(str(variable_user.id if variable_user else "anonymous"), None)
+            entry.value = _parse_variable_value(vardef, forced_value.value)
 
-        entry.value = value
+        entry.readonly = True
+        entry.hidden = forced_value.hidden
+    else:
+        # Multiuser variables store a value per user, the rest use the value of the workspace creator
+        user_value = _get_user_value(value, user_key if vardef.multiuser else creator_key)
+        entry.value = _parse_variable_value(vardef, vardef.default) if user_value is None else user_value
         entry.readonly = False
         entry.hidden = False
 
-    values_by_varname[component_type][component_id][varname] = entry
+    return entry
+
+
+def _resolve_component_variables(variable_index: VariableIndex, preference_values: dict[str, Any],
+                                  property_values: dict[str, Any], forced_values: dict[str, WorkspaceForcedValue],
+                                  user_key: str, creator_key: str) -> dict[str, CacheEntry]:
+    entries = {}
+    for vardef in variable_index:
+        values = preference_values if vardef.kind == 'preference' else property_values
+        entries[vardef.name] = _resolve_variable(vardef, values.get(vardef.name), forced_values.get(vardef.name),
+                                                 user_key, creator_key)
+
+    return entries
+
+
+def _get_operator_variable_values(variables: dict[str, Any]) -> dict[str, Any]:
+    return {name: variable.value for name, variable in variables.items()}
 
 
 async def _populate_variables_values_cache(db: DBSession, workspace: Workspace, request: Optional[Request], user: Optional[UserAll],
@@ -174,6 +315,13 @@ async def _populate_variables_values_cache(db: DBSession, workspace: Workspace,
         preferences = await get_workspace_preference_values(workspace)
         forced_values = process_forced_values(workspace, user, context_values, preferences)
 
+    loader = get_workspace_data_loader(db, request)
+    loader.prime_workspace(workspace)
+    creator = await loader.get_user_names(workspace.creator)
+
+    user_key = str(user.id) if user is not None else "anonymous"
+    creator_key = str(workspace.creator) if creator is not None else "anonymous"
+
     for iwidget in get_widget_instances_from_workspace(workspace):
         svariwidget = str(iwidget.id)
         values_by_varname["iwidget"][svariwidget] = {}
@@ -181,36 +329,26 @@ async def _populate_variables_values_cache(db: DBSession, workspace: Workspace,
         if iwidget.resource is None:
             continue
 
-        resource = await get_catalogue_resource_by_id(db, iwidget.resource)
-        iwidget_info = resource.get_processed_info()
-
-        for vardef in iwidget_info.preferences:
-            value = iwidget.variables.get(vardef.name, None)
-            _process_variable("iwidget", svariwidget, vardef, value, forced_values, values_by_varname, user,
-                              await get_user_by_id(db, workspace.creator))
+        resource = await loader.get_resource_by_id(iwidget.resource)
+        if resource is None:
+            continue
 
-        for vardef in iwidget_info.properties:
-            value = iwidget.variables.get(vardef.name, None)
-            _process_variable("iwidget", svariwidget, vardef, value, forced_values, values_by_varname, user,
-                              await get_user_by_id(db, workspace.creator))
+        values_by_varname["iwidget"][svariwidget] = _resolve_component_variables(
+            get_variable_index(resource), iwidget.variables, iwidget.variables,
+            forced_values.iwidget.get(svariwidget, {}), user_key, creator_key)
 
     for operator_id, operator in workspace.wiring_status.operators.items():
         values_by_varname["ioperator"][operator_id] = {}
         vendor, name, version = operator.name.split('/')
 
-        resource = await get_catalogue_resource(db, vendor, name, version)
+        resource = await loader.get_resource(vendor, name, version)
         if resource is None:
             continue
-        operator_info = resource.get_processed_info()
-        for vardef in operator_info.preferences:
-            value = operator.preferences[vardef.name].value
-            _process_variable("ioperator", operator_id, vardef, value, forced_values, values_by_varname, user,
-                              await get_user_by_id(db, workspace.creator))
 
-        for vardef in operator_info.properties:
-            value = operator.properties[vardef.name].value
-            _process_variable("ioperator", operator_id, vardef, value, forced_values, values_by_varname, user,
-                              await get_user_by_id(db, workspace.creator))
+        values_by_varname["ioperator"][operator_id] = _resolve_component_variables(
+            get_variable_index(resource), _get_operator_variable_values(operator.preferences),
+            _get_operator_variable_values(operator.properties), forced_values.ioperator.get(operator_id, {}), user_key,
+            creator_key)
 
     await cache.set(key, values_by_varname)
 
@@ -231,7 +369,7 @@ class VariableValueCacheManager:
     def _process_entry(self, entry: CacheEntry):
         if entry.secure:
             value = decrypt_value(entry.value)
-            return parse_value_from_text(entry.model_dump(), value)  # TODO types of parameters are missing
+            return parse_value_from_text({'type': entry.type, 'default': entry.default}, value)
         else:
             return entry.value
 
@@ -251,10 +389,8 @@ class VariableValueCacheManager:
         entry = values[component_type][str(component_id)][var_name]
         return self._process_entry(entry)
 
-    async def get_variable_data(self, db: DBSession, request: Optional[Request], component_type, component_id,
-                                var_name) -> CacheVariableData:
-        values = await self.get_variable_values(db, request)
-        entry = values[component_type][str(component_id)][var_name]
+    @staticmethod
+    def _build_variable_data(var_name: str, entry: CacheEntry) -> CacheVariableData:
         if entry.secure and entry.value != '':
             value = '********'
         else:
@@ -268,8 +404,32 @@ class VariableValueCacheManager:
             value=value
         )
 
+    async def get_variable_data(self, db: DBSession, request: Optional[Request], component_type, component_id,
+                                var_name) -> CacheVariableData:
+        values = await self.get_variable_values(db, request)
+        entry = values[component_type][str(component_id)][var_name]
+        return self._build_variable_data(var_name, entry)
+
+    async def get_component_variables_data(self, db: DBSession, request: Optional[Request], component_type: str,
+                                           component_id: str) -> tuple[dict[str, CacheVariableData], dict[str, CacheVariableData]]:
+        values = await self.get_variable_values(db, request)
+        preferences = {}
+        properties = {}
+        for var_name, entry in values[component_type].get(str(component_id), {}).items():
+            variables = preferences if entry.kind == 'preference' else properties
+            variables[var_name] = self._build_variable_data(var_name, entry)
+
+        return preferences, properties
+
+
+async def get_workspace_data(db: DBSession, workspace: Workspace, user: Optional[UserAll],
+                             loader: Optional[WorkspaceDataLoader] = None) -> WorkspaceData:
+    if loader is not None:
+        creator = await loader.get_user_names(workspace.creator)
+        owner = creator[0] if creator is not None else None
+    else:
+        owner = await get_username_by_id(db, workspace.creator)
 
-async def get_workspace_data(db: DBSession, workspace: Workspace, user: Optional[UserAll]) -> WorkspaceData:
     longdescription = workspace.longdescription
     if longdescription != '':
         longdescription = clean_html(markdown.markdown(longdescription, output_format='xhtml'))
@@ -283,7 +443,7 @@ async def get_workspace_data(db: DBSession, workspace: Workspace, user: Optional
         public=workspace.public,
         shared=workspace.is_shared(),
         requireauth=workspace.requireauth,
-        owner=await get_username_by_id(db, workspace.creator),
+        owner=owner,
         removable=await workspace.is_editable_by(db, user) if user is not None else False,
         lastmodified=workspace.last_modified,
         description=workspace.description,
@@ -367,7 +527,7 @@ async def get_widget_instance_data(db: DBSession, request: Request, iwidget: Wid
     if iwidget.resource is None:
         return data_ret
 
-    resource = await get_catalogue_resource_by_id(db, iwidget.resource)
+    resource = await get_workspace_data_loader(db, request).get_resource_by_id(iwidget.resource)
     if resource is None:
         # The widget used by this iwidget is missing
         return data_ret
@@ -375,13 +535,8 @@ async def get_widget_instance_data(db: DBSession, request: Request, iwidget: Wid
     if cache_manager is None:
         cache_manager = VariableValueCacheManager(workspace, user)
 
-    iwidget_info = resource.get_processed_info()
-    data_ret.preferences = {
-        preference.name: await cache_manager.get_variable_data(db, request, "iwidget", iwidget.id, preference.name) for
-        preference in iwidget_info.preferences}
-    data_ret.properties = {
-        proper.name: await cache_manager.get_variable_data(db, request, "iwidget", iwidget.id, proper.name) for proper
-        in iwidget_info.properties}
+    data_ret.preferences, data_ret.properties = await cache_manager.get_component_variables_data(
+        db, request, "iwidget", iwidget.id)
 
     return data_ret
 
@@ -409,7 +564,10 @@ async def get_tab_data(db: DBSession, request: Request, tab: Tab, workspace: Wor
 
 async def _get_global_workspace_data(db: DBSession, request: Request, workspace: Workspace,
                                      user: Optional[UserAll]) -> WorkspaceGlobalData:
-    workspace_data = await get_workspace_data(db, workspace, user)
+    loader = get_workspace_data_loader(db, request)
+    loader.prime_workspace(workspace)
+
+    workspace_data = await get_workspace_data(db, workspace, user, loader=loader)
     data_ret = WorkspaceGlobalData(**workspace_data.model_dump())
 
     # Workspace preferences
@@ -418,17 +576,17 @@ async def _get_global_workspace_data(db: DBSession, request: Request, workspace:
 
     if user and workspace.creator == user.id:
         for u in workspace.users:
-            u_all = await get_user_with_all_info(db, u.id)
+            (username, fullname) = await loader.get_user_names(u.id)
             # TODO: organization
             data_ret.users.append(UserWorkspaceData(
-                fullname=u_all.get_full_name(),
-                username=u_all.username,
+                fullname=fullname,
+                username=username,
                 accesslevel="owner" if u.id == workspace.creator else "read"
             ))
 
         for g in workspace.groups:
             # TODO: organization
-            group = await get_group_by_id(db, g.id)
+            group = await loader.get_group(g.id)
             data_ret.groups.append(GroupWorkspaceData(
                 name=group.name,
                 organization=group.is_organization,
@@ -454,6 +612,9 @@ async def _get_global_workspace_data(db: DBSession, request: Request, workspace:
         await get_tab_data(db, request, tab, workspace=workspace, cache_manager=cache_manager, user=user) for tab in
         tabs.values()]
     data_ret.wiring = deepcopy(workspace.wiring_status)
+    creator = await loader.get_user_names(workspace.creator)
+    user_key = str(user.id) if user is not None else "anonymous"
+    creator_key = str(workspace.creator) if creator is not None else "anonymous"
     for operator_id, operator in data_ret.wiring.operators.items():
         try:
             (vendor, name, version) = operator.name.split('/')
@@ -461,48 +622,32 @@ async def _get_global_workspace_data(db: DBSession, request: Request, workspace:
             continue
 
         try:
-            resource = await get_catalogue_resource(db, vendor, name, version)
-            operator_info = resource.get_processed_info(process_variables=True)
-            if not resource.is_available_for(user):
+            resource = await loader.get_resource(vendor, name, version)
+            if resource is None or not resource.is_available_for(user):
                 raise ValueError()
+            variable_index = get_variable_index(resource)
         except ValueError:
             operator.preferences = {}
             operator.properties = {}
             continue
 
         operator_forced_values = forced_values.ioperator.get(operator_id, {})
-        for preference_name, preference in operator.preferences.items():
-            vardef = operator_info.variables.preferences.get(preference_name)
-            value = preference.value
-
-            variable_user = user if vardef is not None and vardef.multiuser else await get_user_with_all_info(db, workspace.creator)
-
-            if preference_name in operator_forced_values:
-                preference.value = operator_forced_values[preference_name].value
-            elif value is None or value['users'].get(str(variable_user.id if variable_user else "anonymous"), None) is None:
-                preference.value = parse_value_from_text(vardef.model_dump(), vardef.default)
-            else:
-                preference.value = value['users'].get(str(variable_user.id if variable_user else "anonymous"))
-
-            if vardef is not None and vardef.secure:
-                preference.value = '' if preference.value is None or decrypt_value(
-                    preference.value) == '' else '********'
-
-        for property_name, property in operator.properties.items():
-            vardef = operator_info.variables.properties.get(property_name)
-            value = property.value
-
-            variable_user = user if vardef is not None and vardef.multiuser else workspace.creator
-
-            if property_name in operator_forced_values:
-                property.value = operator_forced_values[property_name].value
-            elif value is None or value.users.get(str(variable_user.id if variable_user else "anonymous"), None) is None:
-                property.value = parse_value_from_text(vardef.model_dump(), vardef.default)
-            else:
-                property.value = value.users.get(str(variable_user.id if variable_user else "anonymous"))
-
-            if vardef is not None and vardef.secure:
-                property.value = '' if property.value is None or decrypt_value(property.value) == '' else '********'
+        for variables, vardefs in ((operator.preferences, variable_index.preferences),
+                                   (operator.properties, variable_index.properties)):
+            for variable_name, variable in variables.items():
+                vardef = vardefs.get(variable_name)
+
+                if variable_name in operator_forced_values:
+                    variable.value = operator_forced_values[variable_name].value
+                else:
+                    multiuser = vardef is not None and vardef.multiuser
+                    value = _get_user_value(variable.value, user_key if multiuser else creator_key)
+                    if value is None and vardef is not None:
+                        value = _parse_variable_value(vardef, vardef.default)
+                    variable.value = value
+
+                if vardef is not None and vardef.secure:
+                    variable.value = '' if variable.value is None or decrypt_value(variable.value) == '' else '********'
 
     return data_ret
 
@@ -0,0 +1,443 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterable, Mapping
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Union, TYPE_CHECKING
+import asyncio
+import hashlib
+import time
+
+from wirecloud import settings
+
+if TYPE_CHECKING:
+    from wirecloud.proxy.schemas import ProxyRequestData
+
+# Private cache (RFC 9111) of the responses to the GET requests relayed by the proxy. Entries are scoped to the user
+# and the workspace the requests are made from. Requests carrying credentials (sent by the client or injected by the
+# proxy processors) are also scoped to the component and are only cached when the response explicitly allows it.
+# Concurrent requests for the same entry are coalesced into a single upstream request.
+
+CACHEABLE_STATUS_CODES = frozenset((200, 203, 204, 300, 301, 404, 405, 410, 414, 501))
+CREDENTIAL_HEADERS = frozenset(('authorization', 'proxy-authorization', 'x-wirecloud-secure-data'))
+CREDENTIAL_HEADER_PREFIXES = ('fiware-',)
+CONDITIONAL_HEADERS = ('if-none-match', 'if-modified-since')
+# Headers describing the stored response, updated when it is revalidated (RFC 9111, section 3.2)
+EXCLUDED_UPDATE_HEADERS = frozenset(('content-length', 'content-encoding', 'content-range', 'transfer-encoding'))
+
+COALESCING_TIMEOUT = 60
+
+Headers = Union[Mapping[str, str], Iterable[tuple[str, str]]]
+
+
+def parse_cache_control(value: Optional[str]) -> dict[str, Optional[str]]:
+    directives = {}
+    if not value:
+        return directives
+
+    for directive in value.split(','):
+        name, sep, argument = directive.strip().partition('=')
+        if name:
+            directives[name.strip().lower()] = argument.strip().strip('"') if sep else None
+
+    return directives
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+    return date if date.tzinfo is not None else date.replace(tzinfo=timezone.utc)
+
+
+def _parse_seconds(value: Optional[str]) -> Optional[int]:
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _header_items(headers: Headers) -> list[tuple[str, str]]:
+    return list(headers.items()) if isinstance(headers, Mapping) else list(headers)
+
+
+def _lower_headers(headers: Headers) -> dict[str, str]:
+    return {name.lower(): value for name, value in _header_items(headers)}
+
+
+def _pop_header(headers: dict[str, str], name: str) -> Optional[str]:
+    value = None
+    for header in [header for header in headers if header.lower() == name]:
+        value = headers.pop(header)
+
+    return value
+
+
+def get_credentials_signature(request_data: 'ProxyRequestData') -> Optional[str]:
+    """
+    Returns a digest of the credentials sent by the client in a proxied request (authorization and secure data
+    headers, FIWARE token headers and cookies) or None if the request does not carry any.
+    """
+
+    material = sorted((name.lower(), value) for name, value in request_data.headers.items()
+                      if name.lower() in CREDENTIAL_HEADERS or name.lower().startswith(CREDENTIAL_HEADER_PREFIXES))
+    material += sorted(('cookie', request_data.cookies[key].OutputString()) for key in request_data.cookies)
+    if len(material) == 0:
+        return None
+
+    digest = hashlib.sha256()
+    for name, value in material:
+        digest.update(name.encode('utf-8') + b'\0' + value.encode('utf-8') + b'\0')
+
+    return digest.hexdigest()
+
+
+class ProxyCacheEntry:
+    __slots__ = ('status', 'headers', 'body', 'vary', 'stored_at', 'initial_age', 'lifetime', 'etag',
+                 'last_modified', 'size')
+
+    def __init__(self, status: int, headers: Headers, body: bytes, vary: dict[str, Optional[str]]):
+        self.status = status
+        self.body = body
+        self.vary = vary
+        self.update(headers)
+
+    def update(self, headers: Headers) -> None:
+        items = _header_items(headers)
+        if hasattr(self, 'headers'):
+            updated = {name.lower() for name, _value in items} - EXCLUDED_UPDATE_HEADERS
+            items = [(name, value) for name, value in self.headers if name.lower() not in updated] + \
+                    [(name, value) for name, value in items if name.lower() in updated]
+
+        self.headers = items
+        lowered = _lower_headers(items)
+        cache_control = parse_cache_control(lowered.get('cache-control'))
+
+        self.stored_at = time.monotonic()
+        self.initial_age = _parse_seconds(lowered.get('age')) or 0
+        self.etag = lowered.get('etag')
+        self.last_modified = lowered.get('last-modified')
+        self.size = len(self.body) + sum(len(name) + len(value) for name, value in items)
+
+        lifetime = 0
+        if 'no-cache' in cache_control:
+            lifetime = 0
+        elif _parse_seconds(cache_control.get('max-age')) is not None:
+            lifetime = _parse_seconds(cache_control['max-age'])
+        elif 'expires' in lowered:
+            expires = _parse_date(lowered['expires'])
+            date = _parse_date(lowered.get('date')) or datetime.now(timezone.utc)
+            lifetime = max(int((expires - date).total_seconds()), 0) if expires is not None else 0
+        self.lifetime = lifetime
+
+    @property
+    def age(self) -> int:
+        return self.initial_age + int(time.monotonic() - self.stored_at)
+
+    @property
+    def fresh(self) -> bool:
+        return self.initial_age + (time.monotonic() - self.stored_at) < self.lifetime
+
+    @property
+    def has_validators(self) -> bool:
+        return self.etag is not None or self.last_modified is not None
+
+    def matches(self, request_headers: dict[str, str]) -> bool:
+        return all(request_headers.get(name) == value for name, value in self.vary.items())
+
+    def matches_condition(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        # Whether a conditional request sent by the client can be answered with a 304 response
+        if if_none_match is not None:
+            if self.etag is None:
+                return False
+            # Weak comparison (RFC 9110, section 13.1.2)
+            etags = [etag.strip().removeprefix('W/') for etag in if_none_match.split(',')]
+            return '*' in etags or self.etag.removeprefix('W/') in etags
+
+        if if_modified_since is not None and self.last_modified is not None:
+            since = _parse_date(if_modified_since)
+            modified = _parse_date(self.last_modified)
+            return since is not None and modified is not None and modified <= since
+
+        return False
+
+
+class ProxyCacheLookup:
+    """
+    State of a cacheable proxied request. The request is served from ``entry`` when ``hit`` is True. Otherwise it is
+    sent upstream, using the validators of the stale ``entry`` (if any), and the response is stored by the request
+    if it is the ``leader``, other requests for the same entry waiting for it.
+    """
+
+    __slots__ = ('cache', 'key', 'entry', 'hit', 'leader', 'credentialed', 'vary_headers', 'if_none_match',
+                 'if_modified_since')
+
+    def __init__(self, cache: 'ProxyResponseCache', key: tuple, credentialed: bool, vary_headers: dict[str, str],
+                 if_none_match: Optional[str], if_modified_since: Optional[str]):
+        self.cache = cache
+        self.key = key
+        self.credentialed = credentialed
+        self.vary_headers = vary_headers
+        self.if_none_match = if_none_match
+        self.if_modified_since = if_modified_since
+        self.entry: Optional[ProxyCacheEntry] = None
+        self.hit = False
+        self.leader = False
+
+    @property
+    def revalidating(self) -> bool:
+        return self.leader and self.entry is not None
+
+    def add_validators(self, headers: dict[str, str]) -> None:
+        if self.entry.etag is not None:
+            headers['if-none-match'] = self.entry.etag
+        if self.entry.last_modified is not None:
+            headers['if-modified-since'] = self.entry.last_modified
+
+    def is_not_modified(self) -> bool:
+        return self.entry.matches_condition(self.if_none_match, self.if_modified_since)
+
+    def is_storable(self, status: int, headers: Headers) -> bool:
+        # The first item of the scope is the id of the user
+        return self.cache.is_storable(status, headers, self.credentialed, self.key[1][0] is not None)
+
+    def store(self, status: int, headers: Headers, body: bytes) -> ProxyCacheEntry:
+        vary = {name: self.vary_headers.get(name) for name in parse_vary(headers)}
+        self.entry = ProxyCacheEntry(status, headers, body, vary)
+        self.cache.finish(self.key, self.entry)
+        self.leader = False
+        return self.entry
+
+    def refresh(self, headers: Headers) -> bool:
+        """
+        Updates the stale entry with the headers of a 304 response. Returns whether the entry is kept: responses
+        setting cookies are not stored (as in ``is_storable``), so the entry is dropped and this request is served
+        from a detached copy instead.
+        """
+
+        if 'set-cookie' not in _lower_headers(headers):
+            self.entry.update(headers)
+            self.cache.finish(self.key, self.entry)
+            self.leader = False
+            return True
+
+        # The entry may be being served by other requests, so it is not modified
+        entry = ProxyCacheEntry(self.entry.status, self.entry.headers, self.entry.body, self.entry.vary)
+        entry.update(headers)
+        self.entry = entry
+        self.cache.discard(self.key)
+        self.cache.finish(self.key, None)
+        self.leader = False
+        return False
+
+    def release(self) -> None:
+        if self.leader:
+            self.cache.finish(self.key, None)
+            self.leader = False
+
+
+def parse_vary(headers: Headers) -> list[str]:
+    vary = []
+    for name, value in _header_items(headers):
+        if name.lower() == 'vary':
+            vary += [field.strip().lower() for field in value.split(',') if field.strip()]
+
+    return vary
+
+
+class ProxyResponseCache:
+    def __init__(self, max_size: int = 64 * 1024 * 1024, max_entry_size: int = 1024 * 1024):
+        self.max_size = max_size
+        self.max_entry_size = max_entry_size
+        self.size = 0
+
+        self._entries: OrderedDict[tuple, ProxyCacheEntry] = OrderedDict()
+        self._inflight: dict[tuple, tuple[asyncio.Future, float]] = {}
+
+    @classmethod
+    def from_settings(cls) -> "ProxyResponseCache":
+        return cls(
+            max_size=getattr(settings, 'PROXY_CACHE_MAX_SIZE', 64 * 1024 * 1024),
+            max_entry_size=getattr(settings, 'PROXY_CACHE_MAX_ENTRY_SIZE', 1024 * 1024)
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_key(self, request_data: 'ProxyRequestData', url: str, signature: Optional[str], credentialed: bool) -> tuple:
+        user_id = str(request_data.user.id) if request_data.user is not None else None
+        workspace_id = str(request_data.workspace.id) if request_data.workspace is not None else None
+        scope = (user_id, workspace_id)
+        if credentialed:
+            scope += (request_data.component_type, request_data.component_id)
+
+        return url, scope, signature
+
+    def is_storable(self, status: int, headers: Headers, credentialed: bool, authenticated: bool) -> bool:
+        if status not in CACHEABLE_STATUS_CODES:
+            return False
+
+        lowered = _lower_headers(headers)
+        cache_control = parse_cache_control(lowered.get('cache-control'))
+        if 'no-store' in cache_control or 'set-cookie' in lowered or '*' in parse_vary(headers):
+            return False
+
+        # Anonymous requests share the same scope
+        if 'private' in cache_control and not authenticated:
+            return False
+
+        if credentialed and not ('public' in cache_control or 's-maxage' in cache_control
+                                 or 'must-revalidate' in cache_control):
+            return False
+
+        return ('max-age' in cache_control or 'expires' in lowered or 'etag' in lowered
+                or 'last-modified' in lowered)
+
+    async def lookup(self, request_data: 'ProxyRequestData', url: str, signature: Optional[str],
+                     credentialed: bool) -> Optional[ProxyCacheLookup]:
+        if request_data.method != 'GET' or request_data.data is not None:
+            return None
+
+        request_headers = _lower_headers(request_data.headers)
+        cache_control = parse_cache_control(request_headers.get('cache-control'))
+        if 'no-store' in cache_control:
+            return None
+
+        # Conditional requests sent by the client are answered from the cache, the upstream request must return the
+        # whole response so it can be stored
+        lookup = ProxyCacheLookup(self, self.get_key(request_data, url, signature, credentialed), credentialed,
+                                  request_headers, _pop_header(request_data.headers, 'if-none-match'),
+                                  _pop_header(request_data.headers, 'if-modified-since'))
+        for name in CONDITIONAL_HEADERS:
+            request_headers.pop(name, None)
+
+        inflight = self._inflight.get(lookup.key)
+        if inflight is not None:
+            entry = await self._wait(lookup.key, *inflight)
+            if entry is not None and entry.matches(request_headers):
+                # The response was obtained while this request was waiting, so it is served even if it is stale
+                lookup.entry = entry
+                lookup.hit = True
+            return lookup
+
+        entry = self._entries.get(lookup.key)
+        if entry is not None and entry.matches(request_headers):
+            self._entries.move_to_end(lookup.key)
+            lookup.entry = entry
+            if entry.fresh and 'no-cache' not in cache_control and cache_control.get('max-age') != '0':
+                lookup.hit = True
+                return lookup
+            if not entry.has_validators:
+                lookup.entry = None
+
+        self._inflight[lookup.key] = (asyncio.get_running_loop().create_future(), time.monotonic())
+        lookup.leader = True
+        return lookup
+
+    async def _wait(self, key: tuple, future: asyncio.Future, started_at: float) -> Optional[ProxyCacheEntry]:
+        timeout = COALESCING_TIMEOUT - (time.monotonic() - started_at)
+        try:
+            if timeout <= 0:
+                raise asyncio.TimeoutError()
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            # The leader was abandoned, requests for this entry will be sent upstream again
+            if self._inflight.get(key, (None,))[0] is future:
+                del self._inflight[key]
+            return None
+
+    def finish(self, key: tuple, entry: Optional[ProxyCacheEntry]) -> None:
+        if entry is not None:
+            self._store(key, entry)
+
+        future = self._inflight.pop(key, (None,))[0]
+        if future is not None and not future.done():
+            future.set_result(entry)
+
+    def discard(self, key: tuple) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= previous.size
+
+    def _store(self, key: tuple, entry: ProxyCacheEntry) -> None:
+        self.discard(key)
+
+        if entry.size > self.max_entry_size:
+            return
+
+        self._entries[key] = entry
+        self.size += entry.size
+        while self.size > self.max_size:
+            _key, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+
+async def read_body(content: AsyncIterator[bytes], limit: int) -> tuple[list[bytes], bool]:
+    """
+    Reads a response body if it is not larger than limit. Returns the chunks read and whether the whole body was read.
+    """
+
+    chunks = []
+    size = 0
+    async for chunk in content:
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > limit:
+            return chunks, False
+
+    return chunks, True
+
+
+async def chain_body(chunks: list[bytes], content: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+    async for chunk in content:
+        yield chunk
+
+
+_response_cache: Optional[ProxyResponseCache] = None
+
+
+def get_response_cache() -> Optional[ProxyResponseCache]:
+    global _response_cache
+
+    if not getattr(settings, 'PROXY_CACHE_ENABLED', False):
+        return None
+
+    if _response_cache is None:
+        _response_cache = ProxyResponseCache.from_settings()
+
+    return _response_cache
+
+
+def clear_response_cache() -> None:
+    global _response_cache
+
+    _response_cache = None
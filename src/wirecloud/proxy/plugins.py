@@ -100,4 +100,91 @@ class WirecloudProxyPlugin(WirecloudPlugin):
                 if not ip.strip():
                     raise ValueError("PROXY_BLACKLIST cannot contain empty strings")
 
-        return (validate_proxy_settings,)
+        def validate_proxy_pool_settings(settings, _offline: bool) -> None:
+            # PROXY_POOL_LIMIT (default: 100 connections, 0 means no limit)
+            if not hasattr(settings, 'PROXY_POOL_LIMIT'):
+                setattr(settings, 'PROXY_POOL_LIMIT', 100)
+
+            if not isinstance(settings.PROXY_POOL_LIMIT, int) or settings.PROXY_POOL_LIMIT < 0:
+                raise ValueError("PROXY_POOL_LIMIT must be a non-negative integer")
+
+            # PROXY_POOL_LIMIT_PER_HOST (default: 30 connections, 0 means no limit)
+            if not hasattr(settings, 'PROXY_POOL_LIMIT_PER_HOST'):
+                setattr(settings, 'PROXY_POOL_LIMIT_PER_HOST', 30)
+
+            if not isinstance(settings.PROXY_POOL_LIMIT_PER_HOST, int) or settings.PROXY_POOL_LIMIT_PER_HOST < 0:
+                raise ValueError("PROXY_POOL_LIMIT_PER_HOST must be a non-negative integer")
+
+            if 0 < settings.PROXY_POOL_LIMIT < settings.PROXY_POOL_LIMIT_PER_HOST:
+                logger.warning("PROXY_POOL_LIMIT_PER_HOST is greater than PROXY_POOL_LIMIT. PROXY_POOL_LIMIT will be the effective limit.")
+
+            # PROXY_POOL_KEEPALIVE_TIMEOUT (default: 30 seconds), idle connections are closed after this time
+            if not hasattr(settings, 'PROXY_POOL_KEEPALIVE_TIMEOUT'):
+                setattr(settings, 'PROXY_POOL_KEEPALIVE_TIMEOUT', 30)
+
+            if not isinstance(settings.PROXY_POOL_KEEPALIVE_TIMEOUT, (int, float)) or settings.PROXY_POOL_KEEPALIVE_TIMEOUT <= 0:
+                raise ValueError("PROXY_POOL_KEEPALIVE_TIMEOUT must be a positive number")
+
+            # PROXY_POOL_DNS_CACHE_TTL (default: 300 seconds, 0 disables the DNS cache)
+            if not hasattr(settings, 'PROXY_POOL_DNS_CACHE_TTL'):
+                setattr(settings, 'PROXY_POOL_DNS_CACHE_TTL', 300)
+
+            if not isinstance(settings.PROXY_POOL_DNS_CACHE_TTL, int) or settings.PROXY_POOL_DNS_CACHE_TTL < 0:
+                raise ValueError("PROXY_POOL_DNS_CACHE_TTL must be a non-negative integer")
+
+        def validate_proxy_cache_settings(settings, _offline: bool) -> None:
+            # PROXY_CACHE_ENABLED (default: False), cache of the responses to the proxied GET requests. It is opt-in:
+            # the entries are scoped per user and workspace, but upstream services sending wrong caching headers
+            # would get their responses reused
+            if not hasattr(settings, 'PROXY_CACHE_ENABLED'):
+                setattr(settings, 'PROXY_CACHE_ENABLED', False)
+
+            if not isinstance(settings.PROXY_CACHE_ENABLED, bool):
+                raise ValueError("PROXY_CACHE_ENABLED must be a boolean")
+
+            # PROXY_CACHE_MAX_SIZE (default: 64 MiB), entries are evicted in LRU order once reached
+            if not hasattr(settings, 'PROXY_CACHE_MAX_SIZE'):
+                setattr(settings, 'PROXY_CACHE_MAX_SIZE', 64 * 1024 * 1024)
+
+            if isinstance(settings.PROXY_CACHE_MAX_SIZE, bool) or not isinstance(settings.PROXY_CACHE_MAX_SIZE, int) \
+                    or settings.PROXY_CACHE_MAX_SIZE <= 0:
+                raise ValueError("PROXY_CACHE_MAX_SIZE must be a positive integer")
+
+            # PROXY_CACHE_MAX_ENTRY_SIZE (default: 1 MiB), larger responses are streamed without being stored
+            if not hasattr(settings, 'PROXY_CACHE_MAX_ENTRY_SIZE'):
+                setattr(settings, 'PROXY_CACHE_MAX_ENTRY_SIZE', 1024 * 1024)
+
+            if isinstance(settings.PROXY_CACHE_MAX_ENTRY_SIZE, bool) \
+                    or not isinstance(settings.PROXY_CACHE_MAX_ENTRY_SIZE, int) or settings.PROXY_CACHE_MAX_ENTRY_SIZE <= 0:
+                raise ValueError("PROXY_CACHE_MAX_ENTRY_SIZE must be a positive integer")
+
+            if settings.PROXY_CACHE_MAX_ENTRY_SIZE > settings.PROXY_CACHE_MAX_SIZE:
+                logger.warning("PROXY_CACHE_MAX_ENTRY_SIZE is greater than PROXY_CACHE_MAX_SIZE. PROXY_CACHE_MAX_SIZE will be the effective limit.")
+
+        def validate_proxy_ws_relay_settings(settings, _offline: bool) -> None:
+            # PROXY_WS_QUEUE_SIZE (default: 16), messages queued in each direction before reads are paused
+            if not hasattr(settings, 'PROXY_WS_QUEUE_SIZE'):
+                setattr(settings, 'PROXY_WS_QUEUE_SIZE', 16)
+
+            if isinstance(settings.PROXY_WS_QUEUE_SIZE, bool) or not isinstance(settings.PROXY_WS_QUEUE_SIZE, int) \
+                    or settings.PROXY_WS_QUEUE_SIZE <= 0:
+                raise ValueError("PROXY_WS_QUEUE_SIZE must be a positive integer")
+
+            # PROXY_WS_HEARTBEAT (default: 30 seconds, 0 disables the pings sent to the upstream servers)
+            if not hasattr(settings, 'PROXY_WS_HEARTBEAT'):
+                setattr(settings, 'PROXY_WS_HEARTBEAT', 30)
+
+            if isinstance(settings.PROXY_WS_HEARTBEAT, bool) or not isinstance(settings.PROXY_WS_HEARTBEAT, int) \
+                    or settings.PROXY_WS_HEARTBEAT < 0:
+                raise ValueError("PROXY_WS_HEARTBEAT must be a non-negative integer")
+
+            # PROXY_WS_IDLE_TIMEOUT (default: 0, connections are never closed for being idle)
+            if not hasattr(settings, 'PROXY_WS_IDLE_TIMEOUT'):
+                setattr(settings, 'PROXY_WS_IDLE_TIMEOUT', 0)
+
+            if isinstance(settings.PROXY_WS_IDLE_TIMEOUT, bool) or not isinstance(settings.PROXY_WS_IDLE_TIMEOUT, int) \
+                    or settings.PROXY_WS_IDLE_TIMEOUT < 0:
+                raise ValueError("PROXY_WS_IDLE_TIMEOUT must be a non-negative integer")
+
+        return (validate_proxy_settings, validate_proxy_pool_settings, validate_proxy_cache_settings,
+                validate_proxy_ws_relay_settings)
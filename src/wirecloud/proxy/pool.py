@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+from typing import Optional
+import asyncio
+import logging
+
+import aiohttp
+
+from wirecloud import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Process-wide pool of keep-alive connections to the upstream servers. Every proxied request uses its own
+# lightweight ClientSession (and so its own cookie jar) borrowing connections from a shared TCPConnector, so cookies
+# are never shared between requests while TCP/TLS connections and DNS lookups are.
+class ProxyConnectionPool:
+    def __init__(self, limit: int = 100, limit_per_host: int = 30, keepalive_timeout: float = 30,
+                 dns_cache_ttl: int = 300):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_settings(cls) -> "ProxyConnectionPool":
+        return cls(
+            limit=getattr(settings, 'PROXY_POOL_LIMIT', 100),
+            limit_per_host=getattr(settings, 'PROXY_POOL_LIMIT_PER_HOST', 30),
+            keepalive_timeout=getattr(settings, 'PROXY_POOL_KEEPALIVE_TIMEOUT', 30),
+            dns_cache_ttl=getattr(settings, 'PROXY_POOL_DNS_CACHE_TTL', 300)
+        )
+
+    @property
+    def connector(self) -> aiohttp.TCPConnector:
+        loop = asyncio.get_running_loop()
+
+        # Connectors are bound to the event loop they were created on, create a new one if needed
+        if self._connector is None or self._connector.closed or self._loop is not loop:
+            self._connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=self.dns_cache_ttl != 0,
+                ttl_dns_cache=self.dns_cache_ttl if self.dns_cache_ttl > 0 else None
+            )
+            self._loop = loop
+
+        return self._connector
+
+    @property
+    def closed(self) -> bool:
+        return self._connector is None or self._connector.closed
+
+    def session(self) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(connector=self.connector, connector_owner=False,
+                                     cookie_jar=aiohttp.CookieJar(unsafe=True))
+
+    async def close(self) -> None:
+        if self._connector is not None and not self._connector.closed:
+            try:
+                await self._connector.close()
+            except RuntimeError:
+                # The loop the connector was bound to is already gone
+                logger.debug("Unable to cleanly close the proxy connection pool", exc_info=True)
+
+        self._connector = None
+        self._loop = None
+
+
+_connection_pool: Optional[ProxyConnectionPool] = None
+
+
+def get_connection_pool() -> ProxyConnectionPool:
+    global _connection_pool
+
+    if _connection_pool is None:
+        _connection_pool = ProxyConnectionPool.from_settings()
+
+    return _connection_pool
+
+
+async def open_connection_pool() -> ProxyConnectionPool:
+    global _connection_pool
+
+    if _connection_pool is not None:
+        await _connection_pool.close()
+
+    _connection_pool = ProxyConnectionPool.from_settings()
+    # Bind the connector to the serving event loop right away
+    _connection_pool.connector
+
+    return _connection_pool
+
+
+async def close_connection_pool() -> None:
+    global _connection_pool
+
+    if _connection_pool is not None:
+        await _connection_pool.close()
+        _connection_pool = None
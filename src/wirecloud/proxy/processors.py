@@ -26,7 +26,7 @@ from fastapi import Request
 from wirecloud.database import DBSession
 from wirecloud.platform.workspace.utils import VariableValueCacheManager
 from wirecloud.proxy.schemas import ProxyRequestData
-from wirecloud.proxy.utils import ValidationError
+from wirecloud.proxy.utils import ValidationError, add_body_replacement
 from wirecloud.translation import gettext as _
 
 WIRECLOUD_SECURE_DATA_HEADER = 'x-wirecloud-secure-data'
@@ -108,16 +108,7 @@ async def process_secure_data(db: DBSession, text: str, request: ProxyRequestDat
             if request.data is None:
                 raise ValidationError(_('X-WireCloud-Secure-Data: The request does not contain any data to process.'))
 
-            new_body_array = bytearray()
-            if isinstance(request.data, bytes):
-                new_body_array.extend(request.data)
-            else:
-                async for chunk in request.data:  # pragma: no branch
-                    new_body_array.extend(chunk)
-
-            new_body = new_body_array.replace(substr, value)
-            request.headers['content-length'] = str(len(new_body))
-            request.data = new_body
+            add_body_replacement(request, substr, value)
         elif action == "header":
             var_ref = options.get('var_ref', '')
             substr = options.get('substr', '{' + var_ref + '}')
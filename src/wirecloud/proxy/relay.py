@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+from typing import Awaitable, Callable, Optional, Union
+import asyncio
+import time
+
+import aiohttp
+from fastapi import WebSocket, status
+
+# Relays the messages of a proxied WebSocket connection. Each direction is served by a long-lived pump task that sends
+# the messages read by its reader task through a bounded queue, so a slow receiver stops the reads from the other
+# side instead of making the proxy buffer its messages.
+
+Message = tuple[Union[str, bytes, None], Optional[bool], Optional[tuple[int, str]]]
+
+
+async def read_client_message(ws: WebSocket) -> Message:
+    try:
+        while True:
+            # Receive data in text or binary mode
+            data = await ws.receive()
+            if data["type"] != "websocket.connect":
+                break
+
+        if data["type"] == "websocket.receive":
+            if "bytes" in data and data["bytes"] is not None:
+                return data["bytes"], True, None
+            else:
+                return data["text"], False, None
+        elif data["type"] == "websocket.disconnect":
+            return None, None, (data["code"], data.get("reason", ''))
+    except Exception:
+        pass
+
+    return None, None, (status.WS_1014_BAD_GATEWAY, 'Gateway Error')
+
+
+async def read_server_message(ws: aiohttp.ClientWebSocketResponse) -> Message:
+    try:
+        data = await ws.receive()
+    except Exception:
+        return None, None, (status.WS_1014_BAD_GATEWAY, 'Gateway Error')
+
+    if data.type == aiohttp.WSMsgType.CLOSE:
+        return None, None, (data.data, data.extra)
+    elif data.type == aiohttp.WSMsgType.CLOSED:
+        return None, None, (status.WS_1000_NORMAL_CLOSURE, 'Gateway Disconnected')
+    elif data.type == aiohttp.WSMsgType.BINARY or data.type == aiohttp.WSMsgType.TEXT:
+        return data.data, data.type == aiohttp.WSMsgType.BINARY, None
+
+    # Errors, including missing heartbeat pongs
+    return None, None, (status.WS_1014_BAD_GATEWAY, 'Connection Error')
+
+
+class RelayStats:
+    __slots__ = ('client_messages', 'client_bytes', 'client_queue_high_water', 'server_messages', 'server_bytes',
+                 'server_queue_high_water', 'close_code', 'close_reason', 'started_at')
+
+    def __init__(self):
+        self.client_messages = 0
+        self.client_bytes = 0
+        self.client_queue_high_water = 0
+        self.server_messages = 0
+        self.server_bytes = 0
+        self.server_queue_high_water = 0
+        self.close_code: Optional[int] = None
+        self.close_reason: Optional[str] = None
+        self.started_at = time.monotonic()
+
+    def __str__(self) -> str:
+        return ("%.1fs, client: %d messages, %d bytes, queue high-water %d; server: %d messages, %d bytes, queue "
+                "high-water %d; close: %s %s" % (
+                    time.monotonic() - self.started_at, self.client_messages, self.client_bytes,
+                    self.client_queue_high_water, self.server_messages, self.server_bytes,
+                    self.server_queue_high_water, self.close_code, self.close_reason))
+
+
+class WebSocketRelay:
+    """
+    Relays the messages between an accepted client WebSocket and an upstream aiohttp WebSocket until one of the sides
+    closes the connection, a message cannot be delivered or, if ``idle_timeout`` is not 0, no message is relayed for
+    ``idle_timeout`` seconds. Each direction queues up to ``queue_size`` messages.
+    """
+
+    def __init__(self, client: WebSocket, server: aiohttp.ClientWebSocketResponse, queue_size: int = 16,
+                 idle_timeout: int = 0):
+        self.client = client
+        self.server = server
+        self.queue_size = queue_size
+        self.idle_timeout = idle_timeout
+        self.stats = RelayStats()
+        self.last_activity = time.monotonic()
+
+    async def run(self) -> RelayStats:
+        pumps = [
+            asyncio.create_task(self._pump('client', lambda: read_client_message(self.client), self._send_to_server,
+                                           self._close_server, self._close_client)),
+            asyncio.create_task(self._pump('server', lambda: read_server_message(self.server), self._send_to_client,
+                                           self._close_client, self._close_server)),
+        ]
+
+        try:
+            while True:
+                timeout = None
+                if self.idle_timeout > 0:
+                    timeout = max(self.idle_timeout - (time.monotonic() - self.last_activity), 0)
+
+                done, _pending = await asyncio.wait(pumps, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if done:
+                    break
+
+                if time.monotonic() - self.last_activity >= self.idle_timeout:
+                    await self._close(self._close_both, status.WS_1001_GOING_AWAY, 'Idle timeout')
+                    break
+        finally:
+            for pump in pumps:
+                pump.cancel()
+            await asyncio.gather(*pumps, return_exceptions=True)
+
+        return self.stats
+
+    async def _pump(self, source: str, read: Callable[[], Awaitable[Message]],
+                    send: Callable[[Union[str, bytes], bool], Awaitable[None]],
+                    close_target: Callable[[int, str], Awaitable[None]],
+                    close_source: Callable[[int, str], Awaitable[None]]) -> None:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        reader = asyncio.create_task(self._read(source, read, queue))
+        try:
+            while True:
+                data, is_binary, close = await queue.get()
+                if close is not None:
+                    await self._close(close_target, *close)
+                    return
+
+                try:
+                    await send(data, is_binary)
+                except (RuntimeError, ConnectionError, aiohttp.ClientError):
+                    await self._close(close_source, status.WS_1014_BAD_GATEWAY, 'Gateway Error')
+                    return
+
+                self.last_activity = time.monotonic()
+        finally:
+            reader.cancel()
+
+    async def _read(self, source: str, read: Callable[[], Awaitable[Message]], queue: asyncio.Queue) -> None:
+        while True:
+            message = await read()
+            # Waits for the pump when the queue is full, so no more messages are read from this side
+            await queue.put(message)
+
+            data, is_binary, close = message
+            if close is not None:
+                return
+
+            size = len(data) if is_binary else len(data.encode('utf-8'))
+            if source == 'client':
+                self.stats.client_messages += 1
+                self.stats.client_bytes += size
+                self.stats.client_queue_high_water = max(self.stats.client_queue_high_water, queue.qsize())
+            else:
+                self.stats.server_messages += 1
+                self.stats.server_bytes += size
+                self.stats.server_queue_high_water = max(self.stats.server_queue_high_water, queue.qsize())
+
+    async def _close(self, close: Callable[[int, str], Awaitable[None]], code: int, reason: str) -> None:
+        # Only the first side to close the connection is relayed, the other pump is cancelled afterwards
+        if self.stats.close_code is not None:
+            return
+
+        self.stats.close_code, self.stats.close_reason = code, reason
+        await close(code, reason)
+
+    async def _close_both(self, code: int, reason: str) -> None:
+        await self._close_server(code, reason)
+        await self._close_client(code, reason)
+
+    async def _send_to_server(self, data: Union[str, bytes], is_binary: bool) -> None:
+        if is_binary:
+            await self.server.send_bytes(data)
+        else:
+            await self.server.send_str(data)
+
+    async def _send_to_client(self, data: Union[str, bytes], is_binary: bool) -> None:
+        if is_binary:
+            await self.client.send_bytes(data)
+        else:
+            await self.client.send_text(data)
+
+    async def _close_server(self, code: int, reason: str) -> None:
+        await self.server.close(code=code, message=(reason or '').encode())
+
+    async def _close_client(self, code: int, reason: str) -> None:
+        try:
+            await self.client.close(code=code, reason=reason)
+        except RuntimeError:
+            # The client is already disconnected
+            pass
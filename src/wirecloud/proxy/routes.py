@@ -21,7 +21,6 @@ from http.cookies import SimpleCookie
 from fastapi import APIRouter, Path, Response, Request, WebSocket, WebSocketException, status
 from fastapi.responses import StreamingResponse
 from typing import Optional, Union
-import asyncio
 import aiohttp
 import base64
 import hashlib
@@ -29,9 +28,13 @@ import logging
 import inspect
 
 from wirecloud.commons.auth.utils import UserDepNoCSRF
-from wirecloud.database import DBDep, DBSession, Id
+from wirecloud.database import DBDep, DBReadDep, DBSession, Id
 from wirecloud.platform.workspace.crud import get_workspace_by_username_and_name, get_workspace_by_id
 from wirecloud.proxy import docs
+from wirecloud.proxy.cache import (ProxyCacheLookup, chain_body, get_credentials_signature, get_response_cache,
+                                   read_body)
+from wirecloud.proxy.pool import get_connection_pool
+from wirecloud.proxy.relay import WebSocketRelay
 from wirecloud.proxy.schemas import ProxyRequestData
 from wirecloud.proxy.utils import is_valid_response_header
 from wirecloud.commons.utils.http import (build_error_response, resolve_url_name, iri_to_uri, get_current_domain,
@@ -45,6 +48,10 @@ from wirecloud.translation import gettext as _
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Headers sent in the 304 responses to the conditional requests answered from the cache (RFC 9110, section 15.4.5)
+NOT_MODIFIED_HEADERS = frozenset(('cache-control', 'content-location', 'date', 'etag', 'expires', 'last-modified',
+                                  'vary'))
+
 BLACKLISTED_HTTP_HEADERS = [
     'host', 'forwarded', 'x-forwarded-by',
     'x-forwarded-host', 'x-forwarded-port',
@@ -53,7 +60,7 @@ BLACKLISTED_HTTP_HEADERS = [
 
 
 async def parse_request_headers(request: Union[Request, WebSocket], request_data: ProxyRequestData) -> None:
-    if 'Transfer-Encoding' in request.headers and request.headers['Transfer-Encoding'] != 'identity' and not request_data.is_ws:
+    if 'Transfer-Encoding' in request.headers and request.headers['Transfer-Encoding'].lower() not in ('identity', 'chunked') and not request_data.is_ws:
         raise ValueError("WireCloud doesn't support requests using the Transfer-Encoding header")
 
     for header in request.headers.items():
@@ -61,9 +68,13 @@ async def parse_request_headers(request: Union[Request, WebSocket], request_data
 
         if header_name == 'content-length' and header[1] and not request_data.is_ws:
             # Only take into account request body if the request has a
-            # Content-Length header (we don't support chunked requests)
+            # Content-Length header or uses chunked transfer encoding
             request_data.data = request.stream()
             request_data.headers["Content-Length"] = "%s" % header[1]
+        elif header_name == 'transfer-encoding' and not request_data.is_ws:
+            # Chunked bodies are decoded by the server and relayed upstream using chunked encoding again
+            if header[1].lower() == 'chunked':
+                request_data.data = request.stream()
         elif header_name == 'cookie':
             cookie_parser = SimpleCookie(str(header[1]))
             request_data.cookies.update(cookie_parser)
@@ -148,44 +159,6 @@ def generate_ws_accept_header_from_key(key: str) -> str:
     return accept_key
 
 class Proxy:
-    async def read_ws_from_client(self, ws: WebSocket) -> tuple[str, Union[bytes, None], Union[bool, None], Union[tuple[int, str], None]]:
-        try:
-            # Receive data in text or binary mode
-            data = await ws.receive()
-
-            if data["type"] == "websocket.connect":
-                return await self.read_ws_from_client(ws)
-            elif data["type"] == "websocket.receive":
-                if "bytes" in data and data["bytes"] is not None:
-                    return 'client', data["bytes"], True, None
-                else:
-                    return 'client', data["text"], False, None
-            elif data["type"] == "websocket.disconnect":
-                return 'client', None, None, (data["code"], data.get("reason", ''))
-        except Exception as e:
-            return 'client', None, None, (1014, 'Gateway Error')
-
-        return 'client', None, None, (1014, 'Gateway Error')
-
-
-    async def read_ws_from_server(self, response: aiohttp.ClientWebSocketResponse) -> tuple[str, Union[bytes, None], Union[bool, None], Union[tuple[int, str], None]]:
-        try:
-            data = await response.receive()
-
-            if data.type == aiohttp.WSMsgType.CLOSE:
-                return 'server', None, None, (data.data, data.extra)
-            elif data.type == aiohttp.WSMsgType.ERROR:
-                return 'server', None, None, (1014, 'Connection Error')
-            elif data.type == aiohttp.WSMsgType.CLOSED:
-                return 'server', None, None, (1000, 'Gateway Disconnected')
-            elif data.type == aiohttp.WSMsgType.BINARY or data.type == aiohttp.WSMsgType.TEXT:
-                return 'server', data.data, data.type == aiohttp.WSMsgType.BINARY, None
-            else:
-                return 'server', None, None, (1014, 'Connection Error')
-        except Exception:
-            return 'server', None, None, (1014, 'Gateway Error')
-
-
     async def do_request(self, request: Union[Request, WebSocket], url: str, method: str, request_data: ProxyRequestData,
                          db: DBSession, user: Optional[UserAll] = None) -> Optional[Response]:
         url = iri_to_uri(url)
@@ -209,6 +182,13 @@ class Proxy:
         else:
             request_data.headers['x-forwarded-for'] = request.client.host
 
+        # Credentials sent by the client or injected by the processors must not be shared through the response cache
+        cache = get_response_cache() if not request_data.is_ws else None
+        if cache is not None:
+            cache_url = request_data.url
+            cache_signature = get_credentials_signature(request_data)
+            original_headers = dict(request_data.headers)
+
         # Pass proxy processors to the new request
         try:
             for processor in get_request_proxy_processors():
@@ -227,159 +207,114 @@ class Proxy:
         if cookie_header_content != '':
             request_data.headers['Cookie'] = cookie_header_content
 
-        session = None
+        if request_data.is_ws:
+            return await self.do_ws_request(request, request_data, db)
+
+        lookup = None
+        if cache is not None:
+            credentialed = (cache_signature is not None or request_data.url != cache_url
+                            or request_data.headers != original_headers)
+            lookup = await cache.lookup(request_data, cache_url, cache_signature, credentialed)
+
+        if lookup is not None and lookup.hit:
+            return await self.build_cached_response(request, url, request_data, db, lookup, via_header)
+
         try:
-            session = aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True))
-            if not request_data.is_ws:
-                res = await session.request(
-                    method=request_data.method,
-                    url=request_data.url,
-                    headers=request_data.headers,
-                    data=request_data.data,
-                    timeout=60,
-                    auto_decompress=False,
-                    ssl=getattr(settings, 'WIRECLOUD_HTTPS_VERIFY', True)
-                )
-            else:
-                # Obtain subprotocols from the request
-                subprotocols = request.headers.get('Sec-WebSocket-Protocol')
-                if subprotocols:
-                    subprotocols = [subprotocol.strip() for subprotocol in subprotocols.split(',')]
-
-                pending_tasks = set()
-                read_from_client = True
-                read_from_server = True
-                logger.info("Connecting to %s" % request_data.url)
-                async with session.ws_connect(
-                    url=request_data.url,
-                    headers=request_data.headers,
-                    timeout=60,
-                    protocols=subprotocols if subprotocols else (),
-                    ssl=getattr(settings, 'WIRECLOUD_HTTPS_VERIFY', True),
-                    max_msg_size=getattr(settings, 'PROXY_WS_MAX_MSG_SIZE', 4 * 1024 * 1024),
-                ) as ws:
-                    logger.info("Connected to %s" % request_data.url)
-
-                    # Convert the dict to a list of tuples
-                    headers_dict = {}
-                    for key, value in ws._response.headers.items():
-                        headers_dict[key.lower()] = value
-
-                    if 'date' in headers_dict:
-                        del headers_dict['date']
-
-                    if 'sec-websocket-accept' in headers_dict:
-                        if 'sec-websocket-key' in request.headers:
-                            headers_dict['sec-websocket-accept'] = generate_ws_accept_header_from_key(request.headers['sec-websocket-key'])
-                        else:
-                            del headers_dict['sec-websocket-accept']
-                    elif 'sec-websocket-key' in request.headers:
-                            headers_dict['sec-websocket-accept'] = generate_ws_accept_header_from_key(request.headers['sec-websocket-key'])
-
-                    for processor in get_response_proxy_processors():
-                        if inspect.iscoroutinefunction(processor.process_response):
-                            headers_dict = await processor.process_response(db, request_data, headers_dict)
-                        else:
-                            headers_dict = processor.process_response(db, request_data, headers_dict)
-
-                    headers = [(key.encode(), value.encode()) for key, value in headers_dict.items()]
-
-                    accept_success = True
-                    try:
-                        await request.accept(subprotocol=ws.protocol, headers=headers)
-                    except Exception:
-                        await ws.close(code=status.WS_1014_BAD_GATEWAY, message='Gateway Error'.encode())
-                        accept_success = False
-
-                    while accept_success:
-                        tasks = []
-                        if read_from_server:
-                            tasks.append(self.read_ws_from_server(ws))
-                        if read_from_client:
-                            tasks.append(self.read_ws_from_client(request))
-
-                        if pending_tasks:
-                            tasks.extend(pending_tasks)
-
-                        read_from_server = False
-                        read_from_client = False
-
-                        done, pending_tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
-
-                        for task in done:
-                            source, data, is_binary, close = await task
-                            if source == 'client':
-                                read_from_client = True
-                                if data is None:
-                                    await ws.close(code=close[0], message=close[1].encode())
-                                    break
-                                else:
-                                    if is_binary:
-                                        await ws.send_bytes(data)
-                                    else:
-                                        await ws.send_str(data)
-                            else:
-                                try:
-                                    read_from_server = True
-                                    if data is None:
-                                        await request.close(code=close[0], reason=close[1])
-                                        break
-                                    else:
-                                        if is_binary:
-                                            await request.send_bytes(data)
-                                        else:
-                                            await request.send_text(data)
-                                except RuntimeError:
-                                    await ws.close(code=status.WS_1014_BAD_GATEWAY, message='Gateway Error'.encode())
-                                    break
-                        else: # no break, allows to break the outer loop from the inner loop
-                            continue
-                        break  # pragma: no cover
-
-                logger.info("Disconnected from %s" % request_data.url)
+            return await self.do_http_request(request, url, request_data, db, via_header, lookup)
+        finally:
+            if lookup is not None:
+                # Requests waiting for this one are sent upstream if the response was not stored
+                lookup.release()
+
+    async def do_http_request(self, request: Request, url: str, request_data: ProxyRequestData, db: DBSession,
+                              via_header: str, lookup: Optional[ProxyCacheLookup] = None) -> Response:
+        if lookup is not None and lookup.revalidating:
+            lookup.add_validators(request_data.headers)
+
+        session = get_connection_pool().session()
+        try:
+            res = await session.request(
+                method=request_data.method,
+                url=request_data.url,
+                headers=request_data.headers,
+                data=request_data.data,
+                timeout=60,
+                auto_decompress=False,
+                ssl=getattr(settings, 'WIRECLOUD_HTTPS_VERIFY', True)
+            )
+
+            content = res.content.iter_any()
+            if lookup is not None and lookup.leader:
+                if res.status == 304 and lookup.revalidating:
+                    stored = lookup.refresh(res.headers)
+                    res.release()
+                    # The cookies set by the 304 response are only relayed to this request
+                    response = await self.build_cached_response(request, url, request_data, db, lookup, via_header,
+                                                                None if stored else session)
+                    await session.close()
+                    return response
+
+                if lookup.is_storable(res.status, res.headers):
+                    chunks, complete = await read_body(content, lookup.cache.max_entry_size)
+                    if complete:
+                        lookup.store(res.status, res.headers.items(), b''.join(chunks))
+                        res.release()
+                        await session.close()
+                        return await self.build_cached_response(request, url, request_data, db, lookup, via_header)
+
+                    content = chain_body(chunks, content)
         except aiohttp.ServerTimeoutError as e:
             await session.close()
-            if not request_data.is_ws:
-                return build_error_response(request, 504, _('Gateway Timeout'), details=str(e))
-            else:
-                raise WebSocketException(code=status.WS_1014_BAD_GATEWAY, reason=_('Gateway Timeout'))
+            return build_error_response(request, 504, _('Gateway Timeout'), details=str(e))
         except aiohttp.ClientSSLError as e:
             await session.close()
-            if not request_data.is_ws:
-                return build_error_response(request, 502, _('SSL error'), details=str(e))
-            else:
-                raise WebSocketException(code=status.WS_1014_BAD_GATEWAY, reason=_('SSL error'))
+            return build_error_response(request, 502, _('SSL error'), details=str(e))
         except aiohttp.ClientError as e:
             await session.close()
-            if not request_data.is_ws:
-                return build_error_response(request, 502, _('Connection Error'), details=str(e))
-            else:
-                raise WebSocketException(code=status.WS_1014_BAD_GATEWAY, reason=_('Connection Error'))
+            return build_error_response(request, 502, _('Connection Error'), details=str(e))
 
-        if request_data.is_ws:
-            await session.close()
+        async def stream_response(s: aiohttp.ClientSession, r: aiohttp.ClientResponse):
             try:
-                await request.close(code=status.WS_1014_BAD_GATEWAY, reason=_('Connection Error'))
-            except Exception:
-                pass
-            return None
+                async for chunk in content:
+                    yield chunk
+            finally:
+                # Give the connection back to the pool (or drop it if the body was not fully read)
+                r.release()
+                await s.close()
 
-        async def stream_response(s: aiohttp.ClientSession, r: aiohttp.ClientResponse):
-            async for chunk in r.content.iter_any():
-                yield chunk
+        response = StreamingResponse(stream_response(session, res), status_code=res.status)
+        return await self.process_response(request, url, request_data, db, response, res.headers.items(), session,
+                                           via_header)
+
+    async def build_cached_response(self, request: Request, url: str, request_data: ProxyRequestData, db: DBSession,
+                                    lookup: ProxyCacheLookup, via_header: str,
+                                    session: Optional[aiohttp.ClientSession] = None) -> Response:
+        entry = lookup.entry
+        if lookup.is_not_modified():
+            response = Response(status_code=304)
+            headers = [(name, value) for name, value in entry.headers if name.lower() in NOT_MODIFIED_HEADERS]
+        else:
+            response = Response(content=entry.body, status_code=entry.status)
+            headers = entry.headers
 
-            await s.close()
+        response.headers['Age'] = str(entry.age)
+        return await self.process_response(request, url, request_data, db, response, headers, session, via_header)
 
-        response = StreamingResponse(stream_response(session, res), status_code=res.status)
+    async def process_response(self, request: Request, url: str, request_data: ProxyRequestData, db: DBSession,
+                               response: Response, headers, session: Optional[aiohttp.ClientSession],
+                               via_header: str) -> Response:
         # Split URL into protocol, domain and path
         parsed_url = urlparse(url)
         protocol = parsed_url.scheme
         domain = parsed_url.netloc
         path = parsed_url.path
 
-        for header in res.headers:
+        for header, value in headers:
             header_lower = header.lower()
             if header_lower == 'set-cookie':
+                if session is None:
+                    continue
+
                 for cookie in session.cookie_jar:
                     response.set_cookie(
                         key=cookie.key,
@@ -390,9 +325,9 @@ class Proxy:
                         expires=cookie['expires']
                     )
             elif header_lower == 'via':
-                via_header = via_header + ', ' + res.headers[header]
+                via_header = via_header + ', ' + value
             elif is_valid_response_header(header_lower):
-                response.headers[header] = res.headers[header]
+                response.headers[header] = value
 
         # Pass proxy processors to the response
         for processor in get_response_proxy_processors():
@@ -405,16 +340,103 @@ class Proxy:
 
         return response
 
+    async def do_ws_request(self, request: WebSocket, request_data: ProxyRequestData, db: DBSession) -> None:
+        # WebSocket connections are long-lived and cannot be reused, so they don't take slots from the pool
+        session = aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True))
+        try:
+            # Obtain subprotocols from the request
+            subprotocols = request.headers.get('Sec-WebSocket-Protocol')
+            if subprotocols:
+                subprotocols = [subprotocol.strip() for subprotocol in subprotocols.split(',')]
+
+            logger.info("Connecting to %s" % request_data.url)
+            async with session.ws_connect(
+                url=request_data.url,
+                headers=request_data.headers,
+                timeout=60,
+                protocols=subprotocols if subprotocols else (),
+                ssl=getattr(settings, 'WIRECLOUD_HTTPS_VERIFY', True),
+                max_msg_size=getattr(settings, 'PROXY_WS_MAX_MSG_SIZE', 4 * 1024 * 1024),
+                heartbeat=getattr(settings, 'PROXY_WS_HEARTBEAT', 30) or None,
+            ) as ws:
+                logger.info("Connected to %s" % request_data.url)
+
+                # Convert the dict to a list of tuples
+                headers_dict = {}
+                for key, value in ws._response.headers.items():
+                    headers_dict[key.lower()] = value
+
+                if 'date' in headers_dict:
+                    del headers_dict['date']
+
+                if 'sec-websocket-accept' in headers_dict:
+                    if 'sec-websocket-key' in request.headers:
+                        headers_dict['sec-websocket-accept'] = generate_ws_accept_header_from_key(request.headers['sec-websocket-key'])
+                    else:
+                        del headers_dict['sec-websocket-accept']
+                elif 'sec-websocket-key' in request.headers:
+                        headers_dict['sec-websocket-accept'] = generate_ws_accept_header_from_key(request.headers['sec-websocket-key'])
+
+                for processor in get_response_proxy_processors():
+                    if inspect.iscoroutinefunction(processor.process_response):
+                        headers_dict = await processor.process_response(db, request_data, headers_dict)
+                    else:
+                        headers_dict = processor.process_response(db, request_data, headers_dict)
+
+                headers = [(key.encode(), value.encode()) for key, value in headers_dict.items()]
+
+                accept_success = True
+                try:
+                    await request.accept(subprotocol=ws.protocol, headers=headers)
+                except Exception:
+                    await ws.close(code=status.WS_1014_BAD_GATEWAY, message='Gateway Error'.encode())
+                    accept_success = False
+
+                if accept_success:
+                    relay = WebSocketRelay(request, ws, queue_size=getattr(settings, 'PROXY_WS_QUEUE_SIZE', 16),
+                                           idle_timeout=getattr(settings, 'PROXY_WS_IDLE_TIMEOUT', 0))
+                    await relay.run()
+                    logger.info("Disconnected from %s (%s)" % (request_data.url, relay.stats))
+        except aiohttp.ServerTimeoutError:
+            await session.close()
+            raise WebSocketException(code=status.WS_1014_BAD_GATEWAY, reason=_('Gateway Timeout'))
+        except aiohttp.ClientSSLError:
+            await session.close()
+            raise WebSocketException(code=status.WS_1014_BAD_GATEWAY, reason=_('SSL error'))
+        except aiohttp.ClientError:
+            await session.close()
+            raise WebSocketException(code=status.WS_1014_BAD_GATEWAY, reason=_('Connection Error'))
+
+        await session.close()
+        try:
+            await request.close(code=status.WS_1014_BAD_GATEWAY, reason=_('Connection Error'))
+        except Exception:
+            pass
+
 
 WIRECLOUD_PROXY = Proxy()
 
 
 async def proxy_request(request: Request,
-                        db: DBDep,
+                        db: DBReadDep,
                         user: UserDepNoCSRF,
                         protocol: str = Path(description=docs.proxy_request_protocol_description, pattern='http|https'),
                         domain: str = Path(description=docs.proxy_request_domain_description, pattern='[A-Za-z0-9-.]+'),
                         path: str = Path(description=docs.proxy_request_path_description)) -> Response:
+    return await _proxy_request(request, db, user, protocol, domain, path)
+
+
+async def proxy_write_request(request: Request,
+                              db: DBDep,
+                              user: UserDepNoCSRF,
+                              protocol: str = Path(description=docs.proxy_request_protocol_description, pattern='http|https'),
+                              domain: str = Path(description=docs.proxy_request_domain_description, pattern='[A-Za-z0-9-.]+'),
+                              path: str = Path(description=docs.proxy_request_path_description)) -> Response:
+    return await _proxy_request(request, db, user, protocol, domain, path)
+
+
+async def _proxy_request(request: Request, db: DBSession, user: Optional[UserAll], protocol: str, domain: str,
+                         path: str) -> Response:
     request_method = request.method.upper()
     if protocol not in ('http', 'https'):
         return build_error_response(request, 422, _("Invalid protocol: %s") % protocol)
@@ -453,7 +475,7 @@ async def proxy_request(request: Request,
 
 
 async def proxy_ws_request(ws: WebSocket,
-                           db: DBDep,
+                           db: DBReadDep,
                            user: UserDepNoCSRF,
                            protocol: str = Path(description=docs.proxy_request_protocol_description, pattern='ws|wss'),
                            domain: str = Path(description=docs.proxy_request_domain_description, pattern='[A-Za-z0-9-.]+'),
@@ -494,8 +516,13 @@ async def proxy_ws_request(ws: WebSocket,
         raise WebSocketException(code=status.WS_1011_INTERNAL_ERROR, reason=msg)
 
 
+# Only the safe methods are served using the read session, the requests modifying the target resources use a regular
+# session, so any data stored by the platform while processing them (e.g. refreshed tokens) is written transactionally
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
 for method in ['GET', 'POST', 'PUT', 'DELETE', 'PATCH', 'OPTIONS', 'HEAD']:
-    router.add_api_route('/{protocol}/{domain}/{path:path}', proxy_request,
+    router.add_api_route('/{protocol}/{domain}/{path:path}',
+                     proxy_request if method in SAFE_METHODS else proxy_write_request,
                      response_class=Response,
                      summary=docs.proxy_request_summary,
                      description=docs.proxy_request_description,
@@ -16,8 +16,14 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
 
+from collections.abc import AsyncGenerator, AsyncIterable
+from typing import Union, TYPE_CHECKING
+
 from wirecloud.commons.utils.http import build_error_response
 
+if TYPE_CHECKING:
+    from wirecloud.proxy.schemas import ProxyRequestData
+
 # Remove hop-by-hop headers (http://www.w3.org/Protocols/rfc2616/rfc2616-sec13.html#sec13.5.1)
 BLACKLISTED_HEADERS = {
     'connection': 1, 'keep-alive': 1, 'proxy-authenticate': 1,
@@ -36,4 +42,76 @@ class ValidationError(Exception):
 
 
 def is_valid_response_header(header: str) -> bool:
-    return header not in BLACKLISTED_HEADERS
\ No newline at end of file
+    return header not in BLACKLISTED_HEADERS
+
+
+async def iter_body(data: Union[AsyncIterable[bytes], bytes]) -> AsyncGenerator[bytes, None]:
+    if isinstance(data, (bytes, bytearray)):
+        if data:
+            yield bytes(data)
+        return
+
+    async for chunk in data:
+        if chunk:
+            yield chunk
+
+
+async def replace_body_stream(data: Union[AsyncIterable[bytes], bytes], pattern: bytes,
+                              replacement: bytes) -> AsyncGenerator[bytes, None]:
+    """
+    Replaces every occurrence of pattern in a streamed body, giving the same result as bytes.replace on the whole
+    body. Only the last len(pattern) - 1 bytes of each chunk are held back, as they may be the start of an occurrence
+    split across chunks.
+    """
+
+    keep = len(pattern) - 1
+    pending = b''
+
+    async for chunk in iter_body(data):
+        buffer = pending + chunk if pending else chunk
+        # Occurrences starting before the boundary end inside the buffer
+        boundary = len(buffer) - keep
+        parts = []
+        start = 0
+        index = buffer.find(pattern)
+        while index != -1:
+            parts.append(buffer[start:index])
+            parts.append(replacement)
+            start = index + len(pattern)
+            index = buffer.find(pattern, start)
+
+        end = max(start, boundary)
+        parts.append(buffer[start:end])
+        pending = buffer[end:]
+
+        output = b''.join(parts)
+        if output:
+            yield output
+
+    if pending:
+        yield pending
+
+
+def _del_header(headers: dict[str, str], name: str) -> None:
+    for header in [header for header in headers if header.lower() == name]:
+        del headers[header]
+
+
+def add_body_replacement(request: 'ProxyRequestData', pattern: bytes, replacement: bytes) -> None:
+    """
+    Adds a pattern substitution stage to the body of a proxied request. Streamed bodies are not read: the stage is
+    applied while the body is relayed upstream, using chunked transfer encoding if the length of the body changes.
+    """
+
+    if len(pattern) == 0:
+        return
+
+    if isinstance(request.data, (bytes, bytearray)):
+        request.data = bytes(request.data).replace(pattern, replacement)
+        _del_header(request.headers, 'content-length')
+        request.headers['content-length'] = str(len(request.data))
+        return
+
+    request.data = replace_body_stream(request.data, pattern, replacement)
+    if len(pattern) != len(replacement):
+        _del_header(request.headers, 'content-length')
@@ -87,6 +87,26 @@ def _validate_and_set_defaults():
     if not isinstance(settings.DATABASE['USE_TRANSACTIONS'], bool):
         raise ValueError("DATABASE.USE_TRANSACTIONS must be a boolean")
 
+    if 'SYNC_INDEXES' not in settings.DATABASE:
+        settings.DATABASE['SYNC_INDEXES'] = True
+
+    if not isinstance(settings.DATABASE['SYNC_INDEXES'], bool):
+        raise ValueError("DATABASE.SYNC_INDEXES must be a boolean")
+
+    if 'READ_PREFERENCE' not in settings.DATABASE:
+        settings.DATABASE['READ_PREFERENCE'] = 'primary'
+
+    valid_read_preferences = ['primary', 'primaryPreferred', 'secondary', 'secondaryPreferred', 'nearest']
+    if settings.DATABASE['READ_PREFERENCE'] not in valid_read_preferences:
+        raise ValueError(f"DATABASE.READ_PREFERENCE must be one of: {', '.join(valid_read_preferences)}")
+
+    if 'READ_CONCERN' not in settings.DATABASE:
+        settings.DATABASE['READ_CONCERN'] = None
+
+    valid_read_concerns = ['local', 'available', 'majority', 'linearizable', 'snapshot']
+    if settings.DATABASE['READ_CONCERN'] is not None and settings.DATABASE['READ_CONCERN'] not in valid_read_concerns:
+        raise ValueError(f"DATABASE.READ_CONCERN must be None or one of: {', '.join(valid_read_concerns)}")
+
     # Validate DRIVER
     valid_drivers = ['mongodb', 'postgresql', 'mysql']
     if settings.DATABASE['DRIVER'] not in valid_drivers:
@@ -16,22 +16,40 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
 
-import inspect
 import gettext as gt
 import os
+import sys
 import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
 from gettext import NullTranslations
-from typing import Optional, Callable
+from typing import Optional, Callable, Iterator
 from fastapi import Request, WebSocket
 
 from wirecloud import settings
+from wirecloud.commons.utils.structures import LRUCache
 
 
 translations = {}
 
+# Language of the request being processed. Set by the locale middlewares and propagated to the tasks and worker
+# threads started while handling it
+_request_language: ContextVar[Optional[str]] = ContextVar('wirecloud_request_language', default=None)
+
+# Calling module name -> plugin providing its translations
+_module_plugins: dict[str, str] = {}
+
+TRANSLATION_CACHE_SIZE = 4096
+_translation_cache = LRUCache(TRANSLATION_CACHE_SIZE)
+
 logger = logging.getLogger(__name__)
 
 
+def clear_translation_caches() -> None:
+    _module_plugins.clear()
+    _translation_cache.clear()
+
+
 def generate_translations() -> None:
     for plugin_name in settings.INSTALLED_APPS:
         src_path = os.path.dirname(os.path.dirname(__file__))
@@ -45,21 +63,61 @@ def generate_translations() -> None:
             except FileNotFoundError:
                 pass
 
+    clear_translation_caches()
 
-def find_request_language() -> Optional[str]:
-    # We find a call in the stack that has a Request object in its arguments, and return the language from it
-    stack = inspect.stack()
-    for frame_info in stack:
-        frame = frame_info.frame
 
+@contextmanager
+def override_language(lang: Optional[str]) -> Iterator[None]:
+    token = _request_language.set(lang)
+    try:
+        yield
+    finally:
+        _request_language.reset(token)
+
+
+def find_request_language() -> Optional[str]:
+    lang = _request_language.get()
+    if lang is not None:
+        return lang
+
+    # Code not running behind the locale middlewares: find a call in the stack that has a Request object in its
+    # arguments, and return the language from it
+    frame = sys._getframe(1)
+    while frame is not None:
         for value in frame.f_locals.values():
             if isinstance(value, Request) or isinstance(value, WebSocket):
                 return value.state.lang
+        frame = frame.f_back
 
     return None
 
 
-def gettext(text: str, lang: Optional[str] = None, translation: Optional[NullTranslations] = None) -> str:
+def _find_plugin(module_name: Optional[str]) -> str:
+    plugin = _module_plugins.get(module_name)
+    if plugin is not None:
+        return plugin
+
+    # Find the plugin that requested the translation
+    for plugin_name in settings.INSTALLED_APPS:
+        if module_name.startswith(f"{plugin_name}"):
+            plugin = plugin_name
+            break
+
+    if plugin is None:
+        raise ValueError("Was not able to find the plugin name for gettext. Was this function called from a plugin?")
+
+    # Get the locale directory for the plugin
+    src_path = os.path.dirname(os.path.dirname(__file__))
+    locale_path = os.path.join(src_path, plugin.replace(".", "/"), "locale")
+
+    if not os.path.exists(locale_path) or not os.path.isdir(locale_path):
+        raise ValueError(f"Could not find the locale directory for plugin {plugin}, but a translation was requested")
+
+    _module_plugins[module_name] = plugin
+    return plugin
+
+
+def _gettext(text: str, lang: Optional[str], translation: Optional[NullTranslations], module_name: Optional[str]) -> str:
     lang = lang or find_request_language()
     if lang is None and translation is None:
         raise ValueError("Was not able to find the request language for gettext. Was this function called from a request context?")
@@ -68,39 +126,39 @@ def gettext(text: str, lang: Optional[str] = None, translation: Optional[NullTra
     if lang == "en" or lang == "en-GB":
         return text
 
-    if translation is None:
-        # Find the plugin that requested the translation
-        plugin: Optional[str] = None
-        module_name = inspect.stack()[1].frame.f_globals.get('__name__')
-        for plugin_name in settings.INSTALLED_APPS:
-            if module_name.startswith(f"{plugin_name}"):
-                plugin = plugin_name
-                break
-
-        if plugin is None:
-            raise ValueError("Was not able to find the plugin name for gettext. Was this function called from a plugin?")
-
-        # Get the locale directory for the plugin
-        src_path = os.path.dirname(os.path.dirname(__file__))
-        locale_path = os.path.join(src_path, plugin.replace(".", "/"), "locale")
+    if translation is not None:
+        return translation.gettext(text)
 
-        if not os.path.exists(locale_path) or not os.path.isdir(locale_path):
-            raise ValueError(f"Could not find the locale directory for plugin {plugin}, but a translation was requested")
+    plugin = _find_plugin(module_name)
 
-        # Load the translation
-        translation = translations.get((plugin, lang)) if translations else None
+    key = (plugin, lang, text)
+    translated = _translation_cache.get(key)
+    if translated is not None:
+        return translated
 
-        if translation is None:
-            logger.warning(f"Translation for language {lang} in module {plugin} not found, but was requested")
-            return text
+    # Load the translation
+    translation = translations.get((plugin, lang)) if translations else None
+
+    if translation is None:
+        logger.warning(f"Translation for language {lang} in module {plugin} not found, but was requested")
+        return text
+
+    translated = translation.gettext(text)
+    _translation_cache.set(key, translated)
+    return translated
 
-    return translation.gettext(text)
+
+def gettext(text: str, lang: Optional[str] = None, translation: Optional[NullTranslations] = None) -> str:
+    return _gettext(text, lang, translation, sys._getframe(1).f_globals.get('__name__'))
 
 
 def gettext_lazy(text: str) -> Callable[[], str]:
-    def _gettext(lang: Optional[str] = None, translation: Optional[NullTranslations] = None):
-        return gettext(text, lang, translation)
+    # The translation is looked up in the plugin of the module creating the lazy string
+    module_name = sys._getframe(1).f_globals.get('__name__')
+
+    def _lazy_gettext(lang: Optional[str] = None, translation: Optional[NullTranslations] = None):
+        return _gettext(text, lang, translation, module_name)
 
-    return _gettext
+    return _lazy_gettext
 
 generate_translations()
@@ -181,6 +181,61 @@ async def test_get_resource_by_user_group_id_and_xhtml(db_session):
     assert with_xhtml is not None
 
 
+async def test_resource_queries_do_not_load_widget_code(db_session):
+    rid = await _insert_resource(db_session, short_name="projected")
+    xhtml = XHTML(uri="u", code="<html>code</html>", code_timestamp=1, url="x", content_type="text/html",
+                  use_platform_style=True, cacheable=True)
+    await crud.save_catalogue_resource_xhtml(db_session, Id(str(rid)), xhtml)
+
+    doc = await db_session.client.catalogue_resources.find_one({"_id": rid}, crud.RESOURCE_PROJECTION)
+    assert "xhtml" not in doc
+
+    with_xhtml = await crud.get_catalogue_resource_with_xhtml(db_session, "acme", "projected", "1.0.0")
+    assert with_xhtml.xhtml.uri == "u"
+    assert with_xhtml.xhtml.code == ""
+    assert with_xhtml.xhtml.code_timestamp == 1
+
+    assert await crud.get_catalogue_resource_xhtml_code(db_session, Id(str(rid))) == "<html>code</html>"
+    assert await crud.get_catalogue_resource_xhtml_code(db_session, Id(str(ObjectId()))) == ""
+
+
+async def test_list_queries_use_projection(monkeypatch, db_session):
+    projections = []
+    collection_class = type(db_session.client.catalogue_resources)
+    original_find = collection_class.find
+
+    def _find(self, *args, **kwargs):
+        projections.append(args[1] if len(args) > 1 else None)
+        return original_find(self, *args, **kwargs)
+
+    monkeypatch.setattr(collection_class, "find", _find)
+
+    await crud.get_all_catalogue_resources(db_session)
+    await crud.get_catalogue_resources_with_regex(db_session, "acme", "widget", "1.0.0")
+    assert projections == [crud.RESOURCE_PROJECTION] * 2
+
+    # List views do not load the users and groups of the resources
+    projections.clear()
+    await crud.get_catalogue_resource_versions_for_user(db_session, "acme", "widget")
+    await crud.get_all_catalogue_resource_versions(db_session, "acme", "widget")
+    await crud.get_user_catalogue_resources(db_session, _user(), "acme", "widget")
+    assert projections == [crud.RESOURCE_LIST_PROJECTION] * 3
+
+
+async def test_list_queries_do_not_load_users_and_groups(db_session):
+    uid = ObjectId()
+    await _insert_resource(db_session, short_name="listed", public=False, users=[uid], groups=[ObjectId()])
+
+    (resource,) = await crud.get_user_catalogue_resources(db_session, _user(uid), "acme", "listed")
+    assert (resource.users, resource.groups) == ([], [])
+    assert resource.description.name == "listed"
+
+    # The whole document is still available for the entries
+    resource = await crud.get_catalogue_resource(db_session, "acme", "listed", "1.0.0")
+    assert resource.users == [str(uid)]
+    assert len(resource.groups) == 1
+
+
 async def test_get_user_and_id_queries_return_none_when_missing(db_session):
     user = _user()
     assert await crud.get_user_catalogue_resource(db_session, user, "acme", "missing", "1.0.0") is None
@@ -188,6 +243,20 @@ async def test_get_user_and_id_queries_return_none_when_missing(db_session):
     assert await crud.get_catalogue_resource_by_id(db_session, Id(str(ObjectId()))) is None
 
 
+async def test_batch_resource_lookups(db_session):
+    rid1 = await _insert_resource(db_session, vendor="acme", short_name="batch1", version="1.0.0")
+    rid2 = await _insert_resource(db_session, vendor="acme", short_name="batch2", version="1.0.0")
+
+    by_ids = await crud.get_catalogue_resources_by_ids(db_session, [Id(str(rid1)), Id(str(rid2)), Id(str(ObjectId()))])
+    assert {resource.short_name for resource in by_ids} == {"batch1", "batch2"}
+
+    by_uris = await crud.get_catalogue_resources_by_uris(db_session, [("acme", "batch1", "1.0.0"), ("acme", "missing", "1.0.0")])
+    assert [resource.id for resource in by_uris] == [Id(str(rid1))]
+
+    assert await crud.get_catalogue_resources_by_ids(db_session, []) == []
+    assert await crud.get_catalogue_resources_by_uris(db_session, []) == []
+
+
 async def test_get_versions_and_visibility_queries(db_session):
     uid = ObjectId()
     gid = ObjectId()
@@ -231,11 +300,15 @@ async def test_update_delete_and_install_uninstall_paths(db_session, monkeypatch
 
     monkeypatch.setattr(crud, "commit", _commit)
 
+    invalidated = []
+    monkeypatch.setattr(crud, "clear_processed_info_cache", lambda resource_ids=None: invalidated.append([str(rid) for rid in resource_ids]))
+
     await crud.update_catalogue_resource_description(
         db_session, Id(str(rid)), MACDWidget.model_validate(_macd_widget_dict("updated"))
     )
     updated = await db_session.client.catalogue_resources.find_one({"_id": rid})
     assert "updated" in updated["description"]
+    assert invalidated == [[str(rid)]]
 
     res_obj = SimpleNamespace(id=Id(str(rid)))
     await crud.mark_resources_as_not_available(db_session, [res_obj])
@@ -271,6 +344,7 @@ async def test_update_delete_and_install_uninstall_paths(db_session, monkeypatch
     await db_session.client.catalogue_resources.update_one({"_id": rid}, {"$set": {"users": [], "groups": [], "public": False}})
     deleted_unused = await crud.delete_resource_if_not_used(db_session, res_obj)
     assert deleted_unused is True
+    assert invalidated[-1] == [str(rid)]
 
     rid2 = await _insert_resource(db_session, public=True)
     not_deleted = await crud.delete_resource_if_not_used(db_session, SimpleNamespace(id=Id(str(rid2))))
@@ -283,5 +357,7 @@ async def test_update_delete_and_install_uninstall_paths(db_session, monkeypatch
 
     await crud.delete_catalogue_resources(db_session, [Id(str(rid3)), Id(str(rid4))])
     assert await db_session.client.catalogue_resources.count_documents({"_id": {"$in": [rid3, rid4]}}) == 0
+    assert invalidated[-1] == [str(rid3), str(rid4)]
+    assert len(invalidated) == 3
 
     assert commit_calls["n"] >= 4
@@ -46,6 +46,7 @@ async def test_catalogue_plugin_validator_defaults_and_type(monkeypatch, tmp_pat
     settings_obj = SimpleNamespace(BASEDIR=str(tmp_path))
     validate(settings_obj, False)
     assert settings_obj.CATALOGUE_MEDIA_ROOT.endswith("catalogue/media")
+    assert settings_obj.CATALOGUE_PROCESSED_INFO_CACHE_SIZE == 1024
 
     monkeypatch.setattr(plugins.os.path, "exists", lambda _path: True)
     validate(settings_obj, False)
@@ -54,6 +55,15 @@ async def test_catalogue_plugin_validator_defaults_and_type(monkeypatch, tmp_pat
     with pytest.raises(ValueError, match="CATALOGUE_MEDIA_ROOT must be a string"):
         validate(settings_obj2, False)
 
+    settings_obj3 = SimpleNamespace(BASEDIR=str(tmp_path), CATALOGUE_PROCESSED_INFO_CACHE_SIZE=0)
+    with pytest.raises(ValueError, match="CATALOGUE_PROCESSED_INFO_CACHE_SIZE must be a positive integer"):
+        validate(settings_obj3, False)
+
+    assert settings_obj.WGT_PACKAGING_CONCURRENCY == 2
+    settings_obj4 = SimpleNamespace(BASEDIR=str(tmp_path), WGT_PACKAGING_CONCURRENCY=0)
+    with pytest.raises(ValueError, match="WGT_PACKAGING_CONCURRENCY must be a positive integer"):
+        validate(settings_obj4, False)
+
 
 async def test_catalogue_plugin_validator_makedirs_error(monkeypatch, tmp_path):
     plugin = plugins.WirecloudCataloguePlugin(None)
@@ -36,12 +36,13 @@ def _patch_gettext(monkeypatch):
 
 @pytest.fixture()
 async def app_http_client(db_session):
-    from wirecloud.database import get_session
+    from wirecloud.database import get_session, get_read_session
 
     async def _override_get_session():
         yield db_session
 
     app.dependency_overrides[get_session] = _override_get_session
+    app.dependency_overrides[get_read_session] = _override_get_session
     try:
         transport = ASGITransport(app=app, raise_app_exceptions=False)
         async with AsyncClient(transport=transport, base_url="http://testserver") as client:
@@ -471,12 +472,16 @@ async def test_delete_permission_denied_and_notfound_paths(app_http_client, monk
         app.dependency_overrides.pop(get_user_csrf, None)
 
 
-async def test_changelog_userguide_and_media_additional_content_branches(app_http_client, monkeypatch):
+async def test_changelog_userguide_and_media_additional_content_branches(app_http_client, monkeypatch, tmp_path):
+    catalogue_utils = routes.catalogue_utils
     monkeypatch.setattr(routes, "markdown", SimpleNamespace(markdown=lambda *_a, **_k: "<p>doc</p>"))
+    monkeypatch.setattr(catalogue_utils, "markdown", SimpleNamespace(markdown=lambda *_a, **_k: "<p>doc</p>"))
     monkeypatch.setattr(routes, "clean_html", lambda html, base_url=None: f"clean:{base_url}:{html}")
-    monkeypatch.setattr(routes.catalogue_utils.wgt_deployer, "get_base_dir", lambda *_a: "/tmp")
+    monkeypatch.setattr(catalogue_utils, "clean_html", lambda html, base_url=None: f"clean:{base_url}:{html}")
+    monkeypatch.setattr(catalogue_utils.wgt_deployer, "get_base_dir", lambda *_a: str(tmp_path))
 
     class _Resource:
+        id = "507f1f77bcf86cd799439011"
         vendor = "acme"
         short_name = "widget"
         version = "1.0.0"
@@ -506,21 +511,28 @@ async def test_changelog_userguide_and_media_additional_content_branches(app_htt
             raise IOError("no localized")
         return b"# Title"
 
-    monkeypatch.setattr(routes, "download_local_file", _download)
-    monkeypatch.setattr(routes, "filter_changelog", lambda html, _v: html)
+    monkeypatch.setattr(catalogue_utils, "download_local_file", _download)
+    monkeypatch.setattr(catalogue_utils, "filter_changelog", lambda html, _v: html)
 
     changelog_ok = await app_http_client.get("/catalogue/resource/acme/widget/1.0.0/changelog")
     assert changelog_ok.status_code == 200
+    etag = changelog_ok.headers["ETag"]
+
+    # Rendered documents are served from the cache and validated using their ETag
+    not_modified = await app_http_client.get("/catalogue/resource/acme/widget/1.0.0/changelog",
+                                             headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
 
     changelog_from_ok = await app_http_client.get("/catalogue/resource/acme/widget/1.0.0/changelog", params={"from": "0.9.0"})
     assert changelog_from_ok.status_code == 200
 
-    monkeypatch.setattr(routes, "filter_changelog", lambda html, _v: "")
-    changelog_empty = await app_http_client.get("/catalogue/resource/acme/widget/1.0.0/changelog", params={"from": "0.9.0"})
+    monkeypatch.setattr(catalogue_utils, "filter_changelog", lambda html, _v: "")
+    changelog_empty = await app_http_client.get("/catalogue/resource/acme/widget/1.0.0/changelog", params={"from": "0.8.0"})
     assert changelog_empty.status_code == 404
 
-    monkeypatch.setattr(routes, "download_local_file", lambda _path: (_ for _ in ()).throw(IOError("missing")))
-    current["resource"] = _Resource(changelog="docs/changelog.md")
+    monkeypatch.setattr(catalogue_utils, "download_local_file", lambda _path: (_ for _ in ()).throw(IOError("missing")))
+    current["resource"] = _Resource(changelog="docs/missing-changelog.md")
     changelog_missing_file = await app_http_client.get("/catalogue/resource/acme/widget/1.0.0/changelog")
     assert changelog_missing_file.status_code == 200
 
@@ -532,7 +544,7 @@ async def test_changelog_userguide_and_media_additional_content_branches(app_htt
         raise IOError("missing")
 
     current["resource"] = _Resource(doc="docs/user.md")
-    monkeypatch.setattr(routes, "download_local_file", _download_fail)
+    monkeypatch.setattr(catalogue_utils, "download_local_file", _download_fail)
     userguide_fallback = await app_http_client.get("/catalogue/resource/acme/widget/1.0.0/userguide")
     assert userguide_fallback.status_code == 200
 
@@ -94,6 +94,8 @@ async def test_template_url_template_processed_info_and_global_function(monkeypa
     assert r.get_template(SimpleNamespace()) is not None
     assert r.get_processed_info(SimpleNamespace()) == "processed"
 
+    schemas.clear_processed_info_cache()
+
     abs_url = schemas.get_template_url("acme", "widget", "1.0.0", "http://external/x")
     rel_url = schemas.get_template_url("acme", "widget", "1.0.0", "file.js", request=SimpleNamespace())
     assert abs_url == "http://external/x"
@@ -146,3 +148,73 @@ async def test_availability_public_resource_short_circuit():
 async def test_availability_false_when_not_public_and_no_membership():
     r = _resource(public=False, users=["507f1f77bcf86cd799439099"], groups=["507f1f77bcf86cd799439098"])
     assert r.is_available_for(_user(uid="507f1f77bcf86cd799439012", groups=[Id("507f1f77bcf86cd799439097")])) is False
+
+
+async def test_processed_info_is_cached_and_copied_on_read(monkeypatch):
+    schemas.clear_processed_info_cache()
+    monkeypatch.setattr(schemas, "get_absolute_reverse_url", lambda *_args, **kwargs: "http://testserver/catalogue/media/acme/widget/1.0.0/widget.wgt")
+
+    parsed = []
+    template_parser = schemas.TemplateParser
+
+    def _parser(*args, **kwargs):
+        parsed.append(kwargs.get("base"))
+        return template_parser(*args, **kwargs)
+
+    monkeypatch.setattr(schemas, "TemplateParser", _parser)
+
+    r = _resource()
+    info = r.get_processed_info(SimpleNamespace())
+    assert info.contents.src == "http://testserver/catalogue/media/acme/widget/1.0.0/index.html"
+    info.title = "modified"
+
+    info2 = r.get_processed_info(SimpleNamespace())
+    assert info2.title == "Title"
+    assert info2 is not info
+    assert len(parsed) == 1
+
+    # Different processing options are cached separately
+    info3 = r.get_processed_info(process_urls=False)
+    assert info3.contents.src == "index.html"
+    r.get_processed_info(process_variables=True)
+    assert parsed == ["http://testserver/catalogue/media/acme/widget/1.0.0/widget.wgt", None,
+                      "http://testserver/catalogue/media/acme/widget/1.0.0/widget.wgt"]
+
+    schemas.clear_processed_info_cache([Id("507f1f77bcf86cd799439012")])
+    r.get_processed_info(SimpleNamespace())
+    assert len(parsed) == 3
+
+    schemas.clear_processed_info_cache([r.id])
+    r.get_processed_info(SimpleNamespace())
+    assert len(parsed) == 4
+
+    # Resources without an id are never cached
+    base = schemas.CatalogueResourceBase(**r.model_dump(exclude={"id", "users", "groups"}))
+    base.get_processed_info(SimpleNamespace())
+    base.get_processed_info(SimpleNamespace())
+    assert len(parsed) == 6
+
+    schemas.clear_processed_info_cache()
+    assert len(schemas._get_processed_info_cache()) == 0
+
+
+def test_variable_index_is_built_once_per_resource():
+    description = _macd_widget_dict()
+    description["preferences"] = [{"name": "pref", "type": "text", "default": "d", "secure": True}]
+    description["properties"] = [{"name": "prop", "type": "number", "default": "1", "multiuser": True}]
+    r = CatalogueResource.model_validate({**_resource().model_dump(by_alias=True), "description": description})
+
+    index = schemas.get_variable_index(r)
+    assert [(vardef.name, vardef.kind) for vardef in index] == [("pref", "preference"), ("prop", "property")]
+    assert len(index) == 2
+    assert index.preferences["pref"].secure is True
+    assert index.preferences["pref"].default == "d"
+    assert index.properties["prop"].multiuser is True
+    assert schemas.get_variable_index(r) is index
+
+    # Indexes are dropped with the processed descriptions of the resource
+    schemas.clear_processed_info_cache([r.id])
+    assert schemas.get_variable_index(r) is not index
+
+    empty = schemas.build_variable_index(SimpleNamespace())
+    assert len(empty) == 0
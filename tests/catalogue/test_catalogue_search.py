@@ -137,27 +137,14 @@ async def test_prepare_rebuild_add_delete_index(monkeypatch):
     assert prepared.vendor_name == "acme/widget"
     assert "a" in prepared.input_friendcodes
 
-    class _Indices:
-        def __init__(self):
-            self.exists_called = False
-            self.deleted = False
-            self.created = False
-
-        async def exists(self, index):
-            self.exists_called = True
-            return True
-
-        async def delete(self, index):
-            self.deleted = True
-
-        async def create(self, index, body):
-            self.created = True
+    async def _no_aliases(name):
+        return {}
 
     class _ES:
         def __init__(self):
-            self.indices = _Indices()
             self.index_calls = []
             self.delete_calls = []
+            self.indices = SimpleNamespace(get_alias=_no_aliases)
 
         async def index(self, index, id, document):
             self.index_calls.append((index, id, document))
@@ -168,40 +155,33 @@ async def test_prepare_rebuild_add_delete_index(monkeypatch):
     es = _ES()
     monkeypatch.setattr("wirecloud.commons.search.es_client", es)
 
-    async def _all_resources(_db):
-        return [_Resource()]
+    async def _iter_resources(_db, batch_size):
+        assert batch_size == 50
+        yield _Resource()
 
     async def _by_id(_db, _id):
         return _Resource()
 
-    bulk_calls = {}
+    rebuild_calls = {}
 
-    async def _bulk(_es_client, actions):
-        bulk_calls["actions"] = actions
+    async def _rebuild_index(alias, mappings, documents, chunk_size, progress):
+        rebuild_calls["alias"] = alias
+        rebuild_calls["mappings"] = mappings
+        rebuild_calls["documents"] = [document async for document in documents]
+        return len(rebuild_calls["documents"])
 
-    monkeypatch.setattr(search, "get_all_catalogue_resources", _all_resources)
+    monkeypatch.setattr(search, "iter_all_catalogue_resources", _iter_resources)
     monkeypatch.setattr(search, "get_catalogue_resource_by_id", _by_id)
-    monkeypatch.setattr(search, "async_bulk", _bulk)
+    monkeypatch.setattr("wirecloud.commons.search.rebuild_index", _rebuild_index)
 
-    await search.rebuild_resource_index(SimpleNamespace())
-    assert es.indices.exists_called is True
-    assert es.indices.deleted is True
-    assert es.indices.created is True
-    assert len(bulk_calls["actions"]) == 1
+    assert await search.rebuild_resource_index(SimpleNamespace(), chunk_size=50) == 1
+    assert rebuild_calls["alias"] == search.RESOURCES_INDEX
+    assert rebuild_calls["mappings"] is search.RESOURCE_MAPPINGS
+    assert rebuild_calls["documents"][0][0] == "507f1f77bcf86cd799439011"
+    assert rebuild_calls["documents"][0][1]["vendor_name"] == "acme/widget"
 
     await search.add_resource_to_index(SimpleNamespace(), _Resource())
     assert len(es.index_calls) == 1
 
     await search.delete_resource_from_index(_Resource())
     assert len(es.delete_calls) == 1
-
-    class _IndicesNoExists(_Indices):
-        async def exists(self, index):
-            self.exists_called = True
-            return False
-
-    es2 = _ES()
-    es2.indices = _IndicesNoExists()
-    monkeypatch.setattr("wirecloud.commons.search.es_client", es2)
-    await search.rebuild_resource_index(SimpleNamespace())
-    assert es2.indices.deleted is False
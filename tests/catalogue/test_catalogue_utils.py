@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import errno
+import os
 from datetime import datetime, timezone
 from io import BytesIO
 from types import SimpleNamespace
@@ -533,3 +534,69 @@ async def test_update_resource_catalogue_cache_removal_paths(monkeypatch):
     monkeypatch.setattr(utils, "WgtFile", _WgtErrOther)
     with pytest.raises(IOError):
         await utils.update_resource_catalogue_cache(SimpleNamespace())
+
+
+async def test_get_rendered_resource_doc_is_cached_in_memory_and_on_disk(monkeypatch, tmp_path):
+    r = _resource()
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "changelog.md").write_text("## 1.0.0\n\n* First release\n", encoding="utf-8")
+    monkeypatch.setattr(utils.wgt_deployer, "get_base_dir", lambda *_a: str(tmp_path))
+
+    renders = {"n": 0}
+    original_markdown = utils.markdown.markdown
+
+    def _markdown(*args, **kwargs):
+        renders["n"] += 1
+        return original_markdown(*args, **kwargs)
+
+    monkeypatch.setattr(utils.markdown, "markdown", _markdown)
+
+    doc, etag = await utils.get_rendered_resource_doc(r, "changelog", "docs/changelog.md", "http://testserver/docs/")
+    assert "First release" in doc
+    assert etag.startswith('"') and etag.endswith('"')
+    assert os.listdir(tmp_path / utils.RENDERED_DOCS_DIR) != []
+
+    assert await utils.get_rendered_resource_doc(r, "changelog", "docs/changelog.md", "http://testserver/docs/") == (doc, etag)
+    utils.clear_rendered_docs_cache()
+    assert await utils.get_rendered_resource_doc(r, "changelog", "docs/changelog.md", "http://testserver/docs/") == (doc, etag)
+    assert renders["n"] == 1
+
+    assert await utils.get_rendered_resource_doc(r, "userguide", "docs/missing.md", None) is None
+    assert all(name.endswith(".xhtml") for name in os.listdir(tmp_path / utils.RENDERED_DOCS_DIR))
+
+
+async def test_get_rendered_resource_doc_only_persists_the_canonical_rendering(monkeypatch, tmp_path):
+    r = _resource()
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "changelog.md").write_text(
+        "## 1.1.0\n\n* Second release\n\n![logo](logo.png)\n\n## 1.0.0\n\n* First release\n", encoding="utf-8")
+    monkeypatch.setattr(utils.wgt_deployer, "get_base_dir", lambda *_a: str(tmp_path))
+
+    doc, _etag = await utils.get_rendered_resource_doc(r, "changelog", "docs/changelog.md", "http://a.example/docs/",
+                                                       from_version="1.0.0")
+    assert "Second release" in doc and "First release" not in doc
+    assert 'src="http://a.example/docs/logo.png"' in doc
+
+    doc, _etag = await utils.get_rendered_resource_doc(r, "changelog", "docs/changelog.md", "http://b.example/docs/",
+                                                       from_version="1.0.0-dev.1")
+    assert 'src="http://b.example/docs/logo.png"' in doc
+
+    doc, _etag = await utils.get_rendered_resource_doc(r, "changelog", "docs/changelog.md", None)
+    assert "First release" in doc and 'src="logo.png"' in doc
+    assert len(os.listdir(tmp_path / utils.RENDERED_DOCS_DIR)) == 1
+    assert all(name.endswith(".xhtml") for name in os.listdir(tmp_path / utils.RENDERED_DOCS_DIR))
+
+
+def test_check_if_none_match():
+    from starlette.requests import Request
+    from wirecloud.commons.utils.cache import check_if_none_match
+
+    def _request(value=None):
+        headers = [] if value is None else [(b"if-none-match", value.encode("latin-1"))]
+        return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+    assert check_if_none_match(_request(), '"a"') is True
+    assert check_if_none_match(_request('"a"'), '"a"') is False
+    assert check_if_none_match(_request('"b", "a"'), '"a"') is False
+    assert check_if_none_match(_request('"b"'), '"a"') is True
+    assert check_if_none_match(_request("*"), '"a"') is False
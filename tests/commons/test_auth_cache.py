@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2026 Future Internet Consulting and Development Solutions S.L.
+
+# This file is part of Wirecloud.
+
+# Wirecloud is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# Wirecloud is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with Wirecloud.  If not, see <http://www.gnu.org/licenses/>.
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import asyncio
+import sys
+
+import jwt
+from bson import ObjectId
+from starlette.requests import Request
+from unittest.mock import AsyncMock
+
+from wirecloud import settings
+from wirecloud.commons.auth import cache, crud, utils
+from wirecloud.commons.auth.schemas import UserAll, UserCreate
+from wirecloud.database import Id
+
+
+def _user_all(user_id, **kwargs):
+    return UserAll(
+        id=Id(str(user_id)),
+        username=kwargs.get("username", "u"),
+        email="u@example.com",
+        first_name="U",
+        last_name="Ser",
+        is_superuser=False,
+        is_staff=False,
+        is_active=True,
+        date_joined=datetime.now(timezone.utc),
+        last_login=None,
+        idm_data={},
+        groups=[],
+        permissions=[],
+    )
+
+
+def _request(token):
+    req = Request({"type": "http", "http_version": "1.1", "method": "GET", "path": "/", "query_string": b"", "headers": []})
+    req._cookies = {"token": token}
+    return req
+
+
+def _access_token(token_id, sub):
+    now = datetime.now(timezone.utc)
+    return jwt.encode(
+        {
+            "sub": str(sub),
+            "iss": "Wirecloud",
+            "jti": str(token_id),
+            "exp": int((now + timedelta(minutes=10)).timestamp()),
+            "iat": int(now.timestamp()),
+            "csrf_required": False,
+        },
+        settings.JWT_KEY,
+        algorithm="HS256",
+    )
+
+
+def test_principal_cache_entries_stats_and_copies():
+    principal_cache = cache.PrincipalCache(maxsize=2, ttl=60)
+    user_id = ObjectId()
+
+    assert principal_cache.get_token_validity("t1") is None
+    principal_cache.set_token_validity("t1", user_id, True)
+    principal_cache.set_token_validity("t2", ObjectId(), False)
+    assert principal_cache.get_token_validity("t1") is True
+    assert principal_cache.get_token_validity("t2") is False
+
+    principal_cache.invalidate_user_tokens(Id(str(user_id)))
+    assert principal_cache.get_token_validity("t1") is None
+    assert principal_cache.get_token_validity("t2") is False
+    principal_cache.invalidate_tokens(["t2"])
+    assert principal_cache.get_token_validity("t2") is None
+
+    user = _user_all(user_id)
+    principal_cache.set_user(user)
+    cached = principal_cache.get_user(user_id)
+    assert cached == user and cached is not user
+    cached.username = "changed"
+    assert principal_cache.get_user(str(user_id)).username == "u"
+
+    principal_cache.invalidate_users([user_id])
+    assert principal_cache.get_user(user_id) is None
+    principal_cache.set_user(user)
+    principal_cache.invalidate_users()
+    assert principal_cache.get_user(user_id) is None
+
+    stats = principal_cache.stats()
+    assert stats["tokens"] == {"hits": 3, "misses": 3, "size": 0}
+    assert stats["users"] == {"hits": 2, "misses": 2, "size": 0}
+
+    principal_cache.set_user(user)
+    principal_cache.clear()
+    assert len(principal_cache.users) == 0
+
+
+def test_get_principal_cache_uses_settings(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_PRINCIPAL_CACHE_SIZE", 5, raising=False)
+    monkeypatch.setattr(settings, "AUTH_PRINCIPAL_CACHE_TTL", 7, raising=False)
+    cache.clear_principal_cache()
+
+    principal_cache = cache.get_principal_cache()
+    assert cache.get_principal_cache() is principal_cache
+    assert principal_cache.tokens.maxsize == 5
+    assert principal_cache.users.ttl == 7
+
+    cache.clear_principal_cache()
+    assert cache.get_principal_cache() is not principal_cache
+
+
+async def test_token_validity_is_cached_until_invalidated(db_session, monkeypatch):
+    user_id = Id(str(ObjectId()))
+    lookups = {"n": 0}
+    original = utils.is_token_valid
+
+    async def _counting(db, token_id):
+        lookups["n"] += 1
+        return await original(db, token_id)
+
+    monkeypatch.setattr(utils, "is_token_valid", _counting)
+
+    token_id = await crud.create_token(db_session, datetime.now(timezone.utc) + timedelta(minutes=30), user_id, "sid-1")
+    access = _access_token(token_id, user_id)
+
+    assert await utils.get_token_contents(None, _request(access), db_session, csrf=False) is not None
+    assert await utils.get_token_contents(None, _request(access), db_session, csrf=False) is not None
+    assert lookups["n"] == 1
+
+    await crud.invalidate_token(db_session, token_id)
+    assert await utils.get_token_contents(None, _request(access), db_session, csrf=False) is None
+    assert lookups["n"] == 2
+
+    token_id = await crud.create_token(db_session, datetime.now(timezone.utc) + timedelta(minutes=30), user_id, "sid-2")
+    access = _access_token(token_id, user_id)
+    assert await utils.get_token_contents(None, _request(access), db_session, csrf=False) is not None
+    await crud.invalidate_tokens_by_idm_session(db_session, "sid-2")
+    assert await utils.get_token_contents(None, _request(access), db_session, csrf=False) is None
+
+    token_id = await crud.create_token(db_session, datetime.now(timezone.utc) + timedelta(minutes=30), user_id)
+    access = _access_token(token_id, user_id)
+    assert await utils.get_token_contents(None, _request(access), db_session, csrf=False) is not None
+    await crud.invalidate_all_user_tokens(db_session, user_id)
+    assert await utils.get_token_contents(None, _request(access), db_session, csrf=False) is None
+
+    stats = cache.get_principal_cache().stats()["tokens"]
+    assert stats["hits"] == 1
+
+
+async def test_user_is_cached_until_updated(db_session, monkeypatch):
+    monkeypatch.setitem(sys.modules, "wirecloud.commons.search", SimpleNamespace(add_user_to_index=AsyncMock()))
+
+    created = await crud.create_user_db(db_session, UserCreate(
+        username="cached",
+        password="hashed",
+        first_name="Cached",
+        last_name="User",
+        email="cached@example.com",
+        is_superuser=False,
+        is_staff=False,
+        is_active=True,
+        idm_data={},
+    ))
+
+    lookups = {"n": 0}
+    original = utils.get_user_with_all_info
+
+    async def _counting(db, user_id):
+        lookups["n"] += 1
+        return await original(db, user_id)
+
+    monkeypatch.setattr(utils, "get_user_with_all_info", _counting)
+    token = {"sub": str(created.id)}
+
+    first = await utils.get_user(db_session, token, real_user=False)
+    first.first_name = "Mutated"
+    second = await utils.get_user(db_session, token, real_user=False)
+    assert second.first_name == "Cached"
+    assert lookups["n"] == 1
+
+    second.first_name = "Updated"
+    await crud.update_user(db_session, second)
+    assert (await utils.get_user(db_session, token, real_user=False)).first_name == "Updated"
+    assert lookups["n"] == 2
+
+    gid = ObjectId()
+    await db_session.client.groups.insert_one({"_id": gid, "name": "Cachers", "codename": "cachers", "users": [],
+                                               "group_permissions": [{"codename": "CACHE.VIEW"}], "path": [gid]})
+    await crud.add_user_to_groups_by_codename(db_session, created.id, ["cachers"])
+    user = await utils.get_user(db_session, token, real_user=False)
+    assert user.has_perm("CACHE.VIEW")
+    assert lookups["n"] == 3
+
+    await crud.remove_user_from_all_groups(db_session, created.id)
+    assert not (await utils.get_user(db_session, token, real_user=False)).has_perm("CACHE.VIEW")
+    assert lookups["n"] == 4
+
+
+async def test_principal_cache_does_not_store_values_invalidated_while_loading():
+    principal_cache = cache.PrincipalCache(maxsize=4, ttl=60)
+    user_id = ObjectId()
+
+    async def _load_user():
+        principal_cache.invalidate_users([user_id])
+        return _user_all(user_id)
+
+    assert (await principal_cache.load_user(user_id, _load_user)).username == "u"
+    assert principal_cache.get_user(user_id) is None
+
+    async def _load_user_all_invalidated():
+        principal_cache.invalidate_users()
+        return _user_all(user_id)
+
+    await principal_cache.load_user(user_id, _load_user_all_invalidated)
+    assert principal_cache.get_user(user_id) is None
+
+    async def _load_user_ok():
+        return _user_all(user_id)
+
+    await principal_cache.load_user(user_id, _load_user_ok)
+    assert principal_cache.get_user(user_id) is not None
+
+    async def _load_token():
+        principal_cache.invalidate_user_tokens(user_id)
+        return True
+
+    assert await principal_cache.load_token_validity("t1", user_id, _load_token) is True
+    assert principal_cache.get_token_validity("t1") is None
+
+    async def _load_token_ok():
+        return True
+
+    await principal_cache.load_token_validity("t1", user_id, _load_token_ok)
+    assert principal_cache.get_token_validity("t1") is True
+    assert principal_cache._token_loads._loads == {} and principal_cache._user_loads._loads == {}
+
+
+def test_principal_cache_token_entries_do_not_outlive_the_token(monkeypatch):
+    principal_cache = cache.PrincipalCache(maxsize=4, ttl=60)
+    user_id = ObjectId()
+    now = 1000.0
+    monkeypatch.setattr(cache.time, "time", lambda: now)
+
+    principal_cache.set_token_validity("expired", user_id, True, expires_at=now)
+    assert principal_cache.get_token_validity("expired") is None
+
+    principal_cache.set_token_validity("t1", user_id, True, expires_at=now + 5)
+    expires, _value = principal_cache.tokens._store["t1"]
+    principal_cache.set_token_validity("t2", user_id, True, expires_at=now + 500)
+    expires_default, _value = principal_cache.tokens._store["t2"]
+    assert expires_default - expires > 50
+
+
+class _SharedCache:
+    def __init__(self):
+        self.listening = True
+        self.published = []
+        self.listeners = {}
+
+    def add_listener(self, topic, listener):
+        self.listeners.setdefault(topic, []).append(listener)
+
+    def is_listening(self):
+        return self.listening
+
+    async def publish(self, topic, payload):
+        self.published.append((topic, payload))
+
+
+async def test_principal_cache_invalidations_are_shared_with_other_workers(monkeypatch):
+    shared = _SharedCache()
+    monkeypatch.setattr(settings, "cache", shared, raising=False)
+    cache.clear_principal_cache()
+    principal_cache = cache.get_principal_cache()
+    (listener,) = shared.listeners[cache.PRINCIPAL_CACHE_TOPIC]
+
+    user_id = ObjectId()
+    principal_cache.set_token_validity("t1", user_id, True)
+    principal_cache.set_user(_user_all(user_id))
+    principal_cache.invalidate_tokens(["t0"])
+    principal_cache.invalidate_user_tokens(user_id)
+    principal_cache.invalidate_users([user_id])
+    principal_cache.invalidate_users()
+    await asyncio.sleep(0)
+    assert shared.published == [
+        (cache.PRINCIPAL_CACHE_TOPIC, {"tokens": ["t0"]}),
+        (cache.PRINCIPAL_CACHE_TOPIC, {"user_tokens": str(user_id)}),
+        (cache.PRINCIPAL_CACHE_TOPIC, {"users": [str(user_id)]}),
+        (cache.PRINCIPAL_CACHE_TOPIC, {"users": None}),
+    ]
+
+    # Messages received from other workers are applied without sending them again
+    principal_cache.set_token_validity("t1", user_id, True)
+    principal_cache.set_user(_user_all(user_id))
+    listener({"tokens": ["t1"]})
+    listener({"users": [str(user_id)]})
+    assert principal_cache.get_token_validity("t1") is None
+    assert principal_cache.get_user(user_id) is None
+    principal_cache.set_token_validity("t1", user_id, True)
+    listener({"user_tokens": str(user_id)})
+    assert principal_cache.get_token_validity("t1") is None
+    principal_cache.set_user(_user_all(user_id))
+    listener(None)
+    assert len(principal_cache.users) == 0
+    await asyncio.sleep(0)
+    assert len(shared.published) == 4
+
+    # The cache is bypassed while the invalidations of other workers may be missed
+    shared.listening = False
+    principal_cache.set_user(_user_all(user_id))
+    assert len(principal_cache.users) == 0
+    shared.listening = True
+    principal_cache.set_user(_user_all(user_id))
+    shared.listening = False
+    assert principal_cache.get_user(user_id) is None
+
+    cache.clear_principal_cache()
+
+
+async def test_deleting_groups_invalidates_every_cached_user(db_session, monkeypatch):
+    monkeypatch.setitem(sys.modules, "wirecloud.commons.search", SimpleNamespace(delete_group_from_index=AsyncMock()))
+    principal_cache = cache.get_principal_cache()
+
+    org_id = ObjectId()
+    group_id = ObjectId()
+    await db_session.client.groups.insert_many([
+        {"_id": org_id, "name": "Org", "codename": "org", "users": [], "group_permissions": [], "path": [org_id],
+         "is_organization": True},
+        {"_id": group_id, "name": "Team", "codename": "team", "users": [], "group_permissions": [],
+         "path": [org_id, group_id], "is_organization": False},
+    ])
+    group = await crud.get_group_by_id(db_session, Id(str(group_id)))
+
+    principal_cache.set_user(_user_all(ObjectId()))
+    await crud.delete_group(db_session, group)
+    assert len(principal_cache.users) == 0
+
+    principal_cache.set_user(_user_all(ObjectId()))
+    await crud.delete_organization(db_session, await crud.get_group_by_id(db_session, Id(str(org_id))))
+    assert len(principal_cache.users) == 0
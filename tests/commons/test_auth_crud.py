@@ -118,6 +118,67 @@ async def test_update_user_and_user_info_with_permissions(monkeypatch, db_sessio
     assert groups == []
 
 
+async def test_iter_all_users_and_groups():
+    class _Cursor:
+        def __init__(self, docs):
+            self.docs = docs
+
+        def __aiter__(self):
+            return self._iterate()
+
+        async def _iterate(self):
+            for doc in self.docs:
+                yield doc
+
+    finds = []
+
+    def _collection(docs):
+        def _find(batch_size):
+            finds.append(batch_size)
+            return _Cursor(docs)
+
+        return SimpleNamespace(find=_find)
+
+    user = crud.UserModel(_id=ObjectId(), username="streamed", email="", first_name="", last_name="",
+                          is_superuser=False, is_staff=False, is_active=True, date_joined=datetime.now(timezone.utc),
+                          last_login=None, password="!", idm_data={}, groups=[], permissions=[])
+    group = Group(_id=ObjectId(), name="streamed", codename="streamed", path=[])
+    db = SimpleNamespace(client=SimpleNamespace(users=_collection([user.model_dump(by_alias=True)]),
+                                                groups=_collection([group.model_dump(by_alias=True)])))
+
+    assert [u.id async for u in crud.iter_all_users(db, batch_size=2)] == [user.id]
+    assert [g.id async for g in crud.iter_all_groups(db)] == [group.id]
+    assert finds == [2, 500]
+
+
+async def test_batch_user_and_group_lookups(db_session):
+    bob = await _seed_user(db_session, "bob")
+    carol = await _seed_user(db_session, "carol")
+
+    gid = ObjectId()
+    await db_session.client.groups.insert_one(
+        {
+            "_id": gid,
+            "name": "Editors",
+            "codename": "editors",
+            "group_permissions": [{"codename": "widgets.edit"}],
+            "users": [ObjectId(bob.id)],
+            "path": [gid],
+        }
+    )
+
+    missing_id = Id(str(ObjectId()))
+    names = await crud.get_user_names_by_ids(db_session, [bob.id, carol.id, missing_id])
+    assert {name[0] for name in names.values()} == {"bob", "carol"}
+    assert names[str(bob.id)] == ("bob", bob.get_full_name())
+
+    groups = await crud.get_groups_by_ids(db_session, [Id(str(gid)), missing_id])
+    assert [group.name for group in groups] == ["Editors"]
+
+    assert await crud.get_user_names_by_ids(db_session, []) == {}
+    assert await crud.get_groups_by_ids(db_session, []) == []
+
+
 async def test_group_assignment_and_removal(db_session):
     user = await _seed_user(db_session, "carol")
     g1 = ObjectId()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import pytest
+
+from wirecloud.commons.auth import idm_tokens
+
+
+async def test_token_cache_expiration_and_invalidation(monkeypatch):
+    cache = idm_tokens.TokenCache()
+    calls = []
+
+    async def _fetch():
+        calls.append(1)
+        return "token-%d" % len(calls), 3600
+
+    assert await cache.get(("u1", "fiware"), _fetch) == "token-1"
+    assert await cache.get(("u1", "fiware"), _fetch) == "token-1"
+    assert await cache.get(("u1", "fiware"), _fetch, lambda _value: False) == "token-2"
+
+    now = idm_tokens.time.monotonic()
+    monkeypatch.setattr(idm_tokens.time, "monotonic", lambda: now + 3600 - idm_tokens.EXPIRATION_MARGIN)
+    assert await cache.get(("u1", "fiware"), _fetch) == "token-3"
+
+    cache.invalidate(lambda key: key[0] == "u1")
+    assert len(cache.entries) == 0
+
+
+async def test_token_cache_single_flight_shares_errors_and_retries_cancellations():
+    cache = idm_tokens.TokenCache()
+    release = asyncio.Event()
+    calls = []
+
+    async def _failing_fetch():
+        calls.append("failing")
+        await release.wait()
+        raise ValueError("rejected")
+
+    tasks = [asyncio.create_task(cache.get("key", _failing_fetch)) for _i in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert calls == ["failing"]
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def _slow_fetch():
+        calls.append("slow")
+        await asyncio.sleep(10)
+
+    async def _fetch():
+        calls.append("fetch")
+        return "token", 3600
+
+    leader = asyncio.create_task(cache.get("key", _slow_fetch))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(cache.get("key", _fetch))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    # The waiting request obtains the token itself once the first one is cancelled
+    assert await follower == "token"
+    assert calls[1:] == ["slow", "fetch"]
+    with pytest.raises(asyncio.CancelledError):
+        await leader
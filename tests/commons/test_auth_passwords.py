@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from wirecloud.commons.auth import passwords, utils
+from wirecloud.commons.utils.executor import ExecutorBusy
+
+
+async def test_password_hasher_hash_check_and_rehash():
+    hasher = passwords.PasswordHasher(1, 0, 1000)
+    try:
+        hashed = await hasher.hash_password("secret")
+        assert utils.get_password_iterations(hashed) == 1000
+        assert await hasher.check_password("secret", hashed) is True
+        assert await hasher.check_password("wrong", hashed) is False
+
+        assert hasher.needs_rehash(hashed) is False
+        assert hasher.needs_rehash(utils.hash_password("secret", iterations=500)) is True
+        assert hasher.needs_rehash(utils.hash_password("secret", iterations=2000)) is False
+        assert hasher.needs_rehash("md5$1$salt$hash") is False
+
+        stats = hasher.stats()
+        assert stats["completed"] == 3
+        assert stats["rejected"] == 0
+        assert stats["workers"] == 1
+        assert stats["latency_ms_max"] >= stats["latency_ms_avg"] > 0
+    finally:
+        hasher.shutdown()
+
+
+async def test_password_hasher_does_not_block_the_loop_and_rejects_when_full(monkeypatch):
+    release = threading.Event()
+
+    def _slow_check(_password, _password_hash):
+        release.wait()
+        return True
+
+    monkeypatch.setattr(passwords, "check_password", _slow_check)
+    hasher = passwords.PasswordHasher(1, 1, 1000)
+    try:
+        first = asyncio.ensure_future(hasher.check_password("a", "hash"))
+        second = asyncio.ensure_future(hasher.check_password("b", "hash"))
+
+        # The event loop keeps running while the workers are busy
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        assert time.perf_counter() - start < 0.5
+        assert (hasher.stats()["running"], hasher.stats()["queued"]) == (1, 1)
+
+        with pytest.raises(ExecutorBusy):
+            await hasher.check_password("c", "hash")
+        assert hasher.stats()["rejected"] == 1
+
+        release.set()
+        assert await asyncio.gather(first, second) == [True, True]
+        assert hasher.stats()["completed"] == 2
+    finally:
+        release.set()
+        hasher.shutdown()
+
+
+def test_get_and_clear_password_hasher(monkeypatch):
+    monkeypatch.setattr(passwords.settings, "PASSWORD_HASHING_WORKERS", 3, raising=False)
+    monkeypatch.setattr(passwords.settings, "PASSWORD_HASHING_QUEUE_SIZE", 5, raising=False)
+    monkeypatch.setattr(passwords.settings, "PASSWORD_HASH_ITERATIONS", 1234, raising=False)
+
+    hasher = passwords.get_password_hasher()
+    assert passwords.get_password_hasher() is hasher
+    assert hasher.iterations == 1234
+    assert hasher.stats()["workers"] == 3
+
+    passwords.clear_password_hasher()
+    assert passwords.get_password_hasher() is not hasher
@@ -29,6 +29,7 @@ from wirecloud import settings
 from wirecloud.commons.auth import routes, utils
 from wirecloud.commons.auth.models import Group
 from wirecloud.commons.auth.schemas import Permission, Session, UserAll, UserTokenType, UserWithPassword
+from wirecloud.commons.utils.executor import ExecutorBusy
 from wirecloud.database import Id
 from wirecloud.main import app
 
@@ -41,6 +42,28 @@ class _CallRecorder:
         self.calls.append((args, kwargs))
 
 
+class _FakePasswordHasher:
+    def __init__(self, valid=True, rehash=False, busy=False):
+        self.valid = valid
+        self.rehash = rehash
+        self.busy = busy
+        self.hashed = []
+
+    async def check_password(self, _password, _password_hash):
+        if self.busy:
+            raise ExecutorBusy()
+        return self.valid
+
+    async def hash_password(self, password):
+        if self.busy:
+            raise ExecutorBusy()
+        self.hashed.append(password)
+        return "hashed-password"
+
+    def needs_rehash(self, _password_hash):
+        return self.rehash
+
+
 async def _noop(*_args, **_kwargs):
     return None
 
@@ -99,7 +122,8 @@ def _set_auth_user(user):
 
 def _common_patches(monkeypatch):
     monkeypatch.setattr(routes, "_", lambda text: text)
-    monkeypatch.setattr(routes, "build_error_response", lambda _r, status, _msg: Response(status_code=status))
+    monkeypatch.setattr(routes, "build_error_response",
+                        lambda _r, status, _msg, headers=None: Response(status_code=status, headers=headers))
 
 
 @pytest.fixture()
@@ -251,7 +275,7 @@ async def test_api_login_and_login_http(app_http_client, monkeypatch):
         return None
 
     monkeypatch.setattr(routes, "get_user_with_password", _none_user)
-    monkeypatch.setattr(routes, "check_password", lambda *_a, **_k: False)
+    monkeypatch.setattr(routes, "get_password_hasher", lambda: _FakePasswordHasher(valid=False))
 
     json_headers = {"content-type": "application/json", "accept": "application/json"}
     assert (await app_http_client.post("/api/auth/login", content="not-json", headers=json_headers)).status_code == 422
@@ -266,7 +290,7 @@ async def test_api_login_and_login_http(app_http_client, monkeypatch):
         return good_user
 
     monkeypatch.setattr(routes, "get_user_with_password", _good_user)
-    monkeypatch.setattr(routes, "check_password", lambda *_a, **_k: True)
+    monkeypatch.setattr(routes, "get_password_hasher", lambda: _FakePasswordHasher(valid=True))
 
     response = await app_http_client.post("/api/auth/login", json={"username": "good", "password": "ok"}, headers={"accept": "application/json"})
     assert response.status_code == 200
@@ -278,6 +302,23 @@ async def test_api_login_and_login_http(app_http_client, monkeypatch):
     monkeypatch.setattr(settings, "OID_CONNECT_PLUGIN", None)
     assert (await app_http_client.post("/login", json={"username": "good", "password": "ok"})).status_code == 302
 
+    # Hashes created with fewer iterations are upgraded
+    password_updates = _CallRecorder()
+    hasher = _FakePasswordHasher(valid=True, rehash=True)
+    monkeypatch.setattr(routes, "get_password_hasher", lambda: hasher)
+    monkeypatch.setattr(routes, "set_user_password", password_updates)
+    response = await app_http_client.post("/api/auth/login", json={"username": "good", "password": "ok"}, headers={"accept": "application/json"})
+    assert response.status_code == 200
+    assert hasher.hashed == ["ok"]
+    assert password_updates.calls[0][0][1:] == (good_user.id, "hashed-password")
+
+    # Saturated hashing pool
+    monkeypatch.setattr(routes, "get_password_hasher", lambda: _FakePasswordHasher(busy=True))
+    response = await app_http_client.post("/api/auth/login", json={"username": "good", "password": "ok"}, headers={"accept": "application/json"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert (await app_http_client.post("/login", json={"username": "good", "password": "ok"})).status_code == 503
+
 
 async def test_login_page_and_logout_http(app_http_client, monkeypatch):
     _common_patches(monkeypatch)
@@ -326,8 +367,11 @@ async def test_login_page_and_logout_http(app_http_client, monkeypatch):
     def _backchannel_sync(**_kwargs):
         raise RuntimeError("ignore")
 
+    idm_invalidated = []
+    monkeypatch.setattr(routes, "invalidate_idm_tokens", idm_invalidated.append)
     monkeypatch.setattr(routes, "get_idm_backchannel_logout_functions", lambda: {"keycloak": _backchannel_async})
     assert (await app_http_client.get("/logout")).status_code == 302
+    assert idm_invalidated == [user.id]
 
     monkeypatch.setattr(routes, "get_idm_backchannel_logout_functions", lambda: {"keycloak": _backchannel_sync})
     assert (await app_http_client.get("/logout")).status_code == 302
@@ -532,7 +576,7 @@ async def test_admin_user_group_organization_crud_endpoints_http(app_http_client
 
     app.dependency_overrides[utils.get_user_csrf] = _admin_dep
 
-    monkeypatch.setattr(routes, "hash_password", lambda _password: "hashed-password")
+    monkeypatch.setattr(routes, "get_password_hasher", lambda: _FakePasswordHasher())
 
     user_indexed = _CallRecorder()
     monkeypatch.setattr(routes, "add_user_to_index", user_indexed)
@@ -765,7 +809,7 @@ async def test_admin_user_group_organization_crud_endpoints_http(app_http_client
 
 async def test_admin_user_endpoints_all_if_branches_http(app_http_client, monkeypatch):
     _common_patches(monkeypatch)
-    monkeypatch.setattr(routes, "hash_password", lambda _password: "hashed-password")
+    monkeypatch.setattr(routes, "get_password_hasher", lambda: _FakePasswordHasher())
 
     # create_user: permission denied
     _set_auth_user(_user_all("op", perms=[]))
@@ -236,6 +236,17 @@ async def test_hash_password_generates_checkable_pbkdf2_hash():
     assert len(parts) == 4
     assert utils.check_password(raw, hashed) is True
     assert utils.check_password("wrong-password", hashed) is False
+    assert utils.get_password_iterations(hashed) == 150000
+
+    hashed = utils.hash_password(raw, iterations=1000)
+    assert utils.get_password_iterations(hashed) == 1000
+    assert utils.check_password(raw, hashed) is True
+
+
+def test_get_password_iterations_invalid_hashes():
+    assert utils.get_password_iterations("md5$123$salt$hash") is None
+    assert utils.get_password_iterations("pbkdf2_sha256$x$salt$hash") is None
+    assert utils.get_password_iterations("pbkdf2_sha256$") is None
 
 
 class _FakeAiohttpResponse:
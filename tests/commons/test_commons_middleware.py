@@ -3,6 +3,7 @@
 from fastapi import Response
 from starlette.requests import Request
 
+from wirecloud import translation
 from wirecloud.commons import middleware
 
 
@@ -58,19 +59,22 @@ async def test_locale_middleware_dispatch_sets_language(monkeypatch):
     mw = middleware.LocaleMiddleware(app=lambda *_a, **_k: None)
 
     async def _call_next(_request):
-        return Response("ok", media_type="text/plain")
+        return Response(translation._request_language.get(), media_type="text/plain")
 
     response = await mw.dispatch(req, _call_next)
     assert req.state.lang == "es"
     assert response.headers["Content-Language"] == "es"
+    assert response.body == b"es"
+    assert translation._request_language.get() is None
 
 
 async def test_locale_ws_middleware_handles_non_ws_and_ws(monkeypatch):
-    calls = {"n": 0, "lang": None}
+    calls = {"n": 0, "lang": None, "context_lang": None}
 
     async def _app(scope, _receive, _send):
         calls["n"] += 1
         calls["lang"] = scope.get("state", {}).get("lang")
+        calls["context_lang"] = translation.find_request_language()
 
     mw = middleware.LocaleWSMiddleware(_app)
     monkeypatch.setattr(middleware, "get_language_from_req_data", lambda *_args: "pt")
@@ -89,6 +93,7 @@ async def test_locale_ws_middleware_handles_non_ws_and_ws(monkeypatch):
     await mw(scope_ws, None, None)
     assert calls["n"] == 2
     assert calls["lang"] == "pt"
+    assert calls["context_lang"] == "pt"
 
     scope_ws_no_cookie = {
         "type": "websocket",
@@ -123,6 +128,32 @@ async def test_content_type_utf8_middleware_dispatch_branches():
     assert r3.headers["Content-Type"] == "text/plain; charset=utf-8"
 
 
+async def test_compression_middleware_skips_range_requests():
+    body = b"x" * 2000
+
+    async def _app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _call(headers):
+        messages = []
+
+        async def _send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": headers}
+        await middleware.CompressionMiddleware(_app)(scope, None, _send)
+        return dict(messages[0]["headers"]), messages[1]["body"]
+
+    headers, compressed = await _call([(b"accept-encoding", b"gzip")])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert len(compressed) < len(body)
+
+    headers, ranged = await _call([(b"accept-encoding", b"gzip"), (b"range", b"bytes=0-9")])
+    assert b"content-encoding" not in headers
+    assert ranged == body
+
+
 def test_install_all_middlewares():
     added = []
 
@@ -134,6 +165,6 @@ def test_install_all_middlewares():
     assert added == [
         middleware.LocaleMiddleware,
         middleware.LocaleWSMiddleware,
-        middleware.GZipMiddleware,
+        middleware.CompressionMiddleware,
         middleware.ContentTypeUTF8Middleware,
     ]
@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 
+from types import SimpleNamespace
+
+import pytest
 from fastapi import FastAPI
 
 from wirecloud.commons import plugins
@@ -37,3 +40,37 @@ def test_wirecloud_commons_plugin_urls_openapi_and_commands(monkeypatch):
     assert "UserLogin" in plugin.get_openapi_extra_schemas()
     assert plugin.get_management_commands("sub") == {"cmd": "sub"}
 
+
+
+def test_wirecloud_commons_plugin_auth_settings_validator():
+    validate = plugins.WirecloudCommonsPlugin(None).get_config_validators()[0]
+
+    settings_obj = SimpleNamespace()
+    validate(settings_obj, False)
+    assert settings_obj.AUTH_PRINCIPAL_CACHE_SIZE == 1024
+    assert settings_obj.AUTH_PRINCIPAL_CACHE_TTL == 30
+
+    validate(SimpleNamespace(AUTH_PRINCIPAL_CACHE_SIZE=10, AUTH_PRINCIPAL_CACHE_TTL=0.5), False)
+
+    with pytest.raises(ValueError, match="AUTH_PRINCIPAL_CACHE_SIZE must be a positive integer"):
+        validate(SimpleNamespace(AUTH_PRINCIPAL_CACHE_SIZE=0), False)
+
+    with pytest.raises(ValueError, match="AUTH_PRINCIPAL_CACHE_TTL must be a positive number"):
+        validate(SimpleNamespace(AUTH_PRINCIPAL_CACHE_TTL=0), False)
+
+    with pytest.raises(ValueError, match="AUTH_PRINCIPAL_CACHE_TTL must be a positive number"):
+        validate(SimpleNamespace(AUTH_PRINCIPAL_CACHE_TTL="30"), False)
+
+    assert settings_obj.PASSWORD_HASH_ITERATIONS == 150000
+    assert settings_obj.PASSWORD_HASHING_WORKERS == 2
+    assert settings_obj.PASSWORD_HASHING_QUEUE_SIZE == 64
+    validate(SimpleNamespace(PASSWORD_HASHING_QUEUE_SIZE=0), False)
+
+    with pytest.raises(ValueError, match="PASSWORD_HASH_ITERATIONS must be a positive integer"):
+        validate(SimpleNamespace(PASSWORD_HASH_ITERATIONS=0), False)
+
+    with pytest.raises(ValueError, match="PASSWORD_HASHING_WORKERS must be a positive integer"):
+        validate(SimpleNamespace(PASSWORD_HASHING_WORKERS=True), False)
+
+    with pytest.raises(ValueError, match="PASSWORD_HASHING_QUEUE_SIZE must be a non-negative integer"):
+        validate(SimpleNamespace(PASSWORD_HASHING_QUEUE_SIZE=-1), False)
@@ -7,7 +7,7 @@ from starlette.requests import Request
 
 from wirecloud.commons import routes
 from wirecloud.commons.exceptions import ErrorResponse
-from wirecloud.commons.utils.http import NotFound, PermissionDenied
+from wirecloud.commons.utils.http import Conflict, NotFound, PermissionDenied
 
 
 class _ValidationExc:
@@ -54,6 +54,13 @@ async def test_exception_handlers(monkeypatch):
     not_found_default = await routes.not_found_handler(request, NotFound(""))
     assert not_found_default["msg"] == "Resource not found"
 
+    conflict = await routes.conflict_handler(request, Conflict("stale"))
+    assert conflict["status"] == 409
+    assert conflict["msg"] == "stale"
+
+    conflict_default = await routes.conflict_handler(request, Conflict(""))
+    assert conflict_default["msg"] == "The resource has been modified by another request"
+
     validation = await routes.validation_exception_handler(
         request,
         _ValidationExc(
@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
 
+import fnmatch
 from types import SimpleNamespace
 
+import pytest
+from elasticsearch import NotFoundError
+
 from wirecloud.commons import search
 
 
@@ -20,6 +24,9 @@ class _FakeIndices:
     async def create(self, index, body):
         self.created.append((index, body))
 
+    async def get_alias(self, name):
+        return {}
+
 
 class _FakeES:
     def __init__(self, count_value=0, search_payload=None, exists_value=True):
@@ -28,11 +35,16 @@ class _FakeES:
         self.indices = _FakeIndices(exists_value=exists_value)
         self.index_calls = []
         self.delete_calls = []
+        self.search_calls = []
+        self.delete_by_query_calls = []
 
     async def count(self, index, body):
         return {"count": self.count_value}
 
-    async def search(self, index, body, from_, size):
+    async def search(self, index, body, size, **kwargs):
+        self.search_calls.append(dict(kwargs, index=index, size=size))
+        if callable(self.search_payload):
+            return self.search_payload(kwargs.get("from_"))
         return self.search_payload
 
     async def index(self, index, id, document):
@@ -41,6 +53,9 @@ class _FakeES:
     async def delete(self, index, id):
         self.delete_calls.append((index, id))
 
+    async def delete_by_query(self, index, query, conflicts, refresh):
+        self.delete_by_query_calls.append((index, query))
+
 
 async def test_available_engines_and_getters(monkeypatch):
     import wirecloud.platform.search as platform_search
@@ -72,38 +87,23 @@ async def test_available_engines_and_getters(monkeypatch):
     assert search.get_rebuild_engine("missing") is None
 
 
-async def test_calculate_pagination_and_build_search_response(monkeypatch):
-    es = _FakeES(count_value=11)
-    monkeypatch.setattr(search, "es_client", es)
-    offset, pagecount, pagenum, total = await search.calculate_pagination("users", {}, pagenum=99, max_results=5)
-    assert (offset, pagecount, pagenum, total) == (10, 3, 3, 11)
-
-    offset2, pagecount2, pagenum2, total2 = await search.calculate_pagination(
-        "users",
-        {"query": {"term": {"x": 1}}},
-        pagenum=1,
-        max_results=5,
-    )
-    assert (offset2, pagecount2, pagenum2, total2) == (0, 3, 1, 11)
-    es.count_value = 10
-    assert await search.calculate_pagination("users", {}, pagenum=1, max_results=5) == (0, 2, 1, 10)
+def test_calculate_pagination():
+    assert search.calculate_pagination(11, pagenum=99, max_results=5) == (10, 3, 3)
+    assert search.calculate_pagination(11, pagenum=1, max_results=5) == (0, 3, 1)
+    assert search.calculate_pagination(10, pagenum=2, max_results=5) == (5, 2, 2)
+    assert search.calculate_pagination(0, pagenum=4, max_results=5) == (0, 0, 1)
 
-    async def _calc(*_args, **_kwargs):
-        return 0, 1, 1, 2
 
-    monkeypatch.setattr(search, "calculate_pagination", _calc)
-    monkeypatch.setattr(
-        search,
-        "es_client",
-        _FakeES(
-            search_payload={
-                "hits": {
-                    "hits": [{"_id": "73", "_source": {"fullname": "A", "username": "u1"}}],
-                    "total": {"value": 7},
-                }
+async def test_build_search_response(monkeypatch):
+    es = _FakeES(
+        search_payload={
+            "hits": {
+                "hits": [{"_id": "73", "_source": {"fullname": "A", "username": "u1"}}],
+                "total": {"value": 7},
             }
-        ),
+        }
     )
+    monkeypatch.setattr(search, "es_client", es)
     response = await search.build_search_response(
         index=search.USERS_INDEX,
         body={},
@@ -112,8 +112,10 @@ async def test_calculate_pagination_and_build_search_response(monkeypatch):
         clean=search.clean_user_out,
     )
     assert response.total == 7
+    assert response.pagecount == 2
     assert response.pagelen == 1
     assert response.results[0].type == "user"
+    assert es.search_calls == [{"index": search.USERS_INDEX, "size": 5, "from_": 0, "track_total_hits": True}]
 
     called = {}
 
@@ -139,6 +141,33 @@ async def test_calculate_pagination_and_build_search_response(monkeypatch):
     assert called["request"] == "req"
 
 
+async def test_build_search_response_clamps_out_of_range_pages(monkeypatch):
+    def _payload(from_):
+        hits = [{"_id": str(i), "_source": {"fullname": "A", "username": f"u{i}"}} for i in range(from_, min(from_ + 5, 11))]
+        return {"hits": {"hits": hits, "total": {"value": 11}}}
+
+    es = _FakeES(search_payload=_payload)
+    monkeypatch.setattr(search, "es_client", es)
+
+    response = await search.build_search_response(search.USERS_INDEX, {}, pagenum=2, max_results=5,
+                                                  clean=search.clean_user_out)
+    assert (response.offset, response.pagenum, response.pagecount, response.pagelen) == (5, 2, 3, 5)
+    assert len(es.search_calls) == 1
+
+    es.search_calls.clear()
+    response = await search.build_search_response(search.USERS_INDEX, {}, pagenum=99, max_results=5,
+                                                  clean=search.clean_user_out)
+    assert (response.offset, response.pagenum, response.pagecount, response.pagelen) == (10, 3, 3, 1)
+    assert [call["from_"] for call in es.search_calls] == [490, 10]
+
+    es = _FakeES()
+    monkeypatch.setattr(search, "es_client", es)
+    response = await search.build_search_response(search.USERS_INDEX, {}, pagenum=3, max_results=5,
+                                                  clean=search.clean_user_out)
+    assert (response.offset, response.pagenum, response.pagecount, response.total) == (0, 1, 0, 0)
+    assert len(es.search_calls) == 1
+
+
 async def test_clean_and_search_functions(monkeypatch):
     captured = {}
 
@@ -201,8 +230,16 @@ async def test_clean_and_search_functions(monkeypatch):
         selected = await search.search_user_groups("", 1, 10, order_by=None)
         assert selected.type == "organization"
 
+        # Hits report the versioned index behind the alias
+        async def _build_with_versioned_index(index, body, pagenum, max_results, clean, request=None):
+            return clean({"_index": "groups-20260101000000000000", "_source": {"name": "Org", "is_organization": False}})
+
+        monkeypatch.setattr(search, "build_search_response", _build_with_versioned_index)
+        selected = await search.search_user_groups("", 1, 10, order_by=None)
+        assert selected.type == "group"
+
 
-async def test_add_and_rebuild_indexes(monkeypatch):
+async def test_add_and_delete_index_documents(monkeypatch):
     es = _FakeES()
     monkeypatch.setattr(search, "es_client", es)
 
@@ -221,49 +258,278 @@ async def test_add_and_rebuild_indexes(monkeypatch):
         (search.GROUPS_INDEX, "g1"),
     ]
 
-    bulk_calls = {"n": 0, "last": None}
 
-    async def _bulk(_es, actions):
-        bulk_calls["n"] += 1
-        bulk_calls["last"] = actions
+class _AliasIndices:
+    def __init__(self, indices=(), aliases=None):
+        self.indices = set(indices)
+        self.aliases = dict(aliases or {})
+        # Aliases of the indexes being rebuilt
+        self.markers = {}
+        self.alias_updates = []
+        self.refreshed = []
+        self.created_mappings = {}
+
+    async def create(self, index, body):
+        self.indices.add(index)
+        self.created_mappings[index] = body["mappings"]
+        for alias in body.get("aliases", {}):
+            self.markers[index] = alias
+
+    async def delete(self, index, ignore_unavailable=False):
+        for name in index.split(","):
+            self.indices.discard(name)
+            self.markers.pop(name, None)
+
+    async def exists(self, index):
+        return index in self.indices or index in self.aliases.values()
+
+    async def exists_alias(self, name):
+        return name in self.aliases.values()
+
+    async def get_alias(self, name):
+        if "*" in name:
+            return {index: {"aliases": {alias: {}}} for index, alias in self.markers.items()
+                    if fnmatch.fnmatch(alias, name)}
+        return {index: {"aliases": {name: {}}} for index, alias in self.aliases.items() if alias == name}
+
+    async def get(self, index, allow_no_indices, ignore_unavailable):
+        prefix = index.rstrip("*")
+        return {name: {} for name in self.indices if name.startswith(prefix)}
+
+    async def refresh(self, index):
+        self.refreshed.append(index)
+
+    async def update_aliases(self, actions):
+        self.alias_updates.append(actions)
+        for action in actions:
+            if "remove" in action and self.markers.get(action["remove"]["index"]) == action["remove"]["alias"]:
+                del self.markers[action["remove"]["index"]]
+            elif "remove" in action:
+                del self.aliases[action["remove"]["index"]]
+            elif "remove_index" in action:
+                self.indices.discard(action["remove_index"]["index"])
+            else:
+                self.aliases[action["add"]["index"]] = action["add"]["alias"]
+
+
+def _fake_bulk(bulk_calls):
+    async def _bulk(_es, actions, chunk_size, ignore_status):
+        assert ignore_status == (409,)
+        chunk = []
+        async for action in actions:
+            chunk.append(action)
+            if len(chunk) == chunk_size:
+                bulk_calls.append(chunk)
+                chunk = []
+        if chunk:
+            bulk_calls.append(chunk)
+
+    return _bulk
+
+
+async def _documents(count):
+    for i in range(count):
+        yield str(i), {"name": f"doc{i}"}
+
+
+async def test_rebuild_index_swaps_alias(monkeypatch):
+    es = _FakeES()
+    es.indices = _AliasIndices(indices={"groups", "groups-00000000000000000001"})
+    monkeypatch.setattr(search, "es_client", es)
+    bulk_calls = []
+    monkeypatch.setattr(search, "async_bulk", _fake_bulk(bulk_calls))
+    progress = []
+
+    # Indexes created before aliases were used are replaced by the alias
+    indexed = await search.rebuild_index(search.GROUPS_INDEX, search.GROUP_MAPPINGS, _documents(5), chunk_size=2,
+                                         progress=lambda *args: progress.append(args))
+    assert indexed == 5
+    first = next(name for name in es.indices.indices if name.startswith("groups-2"))
+    assert [len(chunk) for chunk in bulk_calls] == [2, 2, 1]
+    assert all(action["_index"] == first for chunk in bulk_calls for action in chunk)
+    # Documents changed meanwhile are already in the new index and are not overwritten
+    assert all(action["_op_type"] == "create" for chunk in bulk_calls for action in chunk)
+    assert es.indices.alias_updates[0] == [{"remove_index": {"index": "groups"}},
+                                           {"add": {"index": first, "alias": "groups"}},
+                                           {"remove": {"index": first, "alias": first + "-rebuilding"}}]
+    assert es.indices.aliases == {first: "groups"}
+    assert es.indices.markers == {}
+    assert es.indices.indices == {first}
+    # Tombstones of the documents deleted meanwhile are removed before and after the swap
+    assert es.indices.refreshed == [first, first]
+    assert es.delete_by_query_calls == [(first, {"term": {search.REBUILD_DELETED_FIELD: True}})] * 2
+    assert es.indices.created_mappings[first]["properties"][search.REBUILD_DELETED_FIELD] == {"type": "boolean"}
+    assert search.REBUILD_DELETED_FIELD not in search.GROUP_MAPPINGS["mappings"]["properties"]
+    assert [(alias, count, done) for alias, count, _elapsed, done in progress] == [
+        ("groups", 2, False), ("groups", 4, False), ("groups", 5, True)]
+
+    # Following rebuilds move the alias and only remove previous versions
+    es.indices.indices.add("groups-99999999999999999999")
+    await search.rebuild_index(search.GROUPS_INDEX, search.GROUP_MAPPINGS, _documents(1))
+    second = next(name for name in es.indices.aliases)
+    assert second != first
+    assert es.indices.alias_updates[1] == [{"remove": {"index": first, "alias": "groups"}},
+                                           {"add": {"index": second, "alias": "groups"}},
+                                           {"remove": {"index": second, "alias": second + "-rebuilding"}}]
+    assert es.indices.indices == {second, "groups-99999999999999999999"}
+
+
+class _RebuildES:
+    def __init__(self, indices):
+        self.indices = indices
+        self.calls = []
+
+    def _target(self, index, require_alias=False):
+        if index in self.indices.aliases.values():
+            return
+        if index not in self.indices.markers.values() and (require_alias or index not in self.indices.indices):
+            raise NotFoundError("index_not_found_exception", None, None)
+
+    async def index(self, index, id, document, require_alias=False):
+        self._target(index, require_alias)
+        self.calls.append(("index", index, id, document))
+
+    async def update(self, index, id, doc, require_alias=False):
+        self._target(index, require_alias)
+        if id == "missing" and index == "users":
+            raise NotFoundError("document_missing_exception", None, None)
+        self.calls.append(("update", index, id, doc))
+
+    async def delete(self, index, id):
+        self._target(index)
+        self.calls.append(("delete", index, id))
+
+
+class _StoredRebuildES(_RebuildES):
+    # Keeps the documents of the index being rebuilt
+    def __init__(self, indices):
+        super().__init__(indices)
+        self.docs = {}
+
+    async def index(self, index, id, document, require_alias=False):
+        await super().index(index, id, document, require_alias)
+        if index.endswith("-rebuilding"):
+            self.docs[id] = document
+
+    async def delete_by_query(self, index, query, conflicts, refresh):
+        field = next(iter(query["term"]))
+        self.docs = {doc_id: doc for doc_id, doc in self.docs.items() if not doc.get(field)}
+
+
+async def test_index_changes_are_applied_to_the_indexes_being_rebuilt(monkeypatch):
+    live = "users-00000000000000000001"
+    rebuilding = "users-00000000000000000002"
+    es = _RebuildES(_AliasIndices(indices={live, rebuilding}, aliases={live: "users"}))
+    es.indices.markers = {rebuilding: rebuilding + "-rebuilding", "groups-00000000000000000003": "groups-00000000000000000003-rebuilding"}
+    monkeypatch.setattr(search, "es_client", es)
+
+    await search.index_document("users", "u1", {"username": "alice"})
+    await search.update_document("users", "u1", {"username": "bob"})
+    await search.delete_document("users", "u1")
+    assert es.calls == [
+        ("index", "users", "u1", {"username": "alice"}),
+        ("index", rebuilding + "-rebuilding", "u1", {"username": "alice"}),
+        ("update", "users", "u1", {"username": "bob"}),
+        ("update", rebuilding + "-rebuilding", "u1", {"username": "bob"}),
+        ("delete", "users", "u1"),
+        ("index", rebuilding + "-rebuilding", "u1", {search.REBUILD_DELETED_FIELD: True}),
+    ]
+
+    # Documents not found in the live index are still updated in the new one
+    es.calls.clear()
+    with pytest.raises(NotFoundError):
+        await search.update_document("users", "missing", {"username": "bob"})
+    assert es.calls == [("update", rebuilding + "-rebuilding", "missing", {"username": "bob"})]
+    es.calls.clear()
+
+    # Once the rebuild finishes the writes are only sent to the live index
+    es.indices.markers = {}
+    await search.index_document("users", "u2", {"username": "carol"})
+    assert es.calls == [("index", "users", "u2", {"username": "carol"})]
+    assert await search._get_rebuild_targets("users") == []
+
+
+async def test_rebuild_index_does_not_restore_documents_deleted_meanwhile(monkeypatch):
+    live = "users-00000000000000000001"
+    es = _StoredRebuildES(_AliasIndices(indices={live}, aliases={live: "users"}))
+    monkeypatch.setattr(search, "es_client", es)
+
+    async def _bulk(_es, actions, chunk_size, ignore_status):
+        # "0" is deleted before being copied, "1" after it and "2" is deleted and then indexed again
+        await search.delete_document("users", "0")
+        async for action in actions:
+            es.docs.setdefault(action["_id"], action["_source"])
+        await search.delete_document("users", "1")
+        await search.delete_document("users", "2")
+        await search.index_document("users", "2", {"name": "again"})
 
     monkeypatch.setattr(search, "async_bulk", _bulk)
-    async def _all_users(_db):
-        return [user]
 
-    async def _all_groups(_db):
-        return [group]
+    await search.rebuild_index(search.USERS_INDEX, search.USER_MAPPINGS, _documents(3))
+    assert es.docs == {"2": {"name": "again"}}
+
+
+async def test_rebuild_index_failure_keeps_live_index(monkeypatch):
+    es = _FakeES()
+    es.indices = _AliasIndices(indices={"users-00000000000000000001"},
+                               aliases={"users-00000000000000000001": "users"})
+    monkeypatch.setattr(search, "es_client", es)
+
+    async def _failing_bulk(_es, actions, chunk_size, ignore_status):
+        async for _action in actions:
+            raise RuntimeError("bulk failed")
+
+    monkeypatch.setattr(search, "async_bulk", _failing_bulk)
+    with pytest.raises(RuntimeError):
+        await search.rebuild_index(search.USERS_INDEX, search.USER_MAPPINGS, _documents(3))
+
+    assert es.indices.indices == {"users-00000000000000000001"}
+    assert es.indices.aliases == {"users-00000000000000000001": "users"}
+    assert es.indices.alias_updates == []
+
+
+async def test_rebuild_user_and_group_indexes(monkeypatch):
+    es = _FakeES()
+    es.indices = _AliasIndices()
+    monkeypatch.setattr(search, "es_client", es)
+    bulk_calls = []
+    monkeypatch.setattr(search, "async_bulk", _fake_bulk(bulk_calls))
+
+    user = SimpleNamespace(id="u1", first_name="Alice", last_name="A", username="alice")
+    group = SimpleNamespace(id="g1", name="Dev", is_organization=False, path=["g1"])
+    batch_sizes = []
+
+    async def _iter_users(_db, batch_size):
+        batch_sizes.append(batch_size)
+        yield user
 
-    monkeypatch.setattr(search, "get_all_users", _all_users)
-    monkeypatch.setattr(search, "get_all_groups", _all_groups)
+    async def _iter_groups(_db, batch_size):
+        batch_sizes.append(batch_size)
+        yield group
 
-    await search.rebuild_user_index(SimpleNamespace())
-    assert search.USERS_INDEX in es.indices.deleted
-    assert es.indices.created[0][0] == search.USERS_INDEX
-    assert bulk_calls["n"] == 1
-    assert bulk_calls["last"][0]["_source"]["username"] == "alice"
+    monkeypatch.setattr(search, "iter_all_users", _iter_users)
+    monkeypatch.setattr(search, "iter_all_groups", _iter_groups)
 
-    await search.rebuild_group_index(SimpleNamespace())
-    assert search.GROUPS_INDEX in es.indices.deleted
-    assert es.indices.created[1][0] == search.GROUPS_INDEX
-    assert bulk_calls["n"] == 2
-    assert bulk_calls["last"][0]["_source"]["type"] == "group"
+    assert await search.rebuild_user_index(SimpleNamespace()) == 1
+    assert bulk_calls[-1][0]["_source"]["username"] == "alice"
+    assert bulk_calls[-1][0]["_id"] == "u1"
 
-    es_no_delete = _FakeES(exists_value=False)
-    monkeypatch.setattr(search, "es_client", es_no_delete)
-    await search.rebuild_user_index(SimpleNamespace())
-    await search.rebuild_group_index(SimpleNamespace())
-    assert es_no_delete.indices.deleted == []
+    assert await search.rebuild_group_index(SimpleNamespace(), chunk_size=10) == 1
+    assert bulk_calls[-1][0]["_source"]["type"] == "group"
+    assert batch_sizes == [search.REBUILD_CHUNK_SIZE, 10]
+    assert sorted(es.indices.aliases.values()) == ["groups", "users"]
 
 
 async def test_rebuild_all_indexes(monkeypatch):
     calls = []
 
-    async def _user(_db):
+    async def _user(_db, chunk_size, progress):
         calls.append("user")
+        return 1
 
-    async def _group(_db):
+    async def _group(_db, chunk_size, progress):
         calls.append("group")
+        return 2
 
     monkeypatch.setattr(search, "rebuild_user_index", _user)
     monkeypatch.setattr(search, "rebuild_group_index", _group)
@@ -271,14 +537,16 @@ async def test_rebuild_all_indexes(monkeypatch):
     import wirecloud.platform.search as platform_search
     import wirecloud.catalogue.search as catalogue_search
 
-    async def _workspace(_db):
+    async def _workspace(_db, chunk_size, progress):
         calls.append("workspace")
+        return 3
 
-    async def _resource(_db):
+    async def _resource(_db, chunk_size, progress):
         calls.append("resource")
+        return 4
 
     monkeypatch.setattr(platform_search, "rebuild_workspace_index", _workspace)
     monkeypatch.setattr(catalogue_search, "rebuild_resource_index", _resource)
 
-    await search.rebuild_all_indexes(SimpleNamespace())
+    assert await search.rebuild_all_indexes(SimpleNamespace()) == 10
     assert calls == ["user", "group", "workspace", "resource"]
@@ -53,6 +53,17 @@ def test_get_translation_and_paths(monkeypatch):
     path_with_view = tags.get_static_path("default", "classic", request, "js/app.js?view=embed")
     assert "view=embed" in path_with_view
 
+    requested = []
+
+    def _version(theme, path):
+        requested.append((theme, path))
+        return "abc" if path != "missing.js" else None
+
+    monkeypatch.setattr(tags, "find_static_file_version", _version)
+    assert "v=abc" in tags.get_static_path("default", "widget", request, "css/cache.css?context=widget")
+    assert "v=" not in tags.get_static_path("default", "classic", request, "missing.js")
+    assert requested == [("default", "css/default_widget_widget.css"), ("default", "missing.js")]
+
     monkeypatch.setattr(tags, "get_absolute_reverse_url", lambda view, _request, **kwargs: f"/{view}/{kwargs['x']}")
     assert tags.get_url_from_view(request, "wirecloud.view", x="1") == "/wirecloud.view/1"
 
@@ -88,6 +99,60 @@ def test_get_wirecloud_bootstrap(monkeypatch):
     assert "bootstrap.html" in rendered_explicit_view
 
 
+def test_get_wirecloud_bootstrap_reuses_rendered_fragments(monkeypatch):
+    monkeypatch.setattr(tags, "templates", _FakeTemplates())
+    monkeypatch.setattr(tags, "get_constants", lambda: [{"key": "A", "value": "1"}])
+    endpoints = [SimpleNamespace(id="plain", url="/api/x")]
+    monkeypatch.setattr(tags, "get_wirecloud_ajax_endpoints", lambda _view, _request: endpoints)
+
+    context = {
+        "request": SimpleNamespace(state=SimpleNamespace(lang="es")),
+        "static": lambda *_a, **_k: None,
+        "url": lambda *_a, **_k: None,
+        "VIEW_MODE": "workspace",
+        "LANGUAGE_CODE": "es",
+        "WIRECLOUD_VERSION_HASH": "hash",
+        "THEME": "defaulttheme",
+    }
+    themes = [{"value": "defaulttheme", "label": "Default"}]
+
+    rendered = tags.get_wirecloud_bootstrap(context, themes)
+    endpoints[0].url = "/api/changed"
+    assert tags.get_wirecloud_bootstrap(context, themes) == rendered
+    assert "/api/x" in rendered
+
+    # Rebuilt endpoint lists are rendered again
+    monkeypatch.setattr(tags, "get_wirecloud_ajax_endpoints",
+                        lambda _view, _request: [SimpleNamespace(id="plain", url="/api/y")])
+    assert "/api/y" in tags.get_wirecloud_bootstrap(context, themes)
+
+    tags.clear_bootstrap_caches()
+    endpoints[0].url = "/api/z"
+    monkeypatch.setattr(tags, "get_wirecloud_ajax_endpoints", lambda _view, _request: endpoints)
+    assert "/api/z" in tags.get_wirecloud_bootstrap(context, themes)
+
+
+def test_get_javascript_catalogue_is_cached_until_plugins_change(monkeypatch):
+    rendered = []
+    monkeypatch.setattr(tags, "_render_javascript_catalogue",
+                        lambda lang, theme: rendered.append((lang, theme)) or f"{lang}-{theme}-{len(rendered)}")
+    loaded = (object(),)
+    monkeypatch.setattr(tags, "get_plugins", lambda: loaded)
+
+    assert tags.get_javascript_catalogue("es", "defaulttheme") == "es-defaulttheme-1"
+    assert tags.get_javascript_catalogue("es", "defaulttheme") == "es-defaulttheme-1"
+    assert tags.get_javascript_catalogue("en", "defaulttheme") == "en-defaulttheme-2"
+
+    reloaded = (object(),)
+    monkeypatch.setattr(tags, "get_plugins", lambda: reloaded)
+    assert tags.get_javascript_catalogue("es", "defaulttheme") == "es-defaulttheme-3"
+
+    tags.clear_bootstrap_caches()
+    assert tags.get_javascript_catalogue("es", "defaulttheme") == "es-defaulttheme-4"
+    assert rendered == [("es", "defaulttheme"), ("en", "defaulttheme"), ("es", "defaulttheme"),
+                        ("es", "defaulttheme")]
+
+
 def test_get_javascript_catalogue_with_translations(monkeypatch):
     monkeypatch.setattr(tags, "templates", _FakeTemplates())
     monkeypatch.setattr(tags.settings, "INSTALLED_APPS", ["wirecloud.fake", "wirecloud.missing"])
@@ -134,6 +134,36 @@ async def test_db_save_alternative_and_tab(db_session, monkeypatch):
         await db.save_alternative_tab(db_session, tab)
 
 
+def test_db_build_update_document():
+    previous = {
+        "title": "old",
+        "removed": 1,
+        "tabs": {"t1": {"name": "tab", "widgets": {"w1": {"top": 0}}}},
+        "users": [1, 2],
+        "prefs": {"a.b": 1},
+    }
+    current = {
+        "title": "old",
+        "tabs": {"t1": {"name": "tab", "widgets": {"w1": {"top": 3}, "w2": {"top": 1}}}},
+        "users": [1],
+        "prefs": {"a.b": 2},
+        "added": True,
+    }
+
+    assert db.build_update_document(previous, current) == {
+        "$set": {
+            "tabs.t1.widgets.w1.top": 3,
+            "tabs.t1.widgets.w2": {"top": 1},
+            "users": [1],
+            "prefs": {"a.b": 2},
+            "added": True,
+        },
+        "$unset": {"removed": ""},
+    }
+    assert db.build_update_document(current, dict(current)) is None
+    assert db.build_update_document({"flag": 1}, {"flag": True}) == {"$set": {"flag": True}}
+
+
 def test_downloader_and_encoding(monkeypatch, tmp_path):
     path = tmp_path / "a.txt"
     path.write_bytes(b"hello")
@@ -224,7 +254,7 @@ def test_git_info(monkeypatch):
     assert dirty3 is False
 
 
-def test_structures_translation_urlify_and_version():
+def test_structures_translation_urlify_and_version(monkeypatch):
     empty = structures.CaseInsensitiveDict()
     assert len(empty) == 0
 
@@ -242,6 +272,42 @@ def test_structures_translation_urlify_and_version():
     del cid["x-test"]
     assert len(cid) == 1
 
+    with pytest.raises(ValueError, match="maxsize"):
+        structures.LRUCache(0)
+
+    lru = structures.LRUCache(2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+    assert "b" not in lru
+    assert lru.get("b", "missing") == "missing"
+    assert len(lru) == 2
+    lru.delete("a")
+    lru.delete("a")
+    assert "a" not in lru
+    lru.set(("x", 1), 1)
+    lru.delete_matching(lambda key, _value: isinstance(key, tuple))
+    assert list(lru._store) == ["c"]
+    lru.delete_matching(lambda _key, value: value == 3)
+    assert len(lru) == 0
+    assert lru.stats() == {"hits": 1, "misses": 1, "size": 0}
+    lru.clear()
+
+    with pytest.raises(ValueError):
+        structures.LRUCache(2, ttl=0)
+
+    now = [100.0]
+    monkeypatch.setattr(structures.time, "monotonic", lambda: now[0])
+    ttl_cache = structures.LRUCache(2, ttl=10)
+    ttl_cache.set("a", 1)
+    now[0] = 109.0
+    assert ttl_cache.get("a") == 1
+    now[0] = 110.0
+    assert ttl_cache.get("a") is None
+    assert "a" not in ttl_cache
+    assert (ttl_cache.hits, ttl_cache.misses) == (1, 1)
+
     assert translation.get_trans_index("__MSG_HELLO__") == "HELLO"
     assert translation.get_trans_index("nope") is None
     assert translation.get_trans_index(None) is None
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from contextvars import ContextVar
+import threading
+
+import pytest
+
+from wirecloud.commons.utils.executor import BoundedExecutor, ExecutorBusy
+
+_var = ContextVar("_var", default=None)
+
+
+@pytest.mark.parametrize("max_workers", (0, -1, 1.5, True, "2"))
+def test_bounded_executor_invalid_max_workers(max_workers):
+    with pytest.raises(ValueError, match="max_workers must be a positive integer"):
+        BoundedExecutor(max_workers)
+
+
+@pytest.mark.parametrize("max_queued", (-1, 1.5, True))
+def test_bounded_executor_invalid_max_queued(max_queued):
+    with pytest.raises(ValueError, match="max_queued must be a non-negative integer"):
+        BoundedExecutor(1, max_queued=max_queued)
+
+
+async def test_bounded_executor_rejects_when_queue_is_full():
+    executor = BoundedExecutor(1, max_queued=1)
+    release = threading.Event()
+
+    try:
+        running = asyncio.ensure_future(executor.run(release.wait))
+        queued = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0)
+        assert (executor.running, executor.queued) == (1, 1)
+
+        with pytest.raises(ExecutorBusy):
+            await executor.run(release.wait)
+
+        release.set()
+        await asyncio.gather(running, queued)
+        assert (executor.running, executor.queued) == (0, 0)
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+async def test_bounded_executor_run_propagates_context_and_kwargs():
+    executor = BoundedExecutor(1, thread_name_prefix="test-executor")
+    token = _var.set("value")
+    try:
+        def task(a, b=None):
+            return _var.get(), a, b, threading.current_thread().name
+
+        value, a, b, thread_name = await executor.run(task, 1, b=2)
+    finally:
+        _var.reset(token)
+        executor.shutdown()
+
+    assert (value, a, b) == ("value", 1, 2)
+    assert thread_name.startswith("test-executor")
+    assert executor._executor is None
+
+
+async def test_bounded_executor_limits_concurrency():
+    executor = BoundedExecutor(2)
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def task():
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        threading.Event().wait(0.02)
+        with lock:
+            running -= 1
+
+    try:
+        await asyncio.gather(*(executor.run(task) for _i in range(6)))
+    finally:
+        executor.shutdown()
+
+    assert max_running == 2
+
+
+async def test_bounded_executor_propagates_exceptions():
+    executor = BoundedExecutor(1)
+
+    def task():
+        raise KeyError("missing")
+
+    try:
+        with pytest.raises(KeyError):
+            await executor.run(task)
+    finally:
+        executor.shutdown()
+    executor.shutdown()
+
+
+async def test_bounded_executor_counts_calls_until_their_worker_finishes():
+    executor = BoundedExecutor(1, max_queued=0)
+    started = threading.Event()
+    release = threading.Event()
+
+    def task():
+        started.set()
+        release.wait()
+
+    try:
+        call = asyncio.ensure_future(executor.run(task))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+        # The worker is still busy although nobody waits for it
+        assert executor.running == 1
+        with pytest.raises(ExecutorBusy):
+            await executor.run(task)
+
+        release.set()
+        await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+        assert (executor.running, executor.queued) == (0, 0)
+    finally:
+        release.set()
+        executor.shutdown()
@@ -219,6 +219,7 @@ def test_url_helpers_and_download_response(monkeypatch, tmp_path):
             "wirecloud.item": URLTemplate(urlpattern="/items/{id}/{path:path}", defaults={}),
         },
     )
+    monkeypatch.setattr(platform_plugins, "_wirecloud_url_router", None)
 
     rel = http.get_relative_reverse_url("wirecloud.item", req, id="1", path="a/b")
     assert rel == "/mount/items/1/a/b"
@@ -229,7 +230,7 @@ def test_url_helpers_and_download_response(monkeypatch, tmp_path):
     assert abs_url.startswith("http://")
 
     resolved = http.resolve_url_name("/items/1/a/b")
-    assert resolved[0] == "wirecloud.item"
+    assert resolved == ("wirecloud.item", {"id": "1", "path": "a/b"})
     assert http.resolve_url_name("/unknown") is None
 
     with pytest.raises(ValueError):
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import json
+import os
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from wirecloud.commons.utils import sharedcache
+
+
+SRC_PATH = str(Path(__file__).resolve().parents[2] / "src")
+
+# Every worker process owns a SharedCache connected to the same server and
+# executes the JSON commands it reads from stdin, one per line.
+WORKER_SCRIPT = textwrap.dedent("""
+    import asyncio, json, sys
+    from wirecloud.commons.utils.sharedcache import SharedCache
+
+    async def main(url):
+        cache = SharedCache(url, l1_ttl=60)
+        loop = asyncio.get_running_loop()
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                break
+            command = json.loads(line)
+            op = command["op"]
+            if op == "get":
+                result = await cache.get(command["key"])
+            elif op == "set":
+                result = await cache.set(command["key"], command["value"])
+            elif op == "delete":
+                result = await cache.delete(command["key"])
+            elif op == "clear":
+                result = await cache.clear()
+            elif op == "l1":
+                result = command["key"] in cache.l1
+            elif op == "ready":
+                await cache.get("__ready__")
+                while not cache._subscribed:
+                    await asyncio.sleep(0.01)
+                result = True
+            print(json.dumps(result), flush=True)
+        await cache.close()
+
+    asyncio.run(main(sys.argv[1]))
+""")
+
+
+class _Worker:
+    def __init__(self, process):
+        self.process = process
+
+    async def call(self, op, **kwargs):
+        self.process.stdin.write((json.dumps(dict(op=op, **kwargs)) + "\n").encode("utf-8"))
+        await self.process.stdin.drain()
+        line = await asyncio.wait_for(self.process.stdout.readline(), 10)
+        return json.loads(line)
+
+    async def close(self):
+        self.process.stdin.close()
+        await asyncio.wait_for(self.process.wait(), 10)
+
+
+async def _eventually(check, timeout=5):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not await check():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.02)
+
+
+@pytest.fixture
+async def cache_server(tmp_path):
+    path = str(tmp_path / "cache.sock")
+    server = sharedcache.CacheServer(path)
+    await server.start()
+    yield server, f"unix://{path}"
+    await server.close()
+
+
+@pytest.fixture
+async def workers(cache_server):
+    _server, url = cache_server
+    env = dict(os.environ, PYTHONPATH=SRC_PATH)
+    started = []
+    for _i in range(3):
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", WORKER_SCRIPT, url,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, env=env,
+        )
+        started.append(_Worker(process))
+
+    for worker in started:
+        assert await worker.call("ready") is True
+
+    yield started
+
+    for worker in started:
+        await worker.close()
+
+
+def test_resp_connection_url_parsing():
+    unix = sharedcache.RESPConnection("unix:///tmp/cache.sock?db=2&password=secret")
+    assert (unix.path, unix.db, unix.password) == ("/tmp/cache.sock", 2, "secret")
+
+    tcp = sharedcache.RESPConnection("redis://:pass@cache.example.org:6380/3")
+    assert (tcp.host, tcp.port, tcp.db, tcp.password) == ("cache.example.org", 6380, 3, "pass")
+
+    default = sharedcache.RESPConnection("redis://")
+    assert (default.host, default.port, default.db, default.password) == ("localhost", 6379, 0, None)
+
+    with pytest.raises(ValueError, match="Unsupported cache URL scheme"):
+        sharedcache.RESPConnection("memcached://localhost")
+
+
+async def test_cache_server_commands(cache_server):
+    _server, url = cache_server
+    connection = sharedcache.RESPConnection(url + "?db=1&password=x")
+
+    assert await connection.execute("PING") == "PONG"
+    assert await connection.execute("SET", "a", "1") == "OK"
+    assert await connection.execute("GET", "a") == b"1"
+    assert await connection.execute("EXISTS", "a", "b") == 1
+    assert await connection.execute("SET", "b", "2", "PX", 1) == "OK"
+    await asyncio.sleep(0.01)
+    assert await connection.execute("GET", "b") is None
+    assert await connection.execute("SCAN", "0", "MATCH", "a*") == [b"0", [b"a"]]
+    assert await connection.execute("DEL", "a", "b") == 1
+    assert await connection.execute("PUBLISH", "channel", "message") == 0
+
+    with pytest.raises(sharedcache.SharedCacheError, match="unknown command"):
+        await connection.execute("HGETALL", "a")
+    with pytest.raises(sharedcache.SharedCacheError, match="wrong arguments"):
+        await connection.execute("SET", "a")
+
+    assert await connection.execute("SET", "c", "3", "EX", 10) == "OK"
+    assert await connection.execute("FLUSHDB") == "OK"
+    assert await connection.execute("GET", "c") is None
+    await connection.close()
+
+
+async def test_shared_cache_tiers_and_invalidation(cache_server):
+    _server, url = cache_server
+    writer = sharedcache.SharedCache(url, ttl=60)
+    reader = sharedcache.SharedCache(url, ttl=60)
+
+    assert await reader.get("missing", "default") == "default"
+    assert await writer.get("missing") is None
+    await _eventually(lambda: _true(reader._subscribed and writer._subscribed))
+
+    assert await writer.set("key", {"v": 1}) is True
+    assert await reader.get("key") == {"v": 1}
+    assert "key" in reader.l1
+    assert await reader.exists("key") is True
+
+    await writer.set("key", {"v": 2}, ttl=None)
+    await _eventually(lambda: _true("key" not in reader.l1))
+    assert await reader.get("key") == {"v": 2}
+
+    assert await writer.delete("key") == 1
+    await _eventually(lambda: _true("key" not in reader.l1))
+    assert await reader.get("key") is None
+    assert await reader.exists("key") is False
+
+    await writer.set("a", 1)
+    await reader.set("b", 2)
+    assert await writer.get("b") == 2
+    await reader.clear()
+    await _eventually(lambda: _true(len(writer.l1) == 0))
+    assert await writer.get("a") is None
+
+    await writer.close()
+    await reader.close()
+
+
+async def test_shared_cache_exists_starts_the_listener(cache_server):
+    _server, url = cache_server
+    cache = sharedcache.SharedCache(url)
+
+    # Entries left in the L1 before the listener is started may have been invalidated by other workers
+    cache.l1.set("key", "stale")
+    assert await cache.exists("key") is False
+    assert cache._listener is not None
+
+    await cache.close()
+
+
+async def test_shared_cache_ignores_replies_for_keys_invalidated_meanwhile(cache_server):
+    _server, url = cache_server
+    cache = sharedcache.SharedCache(url)
+    other = sharedcache.SharedCache(url)
+    await cache.get("warmup")
+    await _eventually(lambda: _true(cache._subscribed))
+    await other.set("key", "old")
+
+    execute = cache._execute
+    invalidations = []
+
+    async def _execute(*args, **kwargs):
+        result = await execute(*args, **kwargs)
+        if invalidations:
+            # Another worker replaces the value while the reply is on its way
+            await other.set("key", invalidations.pop())
+            await _eventually(lambda: _true(cache._operations["key"][1] > 0))
+        return result
+
+    cache._execute = _execute
+    invalidations.append("new")
+    assert await cache.get("key") == "old"
+    assert "key" not in cache.l1
+    assert await cache.get("key") == "new"
+    assert cache.l1.get("key") == "new"
+
+    invalidations.append("newer")
+    assert await cache.set("key", "mine") is True
+    assert "key" not in cache.l1
+    assert cache._operations == {}
+
+    await cache.close()
+    await other.close()
+
+
+async def test_shared_cache_delivers_published_messages_to_other_workers(cache_server):
+    _server, url = cache_server
+    cache = sharedcache.SharedCache(url)
+    other = sharedcache.SharedCache(url)
+    received = []
+    other_received = []
+    cache.add_listener("topic", received.append)
+    other.add_listener("topic", other_received.append)
+    other.add_listener("topic", other_received.append)
+    assert other.is_listening() is False
+    await _eventually(lambda: _true(cache.is_listening() and other.is_listening()))
+    # Listeners are notified with None when the listener is started
+    assert received == [None]
+    assert other_received == [None]
+
+    await cache.publish("topic", {"users": ["a"]})
+    await cache.publish("another", {"users": ["b"]})
+    await _eventually(lambda: _true(len(other_received) == 2))
+    assert other_received == [None, {"users": ["a"]}]
+    assert received == [None]
+
+    await cache.close()
+    await other.close()
+
+
+async def test_shared_cache_degrades_when_the_server_is_unavailable(tmp_path):
+    cache = sharedcache.SharedCache(f"unix://{tmp_path / 'missing.sock'}")
+
+    assert await cache.get("key", "default") == "default"
+    assert await cache.set("key", 1) is False
+    assert "key" not in cache.l1
+    assert await cache.delete("key") == 0
+    assert await cache.exists("key") is False
+    assert await cache.clear() is True
+    assert cache._subscribed is False
+
+    await cache.close()
+
+
+async def test_shared_cache_flushes_l1_when_the_invalidation_channel_is_lost(tmp_path):
+    path = str(tmp_path / "cache.sock")
+    server = sharedcache.CacheServer(path)
+    await server.start()
+
+    cache = sharedcache.SharedCache(f"unix://{path}")
+    received = []
+    cache.add_listener("topic", received.append)
+    await cache.get("warmup")
+    await _eventually(lambda: _true(cache._subscribed))
+    await cache.set("key", "value")
+    assert "key" in cache.l1
+
+    await server.close()
+    await _eventually(lambda: _true(not cache._subscribed))
+    assert len(cache.l1) == 0
+    assert received == [None, None]
+
+    server = sharedcache.CacheServer(path)
+    os.unlink(path)
+    await server.start()
+    await _eventually(lambda: _true(cache._subscribed))
+
+    await cache.close()
+    await server.close()
+
+
+async def test_multiple_worker_processes_stay_coherent(workers):
+    first, second, third = workers
+
+    assert await first.call("set", key="workspace", value={"rev": 1}) is True
+    for worker in (second, third):
+        assert await worker.call("get", key="workspace") == {"rev": 1}
+
+        # The first read is not kept in the L1 if the invalidation sent by the write arrives meanwhile
+        async def _cached(worker=worker):
+            return await worker.call("get", key="workspace") == {"rev": 1} and \
+                await worker.call("l1", key="workspace") is True
+
+        await _eventually(_cached)
+
+    # Overwriting the value on one worker must drop the stale copies on the others
+    assert await second.call("set", key="workspace", value={"rev": 2}) is True
+
+    async def _all_see_rev_2():
+        return all([await worker.call("get", key="workspace") == {"rev": 2} for worker in workers])
+
+    await _eventually(_all_see_rev_2)
+
+    assert await third.call("delete", key="workspace") == 1
+
+    async def _all_miss():
+        return all([await worker.call("get", key="workspace") is None for worker in workers])
+
+    await _eventually(_all_miss)
+
+    await first.call("set", key="a", value=1)
+    await second.call("get", key="a")
+    await third.call("clear")
+
+    async def _cleared():
+        return await second.call("get", key="a") is None
+
+    await _eventually(_cleared)
+
+
+async def _true(value):
+    return value
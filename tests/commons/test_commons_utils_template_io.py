@@ -168,6 +168,27 @@ def test_xml_parser_widget_macversion_1_rejects_scripts(monkeypatch):
         parser.get_resource_info()
 
 
+def test_xml_parser_compiled_xpaths_and_lazy_schema(monkeypatch):
+    xpath = xml_parser.compile_xpath("t:details/t:title")
+    assert isinstance(xpath, etree.XPath)
+    assert xml_parser.compile_xpath("t:details/t:title") is xpath
+
+    doc = etree.fromstring(f'<widget xmlns="{WIRECLOUD_TEMPLATE_NS}"><details><title>Title</title></details></widget>')
+    assert [element.text for element in xpath(doc)] == ["Title"]
+
+    monkeypatch.setattr(xml_parser, "XMLSCHEMA", None)
+    schema = xml_parser.get_xml_schema()
+    assert isinstance(schema, etree.XMLSchema)
+    assert xml_parser.get_xml_schema() is schema
+
+
+def test_template_parser_loads_rdf_parser_on_demand():
+    from wirecloud.commons.utils.template import TemplateParser
+
+    rdf_fallback = TemplateParser.parsers[-1]
+    assert isinstance(rdf_fallback(rdflib.Graph()), rdf_parser.RDFTemplateParser)
+
+
 def test_rdf_parser_init_branches(monkeypatch):
     rdf_parser._ = lambda text: text
 
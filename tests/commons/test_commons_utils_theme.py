@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import os
 from pathlib import Path
 from types import SimpleNamespace
 
@@ -181,12 +182,18 @@ def test_get_available_themes(monkeypatch, tmp_path):
     monkeypatch.setattr(theme.gt, "translation", lambda *_a, **_k: gt.NullTranslations())
     result = theme.get_available_themes("en")
     assert result == [{"value": "a", "label": "Theme-en"}]
+    assert theme.get_available_themes("en") is result
+    assert theme.get_available_themes("es") == [{"value": "a", "label": "Theme-es"}]
 
     monkeypatch.setattr(theme.gt, "translation", lambda *_a, **_k: (_ for _ in ()).throw(RuntimeError("x")))
     mod_a.label = "StaticLabel"
+    assert theme.get_available_themes("en") is result
+
+    theme.clear_available_themes_cache()
     result2 = theme.get_available_themes("en")
     assert result2 == [{"value": "a", "label": "StaticLabel"}]
 
+    theme.clear_available_themes_cache()
     monkeypatch.setattr(theme, "AVAILABLE_THEMES", ["nolabel"])
     with pytest.raises(ValueError):
         theme.get_available_themes("en")
@@ -318,3 +325,78 @@ def test_get_theme_static_path(monkeypatch, tmp_path):
 
     with pytest.raises(NotFound):
         theme.get_theme_static_path("a", "missing.js")
+
+
+def test_find_static_file_uses_the_index(monkeypatch, tmp_path):
+    dist = tmp_path / "dist"
+    theme_static = tmp_path / "themes" / "a" / "static"
+    plugin_static = tmp_path / "plugin" / "static"
+    for directory in (dist, theme_static / "css", plugin_static):
+        directory.mkdir(parents=True)
+    (dist / "main.js").write_text("dist")
+    (theme_static / "main.js").write_text("theme")
+    (theme_static / "css" / "style.css").write_text("theme")
+    (plugin_static / "plugin.js").write_text("plugin")
+
+    monkeypatch.setattr(theme, "AVAILABLE_THEMES", ["a"])
+    monkeypatch.setattr(theme, "get_static_dirs", lambda _theme: [str(dist), str(theme_static), str(plugin_static)])
+    theme.clear_static_files_index()
+    theme.build_static_files_index()
+
+    # Directories with more precedence win
+    assert theme.find_static_file("a", "main.js") == str(dist / "main.js")
+    assert theme.find_static_file("a", "/css/style.css") == str(theme_static / "css" / "style.css")
+    assert theme.find_static_file("a", "plugin.js") == str(plugin_static / "plugin.js")
+
+    with pytest.raises(NotFound):
+        theme.find_static_file("missing", "main.js")
+    with pytest.raises(ValueError):
+        theme.find_static_file("a", "../main.js")
+
+    # Files missing from the index are searched on disk, and refreshed on demand
+    monkeypatch.setattr(theme, "get_theme_static_path", lambda _theme, path: f"/disk/{path}")
+    assert theme.find_static_file("a", "late.js") == "/disk/late.js"
+    assert theme.find_static_file("a", "main.js", refresh=True) == "/disk/main.js"
+    assert theme.STATIC_FILES_INDEX["a"]["late.js"] == "/disk/late.js"
+
+    assert theme.find_static_file_version("a", "css/style.css") == theme.get_static_file_version(os.stat(theme_static / "css" / "style.css"))
+    assert theme.find_static_file_version("a", "late.js") is None
+
+    (theme_static / "css" / "style.css.gz").write_bytes(b"gz")
+    (dist / "plugin.js.gz").write_bytes(b"gz")
+    theme.clear_static_files_index()
+    assert theme.STATIC_FILES_INDEX == {}
+    theme.build_static_files_index()
+    assert theme.get_static_file_variant("a", "css/style.css", str(theme_static / "css" / "style.css"), ".gz") == str(theme_static / "css" / "style.css.gz")
+    assert theme.get_static_file_variant("a", "css/style.css", str(theme_static / "css" / "style.css"), ".br") is None
+    # Variants of other directories are not used
+    assert theme.get_static_file_variant("a", "plugin.js", str(plugin_static / "plugin.js"), ".gz") is None
+
+
+def test_static_dirs_and_aliases(monkeypatch, tmp_path):
+    child = SimpleNamespace(__file__=str(tmp_path / "child" / "__init__.py"), parent="base")
+    base = SimpleNamespace(__file__=str(tmp_path / "base" / "__init__.py"), parent="missing")
+    modules = {"wirecloud.themes.child": child, "wirecloud.themes.base": base}
+
+    def _import(name):
+        if name in modules:
+            return modules[name]
+        raise ModuleNotFoundError(name)
+
+    class _Plugin:
+        pass
+
+    monkeypatch.setattr(theme, "import_module", _import)
+    monkeypatch.setattr(theme, "get_plugins", lambda: [_Plugin()])
+    monkeypatch.setattr(theme.inspect, "getfile", lambda _cls: str(tmp_path / "plugin" / "plugins.py"))
+    assert theme.get_static_dirs("child") == [
+        theme.DIST_PATH,
+        str(tmp_path / "child" / "static"),
+        str(tmp_path / "base" / "static"),
+        str(tmp_path / "plugin" / "static"),
+    ]
+    assert theme.get_static_dirs("unknown") == [theme.DIST_PATH, str(tmp_path / "plugin" / "static")]
+
+    assert theme.resolve_static_alias("t", "css/cache.css", "classic", "widget") == "css/t_classic_widget.css"
+    assert theme.resolve_static_alias("t", "js/cache.js", "smartphone") == "js/main-t-smartphone.js"
+    assert theme.resolve_static_alias("t", "images/logo.png") == "images/logo.png"
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from wirecloud.commons.utils.urlrouter import URLRouter
+from wirecloud.platform.plugins import URLTemplate
+
+
+def _router():
+    return URLRouter({
+        "root": URLTemplate(urlpattern="/", defaults={}),
+        "resource": URLTemplate(urlpattern="/api/resource/{vendor}/{name}/{version}", defaults={}),
+        "resource_entry": URLTemplate(urlpattern="/api/resource/{vendor}/{name}/{version}/{file_path:path}",
+                                      defaults={}),
+        "resources": URLTemplate(urlpattern="/api/resources", defaults={}),
+        "proxy": URLTemplate(urlpattern="/cdp/{protocol}/{domain}/{path:path}", defaults={}),
+        "suffixed": URLTemplate(urlpattern="/api/file-{id}.json", defaults={}),
+        "workspace": URLTemplate(urlpattern="/{owner}/{name}", defaults={}),
+    })
+
+
+def test_url_router_resolve():
+    router = _router()
+
+    assert router.resolve("/") == ("root", {})
+    assert router.resolve("/api/resources") == ("resources", {})
+    assert router.resolve("/alice/main") == ("workspace", {"owner": "alice", "name": "main"})
+    assert router.resolve("/api/resource/acme/widget/1.0") == (
+        "resource", {"vendor": "acme", "name": "widget", "version": "1.0"})
+    assert router.resolve("/api/resource/acme/widget/1.0/images/a.png") == (
+        "resource_entry", {"vendor": "acme", "name": "widget", "version": "1.0", "file_path": "images/a.png"})
+    assert router.resolve("/cdp/https/example.com/a/b?c") == (
+        "proxy", {"protocol": "https", "domain": "example.com", "path": "a/b?c"})
+    assert router.resolve("/api/file-3.json") == ("suffixed", {"id": "3"})
+    assert router.resolve("/api/v1/file-3xjson") is None
+    assert router.resolve("/a/b/c") is None
+    assert router.resolve("") is None
+
+
+def test_url_router_keeps_declaration_order():
+    router = URLRouter({
+        "generic": URLTemplate(urlpattern="/{owner}/{name}", defaults={}),
+        "specific": URLTemplate(urlpattern="/api/features", defaults={}),
+    })
+    assert router.resolve("/api/features") == ("generic", {"owner": "api", "name": "features"})
+
+
+def test_url_router_reverse():
+    router = _router()
+
+    assert "workspace" in router
+    assert "unknown" not in router
+    assert router.reverse("root", {}) == "/"
+    assert router.reverse("workspace", {"owner": "alice", "name": 1, "extra": "x"}) == "/alice/1"
+    assert router.reverse("resource_entry", {"vendor": "v", "name": "n", "version": "1",
+                                             "file_path": "a/b.js"}) == "/api/resource/v/n/1/a/b.js"
+    assert router.reverse("workspace", {"owner": "alice"}) == "/alice/{name}"
+
+    with pytest.raises(ValueError):
+        router.reverse("unknown", {})
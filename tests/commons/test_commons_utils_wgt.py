@@ -154,3 +154,62 @@ def test_update_config_and_deployer(tmp_path, monkeypatch):
     deployer.undeploy("acme", "widget", "1.0.0")
     assert not base_dir.exists()
     deployer.undeploy("acme", "widget", "1.0.0")
+
+
+async def test_run_packaging_task_keeps_event_loop_responsive(tmp_path, monkeypatch):
+    import asyncio
+    import os
+    import threading
+    import time
+
+    from wirecloud import translation
+
+    monkeypatch.setattr(wgt, "_packaging_executor", None)
+    monkeypatch.setattr(translation.settings, "WGT_PACKAGING_CONCURRENCY", 2, raising=False)
+
+    entries = {"config.xml": b"<widget/>"}
+    for i in range(8):
+        entries["images/file%d.bin" % i] = os.urandom(512 * 1024)
+    wgt_path = tmp_path / "big.wgt"
+    wgt_path.write_bytes(_zip_bytes(entries))
+
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def extract(index):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        try:
+            wgt_file = wgt.WgtFile(str(wgt_path))
+            wgt_file.extract(str(tmp_path / ("out%d" % index)))
+            wgt_file.close()
+            return translation.find_request_language()
+        finally:
+            with lock:
+                running -= 1
+
+    max_lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal max_lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            max_lag = max(max_lag, time.perf_counter() - start - 0.005)
+
+    ticker_task = asyncio.create_task(ticker())
+    with translation.override_language("es"):
+        results = await asyncio.gather(*(wgt.run_packaging_task(extract, i) for i in range(6)))
+    done = True
+    await ticker_task
+    wgt.shutdown_packaging_executor()
+
+    assert results == ["es"] * 6
+    assert max_running <= 2
+    assert max_lag < 0.25
+    assert (tmp_path / "out5" / "images" / "file7.bin").stat().st_size == 512 * 1024
+    assert wgt._packaging_executor is None
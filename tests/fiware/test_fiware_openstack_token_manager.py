@@ -1,14 +1,17 @@
 # -*- coding: utf-8 -*-
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from types import SimpleNamespace
 
+from unittest.mock import AsyncMock
+
 import pytest
 from bson import ObjectId
 
 from wirecloud import settings
 from wirecloud.commons.auth.schemas import UserAll
 from wirecloud.database import Id
+from wirecloud.commons.auth import idm_tokens
 from wirecloud.fiware import openstack_token_manager as otm
 
 
@@ -76,6 +79,20 @@ def _sample_user(idm_data=None, username="user1"):
     )
 
 
+def _store_users(monkeypatch, *users):
+    stored = {user.id: user.model_copy(deep=True) for user in users}
+
+    async def _get_user_by_id(_db, user_id):
+        return stored[user_id].model_copy(deep=True)
+
+    monkeypatch.setattr(idm_tokens, "get_user_by_id", _get_user_by_id)
+    monkeypatch.setattr(idm_tokens, "get_session", _primary_session)
+
+
+async def _primary_session():
+    yield SimpleNamespace()
+
+
 async def test_first_step_openstack_success_and_errors(monkeypatch):
     monkeypatch.setattr(settings, "WIRECLOUD_HTTPS_VERIFY", False)
 
@@ -131,7 +148,15 @@ async def test_get_openstack_project_token(monkeypatch):
     monkeypatch.setattr(otm.aiohttp, "ClientSession", lambda: _FakeClientSession(post_response=ok_response))
 
     token = await otm.get_openstack_project_token("https://cloud/auth/tokens", "p1", "idm-token")
+    assert token == ("project-token", None)
+
+    expires_at = (datetime.now(timezone.utc) + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%S.000000Z")
+    ok_response = _FakeResponse(status=201, headers={"X-Subject-Token": "project-token"},
+                                payload={"token": {"expires_at": expires_at}})
+    monkeypatch.setattr(otm.aiohttp, "ClientSession", lambda: _FakeClientSession(post_response=ok_response))
+    token, expires_in = await otm.get_openstack_project_token("https://cloud/auth/tokens", "p1", "idm-token")
     assert token == "project-token"
+    assert 3500 < expires_in <= 3600
 
     no_token = _FakeResponse(status=201, headers={})
     monkeypatch.setattr(otm.aiohttp, "ClientSession", lambda: _FakeClientSession(post_response=no_token))
@@ -147,18 +172,15 @@ async def test_get_openstack_project_token(monkeypatch):
 async def test_manager_get_token_paths(monkeypatch):
     manager = otm.OpenStackTokenManager("https://cloud")
 
-    cached_user = _sample_user({"openstack_token": {"__default__": "cached-token"}})
-    assert await manager.get_token(SimpleNamespace(), cached_user, None) == "cached-token"
-
     monkeypatch.setattr(settings, "OID_CONNECT_ENABLED", False)
     with pytest.raises(Exception, match="OIDC is not enabled"):
-        await manager.get_token(SimpleNamespace(), _sample_user({}), "tenant-a")
+        await manager.get_token(_sample_user({}), "tenant-a")
 
     monkeypatch.setattr(settings, "OID_CONNECT_ENABLED", True)
     monkeypatch.setattr(settings, "OID_CONNECT_PLUGIN", "fiware")
     monkeypatch.setattr(otm, "get_idm_get_token_functions", lambda: {})
     with pytest.raises(Exception, match="OIDC provider is not configured correctly"):
-        await manager.get_token(SimpleNamespace(), _sample_user({"fiware": {"idm_token": "r0"}}), "tenant-a")
+        await manager.get_token(_sample_user({"fiware": {"idm_token": "r0"}}), "tenant-a")
 
 
 async def test_manager_get_token_sync_async_and_value_error(monkeypatch):
@@ -171,10 +193,11 @@ async def test_manager_get_token_sync_async_and_value_error(monkeypatch):
     async def _update_user(_db, _user):
         updated["called"] = True
 
-    monkeypatch.setattr(otm, "update_user", _update_user)
+    monkeypatch.setattr(idm_tokens, "update_user", _update_user)
+    monkeypatch.setattr(idm_tokens, "commit", AsyncMock())
 
     async def _fake_openstack_token(_username, _access_token, _tenant):
-        return "openstack-token"
+        return "openstack-token", None
 
     monkeypatch.setattr(manager, "get_openstack_token", _fake_openstack_token)
 
@@ -185,10 +208,13 @@ async def test_manager_get_token_sync_async_and_value_error(monkeypatch):
         return {"access_token": "a1", "refresh_token": "r2"}
 
     monkeypatch.setattr(otm, "get_idm_get_token_functions", lambda: {"fiware": _async_token_getter})
+    monkeypatch.setattr(idm_tokens, "get_idm_get_token_functions", lambda: {"fiware": _async_token_getter})
     user = _sample_user({"fiware": {"idm_token": "r1"}})
-    token = await manager.get_token(SimpleNamespace(), user, None)
+    user2 = _sample_user({"fiware": {"idm_token": "r3"}})
+    broken_user = _sample_user({"fiware": {"idm_token": "r5"}})
+    _store_users(monkeypatch, user, user2, broken_user)
+    token = await manager.get_token(user, None)
     assert token == "openstack-token"
-    assert user.idm_data["fiware"]["openstack_token"] == "openstack-token"
     assert user.idm_data["fiware"]["idm_token"] == "r2"
     assert updated["called"] is True
 
@@ -197,8 +223,8 @@ async def test_manager_get_token_sync_async_and_value_error(monkeypatch):
         return {"access_token": "a2", "refresh_token": "r4"}
 
     monkeypatch.setattr(otm, "get_idm_get_token_functions", lambda: {"fiware": _sync_token_getter})
-    user2 = _sample_user({"fiware": {"idm_token": "r3"}})
-    token2 = await manager.get_token(SimpleNamespace(), user2, "tenant-b")
+    monkeypatch.setattr(idm_tokens, "get_idm_get_token_functions", lambda: {"fiware": _sync_token_getter})
+    token2 = await manager.get_token(user2, "tenant-b")
     assert token2 == "openstack-token"
     assert user2.idm_data["fiware"]["idm_token"] == "r4"
 
@@ -206,8 +232,9 @@ async def test_manager_get_token_sync_async_and_value_error(monkeypatch):
         raise ValueError("broken")
 
     monkeypatch.setattr(otm, "get_idm_get_token_functions", lambda: {"fiware": _broken_token_getter})
+    monkeypatch.setattr(idm_tokens, "get_idm_get_token_functions", lambda: {"fiware": _broken_token_getter})
     with pytest.raises(Exception, match="Error retrieving token from IDM"):
-        await manager.get_token(SimpleNamespace(), _sample_user({"fiware": {"idm_token": "r5"}}), "tenant-c")
+        await manager.get_token(broken_user, "tenant-c")
 
 
 async def test_manager_get_openstack_token_paths(monkeypatch):
@@ -235,7 +262,7 @@ async def test_manager_get_openstack_token_paths(monkeypatch):
         captured["url"] = url
         captured["project_id"] = project_id
         captured["idm_token"] = idm_token
-        return "project-token"
+        return "project-token", 3600
 
     monkeypatch.setattr(otm, "first_step_openstack", _first_step)
     monkeypatch.setattr(otm, "get_projects", _get_projects)
@@ -243,11 +270,11 @@ async def test_manager_get_openstack_token_paths(monkeypatch):
     monkeypatch.setattr(otm, "get_openstack_project_token", _project_token)
 
     token = await manager.get_openstack_token("alice", "idm-1", "__default__")
-    assert token == "project-token"
+    assert token == ("project-token", 3600)
     assert captured["project_id"] == "p2"
 
     token2 = await manager.get_openstack_token("alice", "idm-2", "p2")
-    assert token2 == "project-token"
+    assert token2 == ("project-token", 3600)
 
     async def _projects_without_match(_url, _general, _username):
         return {"role_assignments": [{"scope": {}}, {"scope": {"project": {"id": "p3"}}}]}
@@ -260,3 +287,36 @@ async def test_manager_get_openstack_token_paths(monkeypatch):
 
     with pytest.raises(Exception, match="No OpenStack cloud project found for the user"):
         await manager.get_openstack_token("alice", "idm-3", "p2")
+
+
+async def test_manager_get_token_caches_project_tokens(monkeypatch):
+    manager = otm.OpenStackTokenManager("https://cloud")
+    monkeypatch.setattr(settings, "OID_CONNECT_ENABLED", True)
+    monkeypatch.setattr(settings, "OID_CONNECT_PLUGIN", "fiware")
+
+    calls = []
+
+    def _token_getter(refresh_token, code, redirect_uri):
+        calls.append(("idm", refresh_token))
+        return {"access_token": "a1", "refresh_token": refresh_token, "expires_in": 3600}
+
+    async def _fake_openstack_token(_username, access_token, tenant):
+        calls.append(("openstack", access_token, tenant))
+        return "openstack-token-%s" % tenant, 3600
+
+    monkeypatch.setattr(otm, "get_idm_get_token_functions", lambda: {"fiware": _token_getter})
+    monkeypatch.setattr(idm_tokens, "get_idm_get_token_functions", lambda: {"fiware": _token_getter})
+    monkeypatch.setattr(manager, "get_openstack_token", _fake_openstack_token)
+
+    user = _sample_user({"fiware": {"idm_token": "r1"}})
+    _store_users(monkeypatch, user)
+    assert await manager.get_token(user, "t1") == "openstack-token-t1"
+    assert await manager.get_token(user, "t1") == "openstack-token-t1"
+    assert await manager.get_token(user, "t2") == "openstack-token-t2"
+
+    # The refresh token was not rotated, so the user was not saved, and the IdM access token was reused
+    assert calls == [("idm", "r1"), ("openstack", "a1", "t1"), ("openstack", "a1", "t2")]
+
+    idm_tokens.invalidate_idm_tokens(user.id)
+    await manager.get_token(user, "t1")
+    assert len(calls) == 5
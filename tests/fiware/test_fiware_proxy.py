@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import asyncio
 from datetime import datetime, timezone
 from types import SimpleNamespace
 from unittest.mock import AsyncMock
@@ -8,6 +9,7 @@ import pytest
 from bson import ObjectId
 
 from wirecloud import settings
+from wirecloud.commons.auth import idm_tokens
 from wirecloud.commons.auth.schemas import UserAll
 from wirecloud.database import Id
 from wirecloud.fiware import proxy
@@ -32,6 +34,27 @@ def _sample_user(idm_data=None, username="user1"):
     )
 
 
+def _store_users(monkeypatch, *users):
+    # Users as stored in the database, the IdM tokens are exchanged using the stored refresh tokens
+    stored = {user.id: user.model_copy(deep=True) for user in users}
+
+    async def _get_user_by_id(_db, user_id):
+        user = stored.get(user_id)
+        return user.model_copy(deep=True) if user is not None else None
+
+    monkeypatch.setattr(idm_tokens, "get_user_by_id", _get_user_by_id)
+    monkeypatch.setattr(idm_tokens, "get_session", _primary_session)
+    return stored
+
+
+# The IdM tokens are read and updated through a regular (primary) session, not through the one of the request
+PRIMARY_SESSION = SimpleNamespace()
+
+
+async def _primary_session():
+    yield PRIMARY_SESSION
+
+
 def _request(headers=None, url="https://api.example.org/path", data=None, user=None, workspace_creator="owner"):
     return SimpleNamespace(
         workspace=SimpleNamespace(creator=workspace_creator),
@@ -81,6 +104,10 @@ async def test_get_header_or_query_and_replacers_basic_paths():
     assert req6.headers == {}
 
 
+async def _read(data):
+    return b"".join([chunk async for chunk in data])
+
+
 async def test_replace_body_pattern_bytes_generator_and_error(monkeypatch):
     monkeypatch.setattr(proxy, "_", lambda text: text)
 
@@ -99,7 +126,7 @@ async def test_replace_body_pattern_bytes_generator_and_error(monkeypatch):
 
     req_gen = _request(headers={"fiware-openstack-body-pattern": "__TOKEN__"}, data=_chunks())
     await proxy.replace_body_pattern(req_gen, ["fiware-openstack-body-pattern"], "RIGHT")
-    assert req_gen.data == b"left-RIGHT"
+    assert await _read(req_gen.data) == b"left-RIGHT"
 
     class _EmptyAsyncData:
         def __aiter__(self):
@@ -110,8 +137,8 @@ async def test_replace_body_pattern_bytes_generator_and_error(monkeypatch):
 
     req_empty_gen = _request(headers={"fiware-openstack-body-pattern": "__TOKEN__"}, data=_EmptyAsyncData())
     await proxy.replace_body_pattern(req_empty_gen, ["fiware-openstack-body-pattern"], "RIGHT")
-    assert req_empty_gen.data == b""
-    assert req_empty_gen.headers["content-length"] == "0"
+    assert await _read(req_empty_gen.data) == b""
+    assert "content-length" not in req_empty_gen.headers
 
     async def _empty_async_generator():
         return
@@ -119,8 +146,7 @@ async def test_replace_body_pattern_bytes_generator_and_error(monkeypatch):
 
     req_empty_gen2 = _request(headers={"fiware-openstack-body-pattern": "__TOKEN__"}, data=_empty_async_generator())
     await proxy.replace_body_pattern(req_empty_gen2, ["fiware-openstack-body-pattern"], "RIGHT")
-    assert req_empty_gen2.data == b""
-    assert req_empty_gen2.headers["content-length"] == "0"
+    assert await _read(req_empty_gen2.data) == b""
 
     req_error = _request(headers={"fiware-oauth-body-pattern": "__TOKEN__"}, data=None)
     with pytest.raises(ValidationError, match="No body data to replace pattern"):
@@ -202,11 +228,20 @@ async def test_idm_processor_token_fetch_error(monkeypatch):
         raise ValueError("boom")
 
     monkeypatch.setattr(proxy, "get_user_preferences", _prefs)
-    monkeypatch.setattr(proxy, "get_idm_get_token_functions", lambda: {"fiware": _broken_token_getter})
+    monkeypatch.setattr(idm_tokens, "get_idm_get_token_functions", lambda: {"fiware": _broken_token_getter})
 
-    req = _request(headers={"fiware-oauth-token": "1"}, user=_sample_user({"fiware": {"idm_token": "refresh"}}))
+    user = _sample_user({"fiware": {"idm_token": "refresh"}})
+    stored = _store_users(monkeypatch, user)
     with pytest.raises(Exception, match="Failed to get token from IdM"):
-        await processor.process_request(SimpleNamespace(), req)
+        await processor.process_request(SimpleNamespace(), _request(headers={"fiware-oauth-token": "1"}, user=user))
+
+    # The user was removed or logged out from the IdM meanwhile
+    stored[user.id].idm_data["fiware"] = {}
+    with pytest.raises(Exception, match="Failed to get token from IdM"):
+        await processor.process_request(SimpleNamespace(), _request(headers={"fiware-oauth-token": "1"}, user=user))
+    del stored[user.id]
+    with pytest.raises(Exception, match="Failed to get token from IdM"):
+        await processor.process_request(SimpleNamespace(), _request(headers={"fiware-oauth-token": "1"}, user=user))
 
 
 async def test_idm_processor_success_oauth_and_openstack(monkeypatch):
@@ -226,10 +261,11 @@ async def test_idm_processor_success_oauth_and_openstack(monkeypatch):
         return {"access_token": "access-a", "refresh_token": "refresh-b"}
 
     monkeypatch.setattr(proxy, "get_user_preferences", _prefs)
-    monkeypatch.setattr(proxy, "get_idm_get_token_functions", lambda: {"fiware": _token_getter})
-    monkeypatch.setattr(proxy, "update_user", AsyncMock())
+    monkeypatch.setattr(idm_tokens, "get_idm_get_token_functions", lambda: {"fiware": _token_getter})
+    monkeypatch.setattr(idm_tokens, "update_user", AsyncMock())
+    monkeypatch.setattr(idm_tokens, "commit", AsyncMock())
 
-    db = SimpleNamespace(commit=AsyncMock())
+    db = SimpleNamespace()
     req = _request(
         headers={
             "fiware-oauth-token": "1",
@@ -241,6 +277,7 @@ async def test_idm_processor_success_oauth_and_openstack(monkeypatch):
         data=b"v=__TOKEN__",
         user=_sample_user({"fiware": {"idm_token": "refresh-a"}}),
     )
+    _store_users(monkeypatch, req.user)
 
     await processor.process_request(db, req)
 
@@ -248,8 +285,12 @@ async def test_idm_processor_success_oauth_and_openstack(monkeypatch):
     assert req.headers["Authorization"] == "Bearer access-a"
     assert req.data == b"v=access-a"
     assert req.user.idm_data["fiware"]["idm_token"] == "refresh-b"
-    proxy.update_user.assert_awaited_once()
-    db.commit.assert_awaited_once()
+    idm_tokens.update_user.assert_awaited_once()
+    saved_db, saved_user = idm_tokens.update_user.await_args.args
+    assert saved_db is PRIMARY_SESSION
+    assert saved_user.id == req.user.id
+    assert saved_user.idm_data == {"fiware": {"idm_token": "refresh-b"}}
+    idm_tokens.commit.assert_awaited_once_with(PRIMARY_SESSION)
 
     owner = _sample_user({"fiware": {"idm_token": "refresh-owner"}}, username="owner")
 
@@ -262,19 +303,15 @@ async def test_idm_processor_success_oauth_and_openstack(monkeypatch):
             SimpleNamespace(name="external_token_domain_whitelist", value="api.example.org"),
         ]
 
-    async def _async_token_getter(refresh_token, code, redirect_uri):
-        assert refresh_token == "refresh-owner"
-        return {"access_token": "access-owner", "refresh_token": "refresh-owner-2"}
-
     fake_openstack = SimpleNamespace(get_token=AsyncMock(return_value="openstack-token"))
     processor.openstack_manager = fake_openstack
 
     monkeypatch.setattr(proxy, "get_user_with_all_info", _owner_user)
     monkeypatch.setattr(proxy, "get_user_preferences", _owner_prefs)
-    monkeypatch.setattr(proxy, "get_idm_get_token_functions", lambda: {"fiware": _async_token_getter})
-    monkeypatch.setattr(proxy, "update_user", AsyncMock())
+    monkeypatch.setattr(idm_tokens, "get_idm_get_token_functions", lambda: {})
+    monkeypatch.setattr(idm_tokens, "update_user", AsyncMock())
 
-    db2 = SimpleNamespace(commit=AsyncMock())
+    db2 = SimpleNamespace()
     req2 = _request(
         headers={
             "fiware-openstack-token": "1",
@@ -292,5 +329,103 @@ async def test_idm_processor_success_oauth_and_openstack(monkeypatch):
     await processor.process_request(db2, req2)
 
     assert req2.headers["X-Auth-Token"] == "openstack-token"
-    fake_openstack.get_token.assert_awaited_once_with(db2, owner, "tenant-1")
-    db2.commit.assert_awaited_once()
+    fake_openstack.get_token.assert_awaited_once_with(owner, "tenant-1")
+    # Only the OpenStack token was requested
+    idm_tokens.update_user.assert_not_awaited()
+
+
+async def test_idm_processor_reuses_access_tokens(monkeypatch):
+    monkeypatch.setattr(settings, "OID_CONNECT_ENABLED", True)
+    monkeypatch.setattr(settings, "OID_CONNECT_PLUGIN", "fiware")
+
+    processor = proxy.IDMTokenProcessor()
+    calls = []
+
+    async def _token_getter(refresh_token, code, redirect_uri):
+        calls.append(refresh_token)
+        await asyncio.sleep(0.01)
+        return {"access_token": "access-%d" % len(calls), "refresh_token": "refresh-b", "expires_in": 300}
+
+    monkeypatch.setattr(idm_tokens, "get_idm_get_token_functions", lambda: {"fiware": _token_getter})
+    monkeypatch.setattr(idm_tokens, "update_user", AsyncMock())
+    monkeypatch.setattr(idm_tokens, "commit", AsyncMock())
+
+    user = _sample_user({"fiware": {"idm_token": "refresh-a"}})
+    other_user = _sample_user({"fiware": {"idm_token": "refresh-a"}}, username="user2")
+    stored = _store_users(monkeypatch, user, other_user)
+
+    def _widget_request(request_user):
+        return _request(headers={"fiware-oauth-token": "1", "fiware-oauth-header-name": "Authorization"},
+                        user=request_user.model_copy(deep=True))
+
+    # Ten widgets of the same dashboard make a single IdM request and a single user write
+    requests = [_widget_request(user) for _i in range(10)]
+    await asyncio.gather(*[processor.process_request(SimpleNamespace(), req) for req in requests])
+    assert calls == ["refresh-a"]
+    assert {req.headers["Authorization"] for req in requests} == {"Bearer access-1"}
+    assert idm_tokens.update_user.await_count == 1
+
+    # Both the previous and the rotated refresh tokens are accepted until the access token expires
+    rotated = user.model_copy(deep=True)
+    rotated.idm_data["fiware"]["idm_token"] = "refresh-b"
+    for request_user in (user, rotated):
+        req = _widget_request(request_user)
+        await processor.process_request(SimpleNamespace(), req)
+        assert req.headers["Authorization"] == "Bearer access-1"
+    assert len(calls) == 1
+
+    # Tokens are scoped to the user and to their stored refresh token
+    await processor.process_request(SimpleNamespace(), _widget_request(other_user))
+    replaced = user.model_copy(deep=True)
+    replaced.idm_data["fiware"]["idm_token"] = "refresh-c"
+    stored[user.id] = replaced
+    await processor.process_request(SimpleNamespace(), _widget_request(replaced))
+    assert calls == ["refresh-a", "refresh-a", "refresh-c"]
+
+    # Tokens expiring within the safety margin are not cached
+    async def _short_lived(refresh_token, code, redirect_uri):
+        calls.append(refresh_token)
+        return {"access_token": "short", "refresh_token": refresh_token, "expires_in": 10}
+
+    monkeypatch.setattr(idm_tokens, "get_idm_get_token_functions", lambda: {"fiware": _short_lived})
+    idm_tokens.invalidate_idm_tokens(user.id)
+    stored[user.id] = rotated
+    for _i in range(2):
+        await processor.process_request(SimpleNamespace(), _widget_request(rotated))
+    assert calls[-2:] == ["refresh-b", "refresh-b"]
+
+
+async def test_idm_processor_exchanges_the_stored_refresh_token(monkeypatch):
+    monkeypatch.setattr(settings, "OID_CONNECT_ENABLED", True)
+    monkeypatch.setattr(settings, "OID_CONNECT_PLUGIN", "fiware")
+
+    processor = proxy.IDMTokenProcessor()
+    calls = []
+
+    def _token_getter(refresh_token, code, redirect_uri):
+        calls.append(refresh_token)
+        return {"access_token": "access-c", "refresh_token": "refresh-c", "expires_in": 300}
+
+    monkeypatch.setattr(idm_tokens, "get_idm_get_token_functions", lambda: {"fiware": _token_getter})
+    monkeypatch.setattr(idm_tokens, "update_user", AsyncMock())
+    monkeypatch.setattr(idm_tokens, "commit", AsyncMock())
+
+    # The principal cache still holds the refresh token rotated by another worker
+    cached_user = _sample_user({"fiware": {"idm_token": "refresh-a"}})
+    stored_user = cached_user.model_copy(deep=True)
+    stored_user.idm_data["fiware"]["idm_token"] = "refresh-b"
+    _store_users(monkeypatch, stored_user)
+
+    req = _request(headers={"fiware-oauth-token": "1", "fiware-oauth-header-name": "Authorization"}, user=cached_user)
+    await processor.process_request(SimpleNamespace(), req)
+
+    assert calls == ["refresh-b"]
+    assert req.headers["Authorization"] == "Bearer access-c"
+    assert idm_tokens.update_user.await_args.args[1].idm_data["fiware"]["idm_token"] == "refresh-c"
+
+    # Requests made with the stale copy reuse the token
+    stale = _request(headers={"fiware-oauth-token": "1", "fiware-oauth-header-name": "Authorization"},
+                     user=_sample_user({"fiware": {"idm_token": "refresh-a"}}).model_copy(update={"id": cached_user.id}))
+    await processor.process_request(SimpleNamespace(), stale)
+    assert stale.headers["Authorization"] == "Bearer access-c"
+    assert calls == ["refresh-b"]
@@ -3,8 +3,10 @@
 from types import SimpleNamespace
 
 from bson import ObjectId
+from bson.errors import InvalidId
 from starlette.requests import Request
 
+from wirecloud.commons.auth.cache import get_principal_cache
 from wirecloud.platform.context import crud, utils
 from wirecloud.platform.context.schemas import BaseContextKey, PlatformContextKey
 
@@ -89,33 +91,16 @@ async def test_platform_workspace_context_helpers(monkeypatch, db_session):
 
 
 async def test_constant_and_context_values_with_cache(monkeypatch, db_session):
-    class _FakeCache:
-        def __init__(self):
-            self.store = {}
-            self.get_calls = []
-            self.set_calls = []
-
-        async def get(self, key):
-            self.get_calls.append(key)
-            return self.store.get(key)
-
-        async def set(self, key, value):
-            self.set_calls.append((key, value))
-            self.store[key] = value
-
-    fake_cache = _FakeCache()
-    monkeypatch.setattr(utils, "cache", fake_cache)
-
     calls = {"constants": 0}
 
-    async def _constants(_db):
+    async def _all_constants(_db):
         calls["constants"] += 1
-        return {"constA": "1"}
+        return [SimpleNamespace(concept="constA", value="1")]
 
     async def _platform(_db, _request, _user, session=None):
         return {"dynamic": "2"}
 
-    monkeypatch.setattr(utils, "get_constant_context_values", _constants)
+    monkeypatch.setattr(utils, "get_all_constants", _all_constants)
     monkeypatch.setattr(utils, "get_platform_context_current_values", _platform)
     monkeypatch.setattr(utils, "get_workspace_context_current_values", lambda _workspace, _user: {"ws": "3"})
 
@@ -128,11 +113,96 @@ async def test_constant_and_context_values_with_cache(monkeypatch, db_session):
     assert first["workspace"] == {"ws": "3"}
     assert second["platform"]["constA"] == "1"
     assert calls["constants"] == 1
-    assert len(fake_cache.set_calls) == 1
 
+    # Callers get their own copy of the cached constants
+    first["platform"]["constA"] = "changed"
     anon = await utils.get_context_values(db_session, SimpleNamespace(), _request(), None)
     assert anon["platform"]["constA"] == "1"
-    assert "constant_context/anonymous" in fake_cache.get_calls
+    assert calls["constants"] == 1
+
+    utils.get_context_cache().invalidate_constants()
+    await utils.get_context_values(db_session, SimpleNamespace(), _request(), None)
+    assert calls["constants"] == 2
+
+
+async def test_platform_context_values_are_computed_once_per_request(monkeypatch, db_session):
+    calls = {"n": 0}
+
+    class _Plugin:
+        async def get_platform_context_current_values(self, _db, _request, _user, session=None):
+            calls["n"] += 1
+            return {"a": "va"}
+
+    monkeypatch.setattr(utils, "get_plugins", lambda: (_Plugin(),))
+
+    request = _request()
+    user = SimpleNamespace(id="u1")
+    first = await utils.get_platform_context_current_values(db_session, request, user)
+    first["a"] = "changed"
+    second = await utils.get_platform_context_current_values(db_session, request, user)
+    assert second == {"a": "va"}
+    assert calls["n"] == 1
+
+    await utils.get_platform_context_current_values(db_session, request, None)
+    await utils.get_platform_context_current_values(db_session, _request(), user)
+    await utils.get_platform_context_current_values(db_session, None, user)
+    assert calls["n"] == 4
+
+
+async def test_user_context_values_cache_and_invalidation(monkeypatch, db_session):
+    calls = {"groups": 0, "permissions": 0}
+
+    async def _groups(_db, _user_id):
+        calls["groups"] += 1
+        return [SimpleNamespace(name="dev")]
+
+    async def _permissions(_db, _user_id):
+        calls["permissions"] += 1
+        return [SimpleNamespace(codename="COMPONENT.VIEW")]
+
+    monkeypatch.setattr(utils, "get_user_groups", _groups)
+    monkeypatch.setattr(utils, "get_all_user_permissions", _permissions)
+
+    user = SimpleNamespace(id="507f1f77bcf86cd799439011", email=" Alice@Example.org ")
+    values = await utils.get_user_context_values(db_session, user)
+    assert values["groups"] == ("dev",)
+    assert values["permissions"] == ["COMPONENT.VIEW"]
+    assert values["avatar"].endswith("?s=25")
+
+    values["permissions"].append("other")
+    cached = await utils.get_user_context_values(db_session, user)
+    assert cached["permissions"] == ["COMPONENT.VIEW"]
+    assert calls == {"groups": 1, "permissions": 1}
+
+    # Invalidating the principal cache entries of the user also drops the context ones
+    get_principal_cache().invalidate_users([user.id])
+    await utils.get_user_context_values(db_session, user)
+    assert calls == {"groups": 2, "permissions": 2}
+
+    get_principal_cache().invalidate_users()
+    await utils.get_user_context_values(db_session, user)
+    assert calls == {"groups": 3, "permissions": 3}
+    assert utils.get_context_cache().stats()["users"]["size"] == 1
+
+    # Cached values are not used while the invalidations of other workers may be missed
+    monkeypatch.setattr(utils, "is_coherent", lambda: False)
+    await utils.get_user_context_values(db_session, user)
+    await utils.get_user_context_values(db_session, user)
+    assert calls == {"groups": 5, "permissions": 5}
+
+
+async def test_user_context_values_invalid_id(monkeypatch, db_session):
+    async def _groups(_db, _user_id):
+        return []
+
+    async def _permissions(_db, _user_id):
+        raise InvalidId("bad id")
+
+    monkeypatch.setattr(utils, "get_user_groups", _groups)
+    monkeypatch.setattr(utils, "get_all_user_permissions", _permissions)
+
+    values = await utils.get_user_context_values(db_session, SimpleNamespace(id="bad", email="a@example.org"))
+    assert values["permissions"] == []
 
 
 async def test_get_constant_context_values(monkeypatch, db_session):
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+import gzip
 import sys
 from pathlib import Path
 from types import SimpleNamespace
@@ -47,6 +48,33 @@ async def test_runserver_cmd_import_error(monkeypatch):
         await commands.runserver_cmd(SimpleNamespace(host="h", port=1, reload=False, workers=1, debug=False))
 
 
+async def test_runcacheserver_cmd_serves_and_removes_socket(monkeypatch, tmp_path):
+    from wirecloud.commons.utils import sharedcache
+
+    socket_path = tmp_path / "cache.sock"
+    socket_path.write_text("stale")
+    calls = {}
+
+    class _Server:
+        def __init__(self, path):
+            calls["path"] = path
+
+        async def start(self):
+            calls["stale_removed"] = not socket_path.exists()
+            socket_path.write_text("")
+
+        async def serve_forever(self):
+            calls["served"] = True
+
+        async def close(self):
+            calls["closed"] = True
+
+    monkeypatch.setattr(sharedcache, "CacheServer", _Server)
+    await commands.runcacheserver_cmd(SimpleNamespace(socket=str(socket_path)))
+    assert calls == {"path": str(socket_path), "stale_removed": True, "served": True, "closed": True}
+    assert not socket_path.exists()
+
+
 def test_get_modules_to_process(tmp_path):
     wirecloud_path = tmp_path / "wirecloud"
     (wirecloud_path / "platform").mkdir(parents=True)
@@ -244,14 +272,24 @@ async def test_rebuildsearchindexes_and_populate(monkeypatch):
 
     called = {"rebuild": 0, "populate": 0, "create_user_db": 0, "commit": 0}
 
-    async def _rebuild_all_indexes(db):
+    rebuilt = []
+
+    async def _rebuild(db, chunk_size, progress):
         called["rebuild"] += 1
         assert db is session
+        assert chunk_size == 100
+        progress("users", 100, 0.5, False)
+        progress("users", 150, 1.0, True)
+
+    def _get_rebuild_engine(name):
+        rebuilt.append(name)
+        return _rebuild
 
     monkeypatch.setattr("wirecloud.database.get_session", _get_session)
-    monkeypatch.setitem(sys.modules, "wirecloud.commons.search", SimpleNamespace(rebuild_all_indexes=_rebuild_all_indexes))
-    await commands.rebuildsearchindexes_cmd(SimpleNamespace())
+    monkeypatch.setitem(sys.modules, "wirecloud.commons.search", SimpleNamespace(get_rebuild_engine=_get_rebuild_engine))
+    await commands.rebuildsearchindexes_cmd(SimpleNamespace(index="user", chunk_size=100))
     assert called["rebuild"] == 1
+    assert rebuilt == ["user"]
 
     class _Plugin:
         async def populate(self, db, user):
@@ -295,7 +333,7 @@ async def test_rebuild_and_populate_no_sessions_and_plugin_without_populate(monk
             raise StopAsyncIteration
 
     monkeypatch.setattr("wirecloud.database.get_session", lambda: _EmptySessionIter())
-    monkeypatch.setitem(sys.modules, "wirecloud.commons.search", SimpleNamespace(rebuild_all_indexes=lambda _s: None))
+    monkeypatch.setitem(sys.modules, "wirecloud.commons.search", SimpleNamespace(get_rebuild_engine=lambda _name: None))
     await commands.rebuildsearchindexes_cmd(SimpleNamespace())
 
     await commands.populate_cmd(SimpleNamespace())
@@ -329,7 +367,7 @@ async def test_rebuildsearchindexes_cmd_with_empty_async_generator(monkeypatch):
             yield None
 
     monkeypatch.setattr("wirecloud.database.get_session", _empty_gen)
-    monkeypatch.setitem(sys.modules, "wirecloud.commons.search", SimpleNamespace(rebuild_all_indexes=lambda _s: None))
+    monkeypatch.setitem(sys.modules, "wirecloud.commons.search", SimpleNamespace(get_rebuild_engine=lambda _name: None))
     await commands.rebuildsearchindexes_cmd(SimpleNamespace())
 
 
@@ -348,8 +386,56 @@ def test_setup_commands():
     mapping = commands.setup_commands(subparsers)
     assert set(mapping.keys()) == {
         "runserver",
+        "runcacheserver",
         "gentranslations",
         "compiletranslations",
         "rebuildsearchindexes",
+        "syncindexes",
+        "compressstatic",
         "populate",
     }
+
+
+def test_compressstatic_cmd(monkeypatch, tmp_path, capsys):
+    static_dir = tmp_path / "static"
+    static_dir.mkdir()
+    (static_dir / "app.js").write_text("console.log(1);" * 100)
+    (static_dir / "small.css").write_text("a{}")
+    (static_dir / "logo.png").write_bytes(b"x" * 2000)
+
+    monkeypatch.setattr("wirecloud.settings.AVAILABLE_THEMES", ["a", "b"], raising=False)
+    monkeypatch.setattr("wirecloud.commons.utils.theme.get_static_dirs", lambda _theme: [str(static_dir), str(tmp_path / "missing")])
+    monkeypatch.setitem(sys.modules, "brotli", None)
+
+    commands.compressstatic_cmd(SimpleNamespace(min_size=1024, verbose=True))
+    assert gzip.decompress((static_dir / "app.js.gz").read_bytes()) == (static_dir / "app.js").read_bytes()
+    assert not (static_dir / "small.css.gz").exists()
+    assert not (static_dir / "logo.png.gz").exists()
+    assert "1 precompressed static file(s) built." in capsys.readouterr().out
+
+    # Up to date variants are not built again
+    commands.compressstatic_cmd(SimpleNamespace(min_size=1024, verbose=False))
+    assert "0 precompressed static file(s) built." in capsys.readouterr().out
+
+
+async def test_syncindexes_cmd(monkeypatch, capsys):
+    calls = []
+
+    async def _sync_indexes(indexes, drop=True):
+        calls.append((indexes, drop))
+        if len(calls) == 1:
+            return {"created": ["users.wirecloud_username"], "dropped": ["users.wirecloud_old"]}
+        return {"created": [], "dropped": []}
+
+    monkeypatch.setattr("wirecloud.database.sync_indexes", _sync_indexes)
+    monkeypatch.setattr("wirecloud.platform.plugins.get_database_indexes", lambda: {"users": ()})
+
+    await commands.syncindexes_cmd(SimpleNamespace(no_drop=False))
+    out = capsys.readouterr().out
+    assert "- users.wirecloud_old" in out
+    assert "+ users.wirecloud_username" in out
+    assert "1 created, 1 dropped" in out
+
+    await commands.syncindexes_cmd(SimpleNamespace(no_drop=True))
+    assert "up to date" in capsys.readouterr().out
+    assert calls == [({"users": ()}, True), ({"users": ()}, False)]
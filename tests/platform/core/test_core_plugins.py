@@ -6,6 +6,7 @@ import pytest
 from fastapi import FastAPI
 from starlette.requests import Request
 
+from wirecloud.platform.context import utils as context_utils
 from wirecloud.platform.core import plugins as core_plugins
 from wirecloud.platform.plugins import URLTemplate
 
@@ -57,6 +58,13 @@ async def test_get_version_hash_uses_active_features(monkeypatch):
     assert first == second
     assert len(first) == 40
 
+    features_info = {"a": "1", "b": "3"}
+    monkeypatch.setattr(core_plugins, "get_active_features_info", lambda: features_info)
+    changed = core_plugins.get_version_hash()
+    assert changed != first
+    monkeypatch.setattr(core_plugins, "sha1", lambda _data: (_ for _ in ()).throw(AssertionError("not cached")))
+    assert core_plugins.get_version_hash() == changed
+
 
 async def test_populate_component_paths(monkeypatch, db_session):
     async def _exists(*_args, **_kwargs):
@@ -239,7 +247,7 @@ async def test_platform_context_definitions_and_values(monkeypatch, db_session):
     monkeypatch.setattr(core_plugins, "get_current_view", lambda _request: "classic")
     monkeypatch.setattr(core_plugins, "get_current_theme", lambda _request: "wirecloud.defaulttheme")
     monkeypatch.setattr(core_plugins, "get_version_hash", lambda: "hash")
-    monkeypatch.setattr(core_plugins, "get_user_groups", lambda _db, _user_id: _groups())
+    monkeypatch.setattr(context_utils, "get_user_groups", lambda _db, _user_id: _groups())
 
     async def _groups():
         return [SimpleNamespace(name="dev"), SimpleNamespace(name="ops")]
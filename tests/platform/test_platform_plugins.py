@@ -272,6 +272,82 @@ def test_get_active_features_calls_get_plugins_when_cache_is_empty(monkeypatch):
     assert plugins.get_active_features_info() == {"cached": "1"}
 
 
+def test_url_router_is_cached_until_plugins_change(monkeypatch):
+    loaded = (_PluginA(None), _PluginB(None))
+    monkeypatch.setattr(plugins, "get_plugins", lambda _app=None: loaded)
+
+    router = plugins.get_url_router()
+    assert router.resolve("/a") == ("a", {})
+    assert plugins.get_url_router() is router
+
+    plugins.clear_cache()
+    rebuilt = plugins.get_url_router()
+    assert rebuilt is not router
+
+    reloaded = (_PluginA(None),)
+    monkeypatch.setattr(plugins, "get_plugins", lambda _app=None: reloaded)
+    assert plugins.get_url_router() is not rebuilt
+
+
+def test_constants_are_cached_per_language_until_plugins_change(monkeypatch):
+    from wirecloud.translation import override_language
+
+    built = []
+
+    class _CountingPlugin(_PluginA):
+        def get_constants(self):
+            built.append(1)
+            return {"X": 1}
+
+    loaded = (_CountingPlugin(None),)
+    monkeypatch.setattr(plugins, "get_plugins", lambda _app=None: loaded)
+
+    with override_language("en"):
+        constants = plugins.get_constants()
+        assert plugins.get_constants() is constants
+    with override_language("es"):
+        assert plugins.get_constants() == constants
+    assert len(built) == 2
+
+    reloaded = (_CountingPlugin(None),)
+    monkeypatch.setattr(plugins, "get_plugins", lambda _app=None: reloaded)
+    with override_language("en"):
+        assert plugins.get_constants() is not constants
+    assert len(built) == 3
+
+
+def test_ajax_endpoints_are_cached_per_view_and_mount_path(monkeypatch):
+    calls = []
+
+    class _CountingPlugin(_PluginA):
+        def get_ajax_endpoints(self, view, request):
+            calls.append(view)
+            return (plugins.AjaxEndpoint(id="A", url=request.scope["root_path"] + "/a"),)
+
+    loaded = (_CountingPlugin(None),)
+    monkeypatch.setattr(plugins, "get_plugins", lambda _app=None: loaded)
+    monkeypatch.setattr(project_settings, "OID_CONNECT_ENABLED", False, raising=False)
+
+    def _request(root_path="", url="http://example.com/"):
+        return SimpleNamespace(scope={"root_path": root_path}, url=url)
+
+    endpoints = plugins.get_wirecloud_ajax_endpoints("classic", _request())
+    assert plugins.get_wirecloud_ajax_endpoints("classic", _request(url="http://example.com/other")) is endpoints
+    assert plugins.get_wirecloud_ajax_endpoints("smartphone", _request()) is not endpoints
+    assert plugins.get_wirecloud_ajax_endpoints("classic", _request("/wc"))[0].url == "/wc/a"
+    assert calls == ["classic", "smartphone", "classic"]
+
+    # The login view includes the current URL as the state of the OpenID Connect flow
+    monkeypatch.setattr(project_settings, "OID_CONNECT_ENABLED", True, raising=False)
+    first = plugins.get_wirecloud_ajax_endpoints("classic", _request(url="http://example.com/a"))
+    assert plugins.get_wirecloud_ajax_endpoints("classic", _request(url="http://example.com/b")) is not first
+    assert plugins.get_wirecloud_ajax_endpoints("classic", _request(url="http://example.com/a")) is first
+
+    plugins.clear_cache()
+    monkeypatch.setattr(plugins, "get_plugins", lambda _app=None: loaded)
+    assert plugins.get_wirecloud_ajax_endpoints("classic", _request(url="http://example.com/a")) is not first
+
+
 async def test_aggregators_and_cached_helpers(monkeypatch):
     monkeypatch.setattr(plugins, "get_plugins", lambda _app=None: (_PluginA(None), _PluginB(None)))
 
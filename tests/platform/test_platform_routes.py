@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 
+import os
+
 import jinja2
 import pytest
 from fastapi.responses import RedirectResponse
 from starlette.requests import Request
 
+from wirecloud.commons.utils import theme
 from wirecloud.commons.utils.http import NotFound
 from wirecloud import main as main_module
 from wirecloud.platform import routes
@@ -157,26 +160,117 @@ async def test_auto_select_workspace_paths(monkeypatch, db_session):
     assert anon == {"owner": "wirecloud", "workspace": "landing"}
 
 
-def test_serve_static_cache_and_default(monkeypatch):
-    monkeypatch.setattr(routes, "get_theme_static_path", lambda theme, path: f"/themes/{theme}/{path}")
+def _static_request(query="", headers=()):
+    return Request(
+        {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "https",
+            "server": ("wirecloud.example.org", 443),
+            "path": "/static/x",
+            "query_string": query.encode("utf-8"),
+            "headers": [(b"host", b"wirecloud.example.org"), *headers],
+        }
+    )
+
+
+def _patch_static_files(monkeypatch, root):
+    def _find(theme, path, refresh=False):
+        file = root / theme / path
+        if not file.exists():
+            raise NotFound(path)
+        return str(file)
 
-    css = routes.serve_static("css/cache.css", themeactive="wirecloud.defaulttheme", view="classic", context="platform")
+    monkeypatch.setattr(routes, "find_static_file", _find)
+
+
+def test_serve_static_cache_and_default(monkeypatch, tmp_path):
+    _patch_static_files(monkeypatch, tmp_path)
+    for name in ("css/wirecloud.defaulttheme_classic_platform.css", "js/main-wirecloud.defaulttheme-smartphone.js",
+                 "img/logo.png"):
+        (tmp_path / "wirecloud.defaulttheme" / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / "wirecloud.defaulttheme" / name).write_text("x")
+
+    css = routes.serve_static(_static_request(), "css/cache.css", themeactive="wirecloud.defaulttheme", view="classic", context="platform")
     assert "wirecloud.defaulttheme_classic_platform.css" in str(css.path)
 
-    js = routes.serve_static("js/cache.js", themeactive="wirecloud.defaulttheme", view="smartphone", context="platform")
+    js = routes.serve_static(_static_request(), "js/cache.js", themeactive="wirecloud.defaulttheme", view="smartphone", context="platform")
     assert "main-wirecloud.defaulttheme-smartphone.js" in str(js.path)
 
-    image = routes.serve_static("img/logo.png", themeactive="wirecloud.defaulttheme")
-    assert str(image.path).endswith("/themes/wirecloud.defaulttheme/img/logo.png")
-
-    def _raise_not_found(_theme, path):
-        raise NotFound(path)
+    image = routes.serve_static(_static_request(), "img/logo.png", themeactive="wirecloud.defaulttheme")
+    assert str(image.path).endswith("/wirecloud.defaulttheme/img/logo.png")
 
-    monkeypatch.setattr(routes, "get_theme_static_path", _raise_not_found)
     with pytest.raises(NotFound, match="compile CSS"):
-        routes.serve_static("css/cache.css")
+        routes.serve_static(_static_request(), "css/cache.css", themeactive="missing")
     with pytest.raises(NotFound, match="compile JS"):
-        routes.serve_static("js/cache.js")
+        routes.serve_static(_static_request(), "js/cache.js", themeactive="missing")
+
+
+def test_serve_static_validators_and_versions(monkeypatch, tmp_path):
+    _patch_static_files(monkeypatch, tmp_path)
+    (tmp_path / "t").mkdir()
+    (tmp_path / "t" / "app.js").write_text("console.log(1);")
+
+    response = routes.serve_static(_static_request(), "app.js", themeactive="t")
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert "cache-control" not in response.headers
+
+    not_modified = routes.serve_static(_static_request(headers=[(b"if-none-match", etag.encode())]), "app.js", themeactive="t")
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+    changed = routes.serve_static(_static_request(headers=[(b"if-none-match", b'"other"')]), "app.js", themeactive="t")
+    assert changed.status_code == 200
+
+    since = routes.serve_static(_static_request(headers=[(b"if-modified-since", response.headers["last-modified"].encode())]), "app.js", themeactive="t")
+    assert since.status_code == 304
+
+    # Only the URLs using the current version of the file are immutable
+    version = routes.get_static_file_version(os.stat(tmp_path / "t" / "app.js"))
+    versioned = routes.serve_static(_static_request(f"v={version}"), "app.js", themeactive="t")
+    assert versioned.headers["cache-control"] == routes.STATIC_FILES_CACHE_CONTROL
+    outdated = routes.serve_static(_static_request("v=outdated"), "app.js", themeactive="t")
+    assert "cache-control" not in outdated.headers
+
+
+def test_serve_static_precompressed_variants(monkeypatch, tmp_path):
+    _patch_static_files(monkeypatch, tmp_path)
+    (tmp_path / "t").mkdir()
+    original = tmp_path / "t" / "app.js"
+    original.write_text("console.log(1);")
+    for suffix in (".gz", ".br"):
+        (tmp_path / "t" / ("app.js" + suffix)).write_bytes(b"compressed" + suffix.encode())
+    monkeypatch.setitem(theme.STATIC_FILES_INDEX, "t", {
+        "app.js": str(original),
+        "app.js.gz": str(original) + ".gz",
+        "app.js.br": str(original) + ".br",
+    })
+
+    gzip = routes.serve_static(_static_request(headers=[(b"accept-encoding", b"gzip, deflate")]), "app.js", themeactive="t")
+    assert gzip.headers["content-encoding"] == "gzip"
+    assert gzip.headers["vary"] == "Accept-Encoding"
+    assert gzip.media_type == "text/javascript"
+    assert str(gzip.path).endswith("app.js.gz")
+
+    br = routes.serve_static(_static_request(headers=[(b"accept-encoding", b"gzip, br")]), "app.js", themeactive="t")
+    assert br.headers["content-encoding"] == "br"
+    assert br.headers["etag"] != gzip.headers["etag"]
+
+    refused = routes.serve_static(_static_request(headers=[(b"accept-encoding", b"br;q=0, identity")]), "app.js", themeactive="t")
+    assert "content-encoding" not in refused.headers
+    assert refused.headers["vary"] == "Accept-Encoding"
+
+    ranged = routes.serve_static(_static_request(headers=[(b"accept-encoding", b"gzip"), (b"range", b"bytes=0-3")]), "app.js", themeactive="t")
+    assert "content-encoding" not in ranged.headers
+    assert ranged.headers["accept-ranges"] == "bytes"
+
+    # Variants older than the file are ignored
+    os.utime(str(original) + ".gz", (0, 0))
+    os.utime(str(original) + ".br", (0, 0))
+    stale = routes.serve_static(_static_request(headers=[(b"accept-encoding", b"gzip, br")]), "app.js", themeactive="t")
+    assert "content-encoding" not in stale.headers
 
 
 def test_render_wirecloud_context_and_fallback(monkeypatch):
@@ -3,6 +3,8 @@
 from datetime import datetime, timezone
 from types import SimpleNamespace
 
+from elasticsearch import NotFoundError
+
 from wirecloud.platform import search
 
 
@@ -21,6 +23,9 @@ class _FakeIndices:
     async def create(self, index, body):
         self.created.append((index, body))
 
+    async def get_alias(self, name):
+        return {}
+
 
 class _FakeES:
     def __init__(self, exists_value=True):
@@ -161,25 +166,32 @@ async def test_rebuild_and_update_workspace_index_paths(monkeypatch, db_session)
     es = _FakeES(exists_value=True)
     monkeypatch.setattr("wirecloud.commons.search.es_client", es)
 
-    async def _all_workspaces(_db):
-        return [_workspace()]
+    async def _iter_workspaces(_db, batch_size):
+        yield _workspace()
+        yield _workspace()
 
-    async def _username_by_id(_db, _creator):
+    username_lookups = []
+
+    async def _username_by_id(_db, creator):
+        username_lookups.append(creator)
         return "alice"
 
-    bulk_calls = {}
+    rebuild_calls = {}
 
-    async def _bulk(_es, actions):
-        bulk_calls["actions"] = actions
+    async def _rebuild_index(alias, mappings, documents, chunk_size, progress):
+        rebuild_calls["alias"] = alias
+        rebuild_calls["documents"] = [document async for document in documents]
+        return len(rebuild_calls["documents"])
 
-    monkeypatch.setattr("wirecloud.platform.workspace.crud.get_all_workspaces", _all_workspaces)
+    monkeypatch.setattr("wirecloud.platform.workspace.crud.iter_all_workspaces", _iter_workspaces)
     monkeypatch.setattr(search, "get_username_by_id", _username_by_id)
-    monkeypatch.setattr(search, "async_bulk", _bulk)
+    monkeypatch.setattr("wirecloud.commons.search.rebuild_index", _rebuild_index)
 
-    await search.rebuild_workspace_index(db_session)
-    assert search.WORKSPACES_INDEX in es.indices.deleted
-    assert es.indices.created[0][0] == search.WORKSPACES_INDEX
-    assert bulk_calls["actions"][0]["_source"]["owner"] == "alice"
+    assert await search.rebuild_workspace_index(db_session) == 2
+    assert rebuild_calls["alias"] == search.WORKSPACES_INDEX
+    assert rebuild_calls["documents"][0][1]["owner"] == "alice"
+    # Owner usernames are looked up once per creator
+    assert len(username_lookups) == 1
 
     await search.update_workspace_in_index(db_session, _workspace())
     assert es.exists_calls[0] == (search.WORKSPACES_INDEX, "507f1f77bcf86cd799439011")
@@ -190,11 +202,31 @@ async def test_rebuild_and_update_workspace_index_paths(monkeypatch, db_session)
             self.exists_calls.append((index, id))
             return False
 
+    # Saves not changing indexed fields only queue their last_modified, sent later in a single pass
+    monkeypatch.setattr(search, "WORKSPACE_LAST_MODIFIED_DELAY", 0)
+    update_calls = len(es.update_calls)
+    search.schedule_workspace_last_modified_update(_workspace())
+    search.schedule_workspace_last_modified_update(_workspace())
+    assert len(es.update_calls) == update_calls
+    await search._last_modified_flush
+    assert es.update_calls[update_calls:] == [
+        (search.WORKSPACES_INDEX, "507f1f77bcf86cd799439011", {"last_modified": _workspace().last_modified})]
+
+    # Re-indexing the whole workspace discards its queued date
+    search.schedule_workspace_last_modified_update(_workspace())
+    await search.update_workspace_in_index(db_session, _workspace())
+    assert search._pending_last_modified == {}
+
+    class _MissingDocES(_FakeES):
+        async def update(self, index, id, doc):
+            raise NotFoundError("not found", None, None)
+
+    monkeypatch.setattr("wirecloud.commons.search.es_client", _MissingDocES())
+    search.schedule_workspace_last_modified_update(_workspace())
+    await search.flush_workspace_last_modified_updates()
+    assert search._pending_last_modified == {}
+
     es2 = _NoDocES(exists_value=False)
     monkeypatch.setattr("wirecloud.commons.search.es_client", es2)
-    monkeypatch.setattr("wirecloud.platform.workspace.crud.get_all_workspaces", _all_workspaces)
-    await search.rebuild_workspace_index(db_session)
-    assert es2.indices.deleted == []
-
     await search.update_workspace_in_index(db_session, _workspace())
     assert es2.update_calls == []
@@ -27,6 +27,13 @@ def _request(path="/api/widget/acme/test/1.0/html", query=""):
     return req
 
 
+def _cache_key(key):
+    async def _get_cache_key(*_args):
+        return key
+
+    return _get_cache_key
+
+
 def test_get_html_error_response(monkeypatch):
     monkeypatch.setattr("wirecloud.platform.routes.render_wirecloud", lambda *_args, **_kwargs: SimpleNamespace(body=b"<html>err</html>"))
     html = utils.get_html_error_response(_request(), "text/html; charset=utf-8", 500, {"error_msg": "boom"})
@@ -233,7 +240,7 @@ async def test_process_widget_code_cache_hit(monkeypatch, db_session):
     resource = SimpleNamespace(
         id="rid",
         description=SimpleNamespace(contents=SimpleNamespace(cacheable=True, contenttype="text/html", charset="utf-8"), requirements=[]),
-        xhtml=SimpleNamespace(get_cache_key=lambda *_args: "key", code="ignored", cacheable=True, code_timestamp=1, use_platform_style=False, url="widget.html"),
+        xhtml=SimpleNamespace(get_cache_key=_cache_key("key"), code="ignored", cacheable=True, code_timestamp=1, use_platform_style=False, url="widget.html"),
     )
     response = await utils.process_widget_code(db_session, _request(), resource, "classic", None)
     assert response.status_code == 200
@@ -258,7 +265,7 @@ async def test_process_widget_code_error_paths(monkeypatch, db_session):
         get_processed_info=lambda **_kwargs: SimpleNamespace(macversion=1, vendor="acme", name="test", version="1.0", contents=SimpleNamespace(src="index.html")),
         description=SimpleNamespace(contents=SimpleNamespace(cacheable=True, contenttype="text/html", charset="utf-8"), requirements=[]),
         xhtml=SimpleNamespace(
-            get_cache_key=lambda *_args: "key",
+            get_cache_key=_cache_key("key"),
             code="",
             cacheable=True,
             code_timestamp=None,
@@ -302,7 +309,7 @@ async def test_process_widget_code_error_paths(monkeypatch, db_session):
         get_processed_info=lambda **_kwargs: SimpleNamespace(macversion=1, vendor="acme", name="test", version="1.0", contents=SimpleNamespace(src="index.html")),
         description=SimpleNamespace(contents=SimpleNamespace(cacheable=False, contenttype="text/html", charset="utf-8"), requirements=[]),
         xhtml=SimpleNamespace(
-            get_cache_key=lambda *_args: "unused",
+            get_cache_key=_cache_key("unused"),
             code="",
             cacheable=False,
             code_timestamp=None,
@@ -351,7 +358,7 @@ async def test_process_widget_code_success_paths(monkeypatch, db_session):
         get_processed_info=lambda **_kwargs: SimpleNamespace(macversion=1, vendor="acme", name="test", version="1.0", contents=SimpleNamespace(src="index.html")),
         description=SimpleNamespace(contents=SimpleNamespace(cacheable=True, contenttype="text/html", charset="utf-8"), requirements=[]),
         xhtml=SimpleNamespace(
-            get_cache_key=lambda *_args: "cache-key",
+            get_cache_key=_cache_key("cache-key"),
             code="<html>cached</html>",
             cacheable=True,
             code_timestamp=123,
@@ -362,14 +369,27 @@ async def test_process_widget_code_success_paths(monkeypatch, db_session):
     response = await utils.process_widget_code(db_session, _request(), resource, "classic", None)
     assert response.status_code == 200
     assert len(cache.saved) == 1
+    assert cache.saved[0][0] == "cache-key"
     assert patched["n"] == 1
 
+    loaded = []
+
+    async def _get_code(_db, resource_id):
+        loaded.append(resource_id)
+        return "<html>stored</html>"
+
+    monkeypatch.setattr(utils, "get_catalogue_resource_xhtml_code", _get_code)
+    resource.xhtml.code = ""
+    response = await utils.process_widget_code(db_session, _request(), resource, "classic", None)
+    assert response.body == b"<html>stored</html>"
+    assert loaded == ["rid"]
+
     non_cacheable = SimpleNamespace(
         id="rid2",
         get_processed_info=lambda **_kwargs: SimpleNamespace(macversion=1, vendor="acme", name="test", version="1.0", contents=SimpleNamespace(src="index.html")),
         description=SimpleNamespace(contents=SimpleNamespace(cacheable=False, contenttype="text/html", charset="utf-8"), requirements=[]),
         xhtml=SimpleNamespace(
-            get_cache_key=lambda *_args: "unused",
+            get_cache_key=_cache_key("unused"),
             code="",
             cacheable=False,
             code_timestamp=321,
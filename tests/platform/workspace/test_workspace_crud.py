@@ -175,7 +175,7 @@ async def test_workspace_change_delete_and_tab_helpers(db_session, monkeypatch):
     workspace.tabs = {tab0.id: tab0, tab1.id: tab1}
     await crud.insert_workspace(db_session, workspace)
 
-    called = {"delete": [], "index": 0}
+    called = {"delete": [], "index": 0, "last_modified": 0}
 
     async def _cache_delete(key):
         called["delete"].append(key)
@@ -183,12 +183,20 @@ async def test_workspace_change_delete_and_tab_helpers(db_session, monkeypatch):
     async def _update_index(_db, _workspace):
         called["index"] += 1
 
+    def _update_last_modified(_workspace):
+        called["last_modified"] += 1
+
     monkeypatch.setattr(crud.cache, "delete", _cache_delete)
     monkeypatch.setattr(crud, "update_workspace_in_index", _update_index)
+    monkeypatch.setattr(crud, "schedule_workspace_last_modified_update", _update_last_modified)
     await crud.change_workspace(db_session, workspace, SimpleNamespace(id=str(creator)))
-    assert called["index"] == 1
+    assert called["index"] == 0
     assert len(called["delete"]) == 2
 
+    workspace.title = "Operations"
+    await crud.change_workspace(db_session, workspace, SimpleNamespace(id=str(creator)))
+    assert called["index"] == 1
+
     changed = {"n": 0}
 
     async def _change_workspace(_db, _workspace, _user):
@@ -215,6 +223,77 @@ async def test_workspace_change_delete_and_tab_helpers(db_session, monkeypatch):
     assert changed["n"] >= 2
 
 
+async def test_change_workspace_partial_updates_and_conflicts(db_session, monkeypatch):
+    creator = ObjectId()
+    workspace = _workspace_model(name="tracked", creator=creator)
+    tab = Tab(id=f"{workspace.id}-0", name="tab", title="Tab", visible=True)
+    workspace.tabs = {tab.id: tab}
+    await crud.insert_workspace(db_session, workspace)
+
+    indexed = []
+    touched = []
+
+    async def _update_index(_db, ws):
+        indexed.append(ws.id)
+
+    def _update_last_modified(ws):
+        touched.append(ws.last_modified)
+
+    monkeypatch.setattr(crud, "update_workspace_in_index", _update_index)
+    monkeypatch.setattr(crud, "schedule_workspace_last_modified_update", _update_last_modified)
+    user = SimpleNamespace(id=str(creator))
+
+    updates = []
+    original_build_update_document = crud.build_update_document
+
+    def _build_update_document(previous, current):
+        updates.append(original_build_update_document(previous, current))
+        return updates[-1]
+
+    monkeypatch.setattr(crud, "build_update_document", _build_update_document)
+    monkeypatch.setattr(crud, "_", lambda text: text)
+
+    loaded = await crud.get_workspace_by_id(db_session, workspace.id)
+    loaded.tabs[tab.id].title = "Renamed"
+    await crud.change_workspace(db_session, loaded, user)
+    assert set(updates[-1]["$set"]) == {"last_modified", f"tabs.{tab.id}.title"}
+    assert "$unset" not in updates[-1]
+    assert indexed == []
+    assert touched == [loaded.last_modified]
+
+    # Saving again within the same millisecond without changes does not write anything
+    now = crud._now
+    monkeypatch.setattr(crud, "_now", lambda: loaded.last_modified)
+    await crud.change_workspace(db_session, loaded, user)
+    assert updates[-1] is None
+    assert len(touched) == 1
+    monkeypatch.setattr(crud, "_now", now)
+
+    stored = await crud.get_workspace_by_id(db_session, workspace.id)
+    assert stored.tabs[tab.id].title == "Renamed"
+    assert stored.title == "Tracked"
+
+    # The first copy is now stale, saving it must not overwrite the previous change
+    workspace.description = "stale"
+    with pytest.raises(crud.Conflict):
+        await crud.change_workspace(db_session, workspace, user)
+    stored = await crud.get_workspace_by_id(db_session, workspace.id)
+    assert stored.description == ""
+    assert stored.tabs[tab.id].title == "Renamed"
+
+    stored.description = "fresh"
+    await crud.change_workspace(db_session, stored, user)
+    assert indexed == [workspace.id]
+    assert (await crud.get_workspace_by_id(db_session, workspace.id)).description == "fresh"
+
+    # Workspaces not loaded through the crud module are written as a whole
+    untracked = Workspace.model_validate(stored.model_dump(by_alias=True))
+    untracked.title = "Whole"
+    await crud.change_workspace(db_session, untracked, user)
+    assert indexed == [workspace.id, workspace.id]
+    assert (await crud.get_workspace_by_id(db_session, workspace.id)).title == "Whole"
+
+
 async def test_workspace_description_and_user_lookup(db_session, monkeypatch):
     creator = ObjectId()
     workspace = _workspace_model(name="desc", creator=creator)
@@ -8,6 +8,7 @@ from bson import ObjectId
 from Crypto.Cipher import AES
 from starlette.requests import Request
 
+from wirecloud.catalogue.schemas import VariableDefinition
 from wirecloud.commons.utils.template.schemas.macdschemas import MACDPreference, MACDProperty
 from wirecloud.platform.iwidget.models import (
     WidgetConfig,
@@ -48,6 +49,17 @@ def _request():
     return req
 
 
+def _operator_resource(info, available):
+    return SimpleNamespace(
+        id=ObjectId(),
+        vendor="acme",
+        short_name="op",
+        version="1.0.0",
+        get_processed_info=lambda **_kwargs: info,
+        is_available_for=lambda _user: available,
+    )
+
+
 def _workspace():
     creator = ObjectId()
     return Workspace(
@@ -118,42 +130,26 @@ def test_process_forced_values_and_process_variable(monkeypatch):
     missing_param = utils.process_forced_values(ws, None, {}, {})
     assert missing_param.empty_params == ["missing"]
 
-    values = {"iwidget": {"w1": {}}, "ioperator": {"1": {}}}
-    vardef = MACDPreference(
-        name="p1",
-        type="text",
-        label="P1",
-        description="",
-        default="d",
-        readonly=False,
-        required=False,
-        secure=True,
-        multiuser=False,
-    )
-    forced_values = utils.WorkspaceForcedValues(iwidget={"w1": {"p1": WorkspaceForcedValue(value="x", hidden=True)}})
-    utils._process_variable("iwidget", "w1", vardef, None, forced_values, values, SimpleNamespace(id="u1"), SimpleNamespace(id="owner"))
-    assert values["iwidget"]["w1"]["p1"].readonly is True
-    assert values["iwidget"]["w1"]["p1"].hidden is True
+    vardef = VariableDefinition("p1", "preference", "text", secure=True, default="d")
+    entry = utils._resolve_variable(vardef, None, WorkspaceForcedValue(value="x", hidden=True), "u1", "owner")
+    assert entry.readonly is True
+    assert entry.hidden is True
+    assert entry.kind == "preference"
 
     vardef.secure = False
-    values = {"iwidget": {"w1": {}}}
-    forced_non_secure = utils.WorkspaceForcedValues(iwidget={"w1": {"p1": WorkspaceForcedValue(value="12", hidden=False)}})
-    utils._process_variable("iwidget", "w1", vardef, None, forced_non_secure, values, SimpleNamespace(id="u1"), SimpleNamespace(id="owner"))
-    assert values["iwidget"]["w1"]["p1"].value == "12"
-
-    values = {"iwidget": {"w2": {}}}
-    utils._process_variable(
-        "iwidget",
-        "w2",
-        vardef,
-        WidgetVariables(users={}),
-        utils.WorkspaceForcedValues(),
-        values,
-        SimpleNamespace(id="u1"),
-        SimpleNamespace(id="owner"),
-    )
-    assert values["iwidget"]["w2"]["p1"].readonly is False
-    assert values["iwidget"]["w2"]["p1"].value == "d"
+    entry = utils._resolve_variable(vardef, None, WorkspaceForcedValue(value="12", hidden=False), "u1", "owner")
+    assert entry.value == "12"
+
+    entry = utils._resolve_variable(vardef, WidgetVariables(users={}), None, "u1", "owner")
+    assert entry.readonly is False
+    assert entry.value == "d"
+
+    # Multiuser variables use the value of the current user, the rest the one of the workspace creator
+    stored = {"users": {"u1": "mine", "owner": "shared"}}
+    assert utils._resolve_variable(vardef, stored, None, "u1", "owner").value == "shared"
+    multiuser = VariableDefinition("p2", "property", "number", multiuser=True, default="3")
+    assert utils._resolve_variable(multiuser, stored, None, "u1", "owner").value == "mine"
+    assert utils._resolve_variable(multiuser, stored, None, "u2", "owner").value == 3.0
 
 
 async def test_variable_cache_manager_and_workspace_entry(monkeypatch, db_session):
@@ -162,7 +158,10 @@ async def test_variable_cache_manager_and_workspace_entry(monkeypatch, db_sessio
     req = _request()
 
     cache_values = {
-        "iwidget": {"w1": {"v1": CacheEntry(type="text", secure=False, value="plain", readonly=False, hidden=False)}},
+        "iwidget": {"w1": {
+            "v1": CacheEntry(type="text", secure=False, value="plain", readonly=False, hidden=False),
+            "v3": CacheEntry(type="text", secure=True, value="", readonly=False, hidden=False, kind="property"),
+        }},
         "ioperator": {"1": {"v2": CacheEntry(type="text", secure=True, value="secret", readonly=True, hidden=True)}},
     }
     manager = utils.VariableValueCacheManager(ws, user)
@@ -182,6 +181,13 @@ async def test_variable_cache_manager_and_workspace_entry(monkeypatch, db_sessio
     secure_raw = await manager.get_variable_value_from_varname(db_session, req, "ioperator", "1", "v2")
     assert secure_raw == ""
 
+    preferences, properties = await manager.get_component_variables_data(db_session, req, "iwidget", "w1")
+    assert list(preferences) == ["v1"]
+    assert preferences["v1"].value == "plain"
+    assert list(properties) == ["v3"]
+    assert properties["v3"].value == ""
+    assert await manager.get_component_variables_data(db_session, req, "iwidget", "missing") == ({}, {})
+
     async def _cache_get_none(_key):
         return None
 
@@ -229,6 +235,65 @@ async def test_variable_cache_manager_and_workspace_entry(monkeypatch, db_sessio
     assert response_200.status_code == 200
 
 
+async def test_workspace_data_loader_batches_and_memoizes(monkeypatch, db_session):
+    ws = _workspace()
+    shared_user = ObjectId()
+    group_id = ObjectId()
+    widget_resource = ObjectId()
+    ws.users.append(WorkspaceAccessPermissions(id=shared_user, accesslevel=1))
+    ws.groups = [WorkspaceAccessPermissions(id=group_id, accesslevel=1)]
+    ws.tabs = {
+        "tab-0": Tab(id="tab-0", name="tab", title="Tab", widgets={
+            "w1": WidgetInstance(id="w1", resource=widget_resource, positions=WidgetPositions(configurations=[])),
+            "w2": WidgetInstance(id="w2", resource=widget_resource, positions=WidgetPositions(configurations=[])),
+        })
+    }
+    ws.wiring_status = WorkspaceWiring()
+    ws.wiring_status.operators = {
+        "1": SimpleNamespace(name="acme/op/1.0.0"),
+        "2": SimpleNamespace(name="invalid"),
+    }
+
+    calls = []
+
+    def _batch(name, result):
+        async def _fetch(_db, keys):
+            calls.append((name, sorted(str(key) for key in keys)))
+            return result(keys)
+        return _fetch
+
+    widget = SimpleNamespace(id=widget_resource, vendor="acme", short_name="widget", version="1.0.0")
+    operator = SimpleNamespace(id=ObjectId(), vendor="acme", short_name="op", version="1.0.0")
+    monkeypatch.setattr(utils, "get_catalogue_resources_by_ids", _batch("ids", lambda _keys: [widget]))
+    monkeypatch.setattr(utils, "get_catalogue_resources_by_uris", _batch("uris", lambda _keys: [operator]))
+    monkeypatch.setattr(utils, "get_user_names_by_ids", _batch("users", lambda _keys: {str(ws.creator): ("alice", "Alice")}))
+    monkeypatch.setattr(utils, "get_groups_by_ids", _batch("groups", lambda _keys: []))
+
+    req = _request()
+    loader = utils.get_workspace_data_loader(db_session, req)
+    assert utils.get_workspace_data_loader(db_session, req) is loader
+    assert utils.get_workspace_data_loader(db_session, None) is not loader
+
+    loader.prime_workspace(ws)
+    assert await loader.get_resource_by_id(widget_resource) is widget
+    assert await loader.get_resource("acme", "op", "1.0.0") is operator
+    assert await loader.get_resource("acme", "widget", "1.0.0") is widget
+    assert await loader.get_user_names(ws.creator) == ("alice", "Alice")
+    assert await loader.get_user_names(shared_user) is None
+    assert await loader.get_group(group_id) is None
+    assert await loader.get_group(group_id) is None
+
+    assert calls == [
+        ("ids", [str(widget_resource)]),
+        ("uris", ["('acme', 'op', '1.0.0')"]),
+        ("users", sorted([str(ws.creator), str(shared_user)])),
+        ("groups", [str(group_id)]),
+    ]
+
+    assert (await utils.get_workspace_data(db_session, ws, None, loader=loader)).owner == "alice"
+    assert len(calls) == 4
+
+
 async def test_workspace_data_tab_helpers_and_widget_data(monkeypatch, db_session):
     ws = _workspace()
     ws.description = "plain"
@@ -283,10 +348,10 @@ async def test_workspace_data_tab_helpers_and_widget_data(monkeypatch, db_sessio
     assert len(widget_data.layoutConfig) == 1
 
     iwidget.resource = ObjectId()
-    monkeypatch.setattr(utils, "get_catalogue_resource_by_id", lambda *_args, **_kwargs: _none())
+    monkeypatch.setattr(utils, "get_catalogue_resources_by_ids", lambda *_args, **_kwargs: _none())
 
     async def _none():
-        return None
+        return []
 
     missing_resource = await utils.get_widget_instance_data(db_session, req, iwidget, ws, cache_manager=SimpleNamespace(), user=user)
     assert missing_resource.id == "w1"
@@ -295,15 +360,23 @@ async def test_workspace_data_tab_helpers_and_widget_data(monkeypatch, db_sessio
         preferences=[SimpleNamespace(name="p1")],
         properties=[SimpleNamespace(name="k1")],
     )
-    resource = SimpleNamespace(get_processed_info=lambda **_kwargs: resource_info)
-    monkeypatch.setattr(utils, "get_catalogue_resource_by_id", lambda *_args, **_kwargs: _resource())
+    resource = SimpleNamespace(id=iwidget.resource, vendor="acme", short_name="widget", version="1.0.0",
+                               get_processed_info=lambda **_kwargs: resource_info)
+    monkeypatch.setattr(utils, "get_catalogue_resources_by_ids", lambda *_args, **_kwargs: _resource())
 
     async def _resource():
-        return resource
+        return [resource]
+
+    # Missing resources are memoized for the life of the request
+    cached_missing = await utils.get_widget_instance_data(db_session, req, iwidget, ws, cache_manager=SimpleNamespace(), user=user)
+    assert cached_missing.preferences == {}
+
+    req = _request()
 
     class _CacheMgr:
-        async def get_variable_data(self, *_args, **_kwargs):
-            return SimpleNamespace(name="x", secure=False, readonly=False, hidden=False, value="v")
+        async def get_component_variables_data(self, *_args, **_kwargs):
+            data = SimpleNamespace(name="x", secure=False, readonly=False, hidden=False, value="v")
+            return {"p1": data}, {"k1": data}
 
     full_data = await utils.get_widget_instance_data(db_session, req, iwidget, ws, cache_manager=_CacheMgr(), user=user)
     assert "p1" in full_data.preferences
@@ -372,18 +445,24 @@ async def test_populate_variables_values_cache(monkeypatch, db_session):
     )
 
     monkeypatch.setattr(utils, "get_widget_instances_from_workspace", lambda _workspace: [iwidget])
-    monkeypatch.setattr(utils, "get_catalogue_resource_by_id", lambda *_args, **_kwargs: _widget_resource())
-    monkeypatch.setattr(utils, "get_catalogue_resource", lambda *_args, **_kwargs: _operator_resource())
-    monkeypatch.setattr(utils, "get_user_by_id", lambda *_args, **_kwargs: _user())
+    queries = {"resources": 0, "users": 0}
+    monkeypatch.setattr(utils, "get_catalogue_resources_by_ids", lambda *_args, **_kwargs: _widget_resource())
+    monkeypatch.setattr(utils, "get_catalogue_resources_by_uris", lambda *_args, **_kwargs: _operator_resource())
+    monkeypatch.setattr(utils, "get_user_names_by_ids", lambda *_args, **_kwargs: _user())
 
     async def _widget_resource():
-        return SimpleNamespace(get_processed_info=lambda **_kwargs: widget_info)
+        queries["resources"] += 1
+        return [SimpleNamespace(id=iwidget.resource, vendor="acme", short_name="widget", version="1.0.0",
+                                get_processed_info=lambda **_kwargs: widget_info)]
 
     async def _operator_resource():
-        return SimpleNamespace(get_processed_info=lambda **_kwargs: operator_info)
+        queries["resources"] += 1
+        return [SimpleNamespace(id=ObjectId(), vendor="acme", short_name="op", version="1.0.0",
+                                get_processed_info=lambda **_kwargs: operator_info)]
 
     async def _user():
-        return SimpleNamespace(id=creator)
+        queries["users"] += 1
+        return {str(creator): ("owner", "")}
 
     saved = {"key": None}
 
@@ -404,12 +483,13 @@ async def test_populate_variables_values_cache(monkeypatch, db_session):
     assert "w1" in values["iwidget"]
     assert "1" in values["ioperator"]
     assert saved["key"] == "cache-key"
+    assert queries == {"resources": 2, "users": 1}
 
     iwidget.resource = None
     ws.wiring_status.operators = {"1": SimpleNamespace(name="acme/op/1.0.0", preferences={}, properties={})}
     monkeypatch.setattr(utils, "get_context_values", lambda *_args, **_kwargs: _ctx())
     monkeypatch.setattr(utils, "get_workspace_preference_values", lambda *_args, **_kwargs: _prefs())
-    monkeypatch.setattr(utils, "get_catalogue_resource", lambda *_args, **_kwargs: _none())
+    monkeypatch.setattr(utils, "get_catalogue_resources_by_uris", lambda *_args, **_kwargs: _none())
 
     async def _ctx():
         return {}
@@ -418,12 +498,12 @@ async def test_populate_variables_values_cache(monkeypatch, db_session):
         return {}
 
     async def _none():
-        return None
+        return []
 
     values_none = await utils._populate_variables_values_cache(
         db_session,
         ws,
-        req,
+        _request(),
         SimpleNamespace(id="u1"),
         "cache-key-2",
         forced_values=None,
@@ -464,8 +544,8 @@ async def test_get_global_workspace_data_paths(monkeypatch, db_session):
     monkeypatch.setattr(utils, "get_workspace_preference_values", lambda *_args, **_kwargs: _prefs())
     monkeypatch.setattr(utils, "get_context_values", lambda *_args, **_kwargs: _ctx())
     monkeypatch.setattr(utils, "get_tab_data", lambda *_args, **_kwargs: _tab_data())
-    monkeypatch.setattr(utils, "get_group_by_id", lambda *_args, **_kwargs: _group())
-    monkeypatch.setattr(utils, "get_user_with_all_info", lambda *_args, **_kwargs: _user())
+    monkeypatch.setattr(utils, "get_groups_by_ids", lambda *_args, **_kwargs: _group())
+    monkeypatch.setattr(utils, "get_user_names_by_ids", lambda *_args, **_kwargs: _user())
     monkeypatch.setattr(utils, "decrypt_value", lambda _value: "x")
 
     async def _workspace_data():
@@ -481,10 +561,10 @@ async def test_get_global_workspace_data_paths(monkeypatch, db_session):
         return TabData(id="tab-0", name="tab", title="Tab")
 
     async def _group():
-        return SimpleNamespace(name="g", is_organization=False)
+        return [SimpleNamespace(id=ws.groups[0].id, name="g", is_organization=False)] if ws.groups else []
 
     async def _user():
-        return SimpleNamespace(id=ws.creator, username="alice", get_full_name=lambda: "Alice")
+        return {str(ws.creator): ("alice", "Alice")}
 
     forced = utils.WorkspaceForcedValues(
         ioperator={"2": {"p2": WorkspaceForcedValue(value="forced"), "k2": WorkspaceForcedValue(value="forced")}},
@@ -494,18 +574,15 @@ async def test_get_global_workspace_data_paths(monkeypatch, db_session):
     )
     monkeypatch.setattr(utils, "process_forced_values", lambda *_args, **_kwargs: forced)
 
-    async def _catalogue(_db, vendor, name, version):
-        if name == "op":
-            info = SimpleNamespace(
-                variables=SimpleNamespace(
-                    preferences={"p2": SimpleNamespace(multiuser=False, default="d", secure=True, model_dump=lambda: {"type": "text"})},
-                    properties={"k2": SimpleNamespace(multiuser=False, default="1", secure=True, model_dump=lambda: {"type": "number"})},
-                )
-            )
-            return SimpleNamespace(get_processed_info=lambda **_kwargs: info, is_available_for=lambda _user: True)
-        raise ValueError()
-
-    monkeypatch.setattr(utils, "get_catalogue_resource", _catalogue)
+    async def _catalogue(_db, uris):
+        assert uris == [("acme", "op", "1.0.0")]
+        info = SimpleNamespace(
+            preferences=[SimpleNamespace(name="p2", type="text", multiuser=False, default="d", secure=True)],
+            properties=[SimpleNamespace(name="k2", type="number", multiuser=False, default="1", secure=True)],
+        )
+        return [_operator_resource(info, True)]
+
+    monkeypatch.setattr(utils, "get_catalogue_resources_by_uris", _catalogue)
     result = await utils._get_global_workspace_data(db_session, req, ws, user)
     assert result.id == str(ws.id)
     assert len(result.tabs) == 1
@@ -514,7 +591,7 @@ async def test_get_global_workspace_data_paths(monkeypatch, db_session):
 
     forced_empty = utils.WorkspaceForcedValues(ioperator={}, iwidget={}, extra_prefs=[], empty_params=["missing"])
     monkeypatch.setattr(utils, "process_forced_values", lambda *_args, **_kwargs: forced_empty)
-    early = await utils._get_global_workspace_data(db_session, req, ws, user)
+    early = await utils._get_global_workspace_data(db_session, _request(), ws, user)
     assert early.empty_params == ["missing"]
 
     ws.tabs = {}
@@ -529,16 +606,14 @@ async def test_get_global_workspace_data_paths(monkeypatch, db_session):
     }
     monkeypatch.setattr(utils, "process_forced_values", lambda *_args, **_kwargs: utils.WorkspaceForcedValues())
 
-    async def _catalogue_visible(_db, _vendor, _name, _version):
+    async def _catalogue_visible(_db, _uris):
         info = SimpleNamespace(
-            variables=SimpleNamespace(
-                preferences={"p2": SimpleNamespace(multiuser=True, default="d", secure=False, model_dump=lambda: {"type": "text"})},
-                properties={"k2": SimpleNamespace(multiuser=True, default="1", secure=False, model_dump=lambda: {"type": "number"})},
-            )
+            preferences=[SimpleNamespace(name="p2", type="text", multiuser=True, default="d", secure=False)],
+            properties=[SimpleNamespace(name="k2", type="number", multiuser=True, default="1", secure=False)],
         )
-        return SimpleNamespace(get_processed_info=lambda **_kwargs: info, is_available_for=lambda _user: True)
+        return [_operator_resource(info, True)]
 
-    monkeypatch.setattr(utils, "get_catalogue_resource", _catalogue_visible)
+    monkeypatch.setattr(utils, "get_catalogue_resources_by_uris", _catalogue_visible)
     tabs_created = {"n": 0}
 
     async def _create_tab(_db, _user, _title, workspace):
@@ -548,23 +623,21 @@ async def test_get_global_workspace_data_paths(monkeypatch, db_session):
         return tab
 
     monkeypatch.setattr(utils, "create_tab", _create_tab)
-    created_tab_data = await utils._get_global_workspace_data(db_session, req, ws, user)
+    created_tab_data = await utils._get_global_workspace_data(db_session, _request(), ws, user)
     assert tabs_created["n"] == 1
     assert created_tab_data.wiring.operators["3"].preferences["p2"].value == "visible"
     assert created_tab_data.wiring.operators["3"].properties["k2"].value == "7"
     assert len(created_tab_data.groups) == 1
 
-    async def _catalogue_not_available(_db, _vendor, _name, _version):
+    async def _catalogue_not_available(_db, _uris):
         info = SimpleNamespace(
-            variables=SimpleNamespace(
-                preferences={"p2": SimpleNamespace(multiuser=True, default="d", secure=False, model_dump=lambda: {"type": "text"})},
-                properties={"k2": SimpleNamespace(multiuser=True, default="1", secure=False, model_dump=lambda: {"type": "number"})},
-            )
+            preferences=[SimpleNamespace(name="p2", type="text", multiuser=True, default="d", secure=False)],
+            properties=[SimpleNamespace(name="k2", type="number", multiuser=True, default="1", secure=False)],
         )
-        return SimpleNamespace(get_processed_info=lambda **_kwargs: info, is_available_for=lambda _user: False)
+        return [_operator_resource(info, False)]
 
-    monkeypatch.setattr(utils, "get_catalogue_resource", _catalogue_not_available)
-    unavailable = await utils._get_global_workspace_data(db_session, req, ws, user)
+    monkeypatch.setattr(utils, "get_catalogue_resources_by_uris", _catalogue_not_available)
+    unavailable = await utils._get_global_workspace_data(db_session, _request(), ws, user)
     assert unavailable.wiring.operators["3"].preferences == {}
     assert unavailable.wiring.operators["3"].properties == {}
 
@@ -575,12 +648,12 @@ async def test_get_global_workspace_data_paths(monkeypatch, db_session):
             properties={"k2": SimpleNamespace(value=WidgetVariables(users={}))},
         )
     }
-    monkeypatch.setattr(utils, "get_catalogue_resource", _catalogue_visible)
-    defaults = await utils._get_global_workspace_data(db_session, req, ws, user)
+    monkeypatch.setattr(utils, "get_catalogue_resources_by_uris", _catalogue_visible)
+    defaults = await utils._get_global_workspace_data(db_session, _request(), ws, user)
     assert defaults.wiring.operators["4"].preferences["p2"].value == "d"
     assert defaults.wiring.operators["4"].properties["k2"].value == 1.0
 
-    non_owner = await utils._get_global_workspace_data(db_session, req, ws, SimpleNamespace(id=ObjectId()))
+    non_owner = await utils._get_global_workspace_data(db_session, _request(), ws, SimpleNamespace(id=ObjectId()))
     assert non_owner.users == []
     assert non_owner.groups == []
 
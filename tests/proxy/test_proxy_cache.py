@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+import pytest
+from aiohttp import web
+
+from wirecloud.proxy import cache, pool, routes
+from wirecloud.proxy.schemas import ProxyRequestData
+
+
+class _FakeURL:
+    def __init__(self, raw):
+        parsed = urlparse(raw)
+        self.raw = raw
+        self.netloc = parsed.netloc
+        self.fragment = parsed.fragment
+
+    def __str__(self):
+        return self.raw
+
+
+class _FakeRequest:
+    def __init__(self, headers=None):
+        self.method = "GET"
+        self.url = _FakeURL("https://wirecloud.example.org/cdp/path")
+        self.headers = headers or {}
+        self.query_params = {}
+        self.scope = {"http_version": "1.1"}
+        self.client = SimpleNamespace(host="127.0.0.1")
+
+
+@pytest.fixture()
+async def upstream(monkeypatch):
+    state = SimpleNamespace(requests=[], responses={}, delay=0)
+
+    async def _handler(request):
+        state.requests.append(dict(request.headers))
+        if state.delay:
+            await asyncio.sleep(state.delay)
+        status, headers, body = state.responses[request.path]
+        if callable(headers):
+            status, headers, body = headers(request)
+        return web.Response(status=status, headers=headers, body=body)
+
+    app = web.Application()
+    app.router.add_get("/{path:.*}", _handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    state.url = "http://127.0.0.1:%s" % runner.addresses[0][1]
+
+    monkeypatch.setattr(cache.settings, "PROXY_CACHE_ENABLED", True, raising=False)
+    connection_pool = pool.ProxyConnectionPool(limit=10, limit_per_host=10, keepalive_timeout=10, dns_cache_ttl=10)
+    monkeypatch.setattr(routes, "get_connection_pool", lambda: connection_pool)
+    monkeypatch.setattr(routes, "get_current_domain", lambda _req: "wirecloud.example.org")
+    monkeypatch.setattr(routes, "get_request_proxy_processors", lambda: [])
+    monkeypatch.setattr(routes, "get_response_proxy_processors", lambda: [])
+
+    yield state
+
+    await connection_pool.close()
+    await runner.cleanup()
+
+
+async def _body(response):
+    if hasattr(response, "body_iterator"):
+        return b"".join([chunk async for chunk in response.body_iterator])
+    return response.body
+
+
+async def _get(url, headers=None, user=None):
+    request_data = ProxyRequestData(headers=dict(headers or {}))
+    response = await routes.Proxy().do_request(_FakeRequest(), url, "GET", request_data, None, user)
+    return response, await _body(response)
+
+
+def test_parse_cache_control_and_freshness():
+    assert cache.parse_cache_control('public, max-age="60", No-Cache') == {"public": None, "max-age": "60",
+                                                                           "no-cache": None}
+    assert cache.parse_cache_control(None) == {}
+
+    entry = cache.ProxyCacheEntry(200, [("Cache-Control", "max-age=60"), ("Age", "10")], b"x", {})
+    assert entry.fresh is True
+    assert entry.age == 10
+    assert entry.has_validators is False
+
+    entry = cache.ProxyCacheEntry(200, [("Expires", "Thu, 01 Jan 1970 00:00:00 GMT"), ("ETag", '"a"')], b"x", {})
+    assert entry.fresh is False
+    assert entry.matches_condition('W/"a", "b"', None) is True
+    assert entry.matches_condition('"b"', None) is False
+
+    entry = cache.ProxyCacheEntry(200, [("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")], b"x", {})
+    assert entry.lifetime == 0
+    assert entry.matches_condition(None, "Tue, 02 Jan 2024 00:00:00 GMT") is True
+    assert entry.matches_condition(None, "Sun, 31 Dec 2023 00:00:00 GMT") is False
+
+
+@pytest.mark.parametrize(
+    "status,headers,credentialed,authenticated,expected",
+    [
+        (200, {"Cache-Control": "max-age=60"}, False, False, True),
+        (200, {"ETag": '"a"'}, False, False, True),
+        (200, {}, False, False, False),
+        (500, {"Cache-Control": "max-age=60"}, False, False, False),
+        (200, {"Cache-Control": "no-store, max-age=60"}, False, True, False),
+        (200, {"Cache-Control": "max-age=60", "Set-Cookie": "a=b"}, False, True, False),
+        (200, {"Cache-Control": "max-age=60", "Vary": "*"}, False, True, False),
+        (200, {"Cache-Control": "private, max-age=60"}, False, False, False),
+        (200, {"Cache-Control": "private, max-age=60"}, False, True, True),
+        (200, {"Cache-Control": "max-age=60"}, True, True, False),
+        (200, {"Cache-Control": "public, max-age=60"}, True, True, True),
+        (200, {"Cache-Control": "must-revalidate", "ETag": '"a"'}, True, True, True),
+    ],
+)
+def test_response_cache_is_storable(status, headers, credentialed, authenticated, expected):
+    assert cache.ProxyResponseCache().is_storable(status, headers, credentialed, authenticated) is expected
+
+
+def test_response_cache_key_scope_and_credentials_signature():
+    response_cache = cache.ProxyResponseCache()
+    request_data = ProxyRequestData(headers={"Accept": "text/plain"}, component_type="widget", component_id="1")
+    assert cache.get_credentials_signature(request_data) is None
+    assert response_cache.get_key(request_data, "http://a", None, False) == ("http://a", (None, None), None)
+    assert response_cache.get_key(request_data, "http://a", None, True) == ("http://a", (None, None, "widget", "1"),
+                                                                           None)
+
+    request_data.headers["Authorization"] = "Bearer a"
+    signature = cache.get_credentials_signature(request_data)
+    request_data.headers["Authorization"] = "Bearer b"
+    assert signature is not None and cache.get_credentials_signature(request_data) != signature
+
+
+def test_response_cache_size_eviction():
+    response_cache = cache.ProxyResponseCache(max_size=250, max_entry_size=150)
+    for i in range(3):
+        response_cache.finish(("url%s" % i, (None, None), None), cache.ProxyCacheEntry(200, [], b"x" * 100, {}))
+    assert len(response_cache) == 2
+    assert response_cache.size == 200
+
+    # Entries larger than max_entry_size are not stored and replace previous ones
+    response_cache.finish(("url2", (None, None), None), cache.ProxyCacheEntry(200, [], b"x" * 200, {}))
+    assert len(response_cache) == 1
+    assert response_cache.size == 100
+
+    response_cache.clear()
+    assert len(response_cache) == 0 and response_cache.size == 0
+
+
+async def test_proxy_serves_fresh_responses_from_cache(upstream):
+    upstream.responses["/data"] = (200, {"Cache-Control": "max-age=60", "Content-Type": "text/plain"}, b"data")
+
+    response, body = await _get(upstream.url + "/data")
+    assert response.status_code == 200 and body == b"data"
+
+    response, body = await _get(upstream.url + "/data")
+    assert response.status_code == 200 and body == b"data"
+    assert response.headers["Content-Type"] == "text/plain"
+    assert "Age" in response.headers
+    assert len(upstream.requests) == 1
+
+    # Requests sent with credentials do not share the entry
+    await _get(upstream.url + "/data", headers={"Authorization": "Bearer a"})
+    assert len(upstream.requests) == 2
+
+    # Neither do the requests asking for a fresh response
+    await _get(upstream.url + "/data", headers={"Cache-Control": "no-cache"})
+    assert len(upstream.requests) == 3
+
+
+async def test_proxy_revalidates_stale_responses(upstream):
+    def _respond(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return 304, {"ETag": '"v1"', "Cache-Control": "max-age=0"}, b""
+        return 200, {"ETag": '"v1"', "Cache-Control": "max-age=0", "Content-Type": "text/plain"}, b"data"
+
+    upstream.responses["/data"] = (None, _respond, None)
+
+    response, body = await _get(upstream.url + "/data")
+    assert response.status_code == 200 and body == b"data"
+
+    response, body = await _get(upstream.url + "/data")
+    assert response.status_code == 200 and body == b"data"
+    assert upstream.requests[1]["If-None-Match"] == '"v1"'
+
+    # Conditional requests sent by the client are answered by the proxy
+    response, body = await _get(upstream.url + "/data", headers={"If-None-Match": '"v1"'})
+    assert response.status_code == 304 and body == b""
+    assert response.headers["ETag"] == '"v1"'
+    assert "Content-Type" not in response.headers
+    assert len(upstream.requests) == 3
+
+
+async def test_proxy_drops_entries_revalidated_with_cookies(upstream):
+    def _respond(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return 304, {"ETag": '"v1"', "Cache-Control": "max-age=0", "Set-Cookie": "session=abc"}, b""
+        return 200, {"ETag": '"v1"', "Cache-Control": "max-age=0", "Content-Type": "text/plain"}, b"data"
+
+    upstream.responses["/data"] = (None, _respond, None)
+
+    await _get(upstream.url + "/data")
+    response, body = await _get(upstream.url + "/data")
+    assert response.status_code == 200 and body == b"data"
+    assert "session=abc" in response.headers["set-cookie"]
+
+    # The entry is no longer cached, so it is requested again without validators
+    response, body = await _get(upstream.url + "/data")
+    assert response.status_code == 200 and body == b"data"
+    assert "If-None-Match" not in upstream.requests[2]
+    assert "set-cookie" not in response.headers
+
+
+async def test_proxy_coalesces_concurrent_requests(upstream):
+    upstream.delay = 0.1
+    upstream.responses["/data"] = (200, {"Cache-Control": "max-age=60"}, b"data")
+
+    results = await asyncio.gather(*[_get(upstream.url + "/data") for _i in range(5)])
+    assert [body for _response, body in results] == [b"data"] * 5
+    assert len(upstream.requests) == 1
+
+
+async def test_proxy_streams_uncacheable_and_oversized_responses(upstream, monkeypatch):
+    monkeypatch.setattr(routes, "get_response_cache",
+                        lambda: cache.ProxyResponseCache(max_size=1024, max_entry_size=10))
+    upstream.responses["/large"] = (200, {"Cache-Control": "max-age=60"}, b"x" * 100)
+    upstream.responses["/nostore"] = (200, {"Cache-Control": "no-store"}, b"data")
+
+    for path, expected in (("/large", b"x" * 100), ("/nostore", b"data")):
+        for _i in range(2):
+            response, body = await _get(upstream.url + path)
+            assert response.status_code == 200 and body == expected
+
+    assert len(upstream.requests) == 4
+
+
+async def test_get_response_cache_honours_settings(monkeypatch):
+    monkeypatch.delattr(cache.settings, "PROXY_CACHE_ENABLED", raising=False)
+    assert cache.get_response_cache() is None
+
+    monkeypatch.setattr(cache.settings, "PROXY_CACHE_ENABLED", False, raising=False)
+    assert cache.get_response_cache() is None
+
+    monkeypatch.setattr(cache.settings, "PROXY_CACHE_ENABLED", True, raising=False)
+    response_cache = cache.get_response_cache()
+    assert response_cache is cache.get_response_cache()
+
+    cache.clear_response_cache()
+    assert cache.get_response_cache() is not response_cache
@@ -169,3 +169,98 @@ async def test_proxy_plugin_validator_valid_multiple_entries(monkeypatch):
 
     monkeypatch.setattr(plugins, "_set_default_if_missing", lambda *_args, **_kwargs: None)
     validate(settings_obj, False)
+
+
+async def test_proxy_plugin_pool_validator_defaults_and_warning(monkeypatch):
+    plugin = plugins.WirecloudProxyPlugin(None)
+    validate = plugin.get_config_validators()[1]
+
+    settings_obj = SimpleNamespace()
+    validate(settings_obj, False)
+    assert settings_obj.PROXY_POOL_LIMIT == 100
+    assert settings_obj.PROXY_POOL_LIMIT_PER_HOST == 30
+    assert settings_obj.PROXY_POOL_KEEPALIVE_TIMEOUT == 30
+    assert settings_obj.PROXY_POOL_DNS_CACHE_TTL == 300
+
+    warnings = []
+    monkeypatch.setattr(plugins.logger, "warning", lambda msg: warnings.append(msg))
+    validate(SimpleNamespace(PROXY_POOL_LIMIT=5, PROXY_POOL_LIMIT_PER_HOST=10), False)
+    assert any("PROXY_POOL_LIMIT_PER_HOST" in msg for msg in warnings)
+
+
+@pytest.mark.parametrize(
+    "settings_obj,error",
+    [
+        (SimpleNamespace(PROXY_POOL_LIMIT=-1), "PROXY_POOL_LIMIT must be a non-negative integer"),
+        (SimpleNamespace(PROXY_POOL_LIMIT_PER_HOST="x"), "PROXY_POOL_LIMIT_PER_HOST must be a non-negative integer"),
+        (SimpleNamespace(PROXY_POOL_KEEPALIVE_TIMEOUT=0), "PROXY_POOL_KEEPALIVE_TIMEOUT must be a positive number"),
+        (SimpleNamespace(PROXY_POOL_DNS_CACHE_TTL=1.5), "PROXY_POOL_DNS_CACHE_TTL must be a non-negative integer"),
+    ],
+)
+async def test_proxy_plugin_pool_validator_errors(settings_obj, error):
+    plugin = plugins.WirecloudProxyPlugin(None)
+    validate = plugin.get_config_validators()[1]
+
+    with pytest.raises(ValueError, match=error):
+        validate(settings_obj, False)
+
+
+async def test_proxy_plugin_cache_validator_defaults_and_warning(monkeypatch):
+    plugin = plugins.WirecloudProxyPlugin(None)
+    validate = plugin.get_config_validators()[2]
+
+    settings_obj = SimpleNamespace()
+    validate(settings_obj, False)
+    assert settings_obj.PROXY_CACHE_ENABLED is False
+    assert settings_obj.PROXY_CACHE_MAX_SIZE == 64 * 1024 * 1024
+    assert settings_obj.PROXY_CACHE_MAX_ENTRY_SIZE == 1024 * 1024
+
+    warnings = []
+    monkeypatch.setattr(plugins.logger, "warning", lambda msg: warnings.append(msg))
+    validate(SimpleNamespace(PROXY_CACHE_MAX_SIZE=10, PROXY_CACHE_MAX_ENTRY_SIZE=20), False)
+    assert any("PROXY_CACHE_MAX_ENTRY_SIZE" in msg for msg in warnings)
+
+
+@pytest.mark.parametrize(
+    "settings_obj,error",
+    [
+        (SimpleNamespace(PROXY_CACHE_ENABLED="yes"), "PROXY_CACHE_ENABLED must be a boolean"),
+        (SimpleNamespace(PROXY_CACHE_MAX_SIZE=0), "PROXY_CACHE_MAX_SIZE must be a positive integer"),
+        (SimpleNamespace(PROXY_CACHE_MAX_SIZE=True), "PROXY_CACHE_MAX_SIZE must be a positive integer"),
+        (SimpleNamespace(PROXY_CACHE_MAX_ENTRY_SIZE=1.5), "PROXY_CACHE_MAX_ENTRY_SIZE must be a positive integer"),
+    ],
+)
+async def test_proxy_plugin_cache_validator_errors(settings_obj, error):
+    plugin = plugins.WirecloudProxyPlugin(None)
+    validate = plugin.get_config_validators()[2]
+
+    with pytest.raises(ValueError, match=error):
+        validate(settings_obj, False)
+
+
+async def test_proxy_plugin_ws_relay_validator_defaults():
+    plugin = plugins.WirecloudProxyPlugin(None)
+    validate = plugin.get_config_validators()[3]
+
+    settings_obj = SimpleNamespace()
+    validate(settings_obj, False)
+    assert settings_obj.PROXY_WS_QUEUE_SIZE == 16
+    assert settings_obj.PROXY_WS_HEARTBEAT == 30
+    assert settings_obj.PROXY_WS_IDLE_TIMEOUT == 0
+
+
+@pytest.mark.parametrize(
+    "settings_obj,error",
+    [
+        (SimpleNamespace(PROXY_WS_QUEUE_SIZE=0), "PROXY_WS_QUEUE_SIZE must be a positive integer"),
+        (SimpleNamespace(PROXY_WS_HEARTBEAT=-1), "PROXY_WS_HEARTBEAT must be a non-negative integer"),
+        (SimpleNamespace(PROXY_WS_HEARTBEAT=True), "PROXY_WS_HEARTBEAT must be a non-negative integer"),
+        (SimpleNamespace(PROXY_WS_IDLE_TIMEOUT="10"), "PROXY_WS_IDLE_TIMEOUT must be a non-negative integer"),
+    ],
+)
+async def test_proxy_plugin_ws_relay_validator_errors(settings_obj, error):
+    plugin = plugins.WirecloudProxyPlugin(None)
+    validate = plugin.get_config_validators()[3]
+
+    with pytest.raises(ValueError, match=error):
+        validate(settings_obj, False)
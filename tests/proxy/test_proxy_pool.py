@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+from types import SimpleNamespace
+
+import pytest
+from aiohttp import web
+
+from wirecloud.proxy import pool
+
+
+@pytest.fixture()
+async def upstream():
+    peers = []
+
+    async def _handler(request):
+        peers.append(request.transport.get_extra_info('peername'))
+        response = web.Response(text="ok")
+        response.set_cookie("sid", "secret")
+        return response
+
+    app = web.Application()
+    app.router.add_get("/", _handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+
+    yield SimpleNamespace(url="http://127.0.0.1:%s/" % port, peers=peers)
+
+    await runner.cleanup()
+
+
+async def test_connection_pool_reuses_connections_and_isolates_cookies(upstream):
+    connection_pool = pool.ProxyConnectionPool(limit=10, limit_per_host=2, keepalive_timeout=10, dns_cache_ttl=10)
+
+    jars = []
+    for _i in range(3):
+        session = connection_pool.session()
+        res = await session.get(upstream.url)
+        assert await res.text() == "ok"
+        jars.append(session.cookie_jar)
+        assert len(session.cookie_jar) == 1
+        await session.close()
+
+    # All the requests were served through the same keep-alive connection
+    assert len(upstream.peers) == 3
+    assert len(set(upstream.peers)) == 1
+
+    # Each session got its own cookie jar
+    assert len({id(jar) for jar in jars}) == 3
+
+    assert connection_pool.closed is False
+    await connection_pool.close()
+    assert connection_pool.closed is True
+
+
+async def test_connection_pool_connector_configuration_and_recreation():
+    connection_pool = pool.ProxyConnectionPool(limit=5, limit_per_host=1, keepalive_timeout=3, dns_cache_ttl=0)
+    assert connection_pool.closed is True
+
+    connector = connection_pool.connector
+    assert connector.limit == 5
+    assert connector.limit_per_host == 1
+    assert connector.use_dns_cache is False
+    assert connection_pool.connector is connector
+
+    await connector.close()
+    assert connection_pool.connector is not connector
+
+    await connection_pool.close()
+    await connection_pool.close()
+
+
+async def test_connection_pool_from_settings_and_lifecycle(monkeypatch):
+    monkeypatch.setattr(pool.settings, "PROXY_POOL_LIMIT", 7, raising=False)
+    monkeypatch.setattr(pool.settings, "PROXY_POOL_LIMIT_PER_HOST", 3, raising=False)
+    monkeypatch.setattr(pool.settings, "PROXY_POOL_KEEPALIVE_TIMEOUT", 5, raising=False)
+    monkeypatch.setattr(pool.settings, "PROXY_POOL_DNS_CACHE_TTL", 60, raising=False)
+    monkeypatch.setattr(pool, "_connection_pool", None)
+
+    connection_pool = pool.get_connection_pool()
+    assert (connection_pool.limit, connection_pool.limit_per_host) == (7, 3)
+    assert (connection_pool.keepalive_timeout, connection_pool.dns_cache_ttl) == (5, 60)
+    assert pool.get_connection_pool() is connection_pool
+
+    opened = await pool.open_connection_pool()
+    assert opened is not connection_pool
+    assert opened.closed is False
+    assert pool.get_connection_pool() is opened
+
+    await pool.close_connection_pool()
+    assert opened.closed is True
+    assert pool._connection_pool is None
+
+    await pool.close_connection_pool()
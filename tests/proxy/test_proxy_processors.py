@@ -226,6 +226,10 @@ async def test_secure_data_processor_header_query_and_early_return(monkeypatch,
     await processor.process_request(db_session, req_none)
 
 
+async def _read(data):
+    return b"".join([chunk async for chunk in data])
+
+
 async def test_process_secure_data_skips_empty_definition_and_reads_async_body(monkeypatch, db_session):
     class _FakeCache:
         def __init__(self, workspace, user):
@@ -239,18 +243,21 @@ async def test_process_secure_data_skips_empty_definition_and_reads_async_body(m
     monkeypatch.setattr(processors, "get_variable_value_by_ref", _value_by_ref)
 
     async def _chunks():
-        yield b"{token}"
+        yield b"x={to"
+        yield b"ken}&y={token}"
 
     req = SimpleNamespace(
         workspace=SimpleNamespace(),
         user=SimpleNamespace(),
         is_ws=False,
         original_request=SimpleNamespace(),
-        headers={},
+        headers={"Content-Length": "20"},
         data=_chunks(),
     )
     await processors.process_secure_data(db_session, "&action=data,var_ref=token", req, "c1", "widget")
-    assert req.data == b"abc"
+    # The body is not read until it is relayed upstream, using chunked encoding as its length changes
+    assert req.headers == {}
+    assert await _read(req.data) == b"x=abc&y=abc"
 
     req_header_none_encoding = SimpleNamespace(
         workspace=SimpleNamespace(),
@@ -285,4 +292,4 @@ async def test_process_secure_data_skips_empty_definition_and_reads_async_body(m
         data=_EmptyAsyncData(),
     )
     await processors.process_secure_data(db_session, "action=data,var_ref=token", req_empty, "c1", "widget")
-    assert req_empty.data == b""
+    assert await _read(req_empty.data) == b""
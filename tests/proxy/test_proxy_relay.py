@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from types import SimpleNamespace
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from wirecloud.proxy import relay
+
+
+class _ClientWebSocket:
+    # Accepted client WebSocket, the test plays the browser through the incoming and outgoing queues
+
+    def __init__(self, send_delay=0, fail_on_send=False):
+        self.incoming = asyncio.Queue()
+        self.sent = []
+        self.closed = None
+        self.send_delay = send_delay
+        self.fail_on_send = fail_on_send
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def _send(self, data):
+        if self.fail_on_send:
+            raise RuntimeError("client disconnected")
+        if self.send_delay:
+            await asyncio.sleep(self.send_delay)
+        self.sent.append(data)
+
+    async def send_text(self, data):
+        await self._send(data)
+
+    async def send_bytes(self, data):
+        await self._send(data)
+
+    async def close(self, code=1000, reason=None):
+        self.closed = (code, reason)
+
+
+@pytest.fixture()
+async def upstream():
+    state = SimpleNamespace(close_codes=[], burst=0)
+
+    async def _handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        for i in range(state.burst):
+            await ws.send_str("message %d" % i)
+
+        async for msg in ws:
+            if msg.type == aiohttp.WSMsgType.TEXT and msg.data == "close":
+                await ws.close(code=4000, message=b"bye")
+            elif msg.type == aiohttp.WSMsgType.TEXT:
+                await ws.send_str(msg.data)
+            elif msg.type == aiohttp.WSMsgType.BINARY:
+                await ws.send_bytes(msg.data)
+
+        state.close_codes.append(ws.close_code)
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/ws", _handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    state.url = "http://127.0.0.1:%s/ws" % runner.addresses[0][1]
+
+    yield state
+
+    await runner.cleanup()
+
+
+async def _relay(url, client, **kwargs):
+    async with aiohttp.ClientSession() as session:
+        async with session.ws_connect(url) as server:
+            return await relay.WebSocketRelay(client, server, **kwargs).run(), server
+
+
+async def test_relay_echo_and_client_close(upstream):
+    client = _ClientWebSocket()
+    await client.incoming.put({"type": "websocket.receive", "text": "hello"})
+    await client.incoming.put({"type": "websocket.receive", "bytes": b"\x00\x01"})
+
+    async def _disconnect():
+        while len(client.sent) < 2:
+            await asyncio.sleep(0.01)
+        await client.incoming.put({"type": "websocket.disconnect", "code": 1000, "reason": "done"})
+
+    disconnect = asyncio.create_task(_disconnect())
+    stats, server = await _relay(upstream.url, client)
+    await disconnect
+
+    assert client.sent == ["hello", b"\x00\x01"]
+    assert (stats.client_messages, stats.client_bytes) == (2, 7)
+    assert (stats.server_messages, stats.server_bytes) == (2, 7)
+    assert (stats.close_code, stats.close_reason) == (1000, "done")
+    assert server.closed is True
+    assert "client: 2 messages, 7 bytes" in str(stats)
+
+
+async def test_relay_server_close(upstream):
+    client = _ClientWebSocket()
+    await client.incoming.put({"type": "websocket.receive", "text": "close"})
+
+    stats, _server = await _relay(upstream.url, client)
+
+    assert client.closed == (4000, "bye")
+    assert (stats.close_code, stats.close_reason) == (4000, "bye")
+
+
+async def test_relay_backpressure(upstream):
+    upstream.burst = 50
+    client = _ClientWebSocket(send_delay=0.001)
+
+    async def _disconnect():
+        while len(client.sent) < 50:
+            await asyncio.sleep(0.01)
+        await client.incoming.put({"type": "websocket.disconnect", "code": 1000, "reason": ""})
+
+    disconnect = asyncio.create_task(_disconnect())
+    stats, _server = await _relay(upstream.url, client, queue_size=4)
+    await disconnect
+
+    assert client.sent == ["message %d" % i for i in range(50)]
+    assert stats.server_messages == 50
+    assert 0 < stats.server_queue_high_water <= 4
+
+
+async def test_relay_idle_timeout(upstream):
+    client = _ClientWebSocket()
+
+    stats, server = await _relay(upstream.url, client, idle_timeout=0.05)
+
+    assert client.closed == (1001, "Idle timeout")
+    assert server.closed is True
+    assert stats.client_messages == 0
+
+
+async def test_relay_client_send_failure(upstream):
+    client = _ClientWebSocket(fail_on_send=True)
+    await client.incoming.put({"type": "websocket.receive", "text": "hello"})
+
+    stats, server = await _relay(upstream.url, client)
+
+    assert (stats.close_code, stats.close_reason) == (1014, "Gateway Error")
+    assert server.closed is True
+    await asyncio.sleep(0.05)
+    assert upstream.close_codes == [1014]
+
+
+async def test_read_client_message():
+    class _WSClient:
+        def __init__(self, items):
+            self.items = list(items)
+
+        async def receive(self):
+            if not self.items:
+                raise RuntimeError("boom")
+            return self.items.pop(0)
+
+    ws = _WSClient([{"type": "websocket.connect"}, {"type": "websocket.receive", "text": "hi"}])
+    assert await relay.read_client_message(ws) == ("hi", False, None)
+    assert await relay.read_client_message(_WSClient([{"type": "websocket.receive", "bytes": b"x"}])) == (b"x", True, None)
+    assert await relay.read_client_message(_WSClient([{"type": "websocket.disconnect", "code": 1000, "reason": "bye"}])) == (None, None, (1000, "bye"))
+    assert await relay.read_client_message(_WSClient([{"type": "unknown"}])) == (None, None, (1014, "Gateway Error"))
+    assert await relay.read_client_message(_WSClient([])) == (None, None, (1014, "Gateway Error"))
+
+
+async def test_read_server_message():
+    class _WSServer:
+        def __init__(self, msg):
+            self.msg = msg
+
+        async def receive(self):
+            return self.msg
+
+    class _BrokenWSServer:
+        async def receive(self):
+            raise RuntimeError("boom")
+
+    def _msg(typ, data=None, extra=""):
+        return SimpleNamespace(type=typ, data=data, extra=extra)
+
+    assert await relay.read_server_message(_WSServer(_msg(aiohttp.WSMsgType.CLOSE, 1001, "bye"))) == (None, None, (1001, "bye"))
+    assert await relay.read_server_message(_WSServer(_msg(aiohttp.WSMsgType.ERROR))) == (None, None, (1014, "Connection Error"))
+    assert await relay.read_server_message(_WSServer(_msg(aiohttp.WSMsgType.CLOSED))) == (None, None, (1000, "Gateway Disconnected"))
+    assert await relay.read_server_message(_WSServer(_msg(aiohttp.WSMsgType.TEXT, "t"))) == ("t", False, None)
+    assert await relay.read_server_message(_WSServer(_msg(aiohttp.WSMsgType.BINARY, b"b"))) == (b"b", True, None)
+    assert await relay.read_server_message(_BrokenWSServer()) == (None, None, (1014, "Gateway Error"))
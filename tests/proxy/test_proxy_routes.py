@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 
-import asyncio
 from http.cookies import SimpleCookie
 from types import SimpleNamespace
 from urllib.parse import urlparse
@@ -19,14 +18,21 @@ def _patch_gettext(monkeypatch):
     monkeypatch.setattr(routes, "_", lambda text: text)
 
 
+@pytest.fixture(autouse=True)
+def _disable_response_cache(monkeypatch):
+    # The fake requests used by these tests are always relayed upstream, see test_proxy_cache.py
+    monkeypatch.setattr(routes, "get_response_cache", lambda: None)
+
+
 @pytest.fixture()
 async def app_http_client(db_session):
-    from wirecloud.database import get_session
+    from wirecloud.database import get_session, get_read_session
 
     async def _override_get_session():
         yield db_session
 
     app.dependency_overrides[get_session] = _override_get_session
+    app.dependency_overrides[get_read_session] = _override_get_session
     try:
         transport = ASGITransport(app=app, raise_app_exceptions=False)
         async with AsyncClient(transport=transport, base_url="http://testserver") as client:
@@ -70,12 +76,18 @@ class _FakeWebSocket:
 
 
 async def test_parse_request_headers_transfer_encoding_and_cookie_cleanup():
-    req = _FakeRequest(headers={"Transfer-Encoding": "chunked"})
+    req = _FakeRequest(headers={"Transfer-Encoding": "gzip, chunked"})
     request_data = SimpleNamespace(is_ws=False, headers={}, cookies={}, data=None)
 
     with pytest.raises(ValueError, match="Transfer-Encoding"):
         await routes.parse_request_headers(req, request_data)
 
+    chunked = _FakeRequest(headers={"Transfer-Encoding": "chunked", "content-type": "text/plain"})
+    chunked_data = SimpleNamespace(is_ws=False, headers={}, cookies={}, data=None)
+    await routes.parse_request_headers(chunked, chunked_data)
+    assert chunked_data.data is not None
+    assert chunked_data.headers == {"content-type": "text/plain"}
+
     async def _stream():
         yield b"body"
 
@@ -176,63 +188,10 @@ async def test_parse_context_from_query_paths(monkeypatch, db_session):
         await routes.parse_context_from_query(db_session, None, req3, "PUT")
 
 
-async def test_generate_ws_accept_and_proxy_read_helpers():
+async def test_generate_ws_accept_header_from_key():
     key = "dGhlIHNhbXBsZSBub25jZQ=="
     assert routes.generate_ws_accept_header_from_key(key) == "s3pPLMBiTxaQ9kYGzzhZRbK+xOo="
 
-    proxy = routes.Proxy()
-
-    class _WSClient:
-        def __init__(self, items):
-            self.items = list(items)
-
-        async def receive(self):
-            if not self.items:
-                raise RuntimeError("boom")
-            return self.items.pop(0)
-
-    ws = _WSClient([
-        {"type": "websocket.connect"},
-        {"type": "websocket.receive", "text": "hi"},
-    ])
-    src, data, is_binary, close = await proxy.read_ws_from_client(ws)
-    assert (src, data, is_binary, close) == ("client", "hi", False, None)
-
-    ws2 = _WSClient([{"type": "websocket.receive", "bytes": b"x"}])
-    assert await proxy.read_ws_from_client(ws2) == ("client", b"x", True, None)
-
-    ws3 = _WSClient([{"type": "websocket.disconnect", "code": 1000, "reason": "bye"}])
-    assert await proxy.read_ws_from_client(ws3) == ("client", None, None, (1000, "bye"))
-
-    class _Msg:
-        def __init__(self, typ, data=None, extra=""):
-            self.type = typ
-            self.data = data
-            self.extra = extra
-
-    class _WSServer:
-        def __init__(self, msg):
-            self.msg = msg
-
-        async def receive(self):
-            return self.msg
-
-    class _BrokenWSServer:
-        async def receive(self):
-            raise RuntimeError("boom")
-
-    assert (await proxy.read_ws_from_server(_WSServer(_Msg(aiohttp.WSMsgType.CLOSE, 1001, "bye")))) == ("server", None, None, (1001, "bye"))
-    assert (await proxy.read_ws_from_server(_WSServer(_Msg(aiohttp.WSMsgType.ERROR)))) == ("server", None, None, (1014, "Connection Error"))
-    assert (await proxy.read_ws_from_server(_WSServer(_Msg(aiohttp.WSMsgType.CLOSED)))) == ("server", None, None, (1000, "Gateway Disconnected"))
-    assert (await proxy.read_ws_from_server(_WSServer(_Msg(aiohttp.WSMsgType.TEXT, "t")))) == ("server", "t", False, None)
-    assert (await proxy.read_ws_from_server(_WSServer(_Msg(aiohttp.WSMsgType.PING)))) == ("server", None, None, (1014, "Connection Error"))
-    assert (await proxy.read_ws_from_server(_BrokenWSServer())) == ("server", None, None, (1014, "Gateway Error"))
-
-    ws4 = _WSClient([{"type": "unknown"}])
-    assert await proxy.read_ws_from_client(ws4) == ("client", None, None, (1014, "Gateway Error"))
-
-    ws5 = _WSClient([])
-    assert await proxy.read_ws_from_client(ws5) == ("client", None, None, (1014, "Gateway Error"))
 
 
 async def test_parse_context_from_referer_extra_errors(monkeypatch, db_session):
@@ -444,8 +403,8 @@ async def test_do_request_ws_success_and_close_paths(monkeypatch, db_session):
             return None
 
     class _WSCtx:
-        def __init__(self):
-            self.ws = _WSConn()
+        def __init__(self, ws):
+            self.ws = ws
 
         async def __aenter__(self):
             return self.ws
@@ -457,24 +416,39 @@ async def test_do_request_ws_success_and_close_paths(monkeypatch, db_session):
         def __init__(self):
             self.cookie_jar = []
             self.closed = False
+            self.ws = _WSConn()
 
         def ws_connect(self, **kwargs):
-            return _WSCtx()
+            self.ws_kwargs = kwargs
+            return _WSCtx(self.ws)
 
         async def close(self):
             self.closed = True
 
-    monkeypatch.setattr(routes.aiohttp, "ClientSession", lambda **_kwargs: _Session())
-    monkeypatch.setattr(proxy, "read_ws_from_server", lambda _ws: _done_tuple("server", None, None, (1000, "bye")))
-    monkeypatch.setattr(proxy, "read_ws_from_client", lambda _request: _done_tuple("client", "hello", False, None))
+    sessions = []
 
-    async def _wait(tasks, return_when=None):
-        done = set()
-        for t in tasks:
-            done.add(routes.asyncio.create_task(t))
-        return done, set()
+    def _session(**_kwargs):
+        sessions.append(_Session())
+        return sessions[-1]
 
-    monkeypatch.setattr(routes.asyncio, "wait", _wait)
+    monkeypatch.setattr(routes.aiohttp, "ClientSession", _session)
+    relays = []
+
+    class _Relay:
+        def __init__(self, client, server, queue_size, idle_timeout):
+            self.client = client
+            self.server = server
+            self.queue_size = queue_size
+            self.idle_timeout = idle_timeout
+            self.stats = "stats"
+            relays.append(self)
+
+        async def run(self):
+            return self.stats
+
+    monkeypatch.setattr(routes, "WebSocketRelay", _Relay)
+    monkeypatch.setattr(routes.settings, "PROXY_WS_QUEUE_SIZE", 4, raising=False)
+    monkeypatch.setattr(routes.settings, "PROXY_WS_IDLE_TIMEOUT", 10, raising=False)
 
     class _WSReq(_FakeWebSocket):
         def __init__(self):
@@ -500,6 +474,13 @@ async def test_do_request_ws_success_and_close_paths(monkeypatch, db_session):
     assert out is None
     assert ws_request.accepted is True
     assert ws_request.closed is True
+    assert sessions[0].closed is True
+    assert len(relays) == 1
+    assert relays[0].client is ws_request
+    assert relays[0].server is sessions[0].ws
+    assert (relays[0].queue_size, relays[0].idle_timeout) == (4, 10)
+    assert sessions[0].ws_kwargs["protocols"] == ["a", "b"]
+    assert sessions[0].ws_kwargs["heartbeat"] == 30
 
 
 async def test_do_request_ws_accept_failure_and_ws_exception_handlers(monkeypatch, db_session):
@@ -623,6 +604,10 @@ async def test_do_request_ws_loop_branches_and_streaming_body(monkeypatch, db_se
         status = 200
         headers = {"X-Test": "1"}
         content = _Content()
+        released = False
+
+        def release(self):
+            self.released = True
 
     class _WSConn:
         protocol = "proto"
@@ -658,7 +643,8 @@ async def test_do_request_ws_loop_branches_and_streaming_body(monkeypatch, db_se
             self.closed = False
 
         async def request(self, **kwargs):
-            return _Res()
+            self.response = _Res()
+            return self.response
 
         def ws_connect(self, **kwargs):
             return _WSCtx(self.ws)
@@ -676,6 +662,7 @@ async def test_do_request_ws_loop_branches_and_streaming_body(monkeypatch, db_se
         body += chunk
     assert body == b"ab"
     assert session_http.closed is True
+    assert session_http.response.released is True
 
     session_ws = _Session({"X-Test": "1", "Sec-WebSocket-Accept": "server-value"})
     monkeypatch.setattr(routes.aiohttp, "ClientSession", lambda **_kwargs: session_ws)
@@ -685,9 +672,10 @@ async def test_do_request_ws_loop_branches_and_streaming_body(monkeypatch, db_se
         def __init__(self):
             super().__init__(headers={"sec-websocket-key": "dGhlIHNhbXBsZSBub25jZQ=="})
             self.closed = False
+            self.accepted_headers = []
 
         async def accept(self, subprotocol=None, headers=None):
-            return None
+            self.accepted_headers.append(dict(headers))
 
         async def close(self, code=None, reason=None):
             self.closed = True
@@ -701,40 +689,25 @@ async def test_do_request_ws_loop_branches_and_streaming_body(monkeypatch, db_se
     ws_req = _WSReq()
     request_data_ws = SimpleNamespace(is_ws=True, headers={}, cookies=SimpleCookie(), data=None)
 
-    async def _read_client(_request):
-        return "client", None, None, (1000, "bye")
-
-    async def _read_server(_ws):
-        return "server", b"y", True, None
-
-    monkeypatch.setattr(proxy, "read_ws_from_client", _read_client)
-    monkeypatch.setattr(proxy, "read_ws_from_server", _read_server)
+    class _Relay:
+        def __init__(self, client, server, **_kwargs):
+            self.stats = "stats"
 
-    async def _wait(tasks, return_when=None):
-        first = routes.asyncio.create_task(tasks[0])
-        for task in tasks[1:]:
-            task.close()
-        return {first}, set()
+        async def run(self):
+            return self.stats
 
-    monkeypatch.setattr(routes.asyncio, "wait", _wait)
+    monkeypatch.setattr(routes, "WebSocketRelay", _Relay)
     out = await proxy.do_request(ws_req, "wss://api.example.org/ws", "WS", request_data_ws, db_session, None)
     assert out is None
+    assert ws_req.accepted_headers[-1][b"sec-websocket-accept"] == b"s3pPLMBiTxaQ9kYGzzhZRbK+xOo="
 
     # hit 277 by omitting server accept header but keeping client websocket key
     session_ws2 = _Session({"X-Test": "1"})
     monkeypatch.setattr(routes.aiohttp, "ClientSession", lambda **_kwargs: session_ws2)
 
-    async def _read_server_close(_ws):
-        return "server", None, None, (1000, "bye")
-
-    async def _read_client_data(_request):
-        return "client", b"x", True, None
-
-    monkeypatch.setattr(proxy, "read_ws_from_server", _read_server_close)
-    monkeypatch.setattr(proxy, "read_ws_from_client", _read_client_data)
-
     out2 = await proxy.do_request(ws_req, "wss://api.example.org/ws", "WS", request_data_ws, db_session, None)
     assert out2 is None
+    assert ws_req.accepted_headers[-1][b"sec-websocket-accept"] == b"s3pPLMBiTxaQ9kYGzzhZRbK+xOo="
 
     class _RespProcAsync:
         async def process_response(self, _db, _request_data, headers_dict):
@@ -748,169 +721,6 @@ async def test_do_request_ws_loop_branches_and_streaming_body(monkeypatch, db_se
     assert out3 is None
 
 
-async def test_do_request_ws_loop_remaining_branches(monkeypatch, db_session):
-    proxy = routes.Proxy()
-    monkeypatch.setattr(routes, "iri_to_uri", lambda url: url)
-    monkeypatch.setattr(routes, "get_current_domain", lambda _req: "wirecloud.example.org")
-    monkeypatch.setattr(routes, "get_request_proxy_processors", lambda: [])
-    monkeypatch.setattr(routes, "get_response_proxy_processors", lambda: [])
-
-    class _WSConn:
-        protocol = "proto"
-        _response = SimpleNamespace(headers={"X-Test": "1"})
-
-        async def close(self, **kwargs):
-            return None
-
-        async def send_bytes(self, _data):
-            return None
-
-        async def send_str(self, _data):
-            return None
-
-    class _WSCtx:
-        async def __aenter__(self):
-            return _WSConn()
-
-        async def __aexit__(self, exc_type, exc, tb):
-            return False
-
-    class _Session:
-        def __init__(self):
-            self.cookie_jar = []
-
-        def ws_connect(self, **kwargs):
-            return _WSCtx()
-
-        async def close(self):
-            return None
-
-    monkeypatch.setattr(routes.aiohttp, "ClientSession", lambda **_kwargs: _Session())
-    monkeypatch.setattr(proxy, "read_ws_from_client", lambda _request: _done_tuple("client", "unused", False, None))
-    monkeypatch.setattr(proxy, "read_ws_from_server", lambda _ws: _done_tuple("server", "unused", False, None))
-
-    def _fut(value):
-        f = routes.asyncio.get_running_loop().create_future()
-        f.set_result(value)
-        return f
-
-    wait_calls = {"n": 0}
-    pending_client_close = _fut(("client", None, None, (1000, "bye")))
-    pending_client_bytes = _fut(("client", b"x", True, None))
-    pending_server_text = _fut(("server", "svr", False, None))
-
-    async def _wait(tasks, return_when=None):
-        for task in tasks:
-            if asyncio.iscoroutine(task):
-                task.close()
-
-        wait_calls["n"] += 1
-        if wait_calls["n"] == 1:
-            return {_fut(("client", "hello", False, None))}, {pending_server_text}
-        if wait_calls["n"] == 2:
-            return {pending_server_text}, {pending_client_bytes}
-        if wait_calls["n"] == 3:
-            return {pending_client_bytes}, {pending_client_close}
-        return {pending_client_close}, set()
-
-    monkeypatch.setattr(routes.asyncio, "wait", _wait)
-
-    class _WSReq(_FakeWebSocket):
-        def __init__(self):
-            super().__init__(headers={})
-
-        async def accept(self, subprotocol=None, headers=None):
-            return None
-
-        async def close(self, code=None, reason=None):
-            raise RuntimeError("close failed")
-
-        async def send_bytes(self, data):
-            return None
-
-        async def send_text(self, data):
-            return None
-
-    ws_req = _WSReq()
-    request_data_ws = SimpleNamespace(is_ws=True, headers={}, cookies=SimpleCookie(), data=None)
-    out = await proxy.do_request(ws_req, "wss://api.example.org/ws", "WS", request_data_ws, db_session, None)
-    assert out is None
-
-
-async def test_do_request_ws_direct_break_path(monkeypatch, db_session):
-    proxy = routes.Proxy()
-    monkeypatch.setattr(routes, "iri_to_uri", lambda url: url)
-    monkeypatch.setattr(routes, "get_current_domain", lambda _req: "wirecloud.example.org")
-    monkeypatch.setattr(routes, "get_request_proxy_processors", lambda: [])
-    monkeypatch.setattr(routes, "get_response_proxy_processors", lambda: [])
-
-    class _WSConn:
-        protocol = "proto"
-        _response = SimpleNamespace(headers={"X-Test": "1"})
-
-        async def close(self, **kwargs):
-            return None
-
-        async def send_bytes(self, _data):
-            return None
-
-        async def send_str(self, _data):
-            return None
-
-    class _WSCtx:
-        async def __aenter__(self):
-            return _WSConn()
-
-        async def __aexit__(self, exc_type, exc, tb):
-            return False
-
-    class _Session:
-        def __init__(self):
-            self.cookie_jar = []
-
-        def ws_connect(self, **kwargs):
-            return _WSCtx()
-
-        async def close(self):
-            return None
-
-    monkeypatch.setattr(routes.aiohttp, "ClientSession", lambda **_kwargs: _Session())
-    monkeypatch.setattr(proxy, "read_ws_from_client", lambda _request: _done_tuple("client", None, None, (1000, "bye")))
-    monkeypatch.setattr(proxy, "read_ws_from_server", lambda _ws: _done_tuple("server", "unused", False, None))
-
-    async def _wait(tasks, return_when=None):
-        for task in tasks:
-            if asyncio.iscoroutine(task):
-                task.close()
-        f = routes.asyncio.get_running_loop().create_future()
-        f.set_result(("client", None, None, (1000, "bye")))
-        return {f}, set()
-
-    monkeypatch.setattr(routes.asyncio, "wait", _wait)
-
-    class _WSReq(_FakeWebSocket):
-        async def accept(self, subprotocol=None, headers=None):
-            return None
-
-        async def close(self, code=None, reason=None):
-            return None
-
-        async def send_bytes(self, data):
-            return None
-
-        async def send_text(self, data):
-            return None
-
-    ws_req = _WSReq(headers={})
-    request_data_ws = SimpleNamespace(is_ws=True, headers={}, cookies=SimpleCookie(), data=None)
-    out = await proxy.do_request(ws_req, "wss://api.example.org/ws", "WS", request_data_ws, db_session, None)
-    assert out is None
-
-
-async def _done_tuple(source, data, is_binary, close):
-    return source, data, is_binary, close
-
-
 async def test_proxy_request_http_validation_and_success_with_asgi_client(app_http_client, monkeypatch):
     routes.settings.PROXY_BLACKLIST_ENABLED = True
     routes.settings.PROXY_BLACKLIST = ["blocked.example.org"]
@@ -1033,6 +843,27 @@ async def test_proxy_request_direct_unreachable_branches(monkeypatch, db_session
     assert ok["ok"] is True
     assert captured["url"].endswith("#frag")
 
+    req3 = _FakeRequest(method="POST", url="https://wirecloud.example.org/p", query_params={})
+    ok = await routes.proxy_write_request(req3, db_session, None, protocol="https", domain="api.example.org", path="v1")
+    assert ok["ok"] is True
+    assert captured["url"] == "https://api.example.org/v1"
+
+
+def test_proxy_routes_use_the_read_session_only_for_safe_methods():
+    from wirecloud.database import get_read_session, get_session
+
+    dependencies = {}
+    for route in routes.router.routes:
+        for method in getattr(route, "methods", None) or ():
+            dependencies[method] = {dependency.call for dependency in route.dependant.dependencies}
+
+    for method in ("GET", "HEAD", "OPTIONS"):
+        assert get_read_session in dependencies[method]
+        assert get_session not in dependencies[method]
+    for method in ("POST", "PUT", "DELETE", "PATCH"):
+        assert get_session in dependencies[method]
+        assert get_read_session not in dependencies[method]
+
 
 async def test_proxy_ws_request_error_wrappers(monkeypatch, db_session):
     ws = _FakeWebSocket(url="wss://wirecloud.example.org/p", query_params={})
@@ -26,3 +26,70 @@ async def test_validation_error_get_response_and_header_validation(monkeypatch):
 
     assert utils.is_valid_response_header("content-type") is True
     assert utils.is_valid_response_header("transfer-encoding") is False
+
+
+async def _read(data):
+    return b"".join([chunk async for chunk in data])
+
+
+async def _chunked(body, sizes):
+    start = 0
+    for size in sizes:
+        yield body[start:start + size]
+        start += size
+    yield body[start:]
+
+
+async def test_replace_body_stream_matches_bytes_replace_across_chunk_boundaries():
+    import random
+
+    rng = random.Random(0)
+    for pattern, replacement in ((b"{token}", b"secret-value"), (b"aa", b"b"), (b"x", b""), (b"abc", b"abc")):
+        for _i in range(50):
+            body = bytes(rng.choice(b"a{}tokenxbc") for _j in range(rng.randint(0, 200)))
+            sizes = [rng.randint(0, 9) for _j in range(rng.randint(0, 40))]
+            streamed = await _read(utils.replace_body_stream(_chunked(body, sizes), pattern, replacement))
+            assert streamed == body.replace(pattern, replacement)
+
+    assert await _read(utils.replace_body_stream(b"a{token}b", b"{token}", b"1")) == b"a1b"
+
+
+async def test_replace_body_stream_holds_back_only_a_window(monkeypatch):
+    pattern = b"{token}"
+    chunks = []
+
+    async def _body():
+        for _i in range(100):
+            yield b"x" * 1000
+
+    async for chunk in utils.replace_body_stream(_body(), pattern, b"v"):
+        chunks.append(chunk)
+
+    # Every chunk is relayed as soon as it is received, except the bytes that could start an occurrence
+    assert len(chunks) == 101
+    assert len(chunks[0]) == 1000 - (len(pattern) - 1)
+    assert len(chunks[-1]) == len(pattern) - 1
+
+
+async def test_add_body_replacement_headers():
+    request = SimpleNamespace(headers={"Content-Length": "9"}, data=b"a={token}")
+    utils.add_body_replacement(request, b"{token}", b"xyz")
+    assert request.data == b"a=xyz"
+    assert request.headers == {"content-length": "5"}
+
+    async def _body():
+        yield b"a={token}"
+
+    same_length = SimpleNamespace(headers={"Content-Length": "9"}, data=_body())
+    utils.add_body_replacement(same_length, b"{token}", b"1234567")
+    assert same_length.headers == {"Content-Length": "9"}
+    assert await _read(same_length.data) == b"a=1234567"
+
+    other_length = SimpleNamespace(headers={"Content-Length": "9", "content-length": "9"}, data=_body())
+    utils.add_body_replacement(other_length, b"{token}", b"1")
+    assert other_length.headers == {}
+    assert await _read(other_length.data) == b"a=1"
+
+    untouched = SimpleNamespace(headers={}, data=b"abc")
+    utils.add_body_replacement(untouched, b"", b"x")
+    assert untouched.data == b"abc"
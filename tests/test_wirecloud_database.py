@@ -39,6 +39,113 @@ def test_collection_and_database_wrappers():
     assert isinstance(col_item, database.CollectionWrapper)
 
 
+async def test_write_methods_start_the_transaction_lazily():
+    calls = []
+
+    class _Collection:
+        def find_one(self, query, session=None):
+            calls.append(("find_one", session))
+            return "doc"
+
+        async def update_one(self, query, update, session=None):
+            calls.append(("update_one", session))
+            return "updated"
+
+    class _Session:
+        client = {database.DATABASE["NAME"]: {"col": _Collection()}}
+        in_transaction = False
+
+        async def start_transaction(self):
+            calls.append(("start_transaction", None))
+            self.in_transaction = True
+
+    session = _Session()
+    pym = database.PyMongoSession(session, use_transactions=True)
+    db = pym.client
+    assert isinstance(db, database.DatabaseWrapper)
+    assert pym.client is db
+    assert db["col"] is db["col"]
+
+    assert db["col"].find_one({}) == "doc"
+    assert calls == [("find_one", session)]
+    assert db["col"].find_one is db["col"].find_one
+
+    assert await db["col"].update_one({}, {}) == "updated"
+    assert await db["col"].update_one({}, {}) == "updated"
+    assert calls[1:] == [("start_transaction", None), ("update_one", session), ("update_one", session)]
+    assert pym.in_transaction is True
+
+
+async def test_on_commit_callbacks_run_after_the_transaction_is_committed():
+    calls = []
+
+    class _Session:
+        in_transaction = False
+
+        async def start_transaction(self):
+            self.in_transaction = True
+
+        async def commit_transaction(self):
+            calls.append("commit")
+            self.in_transaction = False
+
+    pym = database.PyMongoSession(_Session(), use_transactions=True)
+    database.on_commit(pym, lambda: calls.append("no transaction"))
+    assert calls == ["no transaction"]
+
+    await pym.start_transaction()
+    database.on_commit(pym, lambda: calls.append("first"))
+    database.on_commit(pym, lambda: calls.append("second"))
+    assert calls == ["no transaction"]
+
+    await database.commit(pym)
+    assert calls == ["no transaction", "commit", "first", "second"]
+    await database.commit(pym)
+    assert calls == ["no transaction", "commit", "first", "second"]
+
+
+async def test_get_read_session(monkeypatch):
+    read_db = SimpleNamespace(name="read")
+    monkeypatch.setattr(database, "_read_database", read_db)
+
+    gen = database.get_read_session()
+    session = await gen.__anext__()
+    assert session.client is read_db
+    assert session.in_transaction is False
+    await session.start_transaction()
+    await database.commit(session)
+    with pytest.raises(AttributeError):
+        session.end_session
+    with pytest.raises(StopAsyncIteration):
+        await gen.__anext__()
+
+    assert database.READ_PREFERENCES["secondaryPreferred"].mongos_mode == "secondaryPreferred"
+
+
+def test_get_read_database(monkeypatch):
+    monkeypatch.setattr(database, "_read_database", None)
+    monkeypatch.setitem(database.DATABASE, "READ_PREFERENCE", "invalid")
+    with pytest.raises(ValueError, match="DATABASE.READ_PREFERENCE must be one of"):
+        database.get_read_database()
+
+    calls = []
+
+    def _get_database(name, **kwargs):
+        calls.append((name, kwargs))
+        return SimpleNamespace(name=name)
+
+    monkeypatch.setattr(database, "client", SimpleNamespace(get_database=_get_database))
+    monkeypatch.setitem(database.DATABASE, "READ_PREFERENCE", "secondaryPreferred")
+    monkeypatch.setitem(database.DATABASE, "READ_CONCERN", "majority")
+    read_db = database.get_read_database()
+    assert database.get_read_database() is read_db
+    assert len(calls) == 1
+    name, kwargs = calls[0]
+    assert name == database.DATABASE["NAME"]
+    assert kwargs["read_preference"].mongos_mode == "secondaryPreferred"
+    assert kwargs["read_concern"].level == "majority"
+
+
 def test_pymongo_session_and_pyobjectid(monkeypatch):
     fake_session = SimpleNamespace(
         client={database.DATABASE["NAME"]: SimpleNamespace()},
@@ -169,11 +276,19 @@ async def test_transactions_support_and_session_management(monkeypatch):
     async def _true():
         return True
 
+    # Transactions are only started by the first write
+    gen = database.get_session()
+    sess = await gen.__anext__()
+    with pytest.raises(StopAsyncIteration):
+        await gen.__anext__()
+    assert committed == {"start_tx": 0, "commit": 0, "abort": 0}
+
     gen = database.get_session()
     sess = await gen.__anext__()
+    await sess.start_transaction()
     with pytest.raises(StopAsyncIteration):
         await gen.__anext__()
-    assert committed["start_tx"] >= 1
+    assert committed["start_tx"] == 1
     assert committed["commit"] == 1
 
     async def _false():
@@ -205,7 +320,8 @@ async def test_transactions_support_and_session_management(monkeypatch):
     monkeypatch.setattr(database, "PyMongoSession", _ErrorPySession)
     aborts_before = called["abort"]
     gen3 = database.get_session()
-    _ = await gen3.__anext__()
+    sess3 = await gen3.__anext__()
+    await sess3.start_transaction()
     with pytest.raises(RuntimeError):
         await gen3.__anext__()
     assert called["abort"] > aborts_before
@@ -263,3 +379,70 @@ async def test_commit_and_start_transaction_error_paths(monkeypatch):
 
     with pytest.raises(OperationFailure):
         await failing_other.start_transaction()
+
+
+async def test_sync_indexes_creates_updates_and_drops():
+    from pymongo import ASCENDING, IndexModel
+
+    collection = database.database["test_sync_indexes"]
+    await collection.create_index([("manual", ASCENDING)], name="manual_index")
+    await collection.create_index([("old", ASCENDING)], name="wirecloud_old")
+    await collection.create_index([("changed", ASCENDING)], name="wirecloud_changed")
+
+    indexes = {
+        "test_sync_indexes": (
+            IndexModel([("a", ASCENDING), ("b", ASCENDING)], name="wirecloud_a_b"),
+            IndexModel([("changed", ASCENDING)], name="wirecloud_changed", expireAfterSeconds=0),
+        ),
+    }
+
+    result = await database.sync_indexes(indexes)
+    assert sorted(result["created"]) == ["test_sync_indexes.wirecloud_a_b", "test_sync_indexes.wirecloud_changed"]
+    assert sorted(result["dropped"]) == ["test_sync_indexes.wirecloud_changed", "test_sync_indexes.wirecloud_old"]
+
+    existing = {index["name"]: index for index in await collection.list_indexes().to_list()}
+    assert set(existing) == {"_id_", "manual_index", "wirecloud_a_b", "wirecloud_changed"}
+    assert existing["wirecloud_changed"]["expireAfterSeconds"] == 0
+
+    # Already in sync
+    assert await database.sync_indexes(indexes) == {"created": [], "dropped": []}
+
+    # Indexes no longer declared are kept if drop is False
+    result = await database.sync_indexes({"test_sync_indexes": indexes["test_sync_indexes"][:1]}, drop=False)
+    assert result == {"created": [], "dropped": []}
+    result = await database.sync_indexes({"test_sync_indexes": indexes["test_sync_indexes"][:1]})
+    assert result == {"created": [], "dropped": ["test_sync_indexes.wirecloud_changed"]}
+
+
+async def test_sync_indexes_rejects_unmanaged_names():
+    from pymongo import IndexModel
+
+    with pytest.raises(ValueError, match="must start with 'wirecloud_'"):
+        await database.sync_indexes({"test_sync_indexes_names": (IndexModel([("a", 1)], name="a_1"),)})
+
+
+async def test_drop_index_ignores_missing_indexes():
+    class _Collection:
+        def __init__(self, code):
+            self.code = code
+
+        async def drop_index(self, _name):
+            raise OperationFailure("error", code=self.code)
+
+    await database._drop_index(_Collection(27), "wirecloud_x")
+
+    with pytest.raises(OperationFailure):
+        await database._drop_index(_Collection(13), "wirecloud_x")
+
+
+def test_declared_indexes_are_managed():
+    from wirecloud.platform.plugins import get_database_indexes
+
+    indexes = get_database_indexes()
+    assert {"users", "groups", "tokens", "catalogue_resources", "workspaces", "markets"} <= set(indexes)
+    for collection_indexes in indexes.values():
+        for index in collection_indexes:
+            assert index.document["name"].startswith(database.INDEX_NAME_PREFIX)
+
+    ttl = [index.document for index in indexes["tokens"] if "expireAfterSeconds" in index.document]
+    assert ttl == [{"key": {"expiration": 1}, "name": "wirecloud_expiration_ttl", "expireAfterSeconds": 0}]
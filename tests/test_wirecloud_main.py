@@ -19,13 +19,42 @@ async def test_wirecloud_main_lifespan_calls_validate_and_close(monkeypatch):
     monkeypatch.setattr(main, "validate_settings", _validate)
     monkeypatch.setattr(main, "close", _close)
 
+    async def _sync_indexes(indexes):
+        calls["sync"] = indexes
+
+    monkeypatch.setattr(main, "sync_indexes", _sync_indexes)
+    monkeypatch.setattr(main, "get_database_indexes", lambda: {"users": ()})
+
     async with main.lifespan(main.app):
+        assert calls["sync"] == {"users": ()}
         assert calls["validate"] == 1
         assert calls["close"] == 0
 
     assert calls["close"] == 1
 
 
+async def test_wirecloud_main_lifespan_index_sync_errors_are_logged(monkeypatch):
+    async def _noop(*_args, **_kwargs):
+        return None
+
+    async def _sync_indexes(_indexes):
+        raise RuntimeError("mongodb is down")
+
+    logged = []
+    monkeypatch.setattr(main, "validate_settings", _noop)
+    monkeypatch.setattr(main, "close", _noop)
+    monkeypatch.setattr(main, "sync_indexes", _sync_indexes)
+    monkeypatch.setattr(main.logger, "exception", lambda msg, *_args: logged.append(msg))
+
+    async with main.lifespan(main.app):
+        assert logged == ["Could not synchronize the database indexes"]
+
+    monkeypatch.setitem(main.DATABASE, "SYNC_INDEXES", False)
+    logged.clear()
+    async with main.lifespan(main.app):
+        assert logged == []
+
+
 def test_wirecloud_main_custom_openapi(monkeypatch):
     calls = {"openapi": 0}
     main.app.openapi_schema = None
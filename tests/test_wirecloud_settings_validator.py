@@ -57,6 +57,9 @@ def test_validate_and_set_defaults_happy_path_and_warnings(monkeypatch, tmp_path
     settings_validator._validate_and_set_defaults()
     assert settings_validator.settings.CACHE_DIR.endswith("cache")
     assert settings_validator.settings.DATABASE["USE_TRANSACTIONS"] is True
+    assert settings_validator.settings.DATABASE["SYNC_INDEXES"] is True
+    assert settings_validator.settings.DATABASE["READ_PREFERENCE"] == "primary"
+    assert settings_validator.settings.DATABASE["READ_CONCERN"] is None
 
 
 def test_validate_and_set_defaults_optional_defaults_and_valid_oidc(monkeypatch, tmp_path):
@@ -96,6 +99,9 @@ def test_validate_and_set_defaults_optional_defaults_and_valid_oidc(monkeypatch,
         (lambda v: v["DATABASE"].pop("DRIVER"), "DATABASE.DRIVER is required"),
         (lambda v: v["DATABASE"].update({"DRIVER": ""}), "DATABASE.DRIVER must not be empty"),
         (lambda v: v["DATABASE"].update({"USE_TRANSACTIONS": "x"}), "DATABASE.USE_TRANSACTIONS must be a boolean"),
+        (lambda v: v["DATABASE"].update({"SYNC_INDEXES": "x"}), "DATABASE.SYNC_INDEXES must be a boolean"),
+        (lambda v: v["DATABASE"].update({"READ_PREFERENCE": "x"}), "DATABASE.READ_PREFERENCE must be one of"),
+        (lambda v: v["DATABASE"].update({"READ_CONCERN": "x"}), "DATABASE.READ_CONCERN must be None or one of"),
         (lambda v: v["DATABASE"].update({"DRIVER": "invalid"}), "DATABASE.DRIVER must be one of"),
         (lambda v: v.update({"ELASTICSEARCH": None}), "ELASTICSEARCH configuration is required"),
         (lambda v: v.update({"ELASTICSEARCH": "x"}), "ELASTICSEARCH must be a dictionary"),
@@ -57,13 +57,10 @@ def test_generate_translations(monkeypatch, tmp_path):
 
 
 def test_find_request_language_and_gettext_paths(monkeypatch, tmp_path):
-    req = _request_with_lang("es")
-    fake_frame_a = SimpleNamespace(frame=SimpleNamespace(f_locals={"x": 1}))
-    fake_frame_b = SimpleNamespace(frame=SimpleNamespace(f_locals={"request": req}))
-    monkeypatch.setattr(translation.inspect, "stack", lambda: [fake_frame_a, fake_frame_b])
-    assert translation.find_request_language() == "es"
+    def _handler(request):
+        return translation.find_request_language()
 
-    monkeypatch.setattr(translation.inspect, "stack", lambda: [])
+    assert _handler(_request_with_lang("es")) == "es"
     assert translation.find_request_language() is None
 
     with pytest.raises(ValueError, match="request language"):
@@ -73,31 +70,73 @@ def test_find_request_language_and_gettext_paths(monkeypatch, tmp_path):
     assert translation.gettext("hello", lang="en-GB", translation=None) == "hello"
 
     monkeypatch.setattr(translation.settings, "INSTALLED_APPS", ["wirecloud.commons"], raising=False)
-    caller_frame = SimpleNamespace(frame=SimpleNamespace(f_globals={"__name__": "other.module"}))
-    monkeypatch.setattr(translation.inspect, "stack", lambda: [None, caller_frame])
     with pytest.raises(ValueError, match="plugin name"):
-        translation.gettext("hello", lang="es", translation=None)
+        translation._gettext("hello", "es", None, "other.module")
 
-    caller_frame_ok = SimpleNamespace(frame=SimpleNamespace(f_globals={"__name__": "wirecloud.commons.foo"}))
-    monkeypatch.setattr(translation.inspect, "stack", lambda: [None, caller_frame_ok])
     monkeypatch.setattr(translation.os.path, "dirname", lambda *_args, **_kwargs: str(tmp_path))
     monkeypatch.setattr(translation.os.path, "exists", lambda *_args, **_kwargs: False)
     with pytest.raises(ValueError, match="Could not find the locale directory"):
-        translation.gettext("hello", lang="es", translation=None)
+        translation._gettext("hello", "es", None, "wirecloud.commons.foo")
 
     monkeypatch.setattr(translation.os.path, "exists", lambda *_args, **_kwargs: True)
     monkeypatch.setattr(translation.os.path, "isdir", lambda *_args, **_kwargs: True)
     monkeypatch.setattr(translation.logger, "warning", lambda *_args, **_kwargs: None)
-    translation.translations = {}
-    assert translation.gettext("hello", lang="es", translation=None) == "hello"
+    monkeypatch.setattr(translation, "translations", {})
+    assert translation._gettext("hello", "es", None, "wirecloud.commons.foo") == "hello"
 
-    translation.translations = {("wirecloud.commons", "es"): SimpleNamespace(gettext=lambda text: f"cached:{text}")}
-    assert translation.gettext("hello", lang="es", translation=None) == "cached:hello"
+    monkeypatch.setattr(translation, "translations", {("wirecloud.commons", "es"): SimpleNamespace(gettext=lambda text: f"cached:{text}")})
+    assert translation._gettext("hello", "es", None, "wirecloud.commons.foo") == "cached:hello"
 
     assert translation.gettext("hello", lang="es", translation=SimpleNamespace(gettext=lambda text: f"tr:{text}")) == "tr:hello"
 
 
+def test_gettext_memoizes_plugins_and_translations(monkeypatch):
+    calls = []
+
+    def _gettext(text):
+        calls.append(text)
+        return f"es:{text}"
+
+    monkeypatch.setattr(translation.settings, "INSTALLED_APPS", ["wirecloud.commons"], raising=False)
+    monkeypatch.setattr(translation.os.path, "exists", lambda *_args, **_kwargs: True)
+    monkeypatch.setattr(translation.os.path, "isdir", lambda *_args, **_kwargs: True)
+    monkeypatch.setattr(translation, "translations", {("wirecloud.commons", "es"): SimpleNamespace(gettext=_gettext)})
+
+    assert translation._gettext("hello", "es", None, "wirecloud.commons.foo") == "es:hello"
+    assert translation._module_plugins == {"wirecloud.commons.foo": "wirecloud.commons"}
+
+    # Neither the plugin nor the translation are looked up again
+    monkeypatch.setattr(translation.os.path, "exists", lambda *_args, **_kwargs: False)
+    assert translation._gettext("hello", "es", None, "wirecloud.commons.foo") == "es:hello"
+    assert calls == ["hello"]
+
+    translation.clear_translation_caches()
+    assert translation._module_plugins == {}
+
+
+def test_gettext_uses_caller_module(monkeypatch):
+    modules = []
+    monkeypatch.setattr(translation, "_gettext", lambda text, lang, tr, module_name: modules.append(module_name) or text)
+
+    translation.gettext("hello", lang="es")
+    lazy = translation.gettext_lazy("hello")
+    assert lazy(lang="es") == "hello"
+    assert modules == [__name__, __name__]
+
+
 def test_gettext_lazy(monkeypatch):
-    monkeypatch.setattr(translation, "gettext", lambda text, lang=None, translation=None: f"{lang}:{text}")
+    monkeypatch.setattr(translation, "_gettext", lambda text, lang, tr, module_name: f"{lang}:{text}")
     lazy = translation.gettext_lazy("hello")
     assert lazy(lang="es") == "es:hello"
+
+
+def test_override_language():
+    assert translation.find_request_language() is None
+
+    with translation.override_language("es"):
+        assert translation.find_request_language() == "es"
+        with translation.override_language("fr"):
+            assert translation.find_request_language() == "fr"
+        assert translation.find_request_language() == "es"
+
+    assert translation.find_request_language() is None